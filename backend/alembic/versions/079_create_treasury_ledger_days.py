@@ -0,0 +1,56 @@
+"""create treasury_ledger_days table
+
+Revision ID: 079_create_treasury_ledger_days
+Revises: 078_merge_all_migration_heads
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '079_create_treasury_ledger_days'
+down_revision: Union[str, None] = '078_merge_all_migration_heads'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create treasury_ledger_days table and backfill it from transactions"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    # Check if table already exists
+    if 'treasury_ledger_days' in inspector.get_table_names():
+        return
+
+    op.create_table(
+        'treasury_ledger_days',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('entries', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('exits', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('running_balance', sa.Numeric(14, 2), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('user_id', 'day', name='uq_treasury_ledger_days_user_day'),
+    )
+    op.create_index('idx_treasury_ledger_days_user_day', 'treasury_ledger_days', ['user_id', 'day'])
+
+    # Backfill from existing transactions (cancelled transactions are excluded)
+    if 'transactions' in inspector.get_table_names():
+        # Days in UTC, as the flush listener buckets them
+        from app.models.treasury_ledger import ledger_backfill_sql
+
+        bind.execute(ledger_backfill_sql(bind.dialect.name))
+
+
+def downgrade() -> None:
+    """Drop treasury_ledger_days table"""
+    op.drop_index('idx_treasury_ledger_days_user_day', table_name='treasury_ledger_days')
+    op.drop_table('treasury_ledger_days')
@@ -0,0 +1,52 @@
+"""add trigram index on companies.name
+
+Revision ID: 080_add_companies_name_trgm_index
+Revises: 079_create_treasury_ledger_days
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '080_add_companies_name_trgm_index'
+down_revision: Union[str, None] = '079_create_treasury_ledger_days'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Enable pg_trgm when allowed and index lower(companies.name) for fuzzy matching"""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # CREATE EXTENSION needs elevated privileges on managed databases:
+    # only attempt it when the extension is available and not yet installed
+    available = bind.execute(sa.text(
+        "SELECT installed_version FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).first()
+    if available is None:
+        return
+    if available[0] is None:
+        can_create = bind.execute(sa.text(
+            "SELECT rolsuper OR rolcreatedb FROM pg_roles WHERE rolname = current_user"
+        )).scalar()
+        if not can_create:
+            return
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_companies_name_trgm "
+        "ON companies USING gin (lower(name) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Drop the trigram index (the extension is left installed)"""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute("DROP INDEX IF EXISTS idx_companies_name_trgm")
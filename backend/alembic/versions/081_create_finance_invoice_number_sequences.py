@@ -0,0 +1,54 @@
+"""create finance_invoice_number_sequences table
+
+Revision ID: 081_create_finance_invoice_number_sequences
+Revises: 080_add_companies_name_trgm_index
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '081_create_finance_invoice_number_sequences'
+down_revision: Union[str, None] = '080_add_companies_name_trgm_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the per-year invoice number counters and seed them from existing invoices"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+
+    # Check if table already exists
+    if 'finance_invoice_number_sequences' in inspector.get_table_names():
+        return
+
+    op.create_table(
+        'finance_invoice_number_sequences',
+        sa.Column('prefix', sa.String(length=20), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('last_value', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('prefix', 'year'),
+    )
+
+    # Start each counter after the highest number already issued (compared
+    # numerically: INV-2026-1000 comes after INV-2026-999)
+    if bind.dialect.name == 'postgresql' and 'finance_invoices' in inspector.get_table_names():
+        op.execute(r"""
+            INSERT INTO finance_invoice_number_sequences (prefix, year, last_value)
+            SELECT split_part(invoice_number, '-', 1),
+                   CAST(split_part(invoice_number, '-', 2) AS INTEGER),
+                   MAX(CAST(split_part(invoice_number, '-', 3) AS INTEGER))
+            FROM finance_invoices
+            WHERE invoice_number ~ '^[A-Z]+-\d{4}-\d{1,9}$'
+            GROUP BY 1, 2
+        """)
+
+
+def downgrade() -> None:
+    """Drop finance_invoice_number_sequences table"""
+    op.drop_table('finance_invoice_number_sequences')
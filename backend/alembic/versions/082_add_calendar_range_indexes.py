@@ -0,0 +1,49 @@
+"""add calendar range indexes
+
+Revision ID: 082_add_calendar_range_indexes
+Revises: 081_create_finance_invoice_number_sequences
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '082_add_calendar_range_indexes'
+down_revision: Union[str, None] = '081_create_finance_invoice_number_sequences'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same expressions as app.services.calendar_service.date_span_overlaps
+SPAN_INDEXES = {
+    'idx_calendar_events_span': ('calendar_events', "daterange(date, GREATEST(end_date, date), '[]')"),
+    'idx_vacation_requests_span': ('vacation_requests', "daterange(start_date, GREATEST(end_date, start_date), '[]')"),
+}
+
+
+def upgrade() -> None:
+    """Index event and vacation day spans (GiST) and task due dates per assignee"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+
+    if bind.dialect.name == 'postgresql':
+        for index_name, (table, expression) in SPAN_INDEXES.items():
+            if table in tables:
+                op.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gist (({expression}))")
+
+    if 'project_tasks' in tables:
+        existing = {index['name'] for index in inspector.get_indexes('project_tasks')}
+        if 'idx_project_tasks_assignee_due_date' not in existing:
+            op.create_index('idx_project_tasks_assignee_due_date', 'project_tasks', ['assignee_id', 'due_date'])
+
+
+def downgrade() -> None:
+    """Drop the calendar range indexes"""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for index_name in SPAN_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {index_name}")
+    op.drop_index('idx_project_tasks_assignee_due_date', table_name='project_tasks')
@@ -0,0 +1,76 @@
+"""add project task board columns
+
+Revision ID: 083_add_project_task_board_columns
+Revises: 082_add_calendar_range_indexes
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '083_add_project_task_board_columns'
+down_revision: Union[str, None] = '082_add_calendar_range_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Current board order, as app.services.task_board_service.initial_ranks numbers it
+BOARD_ORDER = '"order", created_at DESC, id DESC'
+
+
+def upgrade() -> None:
+    """Add rank and assignee copies to project_tasks and fill them from the current data"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'project_tasks' not in inspector.get_table_names():
+        return
+
+    columns = {column['name'] for column in inspector.get_columns('project_tasks')}
+    if 'assignee_name' not in columns:
+        op.add_column('project_tasks', sa.Column('assignee_name', sa.String(length=255), nullable=True))
+    if 'assignee_email' not in columns:
+        op.add_column('project_tasks', sa.Column('assignee_email', sa.String(length=255), nullable=True))
+    if 'rank' not in columns:
+        op.add_column('project_tasks', sa.Column('rank', sa.String(length=64), nullable=True))
+
+    op.execute("""
+        UPDATE project_tasks SET
+            assignee_name = NULLIF(TRIM(
+                COALESCE((SELECT first_name FROM users WHERE users.id = project_tasks.assignee_id), '') || ' ' ||
+                COALESCE((SELECT last_name FROM users WHERE users.id = project_tasks.assignee_id), '')
+            ), ''),
+            assignee_email = (SELECT email FROM users WHERE users.id = project_tasks.assignee_id)
+        WHERE assignee_id IS NOT NULL
+    """)
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(f"""
+            UPDATE project_tasks SET rank = ordered.rank
+            FROM (
+                SELECT id, lpad((row_number() OVER (ORDER BY {BOARD_ORDER}))::text, 10, '0') || 'i' AS rank
+                FROM project_tasks
+            ) AS ordered
+            WHERE project_tasks.id = ordered.id
+        """)
+    else:
+        ids = [row[0] for row in bind.execute(sa.text(f"SELECT id FROM project_tasks ORDER BY {BOARD_ORDER}"))]
+        for position, task_id in enumerate(ids, start=1):
+            bind.execute(
+                sa.text("UPDATE project_tasks SET rank = :rank WHERE id = :id"),
+                {"rank": f"{position:010d}i", "id": task_id},
+            )
+
+    existing = {index['name'] for index in inspector.get_indexes('project_tasks')}
+    if 'idx_project_tasks_rank' not in existing:
+        op.create_index('idx_project_tasks_rank', 'project_tasks', ['rank'])
+
+
+def downgrade() -> None:
+    """Drop the task board columns"""
+    op.drop_index('idx_project_tasks_rank', table_name='project_tasks')
+    op.drop_column('project_tasks', 'rank')
+    op.drop_column('project_tasks', 'assignee_email')
+    op.drop_column('project_tasks', 'assignee_name')
@@ -0,0 +1,107 @@
+"""create search documents index
+
+Revision ID: 084_create_search_documents
+Revises: 083_add_project_task_board_columns
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '084_create_search_documents'
+down_revision: Union[str, None] = '083_add_project_task_board_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Title weighted A, whole text B, in both configs searched by app.services.search_index_service
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('french'::regconfig, search_title), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, search_title), 'A') || "
+    "setweight(to_tsvector('french'::regconfig, search_text), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, search_text), 'B')"
+)
+
+
+def _trgm_installed(bind) -> bool:
+    """Install pg_trgm when allowed (same rules as migration 080)"""
+    available = bind.execute(sa.text(
+        "SELECT installed_version FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).first()
+    if available is None:
+        return False
+    if available[0] is None:
+        can_create = bind.execute(sa.text(
+            "SELECT rolsuper OR rolcreatedb FROM pg_roles WHERE rolname = current_user"
+        )).scalar()
+        if not can_create:
+            return False
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    return True
+
+
+def upgrade() -> None:
+    """Create search_documents, its PostgreSQL full-text/trigram indexes, and index existing records"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    tables = inspector.get_table_names()
+
+    if 'search_documents' not in tables:
+        op.create_table(
+            'search_documents',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entity_type', sa.String(length=50), nullable=False),
+            sa.Column('entity_id', sa.String(length=64), nullable=False),
+            sa.Column('team_id', sa.Integer(), nullable=True),
+            sa.Column('title', sa.String(length=255), nullable=False),
+            sa.Column('subtitle', sa.String(length=500), nullable=True),
+            sa.Column('search_title', sa.String(length=255), nullable=False),
+            sa.Column('search_text', sa.Text(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+        )
+        op.create_index('ix_search_documents_id', 'search_documents', ['id'])
+        op.create_index('idx_search_documents_team_id', 'search_documents', ['team_id'])
+
+    if bind.dialect.name == 'postgresql':
+        columns = {column['name'] for column in inspect(bind).get_columns('search_documents')}
+        if 'search_vector' not in columns:
+            op.execute(
+                f"ALTER TABLE search_documents ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+            )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_documents_vector "
+            "ON search_documents USING gin (search_vector)"
+        )
+        if _trgm_installed(bind):
+            op.execute(
+                "CREATE INDEX IF NOT EXISTS idx_search_documents_title_trgm "
+                "ON search_documents USING gin (search_title gin_trgm_ops)"
+            )
+            op.execute(
+                "CREATE INDEX IF NOT EXISTS idx_search_documents_text_trgm "
+                "ON search_documents USING gin (search_text gin_trgm_ops)"
+            )
+
+    # Existing records (later writes are indexed by the flush listener)
+    from app.models.search_document import SEARCH_SPECS, apply_search_documents, search_document_row
+
+    for spec in SEARCH_SPECS.values():
+        table = spec.model.__table__
+        if table.name not in tables:
+            continue
+        rows = bind.execute(sa.select(*table.columns)).all()
+        for start in range(0, len(rows), 1000):
+            apply_search_documents(bind, [search_document_row(spec, row) for row in rows[start:start + 1000]])
+
+
+def downgrade() -> None:
+    """Drop the search index"""
+    bind = op.get_bind()
+    if 'search_documents' in inspect(bind).get_table_names():
+        op.drop_table('search_documents')
@@ -0,0 +1,30 @@
+"""remove invoices from the search index
+
+Revision ID: 085_remove_invoices_from_search_index
+Revises: 084_create_search_documents
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '085_remove_invoices_from_search_index'
+down_revision: Union[str, None] = '084_create_search_documents'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Invoices are owned through user_id, which the tenant-scoped index cannot filter on"""
+    bind = op.get_bind()
+    if 'search_documents' in inspect(bind).get_table_names():
+        op.execute(sa.text("DELETE FROM search_documents WHERE entity_type = 'invoices'"))
+
+
+def downgrade() -> None:
+    """Nothing to restore: invoices are no longer maintained in the index"""
+    pass
@@ -0,0 +1,38 @@
+"""create import checkpoints
+
+Revision ID: 086_create_import_checkpoints
+Revises: 085_remove_invoices_from_search_index
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '086_create_import_checkpoints'
+down_revision: Union[str, None] = '085_remove_invoices_from_search_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Bulk import progress, committed with each chunk (replaces the cache checkpoint)"""
+    bind = op.get_bind()
+    if 'import_checkpoints' not in inspect(bind).get_table_names():
+        op.create_table(
+            'import_checkpoints',
+            sa.Column('key', sa.String(length=255), nullable=False),
+            sa.Column('offset', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('key'),
+        )
+
+
+def downgrade() -> None:
+    """Drop import checkpoints"""
+    bind = op.get_bind()
+    if 'import_checkpoints' in inspect(bind).get_table_names():
+        op.drop_table('import_checkpoints')
@@ -0,0 +1,41 @@
+"""rebuild treasury ledger with UTC days
+
+Revision ID: 087_rebuild_treasury_ledger_utc_days
+Revises: 086_create_import_checkpoints
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '087_rebuild_treasury_ledger_utc_days'
+down_revision: Union[str, None] = '086_create_import_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Recompute treasury_ledger_days: migration 079 bucketed days in the session
+    time zone while the flush listener uses UTC
+    """
+    bind = op.get_bind()
+    tables = inspect(bind).get_table_names()
+    if 'treasury_ledger_days' not in tables or 'transactions' not in tables:
+        return
+
+    from app.models.treasury_ledger import ledger_backfill_sql
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("LOCK TABLE treasury_ledger_days IN SHARE ROW EXCLUSIVE MODE")
+    op.execute("DELETE FROM treasury_ledger_days")
+    bind.execute(ledger_backfill_sql(bind.dialect.name))
+
+
+def downgrade() -> None:
+    """Nothing to undo: the ledger content is derived from transactions"""
+    pass
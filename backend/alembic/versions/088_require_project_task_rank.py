@@ -0,0 +1,53 @@
+"""require project task rank
+
+Revision ID: 088_require_project_task_rank
+Revises: 087_rebuild_treasury_ledger_utc_days
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '088_require_project_task_rank'
+down_revision: Union[str, None] = '087_rebuild_treasury_ledger_utc_days'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Rank the tasks created without one (at the end of the board, by id) and make rank NOT NULL"""
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'project_tasks' not in inspector.get_table_names():
+        return
+
+    # Appending fixed-width numbers to the last rank keeps them after it and in id order
+    last_rank = bind.execute(sa.text("SELECT MAX(rank) FROM project_tasks")).scalar() or ''
+    if bind.dialect.name == 'postgresql':
+        op.execute(sa.text("""
+            UPDATE project_tasks SET rank = :last_rank || ordered.suffix
+            FROM (
+                SELECT id, lpad((row_number() OVER (ORDER BY id))::text, 10, '0') || 'i' AS suffix
+                FROM project_tasks
+                WHERE rank IS NULL
+            ) AS ordered
+            WHERE project_tasks.id = ordered.id
+        """).bindparams(last_rank=last_rank))
+    else:
+        ids = [row[0] for row in bind.execute(sa.text("SELECT id FROM project_tasks WHERE rank IS NULL ORDER BY id"))]
+        for position, task_id in enumerate(ids, start=1):
+            bind.execute(
+                sa.text("UPDATE project_tasks SET rank = :rank WHERE id = :id"),
+                {"rank": f"{last_rank}{position:010d}i", "id": task_id},
+            )
+
+    op.alter_column('project_tasks', 'rank', existing_type=sa.String(length=64), nullable=False)
+
+
+def downgrade() -> None:
+    """Allow tasks without a rank again"""
+    op.alter_column('project_tasks', 'rank', existing_type=sa.String(length=64), nullable=True)
@@ -0,0 +1,60 @@
+"""add companies.name_key
+
+Revision ID: 089_add_companies_name_key
+Revises: 088_require_project_task_rank
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+# revision identifiers, used by Alembic.
+revision: str = '089_add_companies_name_key'
+down_revision: Union[str, None] = '088_require_project_task_rank'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the normalized company name, fill it and index it (trigrams when pg_trgm is installed)"""
+    from app.services.entity_matcher import name_key
+
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if 'companies' not in inspector.get_table_names():
+        return
+
+    columns = {column['name'] for column in inspector.get_columns('companies')}
+    if 'name_key' not in columns:
+        op.add_column('companies', sa.Column('name_key', sa.String(length=255), nullable=True))
+
+    # Same normalization as the application (accents, punctuation, legal forms)
+    rows = [
+        {"id": company_id, "name_key": name_key(name)}
+        for company_id, name in bind.execute(sa.text("SELECT id, name FROM companies"))
+    ]
+    if rows:
+        bind.execute(sa.text("UPDATE companies SET name_key = :name_key WHERE id = :id"), rows)
+
+    existing = {index['name'] for index in inspector.get_indexes('companies')}
+    if 'ix_companies_name_key' not in existing:
+        op.create_index('ix_companies_name_key', 'companies', ['name_key'])
+
+    if bind.dialect.name == 'postgresql':
+        trgm_installed = bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        if trgm_installed:
+            op.execute(
+                "CREATE INDEX IF NOT EXISTS idx_companies_name_key_trgm "
+                "ON companies USING gin (name_key gin_trgm_ops)"
+            )
+
+
+def downgrade() -> None:
+    """Drop the normalized company name"""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_companies_name_key_trgm")
+    op.drop_index('ix_companies_name_key', table_name='companies')
+    op.drop_column('companies', 'name_key')
@@ -1,7 +1,12 @@
 """AI endpoints using OpenAI and Anthropic (Claude)."""
 
-from typing import Optional, List, Literal
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Literal, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -24,7 +29,7 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     """Chat completion request schema."""
     messages: List[ChatMessage] = Field(..., min_items=1)
-    provider: Optional[Literal["openai", "anthropic", "auto"]] = Field(default="auto", description="AI provider to use")
+    provider: Optional[Literal["openai", "anthropic", "fake", "auto"]] = Field(default="auto", description="AI provider to use")
     model: Optional[str] = None
     temperature: Optional[float] = Field(None, ge=0.0, le=2.0)
     max_tokens: Optional[int] = Field(None, ge=1, le=4000)
@@ -34,7 +39,7 @@ class ChatRequest(BaseModel):
 class SimpleChatRequest(BaseModel):
     """Simple chat request schema."""
     message: str = Field(..., min_length=1)
-    provider: Optional[Literal["openai", "anthropic", "auto"]] = Field(default="auto", description="AI provider to use")
+    provider: Optional[Literal["openai", "anthropic", "fake", "auto"]] = Field(default="auto", description="AI provider to use")
     system_prompt: Optional[str] = None
     model: Optional[str] = None
 
@@ -48,6 +53,175 @@ class ChatResponse(BaseModel):
     finish_reason: str
 
 
+DEFAULT_LEO_PROMPT = "Tu es Leo, l'assistant IA de l'ERP Nukleo. Réponds toujours en français sauf demande contraire. Sois concis mais complet."
+
+ERP_CONTEXT_RULES = """RÈGLES:
+- Utilise UNIQUEMENT les données ci-dessus pour répondre
+- Si tu vois 'RÉSUMÉ: CONTACTS: 200', réponds 'Vous avez 200 contacts'
+- Si tu vois 'CLIENTS: 64', réponds 'Vous avez 64 clients'
+- Si tu vois des détails (noms, emails, etc.), utilise-les pour répondre
+- Ne dis JAMAIS 'je n'ai pas accès' - tu as toujours accès aux données ci-dessus
+- Si le contexte est vide, dis 'J'ai cherché mais je n'ai rien trouvé'
+- LIENS: TOUJOURS utilise le format markdown [texte](url) pour les liens. Exemple: [Voir les opportunités](/fr/dashboard/opportunites) ou [Accéder aux contacts](/fr/dashboard/contacts). Ne donne JAMAIS juste le chemin sans format markdown.
+- CALCULS: Si on te demande un total (argent, montant), CALCULE-le à partir des données fournies. Exemple: si tu vois "Montant total: 250000€" dans le contexte, utilise ce nombre.
+- LISTING: Si on te demande de "nommer", "lister", "donner" des éléments, utilise les données détaillées fournies dans le contexte. Ne dis JAMAIS "je n'ai pas accès" si des données sont présentes."""
+
+NO_ERP_CONTEXT_NOTE = "\n\n⚠️ IMPORTANT: Tu as accès aux données de l'ERP Nukleo (contacts, entreprises, projets, opportunités, employés). J'ai cherché dans la base de données pour cette requête mais n'ai trouvé aucune donnée correspondante. Dis clairement à l'utilisateur: 'J'ai cherché dans vos données ERP mais je n'ai pas trouvé d'informations correspondantes.' Ne dis JAMAIS que tu n'as pas accès aux données."
+
+
+@dataclass
+class LeoChatPlan:
+    """Request parameters completed with the user's Leo settings (None when they could not be loaded)"""
+    system_prompt: Optional[str]
+    provider: str
+    temperature: Optional[float]
+    max_tokens: Optional[int]
+    model: Optional[str]
+    leo_settings: Optional[dict] = None
+
+
+async def _leo_chat_plan(request: ChatRequest, current_user: User, db: AsyncSession) -> LeoChatPlan:
+    """Leo settings applied to the request (system prompt, provider, sampling, model)"""
+    plan = LeoChatPlan(
+        system_prompt=request.system_prompt,
+        provider=request.provider,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        model=request.model,
+    )
+    try:
+        from app.services.leo_settings_service import LeoSettingsService
+        
+        leo_service = LeoSettingsService(db)
+        leo_settings = await leo_service.get_leo_settings(current_user.id)
+        
+        # Use Leo settings if no system_prompt provided or if Leo settings exist
+        if not plan.system_prompt or leo_settings.get("custom_instructions") or leo_settings.get("markdown_content"):
+            plan.system_prompt = await leo_service.build_system_prompt(current_user.id)
+        
+        # Use Leo provider preference if set and request provider is "auto"
+        if plan.provider == "auto" and leo_settings.get("provider_preference") != "auto":
+            plan.provider = leo_settings.get("provider_preference", "auto")
+        
+        # Use Leo temperature if not provided in request
+        if plan.temperature is None:
+            plan.temperature = leo_settings.get("temperature", 0.7)
+        
+        # Use Leo max_tokens if not provided in request
+        if plan.max_tokens is None:
+            plan.max_tokens = leo_settings.get("max_tokens")
+        
+        # Use Leo model preference if not provided in request
+        if plan.model is None:
+            plan.model = leo_settings.get("model_preference")
+        
+        plan.leo_settings = leo_settings
+    except Exception as e:
+        # If Leo settings fail, use defaults
+        logger.debug(f"Could not load Leo settings, using defaults: {e}")
+    return plan
+
+
+async def _leo_erp_context(request: ChatRequest, current_user: User, db: AsyncSession) -> str:
+    """ERP data relevant to the last user message, formatted for the system prompt"""
+    from app.services.leo_context_service import LeoContextService
+    
+    try:
+        context_service = LeoContextService(db)
+        
+        # Get last user message
+        last_user_message = None
+        for msg in reversed(request.messages):
+            if msg.role == "user":
+                last_user_message = msg.content
+                break
+        
+        if not last_user_message:
+            return ""
+        
+        # Analyze query to determine relevant data types
+        data_types = context_service.analyze_query(last_user_message)
+        
+        # Log for debugging
+        logger.debug(f"Leo query analysis for '{last_user_message}': {data_types}")
+        
+        # Get relevant data
+        relevant_data = await context_service.get_relevant_data(
+            current_user.id,
+            data_types,
+            last_user_message
+        )
+        
+        # Log data found
+        data_counts = {k: len(v) for k, v in relevant_data.items()}
+        logger.debug(f"Leo context data found: {data_counts}")
+        if context_service.last_retrieval is not None:
+            logger.debug(f"Leo context retrieval timings: {context_service.last_retrieval.to_dict()}")
+        
+        # Build context string
+        erp_context = await context_service.build_context_string(
+            relevant_data,
+            last_user_message
+        )
+        
+        if erp_context:
+            logger.debug(f"Leo ERP context generated ({len(erp_context)} chars)")
+        return erp_context
+    except Exception as e:
+        logger.warning(f"Could not load ERP context: {e}", exc_info=True)
+        return ""
+
+
+async def _leo_system_prompt(plan: LeoChatPlan, request: ChatRequest, current_user: User, db: AsyncSession) -> str:
+    """System prompt with the ERP context (when enabled in the Leo settings)"""
+    if plan.leo_settings is None:
+        return plan.system_prompt or DEFAULT_LEO_PROMPT
+    
+    system_prompt = plan.system_prompt or ""
+    erp_context = ""
+    if plan.leo_settings.get("enable_erp_context", True):
+        erp_context = await _leo_erp_context(request, current_user, db)
+    
+    # Add ERP context to system prompt if available - SIMPLIFIED FORMAT
+    if erp_context:
+        return system_prompt + f"""\n\n=== DONNÉES ERP ===
+{erp_context}
+=== FIN DONNÉES ===
+
+{ERP_CONTEXT_RULES}"""
+    # Even if no specific context, add instruction that Leo has access to ERP data
+    return system_prompt + NO_ERP_CONTEXT_NOTE
+
+
+async def _prepare_leo_chat(
+    request: ChatRequest,
+    current_user: User,
+    db: AsyncSession,
+) -> Tuple[AIService, LeoChatPlan, str, "asyncio.Task"]:
+    """
+    Provider, settings and system prompt of a Leo chat
+    
+    The provider connection is opened (warm_up task) while the ERP context
+    is being retrieved, so neither waits for the other.
+    
+    Raises:
+        ValueError: Unknown or unconfigured provider
+    """
+    plan = await _leo_chat_plan(request, current_user, db)
+    
+    # Resolve provider
+    provider = AIProvider(plan.provider) if plan.provider != "auto" else AIProvider.AUTO
+    service = AIService(provider=provider)
+    warm_up = asyncio.create_task(service.warm_up())
+    
+    try:
+        system_prompt = await _leo_system_prompt(plan, request, current_user, db)
+    except BaseException:
+        warm_up.cancel()
+        raise
+    return service, plan, system_prompt, warm_up
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_completion(
     request: ChatRequest,
@@ -62,120 +236,17 @@ async def chat_completion(
         )
     
     try:
-        # Try to get Leo settings and build system prompt
-        system_prompt = request.system_prompt
-        provider_preference = request.provider
-        temperature = request.temperature
-        max_tokens = request.max_tokens
-        model = request.model
-        
-        try:
-            from app.services.leo_settings_service import LeoSettingsService
-            from app.services.leo_context_service import LeoContextService
-            
-            leo_service = LeoSettingsService(db)
-            leo_settings = await leo_service.get_leo_settings(current_user.id)
-            
-            # Use Leo settings if no system_prompt provided or if Leo settings exist
-            if not system_prompt or leo_settings.get("custom_instructions") or leo_settings.get("markdown_content"):
-                system_prompt = await leo_service.build_system_prompt(current_user.id)
-            
-            # Use Leo provider preference if set and request provider is "auto"
-            if provider_preference == "auto" and leo_settings.get("provider_preference") != "auto":
-                provider_preference = leo_settings.get("provider_preference", "auto")
-            
-            # Use Leo temperature if not provided in request
-            if temperature is None:
-                temperature = leo_settings.get("temperature", 0.7)
-            
-            # Use Leo max_tokens if not provided in request
-            if max_tokens is None:
-                max_tokens = leo_settings.get("max_tokens")
-            
-            # Use Leo model preference if not provided in request
-            if model is None:
-                model = leo_settings.get("model_preference")
-            
-            # Get ERP context if enabled
-            erp_context = ""
-            if leo_settings.get("enable_erp_context", True):
-                try:
-                    context_service = LeoContextService(db)
-                    
-                    # Get last user message
-                    last_user_message = None
-                    for msg in reversed(request.messages):
-                        if msg.role == "user":
-                            last_user_message = msg.content
-                            break
-                    
-                    if last_user_message:
-                        # Analyze query to determine relevant data types
-                        data_types = context_service.analyze_query(last_user_message)
-                        
-                        # Log for debugging
-                        logger.debug(f"Leo query analysis for '{last_user_message}': {data_types}")
-                        
-                        # Get relevant data
-                        relevant_data = await context_service.get_relevant_data(
-                            current_user.id,
-                            data_types,
-                            last_user_message
-                        )
-                        
-                        # Log data found
-                        data_counts = {k: len(v) for k, v in relevant_data.items()}
-                        logger.debug(f"Leo context data found: {data_counts}")
-                        
-                        # Build context string
-                        erp_context = await context_service.build_context_string(
-                            relevant_data,
-                            last_user_message
-                        )
-                        
-                        if erp_context:
-                            logger.debug(f"Leo ERP context generated ({len(erp_context)} chars)")
-                except Exception as e:
-                    logger.warning(f"Could not load ERP context: {e}", exc_info=True)
-                    erp_context = ""
-            
-            # Add ERP context to system prompt if available - SIMPLIFIED FORMAT
-            if erp_context:
-                system_prompt += f"""\n\n=== DONNÉES ERP ===
-{erp_context}
-=== FIN DONNÉES ===
-
-RÈGLES:
-- Utilise UNIQUEMENT les données ci-dessus pour répondre
-- Si tu vois 'RÉSUMÉ: CONTACTS: 200', réponds 'Vous avez 200 contacts'
-- Si tu vois 'CLIENTS: 64', réponds 'Vous avez 64 clients'
-- Si tu vois des détails (noms, emails, etc.), utilise-les pour répondre
-- Ne dis JAMAIS 'je n'ai pas accès' - tu as toujours accès aux données ci-dessus
-- Si le contexte est vide, dis 'J'ai cherché mais je n'ai rien trouvé'
-- LIENS: TOUJOURS utilise le format markdown [texte](url) pour les liens. Exemple: [Voir les opportunités](/fr/dashboard/opportunites) ou [Accéder aux contacts](/fr/dashboard/contacts). Ne donne JAMAIS juste le chemin sans format markdown.
-- CALCULS: Si on te demande un total (argent, montant), CALCULE-le à partir des données fournies. Exemple: si tu vois "Montant total: 250000€" dans le contexte, utilise ce nombre.
-- LISTING: Si on te demande de "nommer", "lister", "donner" des éléments, utilise les données détaillées fournies dans le contexte. Ne dis JAMAIS "je n'ai pas accès" si des données sont présentes."""
-            else:
-                # Even if no specific context, add instruction that Leo has access to ERP data
-                system_prompt += "\n\n⚠️ IMPORTANT: Tu as accès aux données de l'ERP Nukleo (contacts, entreprises, projets, opportunités, employés). J'ai cherché dans la base de données pour cette requête mais n'ai trouvé aucune donnée correspondante. Dis clairement à l'utilisateur: 'J'ai cherché dans vos données ERP mais je n'ai pas trouvé d'informations correspondantes.' Ne dis JAMAIS que tu n'as pas accès aux données."
-        except Exception as e:
-            # If Leo settings fail, use defaults
-            logger.debug(f"Could not load Leo settings, using defaults: {e}")
-            if not system_prompt:
-                system_prompt = "Tu es Leo, l'assistant IA de l'ERP Nukleo. Réponds toujours en français sauf demande contraire. Sois concis mais complet."
-        
-        # Resolve provider
-        provider = AIProvider(provider_preference) if provider_preference != "auto" else AIProvider.AUTO
-        service = AIService(provider=provider)
+        service, plan, system_prompt, warm_up = await _prepare_leo_chat(request, current_user, db)
+        await warm_up
         
         # Convert Pydantic models to dicts
         messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
         
         response = await service.chat_completion(
             messages=messages,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
+            model=plan.model,
+            temperature=plan.temperature,
+            max_tokens=plan.max_tokens,
             system_prompt=system_prompt,
         )
         
@@ -193,6 +264,82 @@ RÈGLES:
         )
 
 
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_completion_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create a chat completion streamed as Server-Sent Events.
+    
+    Each event is a JSON ``data:`` line: ``{"type": "delta", "content": ...}``
+    as text is generated, then ``{"type": "done", ...}`` with the same fields
+    as POST /ai/chat (usage included), or ``{"type": "error", "detail": ...}``.
+    """
+    if not AIService.is_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No AI provider is configured. Please set OPENAI_API_KEY or ANTHROPIC_API_KEY.",
+        )
+    
+    try:
+        service, plan, system_prompt, warm_up = await _prepare_leo_chat(request, current_user, db)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    
+    # Convert Pydantic models to dicts
+    messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
+    user_id = current_user.id
+    
+    async def events():
+        started = time.perf_counter()
+        first_delta_ms = None
+        try:
+            await warm_up
+            async for event in service.stream_chat_completion(
+                messages=messages,
+                model=plan.model,
+                temperature=plan.temperature,
+                max_tokens=plan.max_tokens,
+                system_prompt=system_prompt,
+            ):
+                if event["type"] == "delta" and first_delta_ms is None:
+                    first_delta_ms = (time.perf_counter() - started) * 1000
+                elif event["type"] == "done":
+                    logger.info(
+                        f"AI usage: user={user_id} provider={event['provider']} model={event['model']} "
+                        f"usage={event['usage']} first_delta_ms={first_delta_ms and round(first_delta_ms)} "
+                        f"total_ms={round((time.perf_counter() - started) * 1000)}"
+                    )
+                yield _sse(event)
+        except asyncio.CancelledError:
+            logger.info(f"AI stream cancelled by the client (user={user_id})")
+            raise
+        except Exception as e:
+            logger.error(f"AI stream error: {e}", exc_info=True)
+            yield _sse({"type": "error", "detail": f"AI service error: {str(e)}"})
+        finally:
+            warm_up.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 @router.post("/chat/simple", response_model=dict)
 async def simple_chat(
     request: SimpleChatRequest,
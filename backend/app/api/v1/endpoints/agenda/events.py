@@ -12,10 +12,16 @@ from sqlalchemy.orm import selectinload
 from datetime import time as dt_time
 
 from app.core.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, is_admin_or_superadmin
 from app.models.calendar_event import CalendarEvent
 from app.models.user import User
-from app.schemas.calendar_event import CalendarEventCreate, CalendarEventUpdate, CalendarEvent as CalendarEventSchema
+from app.schemas.calendar_event import (
+    CalendarEventCreate,
+    CalendarEventUpdate,
+    CalendarEvent as CalendarEventSchema,
+    CalendarItem,
+)
+from app.services.calendar_service import CALENDAR_SOURCES, CalendarQueryService
 from app.core.logging import logger
 
 router = APIRouter(prefix="/agenda/events", tags=["agenda-events"])
@@ -109,37 +115,13 @@ async def list_events(
     Returns:
         List of calendar events
     """
-    query = select(CalendarEvent).where(CalendarEvent.user_id == current_user.id)
-    
-    # Apply filters
-    if start_date:
-        # Event overlaps with the start date (event starts before or during, or ends after start_date)
-        query = query.where(
-            or_(
-                CalendarEvent.date >= start_date,
-                and_(
-                    CalendarEvent.end_date.isnot(None),
-                    CalendarEvent.end_date >= start_date
-                )
-            )
-        )
-    
-    if end_date:
-        # Event overlaps with the end date (event ends after or during, or starts before end_date)
-        query = query.where(
-            or_(
-                CalendarEvent.date <= end_date,
-                and_(
-                    CalendarEvent.end_date.isnot(None),
-                    CalendarEvent.end_date <= end_date
-                )
-            )
-        )
+    # Overlap with the window as one range predicate (GiST-indexed on PostgreSQL)
+    query = CalendarQueryService(db).events_query(current_user.id, start_date, end_date)
     
     if event_type:
         query = query.where(CalendarEvent.type == event_type)
     
-    query = query.order_by(CalendarEvent.date.asc(), CalendarEvent.time.asc()).offset(skip).limit(limit)
+    query = query.order_by(CalendarEvent.date.asc(), CalendarEvent.time.asc(), CalendarEvent.id.asc()).offset(skip).limit(limit)
     
     try:
         try:
@@ -189,6 +171,45 @@ async def list_events(
         )
 
 
+@router.get("/calendar", response_model=List[CalendarItem])
+async def get_calendar(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    start_date: date = Query(..., description="First day of the window"),
+    end_date: date = Query(..., description="Last day of the window (inclusive)"),
+    sources: Optional[List[str]] = Query(None, description=f"Sources to include: {', '.join(CALENDAR_SOURCES)}"),
+):
+    """
+    Get the merged agenda of a date window
+    
+    Events, approved vacations, public holidays, assigned task due dates and
+    scheduled tasks in one list sorted by day then time of day. Recurring
+    holidays and scheduled tasks are expanded within the window only.
+    
+    Args:
+        start_date: First day of the window
+        end_date: Last day of the window (at most a year after start_date)
+        sources: Optional subset of sources (default: all)
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        Calendar items of the window
+    """
+    all_vacations = False
+    if sources is None or "vacation" in sources:
+        all_vacations = await is_admin_or_superadmin(current_user, db)
+    try:
+        return await CalendarQueryService(db).agenda(
+            current_user.id, start_date, end_date, sources=sources, all_vacations=all_vacations
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get("/{event_id}", response_model=CalendarEventSchema)
 async def get_event(
     event_id: int,
@@ -24,6 +24,7 @@ from app.core.security import create_refresh_token
 from app.core.security_audit import SecurityAuditLogger, SecurityEventType
 from app.models.user import User
 from app.models.employee import Employee
+from app.services.principal_service import load_principal
 from app.schemas.auth import Token, TokenData, UserCreate, UserResponse, RefreshTokenRequest, TokenWithUser
 from pydantic import BaseModel, EmailStr
 
@@ -97,8 +98,14 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request = None,
 ) -> User:
-    """Get current authenticated user"""
+    """
+    Get current authenticated user
+    
+    The user comes from the principal cache (see app.services.principal_service):
+    on a hit no query is run and the user is attached to the request session as is.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -164,18 +171,18 @@ async def get_current_user(
             pass  # Don't fail auth if audit logging fails
         raise credentials_exception
 
-    # Get user from database
+    # Get user from the principal cache, or the database on a miss
     try:
-        result = await db.execute(
-            select(User).where(User.email == token_data.username)
-        )
-        user = result.scalar_one_or_none()
-        if user is None:
+        principal = await load_principal(db, token_data.username, request)
+        if principal is None:
             logger.warning("User not found in database for authenticated token")
             raise credentials_exception
+        user = principal.attach(db)
         # SECURITY: Only log user ID, not email or other sensitive data
         logger.debug(f"User authenticated: id={user.id}")
         return user
+    except HTTPException:
+        raise
     except (ConnectionError, TimeoutError) as e:
         logger.error(f"Database connection error in get_current_user: {e}", exc_info=True)
         raise HTTPException(
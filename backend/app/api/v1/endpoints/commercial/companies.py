@@ -25,13 +25,14 @@ from app.models.company import Company
 from app.models.contact import Contact
 from app.models.user import User
 from app.schemas.company import CompanyCreate, CompanyUpdate, Company as CompanySchema
-from app.services.import_service import ImportService
+from app.services.bulk_import import read_import_rows
 from app.services.export_service import ExportService
 from app.services.s3_service import S3Service
 from app.core.logging import logger
 from app.utils.import_logs import (
-    import_logs, import_status, add_import_log, update_import_status,
-    get_current_user_from_query, stream_import_logs_generator
+    add_import_log, update_import_status, start_import_job,
+    get_current_user_from_query, stream_import_logs_generator,
+    require_import_job,
 )
 
 router = APIRouter(prefix="/commercial/companies", tags=["commercial-companies"])
@@ -51,6 +52,7 @@ async def stream_import_logs(
     # Authenticate user
     current_user = await get_current_user_from_query(request, db)
     
+    await require_import_job(import_id)
     return StreamingResponse(
         stream_import_logs_generator(import_id),
         media_type="text/event-stream",
@@ -779,20 +781,28 @@ async def import_companies(
     Returns:
         Import results with data, errors, and warnings
     """
+    # Generate import_id if not provided
+    if not import_id:
+        import_id = str(uuid.uuid4())
+    
+    # Initialize logs and status
+    start_import_job(import_id)
+    
     try:
-        # Read file content
-        file_content = await file.read()
+        # The upload is spooled by Starlette: parse it from the file handle
         filename = file.filename or ""
         file_ext = os.path.splitext(filename.lower())[1]
         
         # Dictionary to store logos from ZIP (filename -> file content)
         logos_dict = {}
         excel_content = None
+        excel_file = file.file
+        excel_filename = filename
         
         # Check if it's a ZIP file
         if file_ext == '.zip':
             try:
-                with zipfile.ZipFile(BytesIO(file_content), 'r') as zip_ref:
+                with zipfile.ZipFile(file.file, 'r') as zip_ref:
                     # Extract Excel file and logos
                     for file_info in zip_ref.namelist():
                         file_name_lower = file_info.lower()
@@ -801,6 +811,7 @@ async def import_companies(
                         if file_name_lower.endswith(('.xlsx', '.xls')):
                             if excel_content is None:
                                 excel_content = zip_ref.read(file_info)
+                                excel_filename = file_info
                             else:
                                 logger.warning(f"Multiple Excel files found in ZIP, using first: {file_info}")
                         
@@ -817,7 +828,7 @@ async def import_companies(
                             detail="No Excel file found in ZIP. Please include entreprises.xlsx or entreprises.xls"
                         )
                     
-                    file_content = excel_content
+                    excel_file = BytesIO(excel_content)
                     logger.info(f"Extracted Excel from ZIP with {len(logos_dict)} logos")
                     
             except zipfile.BadZipFile:
@@ -834,10 +845,7 @@ async def import_companies(
         
         # Import from Excel
         try:
-            result = ImportService.import_from_excel(
-                file_content=file_content,
-                has_headers=True
-            )
+            result = await read_import_rows(excel_file, excel_filename)
         except Exception as e:
             logger.error(f"Error importing Excel file: {e}", exc_info=True)
             raise HTTPException(
@@ -4,7 +4,7 @@ API endpoints for managing commercial contacts
 """
 
 from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_, delete
@@ -20,24 +20,29 @@ import asyncio
 
 from app.core.database import get_db
 from app.core.cache_enhanced import cache_query
+from app.core.pagination import InvalidCursorError, Keyset
 from app.dependencies import get_current_user
 from app.models.contact import Contact
 from app.models.company import Company
 from app.models.user import User
 from app.schemas.contact import ContactCreate, ContactUpdate, Contact as ContactSchema
-from app.services.import_service import ImportService
+from app.services.bulk_import import read_import_rows
+from app.services.entity_matcher import (
+    CompanyMatcher, MATCH_EXACT, MATCH_WITHOUT_LEGAL_FORM, find_company_by_name
+)
 from app.services.export_service import ExportService
+from app.services.presigned_urls import presign_stored_url, presign_stored_urls
 from app.services.s3_service import S3Service
 from app.core.logging import logger
+from app.utils.import_logs import (
+    add_import_log, update_import_status, start_import_job, stream_import_logs_generator,
+    require_import_job,
+)
 import unicodedata
 import re
 
 router = APIRouter(prefix="/commercial/contacts", tags=["commercial-contacts"])
 
-# In-memory store for import logs (in production, use Redis)
-import_logs: Dict[str, List[Dict[str, any]]] = {}
-import_status: Dict[str, Dict[str, any]] = {}
-
 
 def normalize_filename(name: str) -> str:
     """
@@ -63,207 +68,54 @@ def normalize_filename(name: str) -> str:
     return name
 
 
-async def find_company_by_name(
-    company_name: str,
-    db: AsyncSession,
-    all_companies: Optional[List[Company]] = None,
-    company_name_to_id: Optional[dict] = None
-) -> Optional[int]:
-    """
-    Find a company ID by name using intelligent matching.
-    
-    Matching strategy:
-    1. Exact match (case-insensitive)
-    2. Match without legal form (SARL, SA, SAS, EURL)
-    3. Partial match (contains)
-    
-    Args:
-        company_name: Company name to search for
-        db: Database session
-        all_companies: Optional pre-loaded list of companies (for performance)
-        company_name_to_id: Optional pre-built mapping (for performance)
-        
-    Returns:
-        Company ID if found, None otherwise
-    """
-    if not company_name or not company_name.strip():
-        return None
-    
-    # Load companies if not provided
-    if all_companies is None or company_name_to_id is None:
-        companies_result = await db.execute(select(Company))
-        all_companies = companies_result.scalars().all()
-        company_name_to_id = {}
-        for company in all_companies:
-            if company.name:
-                company_name_to_id[company.name.lower().strip()] = company.id
-    
-    company_name_normalized = company_name.strip().lower()
-    # Remove common prefixes/suffixes for better matching
-    company_name_clean = company_name_normalized.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-    
-    # Try exact match first
-    if company_name_normalized in company_name_to_id:
-        return company_name_to_id[company_name_normalized]
-    
-    # Try match without legal form
-    if company_name_clean and company_name_clean in company_name_to_id:
-        return company_name_to_id[company_name_clean]
-    
-    # Try partial match (contains)
-    matched_company_id = None
-    for stored_name, stored_id in company_name_to_id.items():
-        stored_clean = stored_name.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-        if (company_name_clean and stored_clean and 
-            (company_name_clean in stored_clean or stored_clean in company_name_clean)):
-            matched_company_id = stored_id
-            break
-    
-    # If no match with cleaned, try original normalized
-    if not matched_company_id:
-        for stored_name, stored_id in company_name_to_id.items():
-            if (company_name_normalized in stored_name or stored_name in company_name_normalized):
-                matched_company_id = stored_id
-                break
-    
-    return matched_company_id
+CONTACT_PHOTO_PREFIX = "contacts/photos"
 
-# Cache for presigned URLs to avoid regenerating them unnecessarily
-# Format: {file_key: (presigned_url, expiration_timestamp)}
-_presigned_url_cache: dict[str, tuple[str, float]] = {}
-_cache_max_size = 1000  # Maximum number of cached URLs
+# Newest first; the id breaks ties between contacts created together
+CONTACT_KEYSET = Keyset(Contact.created_at.desc(), Contact.id.desc())
 
 
-def regenerate_photo_url(photo_url: Optional[str], contact_id: Optional[int] = None) -> Optional[str]:
+async def regenerate_photo_url(photo_url: Optional[str], contact_id: Optional[int] = None) -> Optional[str]:
     """
     Regenerate presigned URL for a contact photo.
     
     Args:
         photo_url: The photo URL (can be a file_key or presigned URL)
-        contact_id: Optional contact ID for logging
+        contact_id: Optional contact ID (kept for call-site compatibility)
         
     Returns:
-        Presigned URL if successful, None if generation fails or no photo_url
+        Presigned URL if successful, the original value if S3 is not configured
+        or no file_key can be extracted, None if generation fails or no photo_url
     """
-    if not photo_url:
-        return None
-    
-    if not S3Service.is_configured():
-        # If S3 is not configured, return the original URL (might be a direct URL)
-        logger.warning(f"S3 not configured, returning original photo_url for contact {contact_id}")
-        return photo_url
-    
-    try:
-        s3_service = S3Service()
-        file_key = None
-        
-        # If it's a presigned URL, try to extract the file_key from it
-        if photo_url.startswith('http'):
-            # Try to extract file_key from presigned URL
-            from urllib.parse import urlparse, parse_qs, unquote
-            parsed = urlparse(photo_url)
-            
-            # Check query params for 'key' parameter (some S3 presigned URLs have it)
-            query_params = parse_qs(parsed.query)
-            if 'key' in query_params:
-                file_key = unquote(query_params['key'][0])
-            else:
-                # Extract from path - remove bucket name if present
-                path = parsed.path.strip('/')
-                # Look for 'contacts/photos' in the path
-                if 'contacts/photos' in path:
-                    # Find the position of 'contacts/photos' and take everything after
-                    idx = path.find('contacts/photos')
-                    if idx != -1:
-                        file_key = path[idx:]
-                elif path.startswith('contacts/'):
-                    file_key = path
-        else:
-            # It's likely already a file_key
-            file_key = photo_url
-        
-        # Validate and normalize file_key format
-        if file_key:
-            # Normalize: remove leading/trailing slashes and ensure it starts with 'contacts/photos'
-            file_key = file_key.strip('/')
-            
-            # If it doesn't start with 'contacts/photos', it might be invalid
-            if not file_key.startswith('contacts/photos'):
-                logger.warning(f"Invalid file_key format for contact {contact_id}: {file_key}. Expected format: contacts/photos/...")
-                # Try to fix if it's just missing the prefix
-                if not file_key.startswith('contacts/'):
-                    logger.info(f"Attempting to fix file_key by adding contacts/photos/ prefix")
-                    file_key = f"contacts/photos/{file_key}"
-            
-            # Skip S3 metadata check for performance (trust that file_key is valid)
-            # This saves 50-100ms per photo and reduces S3 API calls
-            
-            # Check cache first
-            import time
-            if file_key in _presigned_url_cache:
-                cached_url, expiration_timestamp = _presigned_url_cache[file_key]
-                # If URL is still valid (not expired and not close to expiration), return cached version
-                current_time = time.time()
-                buffer_seconds = 3600  # Regenerate 1 hour before expiration
-                if current_time < (expiration_timestamp - buffer_seconds):
-                    logger.debug(f"Using cached presigned URL for contact {contact_id} with file_key: {file_key[:60]}...")
-                    return cached_url
-                # Remove expired entry from cache
-                else:
-                    del _presigned_url_cache[file_key]
-            
-            # Generate new presigned URL
-            try:
-                expiration_seconds = 604800  # 7 days (AWS S3 maximum)
-                presigned_url = s3_service.generate_presigned_url(file_key, expiration=expiration_seconds)
-                if presigned_url:
-                    # Cache the URL with expiration timestamp
-                    expiration_timestamp = time.time() + expiration_seconds
-                    _presigned_url_cache[file_key] = (presigned_url, expiration_timestamp)
-                    
-                    # Limit cache size (LRU eviction - remove oldest entry)
-                    if len(_presigned_url_cache) > _cache_max_size:
-                        oldest_key = next(iter(_presigned_url_cache))
-                        del _presigned_url_cache[oldest_key]
-                    
-                    logger.debug(f"Generated and cached presigned URL for contact {contact_id} with file_key: {file_key[:60]}...")
-                    return presigned_url
-                else:
-                    logger.error(f"generate_presigned_url returned None for contact {contact_id} with file_key: {file_key}")
-                    return None
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL for contact {contact_id} with file_key '{file_key}': {e}", exc_info=True)
-                return None
-        else:
-            # Could not extract file_key, return original URL
-            logger.warning(f"Could not extract file_key from photo_url for contact {contact_id}: {photo_url}")
-            return photo_url  # Return original URL instead of None
-    except Exception as e:
-        logger.error(f"Failed to regenerate presigned URL for contact {contact_id}: {e}", exc_info=True)
-        return None
+    return await presign_stored_url(photo_url, CONTACT_PHOTO_PREFIX, repair=True)
 
 
 @router.get("/", response_model=List[ContactSchema])
 @cache_query(expire=60, tags=["contacts"])  # Cache for 60 seconds, invalidate on contact changes
 async def list_contacts(
     request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces skip)"),
     circle: Optional[str] = Query(None),
     company_id: Optional[int] = Query(None),
-    skip_photo_urls: bool = Query(False, description="Skip presigned URL regeneration for performance (use for large lists)"),
+    skip_photo_urls: bool = Query(False, description="Return stored photo values without presigning them"),
 ) -> List[Contact]:
     """
     Get list of contacts
     
+    The X-Next-Cursor response header holds the cursor of the next page;
+    following it costs the same at any depth, unlike a growing skip.
+    
     Args:
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor of the next page (from X-Next-Cursor)
         circle: Optional circle filter
         company_id: Optional company filter
-        skip_photo_urls: If True, skip presigned URL regeneration for better performance
+        skip_photo_urls: If True, return stored photo values without presigning them
         current_user: Current authenticated user
         db: Database session
         
@@ -280,11 +132,20 @@ async def list_contacts(
     query = query.options(
         selectinload(Contact.company),
         selectinload(Contact.employee)
-    ).order_by(Contact.created_at.desc()).offset(skip).limit(limit)
+    )
+    try:
+        query = CONTACT_KEYSET.window(query, limit, cursor, skip)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
     
     try:
         result = await db.execute(query)
-        contacts = result.scalars().all()
+        contacts, next_cursor = CONTACT_KEYSET.page(result.scalars().all(), limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
     except Exception as e:
         error_str = str(e)
         # Check if the error is about missing photo_filename column
@@ -303,37 +164,15 @@ async def list_contacts(
     # Convert to response format with company and employee names
     contact_list = []
     
-    # Auto-enable skip_photo_urls for large lists to prevent timeout
-    if limit > 100 and not skip_photo_urls:
-        skip_photo_urls = True
-        logger.debug(f"Auto-enabling skip_photo_urls for large list (limit={limit})")
+    # Sign every photo of the page in one batch (shared URL cache, local signing)
+    photo_urls = {}
+    if not skip_photo_urls:
+        photo_urls = await presign_stored_urls(
+            (contact.photo_url for contact in contacts), CONTACT_PHOTO_PREFIX, repair=True
+        )
     
     for contact in contacts:
-        # Regenerate presigned URL for photo if it exists and not skipped
-        if skip_photo_urls:
-            # Use original URL or cached URL if available, but don't generate new ones
-            photo_url = contact.photo_url
-            # Try to get from cache if available
-            if photo_url and S3Service.is_configured():
-                try:
-                    from urllib.parse import urlparse, parse_qs, unquote
-                    import time
-                    parsed = urlparse(photo_url)
-                    path = parsed.path.strip('/')
-                    if 'contacts/photos' in path:
-                        idx = path.find('contacts/photos')
-                        if idx != -1:
-                            file_key = path[idx:]
-                            if file_key in _presigned_url_cache:
-                                cached_url, expiration_timestamp = _presigned_url_cache[file_key]
-                                current_time = time.time()
-                                buffer_seconds = 3600
-                                if current_time < (expiration_timestamp - buffer_seconds):
-                                    photo_url = cached_url
-                except Exception:
-                    pass  # Use original URL if cache lookup fails
-        else:
-            photo_url = regenerate_photo_url(contact.photo_url, contact.id)
+        photo_url = contact.photo_url if skip_photo_urls else photo_urls.get(contact.photo_url)
         
         contact_dict = {
             "id": contact.id,
@@ -446,7 +285,7 @@ async def get_contact(
         )
     
     # Regenerate presigned URL for photo if it exists
-    photo_url = regenerate_photo_url(contact.photo_url, contact.id)
+    photo_url = await regenerate_photo_url(contact.photo_url, contact.id)
     
     # Convert to response format
     contact_dict = {
@@ -557,7 +396,7 @@ async def create_contact(
     await db.refresh(contact, ["company", "employee"])
     
     # Regenerate presigned URL for photo if it exists
-    photo_url = regenerate_photo_url(contact.photo_url, contact.id)
+    photo_url = await regenerate_photo_url(contact.photo_url, contact.id)
     
     # Convert to response format
     contact_dict = {
@@ -736,7 +575,7 @@ async def update_contact(
     await db.refresh(contact, ["company", "employee"])
     
     # Regenerate presigned URL for photo if it exists
-    photo_url = regenerate_photo_url(contact.photo_url, contact.id)
+    photo_url = await regenerate_photo_url(contact.photo_url, contact.id)
     
     # Convert to response format
     contact_dict = {
@@ -836,40 +675,6 @@ async def delete_contact(
     await db.commit()
 
 
-def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
-    """Add a log entry to the import logs"""
-    if import_id not in import_logs:
-        import_logs[import_id] = []
-    
-    log_entry = {
-        "timestamp": dt.now().isoformat(),
-        "level": level,
-        "message": message,
-        "data": data or {}
-    }
-    import_logs[import_id].append(log_entry)
-    
-    # Keep only last 1000 logs per import
-    if len(import_logs[import_id]) > 1000:
-        import_logs[import_id] = import_logs[import_id][-1000:]
-
-
-def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
-    """Update import status"""
-    if import_id not in import_status:
-        import_status[import_id] = {}
-    
-    import_status[import_id].update({
-        "status": status,
-        "updated_at": dt.now().isoformat()
-    })
-    
-    if progress is not None:
-        import_status[import_id]["progress"] = progress
-    if total is not None:
-        import_status[import_id]["total"] = total
-
-
 async def get_current_user_from_query(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -929,42 +734,9 @@ async def stream_import_logs(
     Stream import logs via Server-Sent Events (SSE)
     Note: Uses query parameter authentication because EventSource doesn't support custom headers
     """
-    async def event_generator():
-        last_index = 0
-        
-        while True:
-            # Check if import is complete
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                if status_info.get("status") == "completed" or status_info.get("status") == "failed":
-                    # Send final logs
-                    if import_id in import_logs:
-                        logs = import_logs[import_id]
-                        for log in logs[last_index:]:
-                            yield f"data: {json.dumps(log)}\n\n"
-                    
-                    # Send final status
-                    yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
-                    break
-            
-            # Send new logs
-            if import_id in import_logs:
-                logs = import_logs[import_id]
-                if len(logs) > last_index:
-                    for log in logs[last_index:]:
-                        yield f"data: {json.dumps(log)}\n\n"
-                    last_index = len(logs)
-            
-            # Send status update
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-            
-            await asyncio.sleep(0.5)  # Check every 500ms
-    
+    await require_import_job(import_id)
     return StreamingResponse(
-        event_generator(),
+        stream_import_logs_generator(import_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1030,33 +802,28 @@ async def import_contacts(
         import_id = str(uuid.uuid4())
     
     # Initialize logs and status
-    import_logs[import_id] = []
-    import_status[import_id] = {
-        "status": "started",
-        "progress": 0,
-        "total": 0,
-        "created_at": dt.now().isoformat()
-    }
+    start_import_job(import_id)
     
     add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
     
     try:
-        # Read file content
-        file_content = await file.read()
+        # The upload is spooled by Starlette: parse it from the file handle
         filename = file.filename or ""
         file_ext = os.path.splitext(filename.lower())[1]
         
-        add_import_log(import_id, f"Fichier lu: {len(file_content)} bytes, extension: {file_ext}", "info")
+        add_import_log(import_id, f"Fichier reçu: {file.size or 0} bytes, extension: {file_ext}", "info")
         
         # Dictionary to store photos from ZIP (filename -> file content)
         photos_dict = {}
         excel_content = None
+        excel_file = file.file
+        excel_filename = filename
         
         # Check if it's a ZIP file
         if file_ext == '.zip':
             add_import_log(import_id, "Détection d'un fichier ZIP, extraction en cours...", "info")
             try:
-                with zipfile.ZipFile(BytesIO(file_content), 'r') as zip_ref:
+                with zipfile.ZipFile(file.file, 'r') as zip_ref:
                     photo_count = 0
                     # Extract Excel file and photos
                     for file_info in zip_ref.namelist():
@@ -1066,6 +833,7 @@ async def import_contacts(
                         if file_name_lower.endswith(('.xlsx', '.xls')):
                             if excel_content is None:
                                 excel_content = zip_ref.read(file_info)
+                                excel_filename = file_info
                                 add_import_log(import_id, f"Fichier Excel trouvé dans le ZIP: {file_info}", "info")
                             else:
                                 logger.warning(f"Multiple Excel files found in ZIP, using first: {file_info}")
@@ -1099,7 +867,7 @@ async def import_contacts(
                         detail="No Excel file found in ZIP. Please include contacts.xlsx or contacts.xls"
                     )
                 
-                file_content = excel_content
+                excel_file = BytesIO(excel_content)
                 logger.info(f"Extracted Excel from ZIP with {len(photos_dict)} photos")
                 
             except zipfile.BadZipFile:
@@ -1117,10 +885,7 @@ async def import_contacts(
         # Import from Excel
         add_import_log(import_id, "Lecture du fichier Excel...", "info")
         try:
-            result = ImportService.import_from_excel(
-                file_content=file_content,
-                has_headers=True
-            )
+            result = await read_import_rows(excel_file, excel_filename)
         except Exception as e:
             add_import_log(import_id, f"ERREUR lors de la lecture Excel: {str(e)}", "error")
             logger.error(f"Error importing Excel file: {e}", exc_info=True)
@@ -1152,14 +917,9 @@ async def import_contacts(
         # Load all companies once to create a name -> ID mapping (case-insensitive)
         add_import_log(import_id, "Chargement des entreprises existantes...", "info")
         try:
-            companies_result = await db.execute(select(Company))
-            all_companies = companies_result.scalars().all()
-            # Create a case-insensitive mapping: company_name_lower -> company_id
-            company_name_to_id = {}
-            for company in all_companies:
-                if company.name:
-                    company_name_to_id[company.name.lower().strip()] = company.id
-            add_import_log(import_id, f"{len(company_name_to_id)} entreprise(s) chargée(s) pour le matching", "info")
+            # Normalized name index (exact, without legal form, trigrams)
+            company_matcher = await CompanyMatcher.load(db)
+            add_import_log(import_id, f"{len(company_matcher)} entreprise(s) chargée(s) pour le matching", "info")
         except Exception as e:
             add_import_log(import_id, f"ERREUR lors du chargement des entreprises: {str(e)}", "error")
             logger.error(f"Error loading companies: {e}", exc_info=True)
@@ -1376,16 +1136,11 @@ async def import_contacts(
                     ])
                     
                     if company_name and company_name.strip():
-                        company_name_normalized = company_name.strip().lower()
-                        # Remove common prefixes/suffixes for better matching
-                        company_name_clean = company_name_normalized.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-                        
-                        # Try exact match first
-                        if company_name_normalized in company_name_to_id:
-                            company_id = company_name_to_id[company_name_normalized]
-                        elif company_name_clean and company_name_clean in company_name_to_id:
-                            # Try match without legal form
-                            company_id = company_name_to_id[company_name_clean]
+                        company_match = company_matcher.match(company_name)
+                        if company_match and company_match.match_type == MATCH_EXACT:
+                            company_id = company_match.id
+                        elif company_match and company_match.match_type == MATCH_WITHOUT_LEGAL_FORM:
+                            company_id = company_match.id
                             warnings.append({
                                 'row': idx + 2,
                                 'type': 'company_match_without_legal_form',
@@ -1393,34 +1148,8 @@ async def import_contacts(
                                 'data': {'company_name': company_name, 'matched_company_id': company_id}
                             })
                         else:
-                            # Try partial match (contains) - check both original and cleaned
-                            matched_company_id = None
-                            matched_company_name = None
-                            
-                            # First try with cleaned name
-                            for stored_name, stored_id in company_name_to_id.items():
-                                stored_clean = stored_name.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-                                if (company_name_clean and stored_clean and 
-                                    (company_name_clean in stored_clean or stored_clean in company_name_clean)):
-                                    matched_company_id = stored_id
-                                    # Find the original company name
-                                    for c in all_companies:
-                                        if c.id == stored_id:
-                                            matched_company_name = c.name
-                                            break
-                                    break
-                            
-                            # If no match with cleaned, try original normalized
-                            if not matched_company_id:
-                                for stored_name, stored_id in company_name_to_id.items():
-                                    if (company_name_normalized in stored_name or stored_name in company_name_normalized):
-                                        matched_company_id = stored_id
-                                        # Find the original company name
-                                        for c in all_companies:
-                                            if c.id == stored_id:
-                                                matched_company_name = c.name
-                                                break
-                                        break
+                            matched_company_id = company_match.id if company_match else None
+                            matched_company_name = company_match.name if company_match else None
                             
                             if matched_company_id:
                                 company_id = matched_company_id
@@ -1432,6 +1161,7 @@ async def import_contacts(
                                         'company_name': company_name,
                                         'matched_company_name': matched_company_name,
                                         'matched_company_id': matched_company_id,
+                                        'match_score': company_match.score,
                                         'contact': f"{first_name} {last_name}".strip()
                                     }
                                 })
@@ -2064,6 +1794,9 @@ async def import_contacts(
         try:
             # Regenerate presigned URLs for all contacts before serialization
             serialized_contacts = []
+            photo_urls = await presign_stored_urls(
+                (contact.photo_url for contact in created_contacts), CONTACT_PHOTO_PREFIX, repair=True
+            )
             for contact in created_contacts:
                 # Create a copy of contact data with regenerated photo URL
                 contact_dict = {
@@ -2075,7 +1808,7 @@ async def import_contacts(
                     "position": contact.position,
                     "circle": contact.circle,
                     "linkedin": contact.linkedin,
-                    "photo_url": regenerate_photo_url(contact.photo_url, contact.id),
+                    "photo_url": photo_urls.get(contact.photo_url),
                     "photo_filename": getattr(contact, 'photo_filename', None),
                     "email": contact.email,
                     "phone": contact.phone,
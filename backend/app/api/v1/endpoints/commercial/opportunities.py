@@ -27,12 +27,15 @@ from app.models.company import Company
 from app.models.contact import Contact
 from app.models.user import User
 from app.schemas.opportunity import OpportunityCreate, OpportunityUpdate, Opportunity as OpportunitySchema
-from app.services.import_service import ImportService
+from app.services.bulk_import import read_import_rows
+from app.services.entity_matcher import CompanyMatcher, find_company_by_name
 from app.services.export_service import ExportService
+from app.services.pipeline_board_service import PipelineBoardService
 from app.core.logging import logger
 from app.utils.import_logs import (
-    import_logs, import_status, add_import_log, update_import_status,
-    get_current_user_from_query, stream_import_logs_generator
+    add_import_log, update_import_status, start_import_job,
+    get_current_user_from_query, stream_import_logs_generator,
+    require_import_job,
 )
 from app.utils.notifications import create_notification_async
 from app.utils.notification_templates import NotificationTemplates
@@ -54,114 +57,6 @@ def normalize_key(key: str) -> str:
     return key
 
 
-async def find_company_by_name(
-    company_name: str,
-    db: AsyncSession,
-    all_companies: Optional[List[Company]] = None,
-    company_name_to_id: Optional[dict] = None
-) -> Optional[int]:
-    """
-    Find a company ID by name using intelligent matching.
-    
-    Matching strategy:
-    1. Exact match (case-insensitive)
-    2. Match without legal form (SARL, SA, SAS, EURL)
-    3. Partial match (contains)
-    
-    Args:
-        company_name: Company name to search for
-        db: Database session
-        all_companies: Optional pre-loaded list of companies (for performance)
-        company_name_to_id: Optional pre-built mapping (for performance)
-        
-    Returns:
-        Company ID if found, None otherwise
-    """
-    if not company_name or not company_name.strip():
-        return None
-    
-    # Load companies if not provided
-    if all_companies is None or company_name_to_id is None:
-        companies_result = await db.execute(select(Company))
-        all_companies = companies_result.scalars().all()
-        company_name_to_id = {}
-        company_name_normalized_to_id = {}  # For accent-insensitive matching
-        for company in all_companies:
-            if company.name:
-                name_lower = company.name.lower().strip()
-                company_name_to_id[name_lower] = company.id
-                # Also create normalized version (without accents) for better matching
-                name_normalized = normalize_key(company.name).lower().strip()
-                if name_normalized != name_lower:  # Only add if different
-                    company_name_normalized_to_id[name_normalized] = company.id
-    else:
-        # Build normalized mapping if not already done
-        company_name_normalized_to_id = {}
-        for company in all_companies:
-            if company.name:
-                name_normalized = normalize_key(company.name).lower().strip()
-                name_lower = company.name.lower().strip()
-                if name_normalized != name_lower:
-                    company_name_normalized_to_id[name_normalized] = company.id
-    
-    company_name_normalized = company_name.strip().lower()
-    company_name_normalized_no_accents = normalize_key(company_name).lower().strip()
-    
-    # Remove common prefixes/suffixes for better matching
-    company_name_clean = company_name_normalized.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-    company_name_clean_no_accents = company_name_normalized_no_accents.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-    
-    # Try exact match first (with accents)
-    if company_name_normalized in company_name_to_id:
-        return company_name_to_id[company_name_normalized]
-    
-    # Try exact match without accents
-    if company_name_normalized_no_accents in company_name_normalized_to_id:
-        return company_name_normalized_to_id[company_name_normalized_no_accents]
-    
-    # Try match without legal form (with accents)
-    if company_name_clean and company_name_clean in company_name_to_id:
-        return company_name_to_id[company_name_clean]
-    
-    # Try match without legal form (without accents)
-    if company_name_clean_no_accents and company_name_clean_no_accents in company_name_normalized_to_id:
-        return company_name_normalized_to_id[company_name_clean_no_accents]
-    
-    # Try partial match (contains) - with accents
-    matched_company_id = None
-    for stored_name, stored_id in company_name_to_id.items():
-        stored_clean = stored_name.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-        if (company_name_clean and stored_clean and 
-            (company_name_clean in stored_clean or stored_clean in company_name_clean)):
-            matched_company_id = stored_id
-            break
-    
-    # Try partial match (contains) - without accents
-    if not matched_company_id:
-        for stored_name_normalized, stored_id in company_name_normalized_to_id.items():
-            stored_clean = stored_name_normalized.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-            if (company_name_clean_no_accents and stored_clean and 
-                (company_name_clean_no_accents in stored_clean or stored_clean in company_name_clean_no_accents)):
-                matched_company_id = stored_id
-                break
-    
-    # If no match with cleaned, try original normalized (with accents)
-    if not matched_company_id:
-        for stored_name, stored_id in company_name_to_id.items():
-            if (company_name_normalized in stored_name or stored_name in company_name_normalized):
-                matched_company_id = stored_id
-                break
-    
-    # If still no match, try original normalized (without accents)
-    if not matched_company_id:
-        for stored_name_normalized, stored_id in company_name_normalized_to_id.items():
-            if (company_name_normalized_no_accents in stored_name_normalized or stored_name_normalized in company_name_normalized_no_accents):
-                matched_company_id = stored_id
-                break
-    
-    return matched_company_id
-
-
 async def find_contact_by_name(
     first_name: str,
     last_name: str,
@@ -236,6 +131,7 @@ async def stream_import_logs(
     # Authenticate user
     current_user = await get_current_user_from_query(request, db)
     
+    await require_import_job(import_id)
     return StreamingResponse(
         stream_import_logs_generator(import_id),
         media_type="text/event-stream",
@@ -262,38 +158,8 @@ async def get_opportunities_stats(
         - weighted_value: Sum of (amount * probability / 100) for all active opportunities
         - avg_probability: Average probability of active opportunities
     """
-    # Filter out closed won/lost opportunities
-    query = select(Opportunite).where(
-        ~or_(
-            Opportunite.status == 'closed won',
-            Opportunite.status == 'closed lost',
-            Opportunite.status == 'won',
-            Opportunite.status == 'lost',
-        )
-    )
-    
-    result = await db.execute(query)
-    active_opportunities = result.scalars().all()
-    
-    # Calculate statistics
-    total = len(active_opportunities)
-    total_value = sum(float(opp.amount) if opp.amount else 0.0 for opp in active_opportunities)
-    weighted_value = sum(
-        (float(opp.amount) if opp.amount else 0.0) * (opp.probability or 50) / 100.0
-        for opp in active_opportunities
-    )
-    avg_probability = (
-        sum(opp.probability or 50 for opp in active_opportunities) / total
-        if total > 0
-        else 0.0
-    )
-    
-    return {
-        "total": total,
-        "total_value": total_value,
-        "weighted_value": weighted_value,
-        "avg_probability": round(avg_probability, 1),
-    }
+    # Aggregated in SQL over active (not closed won/lost) opportunities
+    return await PipelineBoardService(db).active_stats()
 
 
 @router.get("/", response_model=List[OpportunitySchema])
@@ -917,41 +783,26 @@ async def import_opportunities(
         import_id = f"import_{int(dt.now().timestamp() * 1000)}_{uuid.uuid4().hex[:8]}"
     
     # Initialize logs and status
-    import_logs[import_id] = []
-    import_status[import_id] = {
-        "status": "started",
-        "progress": 0,
-        "total": 0,
-        "created_at": dt.now().isoformat()
-    }
+    start_import_job(import_id)
     
     add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
     
     try:
-        # Read file content
-        file_content = await file.read()
-        add_import_log(import_id, f"Fichier lu: {len(file_content)} bytes", "info")
+        # The upload is spooled by Starlette: parse it from the file handle
+        add_import_log(import_id, f"Fichier reçu: {file.size or 0} bytes", "info")
         
         # Import from Excel
         add_import_log(import_id, "Lecture du fichier Excel...", "info")
-        result = ImportService.import_from_excel(
-            file_content=file_content,
-            has_headers=True
-        )
+        result = await read_import_rows(file.file, file.filename or "opportunites.xlsx")
         
         total_rows = len(result.get('data', []))
         add_import_log(import_id, f"Fichier Excel lu avec succès: {total_rows} ligne(s) trouvée(s)", "info")
         update_import_status(import_id, "processing", progress=0, total=total_rows)
         
-        # Load all companies once to create a name -> ID mapping
+        # Index all company names once for matching
         add_import_log(import_id, "Chargement des entreprises existantes...", "info")
-        companies_result = await db.execute(select(Company))
-        all_companies = companies_result.scalars().all()
-        company_name_to_id = {}
-        for company in all_companies:
-            if company.name:
-                company_name_to_id[company.name.lower().strip()] = company.id
-        add_import_log(import_id, f"{len(company_name_to_id)} entreprise(s) chargée(s) pour le matching", "info")
+        company_matcher = await CompanyMatcher.load(db)
+        add_import_log(import_id, f"{len(company_matcher)} entreprise(s) chargée(s) pour le matching", "info")
         
         # Load all contacts once to create a name -> ID mapping
         add_import_log(import_id, "Chargement des contacts existants...", "info")
@@ -1272,8 +1123,7 @@ async def import_opportunities(
                             matched_company_id = await find_company_by_name(
                                 company_name=str(company_id_raw).strip(),
                                 db=db,
-                                all_companies=all_companies,
-                                company_name_to_id=company_name_to_id
+                                matcher=company_matcher
                             )
                             if matched_company_id:
                                 company_id = matched_company_id
@@ -1285,8 +1135,7 @@ async def import_opportunities(
                         matched_company_id = await find_company_by_name(
                             company_name=str(company_id_raw).strip(),
                             db=db,
-                            all_companies=all_companies,
-                            company_name_to_id=company_name_to_id
+                            matcher=company_matcher
                         )
                         if matched_company_id:
                             company_id = matched_company_id
@@ -1298,8 +1147,7 @@ async def import_opportunities(
                     matched_company_id = await find_company_by_name(
                         company_name=company_name,
                         db=db,
-                        all_companies=all_companies,
-                        company_name_to_id=company_name_to_id
+                        matcher=company_matcher
                     )
                     if matched_company_id:
                         company_id = matched_company_id
@@ -15,7 +15,16 @@ from app.core.database import get_db
 from app.dependencies import get_current_user
 from app.models.pipeline import Pipeline, PipelineStage
 from app.models.user import User
-from app.schemas.pipeline import PipelineCreate, PipelineUpdate, PipelineResponse, PipelineStageCreate
+from app.schemas.pipeline import (
+    PipelineBoardCardsPage,
+    PipelineBoardResponse,
+    PipelineCreate,
+    PipelineResponse,
+    PipelineStageCreate,
+    PipelineUpdate,
+)
+from app.core.pagination import InvalidCursorError
+from app.services.pipeline_board_service import PipelineBoardService
 from app.core.logging import logger
 
 router = APIRouter(prefix="/commercial/pipelines", tags=["commercial-pipelines"])
@@ -62,16 +71,12 @@ async def list_pipelines(
         result = await db.execute(query)
         pipelines = result.scalars().all()
         
+        # Opportunity counts for the whole page in one grouped query
+        opportunity_counts = await PipelineBoardService(db).opportunity_counts(pipeline.id for pipeline in pipelines)
+        
         # Convert to response format
         pipeline_list = []
         for pipeline in pipelines:
-            # Count opportunities for each pipeline
-            from app.models.pipeline import Opportunite
-            opp_count_result = await db.execute(
-                select(func.count(Opportunite.id)).where(Opportunite.pipeline_id == pipeline.id)
-            )
-            opportunity_count = opp_count_result.scalar() or 0
-            
             pipeline_dict = {
                 'id': pipeline.id,
                 'name': pipeline.name,
@@ -94,7 +99,7 @@ async def list_pipelines(
                     }
                     for stage in pipeline.stages
                 ],
-                'opportunity_count': opportunity_count,
+                'opportunity_count': opportunity_counts.get(pipeline.id, 0),
             }
             pipeline_response = PipelineResponse(**pipeline_dict)
             pipeline_list.append(pipeline_response)
@@ -164,6 +169,71 @@ async def get_pipeline(
     return PipelineResponse(**pipeline_dict)
 
 
+@router.get("/{pipeline_id}/board", response_model=PipelineBoardResponse)
+async def get_pipeline_board(
+    pipeline_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    cards_per_stage: int = Query(20, ge=0, le=200, description="Cards returned per stage"),
+) -> PipelineBoardResponse:
+    """
+    Get the Kanban board of a pipeline in one request
+    
+    Args:
+        pipeline_id: Pipeline ID
+        cards_per_stage: Number of cards returned per stage
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        Pipeline with one column per stage: count, total and weighted amounts,
+        first cards and the cursor to load the next ones
+    """
+    board = await PipelineBoardService(db).board(pipeline_id, cards_per_stage)
+    
+    if board is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pipeline not found"
+        )
+    
+    return PipelineBoardResponse(**board)
+
+
+@router.get("/{pipeline_id}/board/cards", response_model=PipelineBoardCardsPage)
+async def list_pipeline_board_cards(
+    pipeline_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    stage_id: Optional[UUID] = Query(None, description="Stage ID (omit for opportunities without stage)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(20, ge=1, le=200, description="Maximum number of cards to return"),
+) -> PipelineBoardCardsPage:
+    """
+    Get the next cards of a board column
+    
+    Args:
+        pipeline_id: Pipeline ID
+        stage_id: Stage ID, or none for the column of opportunities without stage
+        cursor: Cursor returned with the previous page
+        limit: Maximum number of cards to return
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        Cards and the cursor of the next page
+    """
+    try:
+        page = await PipelineBoardService(db).stage_cards(pipeline_id, stage_id, limit, cursor)
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    
+    return PipelineBoardCardsPage(**page)
+
+
 @router.post("/", response_model=PipelineResponse, status_code=status.HTTP_201_CREATED)
 async def create_pipeline(
     request: Request,
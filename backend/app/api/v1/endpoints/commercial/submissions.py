@@ -3,6 +3,7 @@ Commercial Submissions Endpoints
 API endpoints for managing commercial submissions (soumissions complexes)
 """
 
+from io import BytesIO
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.responses import StreamingResponse
@@ -17,7 +18,7 @@ from app.models.submission import Submission
 from app.models.company import Company
 from app.models.user import User
 from app.schemas.submission import SubmissionCreate, SubmissionUpdate, Submission as SubmissionSchema
-from app.services.submission_pdf_service import SubmissionPDFService
+from app.services.pdf_render_service import pdf_render_service
 from app.core.logging import logger
 
 router = APIRouter(prefix="/commercial/submissions", tags=["commercial-submissions"])
@@ -424,15 +425,14 @@ async def generate_submission_pdf(
             "content": submission.content or {},
         }
         
-        # Generate PDF
-        pdf_service = SubmissionPDFService()
-        pdf_buffer = pdf_service.generate_pdf(submission_dict)
+        # Rendered in a worker process, or served from the PDF cache when unchanged
+        _, pdf = await pdf_render_service.render("submission", submission_dict)
         
         # Generate filename
         filename = f"soumission_{submission.submission_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
         
         return StreamingResponse(
-            pdf_buffer,
+            BytesIO(pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"'
@@ -18,7 +18,6 @@ import json
 import uuid
 import asyncio
 import re
-import time
 
 from app.core.database import get_db
 from app.core.cache_enhanced import cache_query
@@ -29,16 +28,18 @@ from app.models.company import Company
 from app.models.user import User
 from app.schemas.testimonial import TestimonialCreate, TestimonialUpdate, Testimonial as TestimonialSchema
 from app.services.import_service import ImportService
+from app.services.entity_matcher import CompanyMatcher, find_company_by_name
 from app.services.export_service import ExportService
+from app.services.presigned_urls import presign_stored_url, presign_stored_urls
 from app.services.s3_service import S3Service
 from app.core.logging import logger
+from app.utils.import_logs import (
+    add_import_log, update_import_status, start_import_job, stream_import_logs_generator,
+    require_import_job,
+)
 
 router = APIRouter(prefix="/commercial/testimonials", tags=["commercial-testimonials"])
 
-# In-memory store for import logs (in production, use Redis)
-import_logs: Dict[str, List[Dict[str, any]]] = {}
-import_status: Dict[str, Dict[str, any]] = {}
-
 
 def normalize_filename(name: str) -> str:
     """Normalize a name for filename matching"""
@@ -53,50 +54,6 @@ def normalize_filename(name: str) -> str:
     return name
 
 
-async def find_company_by_name(
-    company_name: str,
-    db: AsyncSession,
-    all_companies: Optional[List[Company]] = None,
-    company_name_to_id: Optional[dict] = None
-) -> Optional[int]:
-    """Find a company ID by name using intelligent matching"""
-    if not company_name or not company_name.strip():
-        return None
-    
-    if all_companies is None or company_name_to_id is None:
-        companies_result = await db.execute(select(Company))
-        all_companies = companies_result.scalars().all()
-        company_name_to_id = {}
-        for company in all_companies:
-            if company.name:
-                company_name_to_id[company.name.lower().strip()] = company.id
-    
-    company_name_normalized = company_name.strip().lower()
-    company_name_clean = company_name_normalized.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-    
-    if company_name_normalized in company_name_to_id:
-        return company_name_to_id[company_name_normalized]
-    
-    if company_name_clean and company_name_clean in company_name_to_id:
-        return company_name_to_id[company_name_clean]
-    
-    matched_company_id = None
-    for stored_name, stored_id in company_name_to_id.items():
-        stored_clean = stored_name.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-        if (company_name_clean and stored_clean and 
-            (company_name_clean in stored_clean or stored_clean in company_name_clean)):
-            matched_company_id = stored_id
-            break
-    
-    if not matched_company_id:
-        for stored_name, stored_id in company_name_to_id.items():
-            if (company_name_normalized in stored_name or stored_name in company_name_normalized):
-                matched_company_id = stored_id
-                break
-    
-    return matched_company_id
-
-
 async def find_contact_by_name(
     first_name: str,
     last_name: str,
@@ -136,102 +93,12 @@ async def find_contact_by_name(
     return None
 
 
-# Cache for presigned URLs
-_presigned_url_cache: dict[str, tuple[str, float]] = {}
-_cache_max_size = 1000
+TESTIMONIAL_LOGO_PREFIX = "testimonials/logos"
 
 
-def regenerate_logo_url(logo_url: Optional[str], testimonial_id: Optional[int] = None) -> Optional[str]:
+async def regenerate_logo_url(logo_url: Optional[str], testimonial_id: Optional[int] = None) -> Optional[str]:
     """Regenerate presigned URL for a testimonial logo"""
-    if not logo_url:
-        return None
-    
-    if not S3Service.is_configured():
-        logger.warning(f"S3 not configured, returning original logo_url for testimonial {testimonial_id}")
-        return logo_url
-    
-    try:
-        s3_service = S3Service()
-        file_key = None
-        
-        if logo_url.startswith('http'):
-            from urllib.parse import urlparse, parse_qs, unquote
-            parsed = urlparse(logo_url)
-            query_params = parse_qs(parsed.query)
-            if 'key' in query_params:
-                file_key = unquote(query_params['key'][0])
-            else:
-                path = parsed.path.strip('/')
-                if 'testimonials/logos' in path:
-                    idx = path.find('testimonials/logos')
-                    if idx != -1:
-                        file_key = path[idx:]
-        else:
-            file_key = logo_url
-        
-        if file_key:
-            if file_key in _presigned_url_cache:
-                cached_url, expiration_timestamp = _presigned_url_cache[file_key]
-                current_time = time.time()
-                buffer_seconds = 3600
-                if current_time < (expiration_timestamp - buffer_seconds):
-                    return cached_url
-                else:
-                    del _presigned_url_cache[file_key]
-            
-            try:
-                expiration_seconds = 604800
-                presigned_url = s3_service.generate_presigned_url(file_key, expiration=expiration_seconds)
-                if presigned_url:
-                    expiration_timestamp = time.time() + expiration_seconds
-                    _presigned_url_cache[file_key] = (presigned_url, expiration_timestamp)
-                    
-                    if len(_presigned_url_cache) > _cache_max_size:
-                        oldest_key = next(iter(_presigned_url_cache))
-                        del _presigned_url_cache[oldest_key]
-                    
-                    return presigned_url
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL for testimonial {testimonial_id}: {e}", exc_info=True)
-                return None
-        else:
-            return logo_url
-    except Exception as e:
-        logger.error(f"Failed to regenerate presigned URL for testimonial {testimonial_id}: {e}", exc_info=True)
-        return None
-
-
-def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
-    """Add a log entry to the import logs"""
-    if import_id not in import_logs:
-        import_logs[import_id] = []
-    
-    log_entry = {
-        "timestamp": dt.now().isoformat(),
-        "level": level,
-        "message": message,
-        "data": data or {}
-    }
-    import_logs[import_id].append(log_entry)
-    
-    if len(import_logs[import_id]) > 1000:
-        import_logs[import_id] = import_logs[import_id][-1000:]
-
-
-def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
-    """Update import status"""
-    if import_id not in import_status:
-        import_status[import_id] = {}
-    
-    import_status[import_id].update({
-        "status": status,
-        "updated_at": dt.now().isoformat()
-    })
-    
-    if progress is not None:
-        import_status[import_id]["progress"] = progress
-    if total is not None:
-        import_status[import_id]["total"] = total
+    return await presign_stored_url(logo_url, TESTIMONIAL_LOGO_PREFIX)
 
 
 async def get_current_user_from_query(
@@ -272,36 +139,6 @@ async def get_current_user_from_query(
     return user
 
 
-def stream_import_logs_generator(import_id: str):
-    """Generator for streaming import logs via SSE"""
-    last_index = 0
-    
-    while True:
-        if import_id in import_status:
-            status_info = import_status[import_id]
-            if status_info.get("status") == "completed" or status_info.get("status") == "failed":
-                if import_id in import_logs:
-                    logs = import_logs[import_id]
-                    for log in logs[last_index:]:
-                        yield f"data: {json.dumps(log)}\n\n"
-                yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
-                break
-        
-        if import_id in import_logs:
-            logs = import_logs[import_id]
-            if len(logs) > last_index:
-                for log in logs[last_index:]:
-                    yield f"data: {json.dumps(log)}\n\n"
-                last_index = len(logs)
-        
-        if import_id in import_status:
-            status_info = import_status[import_id]
-            yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-        
-        time.sleep(0.5)
-
-
 @router.get("/import/{import_id}/logs")
 async def stream_import_logs(
     import_id: str,
@@ -311,6 +148,7 @@ async def stream_import_logs(
     """Stream import logs via Server-Sent Events (SSE)"""
     current_user = await get_current_user_from_query(request, db)
     
+    await require_import_job(import_id)
     return StreamingResponse(
         stream_import_logs_generator(import_id),
         media_type="text/event-stream",
@@ -389,8 +227,11 @@ async def list_testimonials(
         )
     
     testimonial_list = []
+    logo_urls = await presign_stored_urls(
+        (testimonial.logo_url for testimonial in testimonials), TESTIMONIAL_LOGO_PREFIX
+    )
     for testimonial in testimonials:
-        logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+        logo_url = logo_urls.get(testimonial.logo_url)
         
         testimonial_dict = {
             "id": testimonial.id,
@@ -450,7 +291,7 @@ async def get_testimonial(
             detail="Testimonial not found"
         )
     
-    logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+    logo_url = await regenerate_logo_url(testimonial.logo_url, testimonial.id)
     
     testimonial_dict = {
         "id": testimonial.id,
@@ -544,7 +385,7 @@ async def create_testimonial(
     await db.refresh(testimonial)
     await db.refresh(testimonial, ["company", "contact"])
     
-    logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+    logo_url = await regenerate_logo_url(testimonial.logo_url, testimonial.id)
     
     testimonial_dict = {
         "id": testimonial.id,
@@ -647,7 +488,7 @@ async def update_testimonial(
     await db.refresh(testimonial)
     await db.refresh(testimonial, ["company", "contact"])
     
-    logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+    logo_url = await regenerate_logo_url(testimonial.logo_url, testimonial.id)
     
     testimonial_dict = {
         "id": testimonial.id,
@@ -783,13 +624,7 @@ async def import_testimonials(
         import_id = str(uuid.uuid4())
     
     # Initialize logs and status
-    import_logs[import_id] = []
-    import_status[import_id] = {
-        "status": "started",
-        "progress": 0,
-        "total": 0,
-        "created_at": dt.now().isoformat()
-    }
+    start_import_job(import_id)
     
     add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
     
@@ -868,9 +703,7 @@ async def import_testimonials(
         
         # Load all companies and contacts
         add_import_log(import_id, "Chargement des entreprises et contacts existants...", "info")
-        companies_result = await db.execute(select(Company))
-        all_companies = companies_result.scalars().all()
-        company_name_to_id = {company.name.lower().strip(): company.id for company in all_companies if company.name}
+        company_matcher = await CompanyMatcher.load(db)
         
         contacts_result = await db.execute(select(Contact))
         all_contacts = contacts_result.scalars().all()
@@ -880,7 +713,7 @@ async def import_testimonials(
                 full_name = f"{contact.first_name.strip().lower()} {contact.last_name.strip().lower()}"
                 contact_name_to_id[full_name] = contact.id
         
-        add_import_log(import_id, f"{len(company_name_to_id)} entreprise(s) et {len(contact_name_to_id)} contact(s) chargé(s)", "info")
+        add_import_log(import_id, f"{len(company_matcher)} entreprise(s) et {len(contact_name_to_id)} contact(s) chargé(s)", "info")
         
         # Initialize S3 service
         s3_service = None
@@ -955,7 +788,7 @@ async def import_testimonials(
                         errors.append({'row': idx + 2, 'data': row_data, 'error': f'Invalid company ID: {company_id_raw}'})
                         continue
                 elif company_name:
-                    matched_company_id = await find_company_by_name(company_name, db, all_companies, company_name_to_id)
+                    matched_company_id = await find_company_by_name(company_name, db, matcher=company_matcher)
                     if matched_company_id:
                         company_id = matched_company_id
                     else:
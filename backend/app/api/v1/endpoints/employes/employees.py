@@ -28,15 +28,16 @@ from app.schemas.employee import EmployeeCreate, EmployeeUpdate, Employee as Emp
 from pydantic import ValidationError
 from app.services.import_service import ImportService
 from app.services.export_service import ExportService
+from app.services.presigned_urls import presign_stored_url, presign_stored_urls
 from app.services.s3_service import S3Service
 from app.core.logging import logger
+from app.utils.import_logs import (
+    add_import_log, update_import_status, start_import_job, stream_import_logs_generator,
+    require_import_job,
+)
 
 router = APIRouter(prefix="/employes/employees", tags=["employes"])
 
-# In-memory store for import logs (in production, use Redis)
-import_logs: Dict[str, List[Dict[str, any]]] = {}
-import_status: Dict[str, Dict[str, any]] = {}
-
 
 def normalize_filename(name: str) -> str:
     """
@@ -62,79 +63,14 @@ def normalize_filename(name: str) -> str:
     return name
 
 
-# Cache for presigned URLs
-_presigned_url_cache: dict[str, tuple[str, float]] = {}
-_cache_max_size = 1000
+EMPLOYEE_PHOTO_PREFIX = "employees/photos"
 
 
-def regenerate_photo_url(photo_url: Optional[str], employee_id: Optional[int] = None) -> Optional[str]:
+async def regenerate_photo_url(photo_url: Optional[str], employee_id: Optional[int] = None) -> Optional[str]:
     """
     Regenerate presigned URL for an employee photo.
     """
-    if not photo_url:
-        return None
-    
-    if not S3Service.is_configured():
-        logger.warning(f"S3 not configured, returning original photo_url for employee {employee_id}")
-        return photo_url
-    
-    try:
-        s3_service = S3Service()
-        file_key = None
-        
-        if photo_url.startswith('http'):
-            from urllib.parse import urlparse, parse_qs, unquote
-            parsed = urlparse(photo_url)
-            query_params = parse_qs(parsed.query)
-            if 'key' in query_params:
-                file_key = unquote(query_params['key'][0])
-            else:
-                path = parsed.path.strip('/')
-                if 'employees/photos' in path:
-                    idx = path.find('employees/photos')
-                    if idx != -1:
-                        file_key = path[idx:]
-                elif path.startswith('employees/'):
-                    file_key = path
-        else:
-            file_key = photo_url
-        
-        if file_key:
-            file_key = file_key.strip('/')
-            if not file_key.startswith('employees/photos'):
-                if not file_key.startswith('employees/'):
-                    file_key = f"employees/photos/{file_key}"
-            
-            import time
-            if file_key in _presigned_url_cache:
-                cached_url, expiration_timestamp = _presigned_url_cache[file_key]
-                current_time = time.time()
-                buffer_seconds = 3600
-                if current_time < (expiration_timestamp - buffer_seconds):
-                    return cached_url
-                else:
-                    del _presigned_url_cache[file_key]
-            
-            try:
-                expiration_seconds = 604800  # 7 days
-                presigned_url = s3_service.generate_presigned_url(file_key, expiration=expiration_seconds)
-                if presigned_url:
-                    expiration_timestamp = time.time() + expiration_seconds
-                    _presigned_url_cache[file_key] = (presigned_url, expiration_timestamp)
-                    
-                    if len(_presigned_url_cache) > _cache_max_size:
-                        oldest_key = next(iter(_presigned_url_cache))
-                        del _presigned_url_cache[oldest_key]
-                    
-                    return presigned_url
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL for employee {employee_id}: {e}", exc_info=True)
-                return None
-        else:
-            return photo_url
-    except Exception as e:
-        logger.error(f"Failed to regenerate presigned URL for employee {employee_id}: {e}", exc_info=True)
-        return None
+    return await presign_stored_url(photo_url, EMPLOYEE_PHOTO_PREFIX, repair=True)
 
 
 @router.get("/", response_model=List[EmployeeSchema])
@@ -262,10 +198,13 @@ async def list_employees(
             )
     
     employee_list = []
+    photo_urls = await presign_stored_urls(
+        (employee.photo_url for employee in employees), EMPLOYEE_PHOTO_PREFIX, repair=True
+    )
     for employee in employees:
         try:
             # Regenerate photo URL if needed
-            photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+            photo_url = photo_urls.get(employee.photo_url)
             if photo_url and photo_url != employee.photo_url:
                 # Update photo_url on employee object temporarily for serialization
                 employee.photo_url = photo_url
@@ -382,7 +321,7 @@ async def get_employee(
             detail="Employee not found"
         )
     
-    photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+    photo_url = await regenerate_photo_url(employee.photo_url, employee.id)
     
     employee_dict = {
         "id": employee.id,
@@ -433,7 +372,7 @@ async def create_employee(
     await db.commit()
     await db.refresh(employee)
     
-    photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+    photo_url = await regenerate_photo_url(employee.photo_url, employee.id)
     
     employee_dict = {
         "id": employee.id,
@@ -486,7 +425,7 @@ async def update_employee(
     await db.commit()
     await db.refresh(employee)
     
-    photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+    photo_url = await regenerate_photo_url(employee.photo_url, employee.id)
     
     employee_dict = {
         "id": employee.id,
@@ -609,7 +548,7 @@ async def link_employee_to_user(
     
     logger.info(f"User {current_user.id} linked employee {employee_id} to user {user_id}")
     
-    photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+    photo_url = await regenerate_photo_url(employee.photo_url, employee.id)
     
     employee_dict = {
         "id": employee.id,
@@ -670,7 +609,7 @@ async def unlink_employee_from_user(
     
     logger.info(f"User {current_user.id} unlinked employee {employee_id} from user")
     
-    photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+    photo_url = await regenerate_photo_url(employee.photo_url, employee.id)
     
     employee_dict = {
         "id": employee.id,
@@ -716,39 +655,6 @@ async def delete_employee(
     await db.commit()
 
 
-def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
-    """Add a log entry to the import logs"""
-    if import_id not in import_logs:
-        import_logs[import_id] = []
-    
-    log_entry = {
-        "timestamp": dt.now().isoformat(),
-        "level": level,
-        "message": message,
-        "data": data or {}
-    }
-    import_logs[import_id].append(log_entry)
-    
-    if len(import_logs[import_id]) > 1000:
-        import_logs[import_id] = import_logs[import_id][-1000:]
-
-
-def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
-    """Update import status"""
-    if import_id not in import_status:
-        import_status[import_id] = {}
-    
-    import_status[import_id].update({
-        "status": status,
-        "updated_at": dt.now().isoformat()
-    })
-    
-    if progress is not None:
-        import_status[import_id]["progress"] = progress
-    if total is not None:
-        import_status[import_id]["total"] = total
-
-
 @router.get("/import/{import_id}/logs")
 async def stream_import_logs(
     import_id: str,
@@ -759,38 +665,9 @@ async def stream_import_logs(
     """
     Stream import logs via Server-Sent Events (SSE)
     """
-    async def event_generator():
-        last_index = 0
-        
-        while True:
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                if status_info.get("status") == "completed" or status_info.get("status") == "failed":
-                    if import_id in import_logs:
-                        logs = import_logs[import_id]
-                        for log in logs[last_index:]:
-                            yield f"data: {json.dumps(log)}\n\n"
-                    
-                    yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
-                    break
-            
-            if import_id in import_logs:
-                logs = import_logs[import_id]
-                if len(logs) > last_index:
-                    for log in logs[last_index:]:
-                        yield f"data: {json.dumps(log)}\n\n"
-                    last_index = len(logs)
-            
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-            
-            import asyncio
-            await asyncio.sleep(0.5)
-    
+    await require_import_job(import_id)
     return StreamingResponse(
-        event_generator(),
+        stream_import_logs_generator(import_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -824,13 +701,8 @@ async def import_employees(
     if not import_id:
         import_id = str(uuid.uuid4())
     
-    import_logs[import_id] = []
-    import_status[import_id] = {
-        "status": "started",
-        "progress": 0,
-        "total": 0,
-        "created_at": dt.now().isoformat()
-    }
+    # Initialize logs and status
+    start_import_job(import_id)
     
     add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
     
@@ -1074,8 +946,11 @@ async def import_employees(
             await db.refresh(employee)
         
         serialized_employees = []
+        photo_urls = await presign_stored_urls(
+            (employee.photo_url for employee in created_employees), EMPLOYEE_PHOTO_PREFIX, repair=True
+        )
         for employee in created_employees:
-            photo_url = regenerate_photo_url(employee.photo_url, employee.id)
+            photo_url = photo_urls.get(employee.photo_url)
             employee_dict = {
                 "id": employee.id,
                 "first_name": employee.first_name,
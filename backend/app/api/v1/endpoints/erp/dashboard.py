@@ -20,7 +20,7 @@ router = APIRouter(prefix="/erp/dashboard", tags=["ERP Portal - Dashboard"])
 
 @router.get("/stats", response_model=ERPDashboardStats)
 @require_permission(Permission.ERP_VIEW_REPORTS)
-@cached(expire=300, key_prefix="erp_dashboard")  # Cache for 5 minutes
+@cached(expire=300, key_prefix="erp_dashboard", stale_ttl=600)  # Cache for 5 minutes, serve stale while refreshing
 async def get_erp_dashboard_stats(
     db: Annotated[AsyncSession, Depends(get_db)],
     current_user: User = Depends(get_current_user),
@@ -40,7 +40,8 @@ async def get_erp_dashboard_stats(
     
     Requires ERP_VIEW_REPORTS permission.
     
-    Results are cached for 5 minutes to improve performance.
+    Results are cached for 5 minutes to improve performance. Expired results
+    are served for up to 10 more minutes while a single worker refreshes them.
     """
     try:
         service = ERPService(db)
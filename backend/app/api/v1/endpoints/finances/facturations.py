@@ -11,13 +11,11 @@ from sqlalchemy import select, func, and_, or_, desc
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 import json
-import os
-import boto3
 from io import BytesIO
-import uuid
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 
 from app.core.database import get_db
+from app.core.pagination import InvalidCursorError
 from app.dependencies import get_current_user
 from app.models.user import User
 from app.models.finance_invoice import FinanceInvoice, FinanceInvoicePayment, FinanceInvoiceStatus
@@ -36,37 +34,29 @@ from app.core.logging import logger
 from app.utils.notifications import create_notification_async
 from app.utils.notification_templates import NotificationTemplates
 from app.models.notification import NotificationType
-from app.services.invoice_pdf_service import InvoicePDFService
+from app.services.pdf_render_service import pdf_render_service
+from app.services.finance_invoice_service import (
+    FinanceInvoiceQueryService,
+    advance_invoice_sequence,
+    reserve_invoice_numbers,
+)
 from app.services.email_service import EmailService
 from app.services.email_templates import EmailTemplates
 from app.services.s3_service import S3Service
 from fastapi.responses import StreamingResponse
 from io import BytesIO
-import uuid
 
 router = APIRouter(prefix="/finances/facturations", tags=["finances-facturations"])
 
 
 async def generate_invoice_number(db: AsyncSession, issue_date: datetime) -> str:
-    """Generate a unique invoice number"""
-    year = issue_date.year
-    # Get the last invoice number for this year
-    result = await db.execute(
-        select(func.max(FinanceInvoice.invoice_number))
-        .where(func.extract('year', FinanceInvoice.issue_date) == year)
-    )
-    last_number = result.scalar()
-    
-    if last_number and last_number.startswith(f'INV-{year}-'):
-        try:
-            last_seq = int(last_number.split('-')[-1])
-            next_seq = last_seq + 1
-        except (ValueError, IndexError):
-            next_seq = 1
-    else:
-        next_seq = 1
+    """
+    Allocate the next invoice number of the issue year
     
-    return f'INV-{year}-{str(next_seq).zfill(3)}'
+    The per-year counter row stays locked until the caller commits (see
+    ``reserve_invoice_numbers``).
+    """
+    return (await reserve_invoice_numbers(db, issue_date.year))[0]
 
 
 def calculate_invoice_status(invoice: FinanceInvoice) -> str:
@@ -99,6 +89,62 @@ def calculate_invoice_status(invoice: FinanceInvoice) -> str:
         return invoice.status.value
 
 
+def _json_field(invoice: FinanceInvoice, name: str, default):
+    """JSON column value; legacy rows may hold a serialized string"""
+    value = getattr(invoice, name)
+    if isinstance(value, type(default)):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, type(default)):
+                return parsed
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning(f"Error parsing {name} for invoice {invoice.id}: {e}")
+    return type(default)()
+
+
+def _invoice_pdf_data(invoice: FinanceInvoice) -> dict:
+    """Invoice snapshot rendered in the PDF (its hash is the PDF cache key)"""
+    return {
+        "id": invoice.id,
+        "invoice_number": invoice.invoice_number,
+        "client_data": _json_field(invoice, "client_data", {}),
+        "line_items": _json_field(invoice, "line_items", []),
+        "subtotal": float(invoice.subtotal),
+        "tax_rate": float(invoice.tax_rate),
+        "tax_amount": float(invoice.tax_amount),
+        "total": float(invoice.total),
+        "issue_date": invoice.issue_date.isoformat() if invoice.issue_date else "",
+        "due_date": invoice.due_date.isoformat() if invoice.due_date else "",
+        "status": invoice.status.value,
+        "amount_paid": float(invoice.amount_paid),
+        "amount_due": float(invoice.amount_due),
+        "terms": invoice.terms or "",
+        "notes": invoice.notes or "",
+    }
+
+
+async def _store_invoice_pdf(invoice: FinanceInvoice, db: AsyncSession) -> bytes:
+    """
+    Render the invoice PDF (cached by content) and keep ``pdf_url`` current
+    
+    The S3 key embeds the snapshot hash: the PDF is only uploaded again
+    when the invoice content changed since the stored one.
+    """
+    digest, pdf = await pdf_render_service.render("invoice", _invoice_pdf_data(invoice))
+    
+    if S3Service.is_configured():
+        file_key = f"invoices/{invoice.user_id}/{invoice.invoice_number}_{digest[:16]}.pdf"
+        if not invoice.pdf_url or file_key not in invoice.pdf_url:
+            try:
+                invoice.pdf_url = await pdf_render_service.upload(pdf, file_key)
+                await db.commit()
+            except Exception as s3_error:
+                logger.warning(f"Failed to upload PDF to S3: {s3_error}")
+    return pdf
+
+
 @router.get("/", response_model=FinanceInvoiceListResponse)
 async def list_facturations(
     db: AsyncSession = Depends(get_db),
@@ -107,101 +153,36 @@ async def list_facturations(
     limit: int = Query(100, ge=1, le=1000),
     status: Optional[str] = Query(None, description="Filter by status"),
     project_id: Optional[int] = Query(None, description="Filter by project ID"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces skip)"),
 ):
     """
     List all invoices (facturations) for the current user
-    """
-    query = select(FinanceInvoice).where(FinanceInvoice.user_id == current_user.id)
     
-    if status:
-        query = query.where(FinanceInvoice.status == status)
-    
-    if project_id:
-        query = query.where(FinanceInvoice.project_id == project_id)
-    
-    # Get total count - use a simpler approach
+    One statement for the page (project names joined, status computed in SQL,
+    total as a window count) plus one for the payments of the page.
+    Following ``next_cursor`` costs the same at any depth, unlike ``skip``.
+    """
     try:
-        count_query = select(func.count(FinanceInvoice.id)).where(FinanceInvoice.user_id == current_user.id)
-        if status:
-            count_query = count_query.where(FinanceInvoice.status == status)
-        if project_id:
-            count_query = count_query.where(FinanceInvoice.project_id == project_id)
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-    except Exception as e:
-        logger.error(f"Error counting invoices: {e}", exc_info=True)
-        total = 0
-    
-    # Get invoices with payments
-    query = query.options(selectinload(FinanceInvoice.payments))
-    query = query.order_by(desc(FinanceInvoice.issue_date))
-    query = query.offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    invoices = result.scalars().all()
+        rows, total, next_cursor = await FinanceInvoiceQueryService(db).list_page(
+            current_user.id, skip, limit, status=status, project_id=project_id, cursor=cursor
+        )
+    except InvalidCursorError:
+        # ``status`` is the filter parameter here
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
     # Convert to response format
     invoice_responses = []
-    for invoice in invoices:
-        # Calculate actual status
-        actual_status = calculate_invoice_status(invoice)
-        
-        # Get project name if project_id exists
-        project_name = None
-        if invoice.project_id:
-            project_result = await db.execute(
-                select(Project).where(Project.id == invoice.project_id)
-            )
-            project = project_result.scalar_one_or_none()
-            if project:
-                project_name = project.name
-        
-        # Convert payments
-        payments = [
-            PaymentResponse(
-                id=payment.id,
-                invoice_id=payment.invoice_id,
-                amount=payment.amount,
-                payment_date=payment.payment_date,
-                payment_method=payment.payment_method,
-                reference=payment.reference,
-                notes=payment.notes,
-                created_at=payment.created_at,
-                updated_at=payment.updated_at,
-            )
-            for payment in invoice.payments
-        ]
-        
-        # Safely parse JSON fields
-        try:
-            client_data = invoice.client_data
-            if not isinstance(client_data, dict):
-                if isinstance(client_data, str):
-                    client_data = json.loads(client_data) if client_data else {}
-                else:
-                    client_data = {}
-        except (json.JSONDecodeError, TypeError) as e:
-            logger.warning(f"Error parsing client_data for invoice {invoice.id}: {e}")
-            client_data = {}
-        
-        try:
-            line_items = invoice.line_items
-            if not isinstance(line_items, list):
-                if isinstance(line_items, str):
-                    line_items = json.loads(line_items) if line_items else []
-                else:
-                    line_items = []
-        except (json.JSONDecodeError, TypeError) as e:
-            logger.warning(f"Error parsing line_items for invoice {invoice.id}: {e}")
-            line_items = []
+    for invoice, project_name, actual_status in rows:
+        payments = [PaymentResponse.model_validate(payment) for payment in invoice.payments]
         
         invoice_data = {
             "id": invoice.id,
             "user_id": invoice.user_id,
             "invoice_number": invoice.invoice_number,
             "project_id": invoice.project_id,
-            "client_data": client_data,
-            "line_items": line_items,
+            "project_name": project_name,
+            "client_data": _json_field(invoice, "client_data", {}),
+            "line_items": _json_field(invoice, "line_items", []),
             "subtotal": invoice.subtotal,
             "tax_rate": float(invoice.tax_rate) if invoice.tax_rate is not None else 0.0,
             "tax_amount": invoice.tax_amount,
@@ -232,6 +213,73 @@ async def list_facturations(
         total=total,
         skip=skip,
         limit=limit,
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/stats")
+async def get_invoice_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+):
+    """
+    Get invoice statistics
+    
+    All buckets come from one aggregate query, overdue included.
+    """
+    return await FinanceInvoiceQueryService(db).stats(current_user.id, start_date=start_date, end_date=end_date)
+
+
+@router.get("/pdf-archive")
+async def download_invoices_pdf_archive(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download the PDFs of every invoice issued in a month as one ZIP archive
+    
+    Invoices are rendered in parallel across the PDF workers; unchanged ones
+    come from the PDF cache.
+    """
+    period_start = datetime(year, month, 1, tzinfo=timezone.utc)
+    period_end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+    result = await db.execute(
+        select(FinanceInvoice)
+        .where(FinanceInvoice.user_id == current_user.id)
+        .where(FinanceInvoice.issue_date >= period_start)
+        .where(FinanceInvoice.issue_date < period_end)
+        .order_by(FinanceInvoice.issue_date, FinanceInvoice.id)
+    )
+    invoices = result.scalars().all()
+    
+    if not invoices:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No invoices issued in this period"
+        )
+    
+    try:
+        archive = await pdf_render_service.render_zip("invoice", [
+            (f"facture_{invoice.invoice_number}.pdf", _invoice_pdf_data(invoice))
+            for invoice in invoices
+        ])
+    except Exception as e:
+        logger.error(f"Failed to build PDF archive for {year}-{month:02d}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to generate PDF archive: {str(e)}"
+        )
+    
+    return Response(
+        content=archive,
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="factures_{year}-{month:02d}.zip"'
+        }
     )
 
 
@@ -339,6 +387,9 @@ async def create_facturation(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invoice number {invoice_number} already exists"
         )
+    if invoice_data.invoice_number:
+        # Keep the sequence from handing out this number later
+        await advance_invoice_sequence(db, invoice_number)
     
     # Calculate amounts if not provided
     subtotal = invoice_data.subtotal
@@ -690,38 +741,8 @@ async def send_facturation(
                 if not pdf_url:
                     # Generate PDF and upload to S3
                     try:
-                        invoice_dict = {
-                            "id": invoice.id,
-                            "invoice_number": invoice.invoice_number,
-                            "client_data": client_data,
-                            "line_items": invoice.line_items if isinstance(invoice.line_items, list) else json.loads(invoice.line_items) if invoice.line_items else [],
-                            "subtotal": float(invoice.subtotal),
-                            "tax_rate": float(invoice.tax_rate),
-                            "tax_amount": float(invoice.tax_amount),
-                            "total": float(invoice.total),
-                            "issue_date": invoice.issue_date.isoformat() if invoice.issue_date else "",
-                            "due_date": invoice.due_date.isoformat() if invoice.due_date else "",
-                            "status": invoice.status.value,
-                            "amount_paid": float(invoice.amount_paid),
-                            "amount_due": float(invoice.amount_due),
-                            "terms": invoice.terms or "",
-                            "notes": invoice.notes or "",
-                        }
-                        pdf_buffer = InvoicePDFService.generate_pdf(invoice_dict)
-                        
-                        # Upload PDF to S3
-                        if S3Service.is_configured():
-                            s3_service = S3Service()
-                            file_key = f"invoices/{invoice.user_id}/{invoice.invoice_number}_{uuid.uuid4().hex[:8]}.pdf"
-                            s3_client.put_object(
-                                Bucket=os.getenv("AWS_S3_BUCKET"),
-                                Key=file_key,
-                                Body=pdf_buffer.getvalue(),
-                                ContentType="application/pdf",
-                            )
-                            pdf_url = s3_service.generate_presigned_url(file_key, expiration=604800)  # 7 days
-                            invoice.pdf_url = pdf_url
-                            await db.commit()
+                        await _store_invoice_pdf(invoice, db)
+                        pdf_url = invoice.pdf_url
                     except Exception as pdf_error:
                         logger.error(f"Failed to generate PDF for invoice {invoice.id}: {pdf_error}", exc_info=True)
                 
@@ -993,56 +1014,12 @@ async def generate_invoice_pdf(
         )
     
     try:
-        # Prepare invoice data for PDF generation
-        invoice_dict = {
-            "id": invoice.id,
-            "invoice_number": invoice.invoice_number,
-            "client_data": invoice.client_data if isinstance(invoice.client_data, dict) else json.loads(invoice.client_data) if invoice.client_data else {},
-            "line_items": invoice.line_items if isinstance(invoice.line_items, list) else json.loads(invoice.line_items) if invoice.line_items else [],
-            "subtotal": float(invoice.subtotal),
-            "tax_rate": float(invoice.tax_rate),
-            "tax_amount": float(invoice.tax_amount),
-            "total": float(invoice.total),
-            "issue_date": invoice.issue_date.isoformat() if invoice.issue_date else "",
-            "due_date": invoice.due_date.isoformat() if invoice.due_date else "",
-            "status": invoice.status.value,
-            "amount_paid": float(invoice.amount_paid),
-            "amount_due": float(invoice.amount_due),
-            "terms": invoice.terms or "",
-            "notes": invoice.notes or "",
-        }
-        
-        # Generate PDF
-        pdf_buffer = InvoicePDFService.generate_pdf(invoice_dict)
-        
-        # Upload to S3 if configured
-        if S3Service.is_configured() and not invoice.pdf_url:
-            try:
-                s3_service = S3Service()
-                file_key = f"invoices/{invoice.user_id}/{invoice.invoice_number}_{uuid.uuid4().hex[:8]}.pdf"
-                s3_client = boto3.client(
-                    's3',
-                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-                    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-                    region_name=os.getenv("AWS_REGION", "us-east-1"),
-                    endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL"),
-                )
-                s3_client.put_object(
-                    Bucket=os.getenv("AWS_S3_BUCKET"),
-                    Key=file_key,
-                    Body=pdf_buffer.getvalue(),
-                    ContentType="application/pdf",
-                )
-                pdf_url = s3_service.generate_presigned_url(file_key, expiration=604800)  # 7 days
-                invoice.pdf_url = pdf_url
-                await db.commit()
-            except Exception as s3_error:
-                logger.warning(f"Failed to upload PDF to S3: {s3_error}")
+        # Rendered in a worker process, or served from the PDF cache when unchanged
+        pdf = await _store_invoice_pdf(invoice, db)
         
         # Return PDF as download
-        pdf_buffer.seek(0)
         return StreamingResponse(
-            pdf_buffer,
+            BytesIO(pdf),
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f'attachment; filename="facture_{invoice.invoice_number}.pdf"'
@@ -1101,48 +1078,7 @@ async def send_invoice_email(
         # For now, we'll generate it inline if needed
         if not invoice.pdf_url:
             try:
-                invoice_dict = {
-                    "id": invoice.id,
-                    "invoice_number": invoice.invoice_number,
-                    "client_data": client_data,
-                    "line_items": invoice.line_items if isinstance(invoice.line_items, list) else json.loads(invoice.line_items) if invoice.line_items else [],
-                    "subtotal": float(invoice.subtotal),
-                    "tax_rate": float(invoice.tax_rate),
-                    "tax_amount": float(invoice.tax_amount),
-                    "total": float(invoice.total),
-                    "issue_date": invoice.issue_date.isoformat() if invoice.issue_date else "",
-                    "due_date": invoice.due_date.isoformat() if invoice.due_date else "",
-                    "status": invoice.status.value,
-                    "amount_paid": float(invoice.amount_paid),
-                    "amount_due": float(invoice.amount_due),
-                    "terms": invoice.terms or "",
-                    "notes": invoice.notes or "",
-                }
-                pdf_buffer = InvoicePDFService.generate_pdf(invoice_dict)
-                
-                # Upload to S3 if configured
-                if S3Service.is_configured():
-                    try:
-                        s3_service = S3Service()
-                        file_key = f"invoices/{invoice.user_id}/{invoice.invoice_number}_{uuid.uuid4().hex[:8]}.pdf"
-                        s3_client_inst = boto3.client(
-                            's3',
-                            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-                            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-                            region_name=os.getenv("AWS_REGION", "us-east-1"),
-                            endpoint_url=os.getenv("AWS_S3_ENDPOINT_URL"),
-                        )
-                        s3_client_inst.put_object(
-                            Bucket=os.getenv("AWS_S3_BUCKET"),
-                            Key=file_key,
-                            Body=pdf_buffer.getvalue(),
-                            ContentType="application/pdf",
-                        )
-                        pdf_url = s3_service.generate_presigned_url(file_key, expiration=604800)  # 7 days
-                        invoice.pdf_url = pdf_url
-                        await db.commit()
-                    except Exception as s3_error:
-                        logger.warning(f"Failed to upload PDF to S3: {s3_error}")
+                await _store_invoice_pdf(invoice, db)
             except Exception as pdf_error:
                 logger.warning(f"Failed to generate PDF: {pdf_error}")
         
@@ -1439,61 +1375,6 @@ async def remind_invoice(
     return FinanceInvoiceResponse(**invoice_response_data)
 
 
-@router.get("/stats")
-async def get_invoice_stats(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    start_date: Optional[datetime] = Query(None),
-    end_date: Optional[datetime] = Query(None),
-):
-    """
-    Get invoice statistics
-    """
-    query = select(FinanceInvoice).where(FinanceInvoice.user_id == current_user.id)
-    
-    if start_date:
-        query = query.where(FinanceInvoice.issue_date >= start_date)
-    if end_date:
-        query = query.where(FinanceInvoice.issue_date <= end_date)
-    
-    result = await db.execute(query)
-    invoices = result.scalars().all()
-    
-    total_amount = sum(float(inv.total) for inv in invoices)
-    paid_amount = sum(float(inv.amount_paid) for inv in invoices)
-    pending_amount = sum(float(inv.amount_due) for inv in invoices if inv.status in [FinanceInvoiceStatus.SENT, FinanceInvoiceStatus.DRAFT])
-    overdue_amount = sum(float(inv.amount_due) for inv in invoices if calculate_invoice_status(inv) == "overdue")
-    
-    stats = {
-        "total": {
-            "amount": total_amount,
-            "count": len(invoices),
-        },
-        "paid": {
-            "amount": paid_amount,
-            "count": len([inv for inv in invoices if inv.status == FinanceInvoiceStatus.PAID]),
-        },
-        "pending": {
-            "amount": pending_amount,
-            "count": len([inv for inv in invoices if inv.status in [FinanceInvoiceStatus.SENT, FinanceInvoiceStatus.DRAFT]]),
-        },
-        "overdue": {
-            "amount": overdue_amount,
-            "count": len([inv for inv in invoices if calculate_invoice_status(inv) == "overdue"]),
-        },
-        "by_status": {
-            "draft": len([inv for inv in invoices if inv.status == FinanceInvoiceStatus.DRAFT]),
-            "sent": len([inv for inv in invoices if inv.status == FinanceInvoiceStatus.SENT]),
-            "paid": len([inv for inv in invoices if inv.status == FinanceInvoiceStatus.PAID]),
-            "partial": len([inv for inv in invoices if calculate_invoice_status(inv) == "partial"]),
-            "overdue": len([inv for inv in invoices if calculate_invoice_status(inv) == "overdue"]),
-            "cancelled": len([inv for inv in invoices if inv.status == FinanceInvoiceStatus.CANCELLED]),
-        },
-    }
-    
-    return stats
-
-
 @router.get("/export")
 async def export_invoices(
     db: AsyncSession = Depends(get_db),
@@ -9,6 +9,7 @@ from sqlalchemy import select, func, and_, or_, cast, String, case, text
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+import asyncio
 import zipfile
 import os
 import json
@@ -23,6 +24,10 @@ from app.models.transaction_category import TransactionCategory, TransactionType
 from app.models.invoice import Invoice, InvoiceStatus
 from app.models.expense_account import ExpenseAccount, ExpenseAccountStatus
 from app.core.logging import logger
+from app.models.treasury_ledger import apply_ledger_deltas, ledger_deltas_for_rows
+from app.services.bulk_import import BulkImporter, detect_format, fingerprint_file, iter_rows, open_import_source
+from app.services.transaction_import import parse_transaction_row
+from app.services.treasury_ledger_service import TreasuryLedgerService
 from app.utils.notifications import create_notification_async
 from app.utils.notification_templates import NotificationTemplates
 from app.models.notification import NotificationType
@@ -729,28 +734,9 @@ async def create_transaction(
                 )
                 logger.info(f"Created notification for large transaction {transaction.id}")
             
-            # Check for low balance after transaction
-            entries_query = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                and_(
-                    Transaction.user_id == current_user.id,
-                    Transaction.type == TransactionTypeEnum.REVENUE,
-                    cast(Transaction.status, String) != TransactionStatus.CANCELLED.value
-                )
-            )
-            exits_query = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-                and_(
-                    Transaction.user_id == current_user.id,
-                    Transaction.type == TransactionTypeEnum.EXPENSE,
-                    cast(Transaction.status, String) != TransactionStatus.CANCELLED.value
-                )
-            )
-            
-            entries_result = await db.execute(entries_query)
-            exits_result = await db.execute(exits_query)
-            
-            entries_sum = entries_result.scalar() or Decimal(0)
-            exits_sum = exits_result.scalar() or Decimal(0)
-            current_balance = account.initial_balance + entries_sum - exits_sum
+            # Check for low balance after transaction (ledger is maintained on flush)
+            net_to_date = await TreasuryLedgerService(db).balance_at(current_user.id, datetime.utcnow())
+            current_balance = account.initial_balance + net_to_date
             
             # Alert for low balance (< $10,000)
             if current_balance < Decimal(10000):
@@ -910,7 +896,7 @@ async def get_weekly_cashflow(
     date_from: Optional[datetime] = Query(None, description="Start date (default: today)"),
     date_to: Optional[datetime] = Query(None, description="End date (default: +12 weeks)"),
 ):
-    """Get weekly cashflow for the specified period"""
+    """Get weekly cashflow for the specified period (read from the treasury ledger)"""
     try:
         # Default dates: today to 12 weeks from now
         if not date_from:
@@ -918,156 +904,33 @@ async def get_weekly_cashflow(
         if not date_to:
             date_to = date_from + timedelta(weeks=12)
         
-        # Check which columns exist in the database
-        columns_result = await db.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'transactions'
-        """))
-        existing_columns = {row[0] for row in columns_result}
-        
-        # Determine date column to use
-        date_column = 'transaction_date' if 'transaction_date' in existing_columns else ('date' if 'date' in existing_columns else 'created_at')
-        
-        # Build query using raw SQL to avoid column mismatch issues
-        # Only select columns that exist and are needed
-        select_columns = ['id', 'user_id', 'type', 'amount', 'status']
-        if date_column in existing_columns:
-            select_columns.append(date_column)
-        
-        # Build WHERE clause
-        where_clause = f"user_id = :user_id AND {date_column} >= :date_from AND {date_column} <= :date_to AND CAST(status AS VARCHAR) != :status_cancelled"
-        
-        sql_query = f"""
-            SELECT {', '.join(select_columns)}
-            FROM transactions
-            WHERE {where_clause}
-        """
-        
-        params = {
-            "user_id": current_user.id,
-            "date_from": date_from,
-            "date_to": date_to,
-            "status_cancelled": TransactionStatus.CANCELLED.value
-        }
-        
-        result = await db.execute(text(sql_query), params)
-        rows = result.fetchall()
-        
-        # Convert rows to transaction-like objects
-        transactions = []
-        for row in rows:
-            row_dict = dict(zip(result.keys(), row))
-            # Create a simple object with the fields we need
-            class SimpleTransaction:
-                def __init__(self, row_dict):
-                    self.id = row_dict.get('id')
-                    self.type = TransactionTypeEnum.REVENUE if row_dict.get('type') in ['revenue', 'entry', 'entree', 'entrée'] else TransactionTypeEnum.EXPENSE
-                    self.amount = Decimal(str(row_dict.get('amount', 0)))
-                    self.transaction_date = row_dict.get(date_column) or row_dict.get('created_at') or date_from
-                    self.status = TransactionStatus(row_dict.get('status', 'pending'))
-            
-            transactions.append(SimpleTransaction(row_dict))
-        
         # Note: Transaction model doesn't have bank_account_id field
         # Filtering by bank_account_id is not supported for Transaction model
-        # For now, we'll use all transactions for the user
         if bank_account_id:
             logger.warning(f"bank_account_id filter requested but Transaction model doesn't support it, using all transactions")
         
-        # Get initial balance - calculate from all transactions before date_from
-        # Since Transaction model doesn't have bank_account_id, we calculate balance from all user transactions
-        # Sum revenues (positive) and subtract expenses (negative)
-        revenue_query = text(f"""
-            SELECT COALESCE(SUM(amount), 0)
-            FROM transactions
-            WHERE user_id = :user_id 
-            AND {date_column} < :date_from
-            AND type = :type_revenue
-            AND CAST(status AS VARCHAR) != :status_cancelled
-        """)
-        expense_query = text(f"""
-            SELECT COALESCE(SUM(amount), 0)
-            FROM transactions
-            WHERE user_id = :user_id 
-            AND {date_column} < :date_from
-            AND type = :type_expense
-            AND CAST(status AS VARCHAR) != :status_cancelled
-        """)
-        
-        balance_params = {
-            "user_id": current_user.id,
-            "date_from": date_from,
-            "type_revenue": TransactionTypeEnum.REVENUE.value,
-            "type_expense": TransactionTypeEnum.EXPENSE.value,
-            "status_cancelled": TransactionStatus.CANCELLED.value
-        }
-        revenue_result = await db.execute(revenue_query, balance_params)
-        expense_result = await db.execute(expense_query, balance_params)
-        total_revenues = Decimal(str(revenue_result.scalar() or 0))
-        total_expenses = Decimal(str(expense_result.scalar() or 0))
-        initial_balance = total_revenues - total_expenses
-        
-        # Group transactions by week
-        weeks_data = {}
-        current_date = date_from
-        
-        while current_date <= date_to:
-            week_start = current_date - timedelta(days=current_date.weekday())
-            week_end = week_start + timedelta(days=6)
-            
-            week_key = week_start.isoformat()
-            if week_key not in weeks_data:
-                weeks_data[week_key] = {
-                    "week_start": week_start,
-                    "week_end": week_end,
-                    "entries": Decimal(0),
-                    "exits": Decimal(0),
-                    "is_projected": week_start > datetime.utcnow()
-                }
-            
-            current_date = week_end + timedelta(days=1)
+        ledger = TreasuryLedgerService(db)
+        initial_balance, ledger_weeks = await ledger.weekly_cashflow(current_user.id, date_from, date_to)
         
-        # Process transactions
-        for transaction in transactions:
-            transaction_date = transaction.transaction_date
-            if not transaction_date:
-                logger.warning(f"Transaction {transaction.id} has no transaction_date, skipping")
-                continue
-            # Ensure transaction_date is a datetime object
-            if isinstance(transaction_date, str):
-                try:
-                    transaction_date = datetime.fromisoformat(transaction_date.replace('Z', '+00:00'))
-                except:
-                    logger.warning(f"Could not parse transaction_date {transaction_date}, skipping")
-                    continue
-            week_start = transaction_date - timedelta(days=transaction_date.weekday())
-            week_key = week_start.isoformat()
-            
-            if week_key in weeks_data:
-                # Transaction.type is an enum: TransactionTypeEnum.REVENUE or TransactionTypeEnum.EXPENSE
-                # Map to entry/exit for cashflow calculation
-                if transaction.type == TransactionTypeEnum.REVENUE:
-                    weeks_data[week_key]["entries"] += transaction.amount
-                elif transaction.type == TransactionTypeEnum.EXPENSE:
-                    weeks_data[week_key]["exits"] += transaction.amount
-        
-        # Calculate balances
+        today = datetime.utcnow().date()
         weeks = []
-        current_balance = initial_balance
         total_entries = Decimal(0)
         total_exits = Decimal(0)
+        current_balance = initial_balance
         
-        for week_key in sorted(weeks_data.keys()):
-            week_data = weeks_data[week_key]
-            # Calculate balance: accumulate from initial balance
-            current_balance = current_balance + week_data["entries"] - week_data["exits"]
-            week_data["balance"] = current_balance
-            
-            total_entries += week_data["entries"]
-            total_exits += week_data["exits"]
-            
-            weeks.append(CashflowWeek(**week_data))
+        for week in ledger_weeks:
+            week_start = datetime.combine(week.week_start, datetime.min.time())
+            weeks.append(CashflowWeek(
+                week_start=week_start,
+                week_end=datetime.combine(week.week_end, datetime.min.time()),
+                entries=week.entries,
+                exits=week.exits,
+                balance=week.balance,
+                is_projected=week.week_start > today,
+            ))
+            total_entries += week.entries
+            total_exits += week.exits
+            current_balance = week.balance
         
         return CashflowResponse(
             weeks=weeks,
@@ -1093,239 +956,51 @@ async def get_treasury_stats(
     bank_account_id: Optional[int] = Query(None, description="Filter by bank account"),
     period_days: int = Query(30, ge=1, le=365, description="Period in days"),
 ):
-    """Get treasury statistics"""
+    """Get treasury statistics (read from the treasury ledger)"""
     try:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=period_days)
         
-        # Check which columns exist in the database
-        columns_result = await db.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'transactions'
-        """))
-        existing_columns = {row[0] for row in columns_result}
-        
-        # Determine date column to use
-        date_column = 'transaction_date' if 'transaction_date' in existing_columns else ('date' if 'date' in existing_columns else 'created_at')
-        
-        # Build query using raw SQL to avoid column mismatch issues
-        select_columns = ['id', 'user_id', 'type', 'amount', 'status']
-        if date_column in existing_columns:
-            select_columns.append(date_column)
-        
-        # Build WHERE clause
-        where_clause = f"user_id = :user_id AND {date_column} >= :start_date AND {date_column} <= :end_date AND CAST(status AS VARCHAR) != :status_cancelled"
-        
-        sql_query = f"""
-            SELECT {', '.join(select_columns)}
-            FROM transactions
-            WHERE {where_clause}
-        """
-        
-        params = {
-            "user_id": current_user.id,
-            "start_date": start_date,
-            "end_date": end_date,
-            "status_cancelled": TransactionStatus.CANCELLED.value
-        }
-        
         # Note: Transaction model doesn't have bank_account_id field
         # Filtering by bank_account_id is not supported for Transaction model
         if bank_account_id:
             logger.warning(f"bank_account_id filter requested but Transaction model doesn't support it, using all transactions")
         
-        result = await db.execute(text(sql_query), params)
-        rows = result.fetchall()
-        
-        # Convert rows to transaction-like objects
-        transactions = []
-        for row in rows:
-            row_dict = dict(zip(result.keys(), row))
-            # Create a simple object with the fields we need
-            class SimpleTransaction:
-                def __init__(self, row_dict):
-                    self.id = row_dict.get('id')
-                    self.type = TransactionTypeEnum.REVENUE if row_dict.get('type') in ['revenue', 'entry', 'entree', 'entrée'] else TransactionTypeEnum.EXPENSE
-                    self.amount = Decimal(str(row_dict.get('amount', 0)))
-                    self.transaction_date = row_dict.get(date_column) or row_dict.get('created_at') or start_date
-                    self.status = TransactionStatus(row_dict.get('status', 'pending'))
-            
-            transactions.append(SimpleTransaction(row_dict))
+        ledger = TreasuryLedgerService(db)
         
-        # Calculate totals
-        total_entries = sum(t.amount for t in transactions if t.type == TransactionTypeEnum.REVENUE)
-        total_exits = sum(t.amount for t in transactions if t.type == TransactionTypeEnum.EXPENSE)
+        # Totals for the period
+        total_entries, total_exits = await ledger.totals(current_user.id, start_date, end_date)
         
-        # Get current balance
+        # Opening balances of the selected account (or of all accounts)
+        accounts_query = select(func.coalesce(func.sum(BankAccount.initial_balance), 0)).where(
+            BankAccount.user_id == current_user.id
+        )
         if bank_account_id:
             account_result = await db.execute(
-                select(BankAccount).where(
+                select(BankAccount.id).where(
                     and_(
                         BankAccount.id == bank_account_id,
                         BankAccount.user_id == current_user.id
                     )
                 )
             )
-            account = account_result.scalar_one_or_none()
-            if not account:
+            if account_result.scalar_one_or_none() is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Bank account not found"
                 )
-            initial_balance = account.initial_balance
-            
-            # Calculate current balance
-            entries_query = text(f"""
-                SELECT COALESCE(SUM(amount), 0)
-                FROM transactions
-                WHERE user_id = :user_id 
-                AND type = :type_revenue
-                AND CAST(status AS VARCHAR) != :status_cancelled
-            """)
-            exits_query = text(f"""
-                SELECT COALESCE(SUM(amount), 0)
-                FROM transactions
-                WHERE user_id = :user_id 
-                AND type = :type_expense
-                AND CAST(status AS VARCHAR) != :status_cancelled
-            """)
-            
-            balance_params = {
-                "user_id": current_user.id,
-                "type_revenue": TransactionTypeEnum.REVENUE.value,
-                "type_expense": TransactionTypeEnum.EXPENSE.value,
-                "status_cancelled": TransactionStatus.CANCELLED.value
-            }
-            
-            entries_result = await db.execute(entries_query, balance_params)
-            exits_result = await db.execute(exits_query, balance_params)
-            
-            entries_sum = Decimal(str(entries_result.scalar() or 0))
-            exits_sum = Decimal(str(exits_result.scalar() or 0))
-            
-            current_balance = initial_balance + entries_sum - exits_sum
-        else:
-            # Sum all accounts
-            accounts_result = await db.execute(
-                select(BankAccount).where(BankAccount.user_id == current_user.id)
-            )
-            accounts = accounts_result.scalars().all()
-            
-            current_balance = Decimal(0)
-            for account in accounts:
-                entries_query = text(f"""
-                    SELECT COALESCE(SUM(amount), 0)
-                    FROM transactions
-                    WHERE user_id = :user_id 
-                    AND type = :type_revenue
-                    AND CAST(status AS VARCHAR) != :status_cancelled
-                """)
-                exits_query = text(f"""
-                    SELECT COALESCE(SUM(amount), 0)
-                    FROM transactions
-                    WHERE user_id = :user_id 
-                    AND type = :type_expense
-                    AND CAST(status AS VARCHAR) != :status_cancelled
-                """)
-                
-                balance_params = {
-                    "user_id": current_user.id,
-                    "type_revenue": TransactionTypeEnum.REVENUE.value,
-                    "type_expense": TransactionTypeEnum.EXPENSE.value,
-                    "status_cancelled": TransactionStatus.CANCELLED.value
-                }
-                
-                entries_result = await db.execute(entries_query, balance_params)
-                exits_result = await db.execute(exits_query, balance_params)
-                
-                entries_sum = Decimal(str(entries_result.scalar() or 0))
-                exits_sum = Decimal(str(exits_result.scalar() or 0))
-                
-                current_balance += account.initial_balance + entries_sum - exits_sum
+            accounts_query = accounts_query.where(BankAccount.id == bank_account_id)
+        initial_balance = Decimal(str((await db.execute(accounts_query)).scalar() or 0))
         
-        # Calculate projected balance (30 days)
-        projected_date = end_date + timedelta(days=30)
-        projected_query = text(f"""
-            SELECT {', '.join(select_columns)}
-            FROM transactions
-            WHERE user_id = :user_id 
-            AND {date_column} > :end_date 
-            AND {date_column} <= :projected_date
-            AND CAST(status AS VARCHAR) != :status_cancelled
-        """)
-        
-        projected_params = {
-            "user_id": current_user.id,
-            "end_date": end_date,
-            "projected_date": projected_date,
-            "status_cancelled": TransactionStatus.CANCELLED.value
-        }
-        
-        if bank_account_id:
-            # Note: Transaction model doesn't have bank_account_id, ignoring filter
-            logger.warning(f"bank_account_id filter requested but Transaction model doesn't support it")
-        
-        projected_result = await db.execute(projected_query, projected_params)
-        projected_rows = projected_result.fetchall()
-        
-        # Convert rows to transaction-like objects
-        projected_transactions = []
-        for row in projected_rows:
-            row_dict = dict(zip(projected_result.keys(), row))
-            class SimpleTransaction:
-                def __init__(self, row_dict):
-                    self.id = row_dict.get('id')
-                    self.type = TransactionTypeEnum.REVENUE if row_dict.get('type') in ['revenue', 'entry', 'entree', 'entrée'] else TransactionTypeEnum.EXPENSE
-                    self.amount = Decimal(str(row_dict.get('amount', 0)))
-                    self.transaction_date = row_dict.get(date_column) or row_dict.get('created_at') or end_date
-                    self.status = TransactionStatus(row_dict.get('status', 'pending'))
-            projected_transactions.append(SimpleTransaction(row_dict))
-        
-        projected_entries = sum(t.amount for t in projected_transactions if t.type == TransactionTypeEnum.REVENUE)
-        projected_exits = sum(t.amount for t in projected_transactions if t.type == TransactionTypeEnum.EXPENSE)
-        projected_balance = current_balance + projected_entries - projected_exits
+        # Current balance as of today, projected balance in 30 days
+        current_balance = initial_balance + await ledger.balance_at(current_user.id, end_date)
+        projected_balance = initial_balance + await ledger.balance_at(current_user.id, end_date + timedelta(days=30))
         
         # Calculate variation (vs previous period)
         prev_start_date = start_date - timedelta(days=period_days)
-        prev_query = text(f"""
-            SELECT {', '.join(select_columns)}
-            FROM transactions
-            WHERE user_id = :user_id 
-            AND {date_column} >= :prev_start_date 
-            AND {date_column} < :start_date
-            AND CAST(status AS VARCHAR) != :status_cancelled
-        """)
-        
-        prev_params = {
-            "user_id": current_user.id,
-            "prev_start_date": prev_start_date,
-            "start_date": start_date,
-            "status_cancelled": TransactionStatus.CANCELLED.value
-        }
-        
-        if bank_account_id:
-            # Note: Transaction model doesn't have bank_account_id, ignoring filter
-            logger.warning(f"bank_account_id filter requested but Transaction model doesn't support it")
-        
-        prev_result = await db.execute(prev_query, prev_params)
-        prev_rows = prev_result.fetchall()
-        
-        # Convert rows to transaction-like objects
-        prev_transactions = []
-        for row in prev_rows:
-            row_dict = dict(zip(prev_result.keys(), row))
-            class SimpleTransaction:
-                def __init__(self, row_dict):
-                    self.id = row_dict.get('id')
-                    self.type = TransactionTypeEnum.REVENUE if row_dict.get('type') in ['revenue', 'entry', 'entree', 'entrée'] else TransactionTypeEnum.EXPENSE
-                    self.amount = Decimal(str(row_dict.get('amount', 0)))
-                    self.transaction_date = row_dict.get(date_column) or row_dict.get('created_at') or prev_start_date
-                    self.status = TransactionStatus(row_dict.get('status', 'pending'))
-            prev_transactions.append(SimpleTransaction(row_dict))
-        
-        prev_total_entries = sum(t.amount for t in prev_transactions if t.type == TransactionTypeEnum.REVENUE)
-        prev_total_exits = sum(t.amount for t in prev_transactions if t.type == TransactionTypeEnum.EXPENSE)
+        prev_total_entries, prev_total_exits = await ledger.totals(
+            current_user.id, prev_start_date, start_date - timedelta(days=1)
+        )
         prev_net = prev_total_entries - prev_total_exits
         current_net = total_entries - total_exits
         
@@ -1334,10 +1009,10 @@ async def get_treasury_stats(
             variation_percent = ((current_net - prev_net) / abs(prev_net)) * 100
         
         return TreasuryStats(
-            total_entries=Decimal(str(total_entries)),
-            total_exits=Decimal(str(total_exits)),
-            current_balance=Decimal(str(current_balance)),
-            projected_balance_30d=Decimal(str(projected_balance)),
+            total_entries=total_entries,
+            total_exits=total_exits,
+            current_balance=current_balance,
+            projected_balance_30d=projected_balance,
             variation_percent=Decimal(str(variation_percent)) if variation_percent else None
         )
     except HTTPException:
@@ -1803,38 +1478,12 @@ async def get_treasury_alerts(
         accounts_result = await db.execute(accounts_query)
         accounts = accounts_result.scalars().all()
         
+        # Net of all transactions to date, read once from the ledger
+        net_to_date = await TreasuryLedgerService(db).balance_at(current_user.id, today)
+        
         low_balance_accounts = []
         for account in accounts:
-            # Calculate current balance
-            entries_query = text("""
-                SELECT COALESCE(SUM(amount), 0)
-                FROM transactions
-                WHERE user_id = :user_id 
-                AND type = :type_revenue
-                AND CAST(status AS VARCHAR) != :status_cancelled
-            """)
-            exits_query = text("""
-                SELECT COALESCE(SUM(amount), 0)
-                FROM transactions
-                WHERE user_id = :user_id 
-                AND type = :type_expense
-                AND CAST(status AS VARCHAR) != :status_cancelled
-            """)
-            
-            balance_params = {
-                "user_id": current_user.id,
-                "type_revenue": TransactionTypeEnum.REVENUE.value,
-                "type_expense": TransactionTypeEnum.EXPENSE.value,
-                "status_cancelled": TransactionStatus.CANCELLED.value
-            }
-            
-            entries_result = await db.execute(entries_query, balance_params)
-            exits_result = await db.execute(exits_query, balance_params)
-            
-            entries_sum = Decimal(str(entries_result.scalar() or 0))
-            exits_sum = Decimal(str(exits_result.scalar() or 0))
-            
-            current_balance = account.initial_balance + entries_sum - exits_sum
+            current_balance = account.initial_balance + net_to_date
             
             if current_balance < low_balance_threshold:
                 low_balance_accounts.append({
@@ -1859,27 +1508,6 @@ async def get_treasury_alerts(
 
 # ==================== Import Endpoints ====================
 
-def normalize_field_name(field_name: str) -> str:
-    """Normalize field name for flexible matching"""
-    if not field_name:
-        return ""
-    # Remove accents, lowercase, strip
-    import unicodedata
-    normalized = unicodedata.normalize('NFD', field_name.lower().strip())
-    normalized = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
-    return normalized.replace(' ', '_').replace('-', '_')
-
-
-def get_field_value(row_data: Dict[str, Any], possible_names: List[str]) -> Optional[Any]:
-    """Get field value from row using multiple possible column names"""
-    for name in possible_names:
-        normalized_name = normalize_field_name(name)
-        for key, value in row_data.items():
-            if normalize_field_name(key) == normalized_name:
-                return value if value else None
-    return None
-
-
 @router.post("/import")
 async def import_transactions(
     file: UploadFile = File(...),
@@ -1914,335 +1542,141 @@ async def import_transactions(
     - Reference: reference, reference_number, numero_reference, numero
     - Notes: notes, remarques, commentaires
     
+    Rows are streamed and written in chunks of BULK_IMPORT_CHUNK_SIZE, each
+    committed on its own. Uploading the same file again after a failure
+    resumes after the last committed chunk.
+    
     Returns:
         Import results with created transactions, errors, and warnings
     """
+    source = None
     try:
-        from app.services.import_service import ImportService
-        
-        # Read file content
-        file_content = await file.read()
-        filename = file.filename or ""
-        file_ext = os.path.splitext(filename.lower())[1]
-        
-        excel_content = None
-        csv_content = None
-        instructions_content = None
-        
-        # Check if it's a ZIP file
-        if file_ext == '.zip':
-            try:
-                with zipfile.ZipFile(BytesIO(file_content), 'r') as zip_ref:
-                    for file_info in zip_ref.namelist():
-                        file_name_lower = file_info.lower()
-                        
-                        # Find Excel file
-                        if file_name_lower.endswith(('.xlsx', '.xls')):
-                            if excel_content is None:
-                                excel_content = zip_ref.read(file_info)
-                            else:
-                                logger.warning(f"Multiple Excel files found in ZIP, using first: {file_info}")
-                        
-                        # Find CSV file
-                        elif file_name_lower.endswith('.csv'):
-                            if csv_content is None:
-                                csv_content = zip_ref.read(file_info)
-                            else:
-                                logger.warning(f"Multiple CSV files found in ZIP, using first: {file_info}")
-                        
-                        # Find instructions file
-                        elif 'instructions' in file_name_lower and file_name_lower.endswith('.txt'):
-                            instructions_content = zip_ref.read(file_info).decode('utf-8')
-                    
-                    if excel_content is None and csv_content is None:
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="No Excel or CSV file found in ZIP. Please include transactions.xlsx or transactions.csv"
-                        )
-                    
-                    file_content = excel_content if excel_content else csv_content
-                    logger.info(f"Extracted {'Excel' if excel_content else 'CSV'} from ZIP")
-                    
-            except zipfile.BadZipFile:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid ZIP file format"
-                )
-            except Exception as e:
-                logger.error(f"Error extracting ZIP: {e}")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Error processing ZIP file: {str(e)}"
-                )
-        
-        # Determine format
-        if file_ext == '.zip':
-            format_type = 'excel' if excel_content else 'csv'
-        elif file_ext in ['.xlsx', '.xls']:
-            format_type = 'excel'
-        elif file_ext == '.csv':
-            format_type = 'csv'
-        else:
+        if detect_format(file.filename or "") is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unsupported file format. Supported: CSV, Excel (.xlsx, .xls), or ZIP"
             )
         
-        # Validate transaction data function
-        def validate_transaction(row_data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
-            """Validate transaction row"""
-            # Check required fields
-            transaction_type = get_field_value(row_data, [
-                'type', 'type_transaction', 'entree_sortie', 'entry_exit'
-            ])
-            if not transaction_type:
-                return False, "Missing required field: type"
-            
-            # Normalize type
-            type_str = str(transaction_type).lower().strip()
-            if type_str in ['entree', 'entrée', 'entry', 'entrées', 'revenue', 'revenu']:
-                transaction_type = 'entry'  # For validation purposes
-            elif type_str in ['sortie', 'exit', 'sorties', 'expense', 'depense', 'dépense']:
-                transaction_type = 'exit'  # For validation purposes
-            elif type_str not in ['entry', 'exit', 'revenue', 'expense', 'entree', 'sortie']:
-                return False, f"Invalid type: {transaction_type}. Must be 'entry'/'revenue' or 'exit'/'expense'"
-            
-            amount = get_field_value(row_data, ['amount', 'montant', 'montant_transaction'])
-            if not amount:
-                return False, "Missing required field: amount"
-            
-            try:
-                amount_decimal = Decimal(str(amount))
-                if amount_decimal <= 0:
-                    return False, "Amount must be greater than 0"
-            except (ValueError, TypeError):
-                return False, f"Invalid amount: {amount}"
-            
-            date_str = get_field_value(row_data, ['date', 'date_transaction', 'date_operation'])
-            if not date_str:
-                return False, "Missing required field: date"
-            
-            try:
-                # Try parsing date
-                if isinstance(date_str, datetime):
-                    pass  # Already a datetime
-                elif isinstance(date_str, str):
-                    # Try multiple date formats
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']:
-                        try:
-                            datetime.strptime(date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        return False, f"Invalid date format: {date_str}"
-            except Exception:
-                return False, f"Invalid date: {date_str}"
-            
-            description = get_field_value(row_data, ['description', 'libelle', 'libellé', 'description_transaction'])
-            if not description:
-                return False, "Missing required field: description"
-            
-            return True, None
-        
-        # Import data
-        if format_type == 'excel':
-            result = ImportService.import_from_excel(
-                file_content=file_content,
-                has_headers=True,
-                validator=validate_transaction
-            )
-        else:  # CSV
-            result = ImportService.import_from_csv(
-                file_content=file_content,
-                encoding='utf-8',
-                has_headers=True,
-                validator=validate_transaction
+        # The upload is spooled by Starlette: hash and open it without loading it in memory
+        try:
+            file_hash = await asyncio.to_thread(fingerprint_file, file.file)
+            source = await asyncio.to_thread(open_import_source, file.file, file.filename or "")
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
             )
         
-        if dry_run:
-            return {
-                "dry_run": True,
-                "total_rows": result['total_rows'],
-                "valid_rows": result['valid_rows'],
-                "invalid_rows": result['invalid_rows'],
-                "errors": result['errors'],
-                "warnings": result['warnings'],
-                "preview": result['data'][:5] if result['data'] else []
-            }
-        
-        # Note: Transaction model doesn't have bank_account_id field
-        # We verify the bank account exists for reference but don't store it in the transaction
-        account = None
-        if bank_account_id:
-            account_result = await db.execute(
-                select(BankAccount).where(
-                    and_(
-                        BankAccount.id == bank_account_id,
-                        BankAccount.user_id == current_user.id
+        if not dry_run:
+            # Note: Transaction model doesn't have bank_account_id field
+            # We verify the bank account exists for reference but don't store it in the transaction
+            if bank_account_id:
+                account_result = await db.execute(
+                    select(BankAccount).where(
+                        and_(
+                            BankAccount.id == bank_account_id,
+                            BankAccount.user_id == current_user.id
+                        )
                     )
                 )
-            )
-            account = account_result.scalar_one_or_none()
-            if not account:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Bank account not found"
-                )
-        else:
-            # Try to get a default account for reference (optional)
-            account_result = await db.execute(
-                select(BankAccount).where(
-                    and_(
-                        BankAccount.user_id == current_user.id,
-                        BankAccount.is_active == True
+                if not account_result.scalar_one_or_none():
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Bank account not found"
                     )
-                ).limit(1)
-            )
-            account = account_result.scalar_one_or_none()
-            if not account:
-                logger.warning(f"No active bank account found for user {current_user.id}, transactions will be created without account reference")
+            else:
+                # Try to get a default account for reference (optional)
+                account_result = await db.execute(
+                    select(BankAccount.id).where(
+                        and_(
+                            BankAccount.user_id == current_user.id,
+                            BankAccount.is_active == True
+                        )
+                    ).limit(1)
+                )
+                if not account_result.scalar_one_or_none():
+                    logger.warning(f"No active bank account found for user {current_user.id}, transactions will be created without account reference")
         
-        # Process valid rows and create transactions
-        created_transactions = []
-        import_errors = []
+        # Load categories once and resolve names in memory (same matching as ILIKE '%name%')
+        categories_result = await db.execute(
+            select(TransactionCategory.id, TransactionCategory.name).where(
+                TransactionCategory.user_id == current_user.id
+            )
+        )
+        categories = [(name.lower(), category_id) for category_id, name in categories_result.all() if name]
+        category_ids: Dict[str, Optional[int]] = {}
         import_warnings = []
         
-        for row_data in result['data']:
-            try:
-                # Extract and normalize fields
-                transaction_type = get_field_value(row_data, [
-                    'type', 'type_transaction', 'entree_sortie', 'entry_exit'
-                ])
-                type_str = str(transaction_type).lower().strip()
-                if type_str in ['entree', 'entrée', 'entry', 'entrées', 'revenue', 'revenu']:
-                    transaction_type_enum = TransactionTypeEnum.REVENUE
-                else:
-                    transaction_type_enum = TransactionTypeEnum.EXPENSE
-                
-                amount = Decimal(str(get_field_value(row_data, ['amount', 'montant', 'montant_transaction'])))
-                
-                date_str = get_field_value(row_data, ['date', 'date_transaction', 'date_operation'])
-                if isinstance(date_str, str):
-                    # Parse date
-                    transaction_date = None
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']:
-                        try:
-                            transaction_date = datetime.strptime(date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    if not transaction_date:
-                        import_errors.append({
-                            'row': row_data,
-                            'error': f"Could not parse date: {date_str}"
-                        })
-                        continue
-                else:
-                    transaction_date = date_str
-                
-                description = str(get_field_value(row_data, ['description', 'libelle', 'libellé', 'description_transaction']))
-                
-                # Optional fields
-                category_name = get_field_value(row_data, ['category', 'categorie', 'category_name', 'nom_categorie'])
-                category_id = None
-                if category_name:
-                    # Try to find category by name
-                    category_result = await db.execute(
-                        select(TransactionCategory).where(
-                            and_(
-                                TransactionCategory.user_id == current_user.id,
-                                TransactionCategory.name.ilike(f"%{category_name}%")
-                            )
-                        ).limit(1)
-                    )
-                    category = category_result.scalar_one_or_none()
-                    if category:
-                        category_id = category.id
-                    else:
-                        import_warnings.append({
-                            'row': row_data,
-                            'warning': f"Category '{category_name}' not found, transaction created without category"
-                        })
-                
-                status_str = get_field_value(row_data, ['status', 'statut', 'etat', 'state'])
-                transaction_status = TransactionStatus.PENDING
-                if status_str:
-                    status_lower = str(status_str).lower()
-                    if status_lower in ['pending', 'en_attente', 'pending']:
-                        transaction_status = TransactionStatus.PENDING
-                    elif status_lower in ['paid', 'paye', 'payé', 'confirmed', 'confirme', 'confirmé']:
-                        transaction_status = TransactionStatus.PAID
-                    elif status_lower in ['cancelled', 'annule', 'annulé']:
-                        transaction_status = TransactionStatus.CANCELLED
-                
-                payment_method = get_field_value(row_data, ['payment_method', 'methode_paiement', 'moyen_paiement'])
-                reference_number = get_field_value(row_data, ['reference', 'reference_number', 'numero_reference', 'numero'])
-                notes = get_field_value(row_data, ['notes', 'remarques', 'commentaires'])
-                
-                # Build transaction metadata for optional fields that don't have dedicated columns
-                transaction_metadata = {}
-                if payment_method:
-                    transaction_metadata['payment_method'] = str(payment_method)
-                if reference_number:
-                    transaction_metadata['reference_number'] = str(reference_number)
-                
-                # Ensure transaction_date has timezone info
-                if transaction_date and transaction_date.tzinfo is None:
-                    # Assume UTC if no timezone info
-                    transaction_date = transaction_date.replace(tzinfo=timezone.utc)
-                
-                # Create transaction
-                # Note: Transaction model doesn't have bank_account_id field, so we ignore it
-                transaction = Transaction(
+        def resolve_category(category_name: str) -> Optional[int]:
+            key = category_name.lower()
+            if key not in category_ids:
+                category_ids[key] = next((cid for cname, cid in categories if key in cname), None)
+            return category_ids[key]
+        
+        async def prepare_transactions(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            for record in records:
+                category_name = record.pop('category_name')
+                category_id = resolve_category(category_name) if category_name else None
+                if category_name and category_id is None and len(import_warnings) < 1000:
+                    import_warnings.append({
+                        'row': {'description': record['description'], 'category': category_name},
+                        'warning': f"Category '{category_name}' not found, transaction created without category"
+                    })
+                record.update(
                     user_id=current_user.id,
-                    type=transaction_type_enum,
-                    amount=amount,
-                    transaction_date=transaction_date,
-                    description=description,
-                    notes=notes,
+                    type=TransactionTypeEnum(record['type']),
+                    status=TransactionStatus(record['status']),
                     category_id=category_id,
-                    status=transaction_status,
-                    transaction_metadata=json.dumps(transaction_metadata) if transaction_metadata else None
                 )
-                
-                db.add(transaction)
-                created_transactions.append(transaction)
-                
-            except Exception as e:
-                import_errors.append({
-                    'row': row_data,
-                    'error': str(e)
-                })
-                logger.error(f"Error creating transaction from row: {e}", exc_info=True)
-        
-        # Commit all transactions
-        await db.commit()
+            return records
+        
+        async def update_ledger(records: List[Dict[str, Any]]) -> None:
+            # Bulk inserts bypass the flush listener that maintains the ledger
+            deltas = ledger_deltas_for_rows(records)
+            await db.run_sync(lambda session: apply_ledger_deltas(session.connection(), deltas))
+        
+        importer = BulkImporter(
+            db,
+            Transaction,
+            parse_transaction_row,
+            checkpoint_key=f"transactions:{current_user.id}:{file_hash}",
+            prepare=prepare_transactions,
+            on_written=update_ledger,
+            dry_run=dry_run,
+        )
+        result = await importer.run(iter_rows(source))
         
-        # Refresh transactions to get IDs
-        for transaction in created_transactions:
-            await db.refresh(transaction)
+        if dry_run:
+            return {
+                "dry_run": True,
+                "total_rows": result.total_rows,
+                "valid_rows": result.valid_rows,
+                "invalid_rows": result.invalid_rows,
+                "errors": result.errors,
+                "warnings": import_warnings,
+                "preview": result.preview[:5]
+            }
         
-        logger.info(f"User {current_user.id} imported {len(created_transactions)} transactions")
+        logger.info(f"User {current_user.id} imported {result.inserted} transactions")
         
         return {
             "success": True,
-            "total_rows": result['total_rows'],
-            "valid_rows": result['valid_rows'],
-            "invalid_rows": result['invalid_rows'],
-            "created_count": len(created_transactions),
-            "errors": result['errors'] + import_errors,
-            "warnings": result['warnings'] + import_warnings,
-            "instructions": instructions_content,
+            "total_rows": result.total_rows,
+            "valid_rows": result.valid_rows,
+            "invalid_rows": result.invalid_rows,
+            "created_count": result.inserted,
+            "resumed_from": result.resumed_from,
+            "errors": result.errors,
+            "warnings": import_warnings,
+            "instructions": source.instructions,
             "transactions": [
                 {
-                    "id": t.id,
-                    "type": t.type.value if hasattr(t.type, 'value') else str(t.type),
-                    "amount": float(t.amount),
-                    "date": t.transaction_date.isoformat() if t.transaction_date else None,
-                    "description": t.description
+                    "type": t['type'].value,
+                    "amount": float(t['amount']),
+                    "date": t['transaction_date'].isoformat(),
+                    "description": t['description']
                 }
-                for t in created_transactions[:10]  # Return first 10
+                for t in result.preview  # Return first 10
             ]
         }
         
@@ -2255,6 +1689,9 @@ async def import_transactions(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error importing transactions: {str(e)}"
         )
+    finally:
+        if source is not None:
+            source.close()
 
 
 @router.get("/import/template")
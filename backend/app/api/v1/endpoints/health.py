@@ -167,6 +167,7 @@ async def startup_check() -> Dict[str, Any]:
             checks["checks"]["cache"] = {
                 "status": "healthy",
                 "configured": True,
+                "stats": cache_backend.get_stats(),
             }
         else:
             checks["checks"]["cache"] = {
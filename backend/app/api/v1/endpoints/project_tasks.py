@@ -4,13 +4,14 @@ API endpoints for project task management
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, text, insert
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import ProgrammingError, PendingRollbackError
 
 from app.core.database import get_db
+from app.core.pagination import InvalidCursorError
 from app.dependencies import get_current_user
 from app.models import User, Team, Project, ProjectTask, TaskStatus, TaskPriority, Employee
 from app.schemas.project_task import (
@@ -18,7 +19,10 @@ from app.schemas.project_task import (
     ProjectTaskUpdate,
     ProjectTaskResponse,
     ProjectTaskWithAssignee,
+    ProjectTaskMoveBatch,
+    ProjectTaskPosition,
 )
+from app.services.task_board_service import TaskBoardService, TaskMoveError
 from app.core.logging import logger
 from app.utils.notifications import create_notification_async
 from app.utils.notification_templates import NotificationTemplates
@@ -106,6 +110,7 @@ async def get_or_create_user_for_employee(employee_id: int, db: AsyncSession) ->
 
 @router.get("", response_model=List[ProjectTaskWithAssignee])
 async def list_tasks(
+    response: Response,
     team_id: Optional[int] = Query(None, description="Filter by team ID"),
     project_id: Optional[int] = Query(None, description="Filter by project ID"),
     assignee_id: Optional[int] = Query(None, description="Filter by assignee ID (user_id)"),
@@ -113,119 +118,57 @@ async def list_tasks(
     task_status: Optional[TaskStatus] = Query(None, description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces skip)"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List project tasks"""
+    """
+    List project tasks in board order
+    
+    Reads project_tasks only: assignee name and email are the copies stored
+    on each task. The X-Next-Cursor response header holds the cursor of the
+    next page.
+    """
     try:
-        query = select(ProjectTask)
+        board = TaskBoardService(db)
         
         # Handle assignee filter: can be either assignee_id (user_id) or employee_assignee_id (employee_id)
-        final_assignee_id = None
+        final_assignee_id = assignee_id
         if employee_assignee_id:
-            # Get user_id from employee, create one if needed using the same function as task creation
-            # This ensures consistency: if tasks were created with employee_assignee_id, the user_id should exist
-            # But if it doesn't exist, we'll create it (same as when creating a task)
-            final_assignee_id = await get_or_create_user_for_employee(employee_assignee_id, db)
-        elif assignee_id:
-            final_assignee_id = assignee_id
-        
-        if team_id:
-            query = query.where(ProjectTask.team_id == team_id)
-        # Note: project_id filter may fail if column doesn't exist in database
-        # This will be caught by the exception handler below
-        if project_id:
-            query = query.where(ProjectTask.project_id == project_id)
-        if final_assignee_id:
-            query = query.where(ProjectTask.assignee_id == final_assignee_id)
-        if task_status:
-            query = query.where(ProjectTask.status == task_status)
-        
-        # Try to order by order field, fallback to created_at if order doesn't exist
-        try:
-            query = query.offset(skip).limit(limit).order_by(ProjectTask.order, ProjectTask.created_at.desc())
-        except (AttributeError, ProgrammingError):
-            # If order column doesn't exist, just order by created_at
-            query = query.offset(skip).limit(limit).order_by(ProjectTask.created_at.desc())
+            # An employee without a user cannot have tasks: nothing to list (and nothing to create here)
+            final_assignee_id = await board.employee_user_id(employee_assignee_id)
+            if not final_assignee_id:
+                return []
         
-        # Try to load relationships, but handle errors gracefully
-        # Don't load project relationship as project_id column may not exist
         try:
-            result = await db.execute(query.options(
-                selectinload(ProjectTask.assignee),
-                selectinload(ProjectTask.team),
-            ))
-        except (ProgrammingError, AttributeError, Exception) as e:
-            # If relationship loading fails (e.g., missing columns), try without relationships
+            tasks, next_cursor = await board.list_page(
+                limit,
+                cursor=cursor,
+                skip=skip,
+                team_id=team_id,
+                project_id=project_id,
+                assignee_id=final_assignee_id,
+                task_status=task_status,
+            )
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        except ProgrammingError as e:
             error_str = str(e).lower()
-            logger.warning(f"Failed to load relationships for project tasks: {e}")
-            
-            # If error is due to project_id column not existing, return empty list
-            # SQLAlchemy will always try to select all model columns, so we can't work around this
-            # Return empty list to allow application to continue functioning
-            if 'project_id' in error_str and ('does not exist' in error_str or 'undefinedcolumn' in error_str):
-                logger.warning("project_id column doesn't exist in database - returning empty list. Database migration may be needed.")
-                # FastAPI will handle rollback automatically via session middleware
-                return []  # Return empty list to allow application to continue
-            
-            # Retry without relationship loading for other errors
-            # FastAPI will handle rollback automatically if this also fails
-            result = await db.execute(query)
+            # Database not migrated yet: keep the application usable
+            if 'does not exist' in error_str or 'undefinedcolumn' in error_str:
+                logger.warning(f"project_tasks columns missing - returning empty list. Database migration may be needed: {e}")
+                return []
+            raise
         
-        tasks = result.scalars().all()
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
-        # Convert to response format
-        task_responses = []
-        for task in tasks:
-            try:
-                # Safely access all fields with getattr and defaults
-                task_dict = {
-                    "id": task.id,
-                    "title": task.title or "Untitled Task",
-                    "description": getattr(task, 'description', None),
-                    "status": task.status,
-                    "priority": task.priority,
-                    "team_id": getattr(task, 'team_id', None),
-                    "project_id": getattr(task, 'project_id', None),
-                    "assignee_id": getattr(task, 'assignee_id', None),
-                    "created_by_id": getattr(task, 'created_by_id', None),
-                    "due_date": getattr(task, 'due_date', None),
-                    "started_at": getattr(task, 'started_at', None),
-                    "completed_at": getattr(task, 'completed_at', None),
-                    "order": getattr(task, 'order', 0),
-                    "created_at": task.created_at,
-                    "updated_at": task.updated_at,
-                    "assignee_name": None,
-                    "assignee_email": None,
-                }
-                
-                # Try to get assignee information if available
-                try:
-                    if hasattr(task, 'assignee') and task.assignee:
-                        assignee = task.assignee
-                        first_name = getattr(assignee, 'first_name', '') or ''
-                        last_name = getattr(assignee, 'last_name', '') or ''
-                        task_dict["assignee_name"] = f"{first_name} {last_name}".strip() or None
-                        task_dict["assignee_email"] = getattr(assignee, 'email', None)
-                except (AttributeError, ProgrammingError) as e:
-                    logger.debug(f"Could not load assignee info for task {task.id}: {e}")
-                    # Keep assignee_name and assignee_email as None
-                
-                # Ensure title is not empty (required by schema)
-                if not task_dict["title"] or not task_dict["title"].strip():
-                    task_dict["title"] = "Untitled Task"
-                
-                task_responses.append(ProjectTaskWithAssignee(**task_dict))
-            except Exception as e:
-                logger.warning(
-                    f"Error processing task {getattr(task, 'id', 'unknown')}: {e}",
-                    exc_info=True,
-                    context={"task_id": getattr(task, 'id', None)}
-                )
-                # Skip this task and continue with others
-                continue
-        
-        return task_responses
+        return [ProjectTaskWithAssignee(**task) for task in tasks]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(
             f"Unexpected error in list_tasks: {type(e).__name__}: {str(e)}",
@@ -257,7 +200,6 @@ async def get_task(
                 select(ProjectTask)
                 .where(ProjectTask.id == task_id)
                 .options(
-                    selectinload(ProjectTask.assignee),
                     selectinload(ProjectTask.team),
                     selectinload(ProjectTask.project),
                 )
@@ -292,24 +234,14 @@ async def get_task(
             "started_at": getattr(task, 'started_at', None),
             "completed_at": getattr(task, 'completed_at', None),
             "order": getattr(task, 'order', 0),
+            "rank": task.rank,
             "created_at": task.created_at,
             "updated_at": task.updated_at,
-            "assignee_name": None,
-            "assignee_email": None,
+            # Copies kept in sync with the assignee on flush
+            "assignee_name": task.assignee_name,
+            "assignee_email": task.assignee_email,
         }
         
-        # Try to get assignee information if available
-        try:
-            if hasattr(task, 'assignee') and task.assignee:
-                assignee = task.assignee
-                first_name = getattr(assignee, 'first_name', '') or ''
-                last_name = getattr(assignee, 'last_name', '') or ''
-                task_dict["assignee_name"] = f"{first_name} {last_name}".strip() or None
-                task_dict["assignee_email"] = getattr(assignee, 'email', None)
-        except (AttributeError, ProgrammingError):
-            # Keep assignee_name and assignee_email as None
-            pass
-        
         # Ensure title is not empty (required by schema)
         if not task_dict["title"] or not task_dict["title"].strip():
             task_dict["title"] = "Untitled Task"
@@ -456,10 +388,10 @@ async def create_task(
             insert_stmt = text("""
                 INSERT INTO project_tasks (
                     title, description, status, priority, team_id, 
-                    assignee_id, created_by_id, due_date, "order", created_at, updated_at
+                    assignee_id, created_by_id, due_date, "order", rank, created_at, updated_at
                 ) VALUES (
                     :title, :description, :status::taskstatus, :priority::taskpriority, :team_id,
-                    :assignee_id, :created_by_id, :due_date, :order, NOW(), NOW()
+                    :assignee_id, :created_by_id, :due_date, :order, :rank, NOW(), NOW()
                 ) RETURNING id, created_at, updated_at
             """)
             
@@ -474,6 +406,8 @@ async def create_task(
                     "created_by_id": current_user.id,
                     "due_date": task_data.due_date,
                     "order": task_data.order or 0,
+                    # Raw insert: the ORM flush listener does not run
+                    "rank": await TaskBoardService(db).rank_at_end(),
                 })
                 row = result.fetchone()
                 task_id, created_at, updated_at = row
@@ -539,6 +473,41 @@ async def create_task(
         )
 
 
+@router.post("/move", response_model=List[ProjectTaskPosition])
+async def move_tasks(
+    batch: ProjectTaskMoveBatch,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Move tasks on the board
+    
+    Each move places a task between two neighbours (and optionally in another
+    status column); only the moved tasks are written, in one statement.
+    """
+    try:
+        return await TaskBoardService(db).move_many([move.model_dump() for move in batch.moves])
+    except TaskMoveError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(
+            f"Unexpected error in move_tasks: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+            context={"user_id": getattr(current_user, 'id', None), "moves": len(batch.moves)}
+        )
+        try:
+            await db.rollback()
+        except Exception:
+            pass  # Ignore rollback errors
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"A database error occurred: {str(e)}"
+        )
+
+
 @router.patch("/{task_id}", response_model=ProjectTaskResponse)
 async def update_task(
     task_id: int,
@@ -12,7 +12,7 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import ProgrammingError
 
 from app.core.database import get_db
-from app.core.cache import cached, invalidate_cache_pattern
+from app.core.cache import cached, invalidate_cache_tables_after
 from app.core.rate_limit import rate_limit_decorator
 from app.core.tenancy_helpers import apply_tenant_scope
 from app.dependencies import get_current_user
@@ -88,7 +88,7 @@ async def _check_project_columns_exist(db: AsyncSession, column_names: List[str]
 
 @router.get("/")
 @rate_limit_decorator("200/hour")
-@cached(expire=300, key_prefix="projects")
+@cached(expire=300, key_prefix="projects", tables=["projects", "clients", "employees"])
 async def get_projects(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -570,7 +570,7 @@ async def get_clients_list(
 
 
 @router.get("/{project_id}", response_model=ProjectSchema)
-@cached(expire=300, key_prefix="project")
+@cached(expire=300, key_prefix="project", tables=["projects", "clients", "employees"])
 async def get_project(
     project_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -936,7 +936,7 @@ async def find_client_by_name(
 
 @router.post("/", response_model=ProjectSchema, status_code=http_status.HTTP_201_CREATED)
 @rate_limit_decorator("30/hour")
-@invalidate_cache_pattern("projects:*")
+@invalidate_cache_tables_after("projects")
 async def create_project(
     request: Request,
     project_data: ProjectCreate,
@@ -1062,8 +1062,7 @@ async def create_project(
 
 @router.put("/{project_id}", response_model=ProjectSchema)
 @rate_limit_decorator("100/hour")
-@invalidate_cache_pattern("projects:*")
-@invalidate_cache_pattern("project:*")
+@invalidate_cache_tables_after("projects")
 async def update_project(
     request: Request,
     project_id: int,
@@ -1187,8 +1186,7 @@ async def update_project(
 
 @router.delete("/{project_id}", status_code=http_status.HTTP_204_NO_CONTENT)
 @rate_limit_decorator("50/hour")
-@invalidate_cache_pattern("projects:*")
-@invalidate_cache_pattern("project:*")
+@invalidate_cache_tables_after("projects")
 async def delete_project(
     request: Request,
     project_id: int,
@@ -1224,7 +1222,7 @@ async def delete_project(
 
 
 @router.get("/stats")
-@cached(expire=300, key_prefix="projects_stats")
+@cached(expire=300, key_prefix="projects_stats", tables=["projects"], stale_ttl=600)
 async def get_projects_stats(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -1342,6 +1340,7 @@ async def get_projects_stats(
 
 
 @router.delete("/bulk", status_code=http_status.HTTP_200_OK)
+@invalidate_cache_tables_after("projects")
 async def delete_all_projects(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -26,8 +26,9 @@ from app.schemas.project import ProjectCreate
 from app.core.logging import logger
 from app.services.export_service import ExportService
 from app.utils.import_logs import (
-    import_logs, import_status, add_import_log, update_import_status,
-    get_current_user_from_query, stream_import_logs_generator
+    add_import_log, update_import_status, start_import_job,
+    get_current_user_from_query, stream_import_logs_generator,
+    require_import_job,
 )
 
 router = APIRouter()
@@ -47,6 +48,7 @@ async def stream_import_logs(
     # Authenticate user
     current_user = await get_current_user_from_query(request, db)
     
+    await require_import_job(import_id)
     return StreamingResponse(
         stream_import_logs_generator(import_id),
         media_type="text/event-stream",
@@ -167,6 +169,13 @@ async def import_projects(
     - Responsable: responsable, responsable_name, employee, employee_name, responsable name
     - Responsable ID: responsable_id, id_responsable, employee_id, id_employee
     """
+    # Generate import_id if not provided
+    if not import_id:
+        import_id = str(uuid.uuid4())
+    
+    # Initialize logs and status
+    start_import_job(import_id)
+    
     try:
         file_content = await file.read()
         file_extension = file.filename.split('.')[-1].lower() if file.filename else ''
@@ -28,19 +28,20 @@ from app.models.company import Company
 from app.models.user import User
 from app.schemas.testimonial import TestimonialCreate, TestimonialUpdate, Testimonial as TestimonialSchema
 from app.services.import_service import ImportService
+from app.services.entity_matcher import CompanyMatcher, find_company_by_name
 from app.services.export_service import ExportService
+from app.services.presigned_urls import presign_stored_url, presign_stored_urls
 from app.services.s3_service import S3Service
 from app.core.logging import logger
+from app.utils.import_logs import (
+    add_import_log, update_import_status, start_import_job, stream_import_logs_generator,
+    require_import_job,
+)
 
 router = APIRouter(prefix="/reseau/testimonials", tags=["reseau-testimonials"])
 
-# In-memory store for import logs (in production, use Redis)
-import_logs: Dict[str, List[Dict[str, any]]] = {}
-import_status: Dict[str, Dict[str, any]] = {}
-
-# Cache for presigned URLs (logo_url)
-_presigned_url_cache: Dict[str, tuple[str, float]] = {}
-_cache_max_size = 1000  # Maximum number of cached URLs
+TESTIMONIAL_LOGO_PREFIX = "testimonials/logos"
+COMPANY_LOGO_PREFIX = "companies/logos"
 
 
 def normalize_filename(name: str) -> str:
@@ -67,72 +68,6 @@ def normalize_filename(name: str) -> str:
     return name
 
 
-async def find_company_by_name(
-    company_name: str,
-    db: AsyncSession,
-    all_companies: Optional[List[Company]] = None,
-    company_name_to_id: Optional[dict] = None
-) -> Optional[int]:
-    """
-    Find a company ID by name using intelligent matching.
-    
-    Matching strategy:
-    1. Exact match (case-insensitive)
-    2. Match without legal form (SARL, SA, SAS, EURL)
-    3. Partial match (contains)
-    
-    Args:
-        company_name: Company name to search for
-        db: Database session
-        all_companies: Optional pre-loaded list of companies (for performance)
-        company_name_to_id: Optional pre-built mapping (for performance)
-        
-    Returns:
-        Company ID if found, None otherwise
-    """
-    if not company_name or not company_name.strip():
-        return None
-    
-    # Load companies if not provided
-    if all_companies is None or company_name_to_id is None:
-        companies_result = await db.execute(select(Company))
-        all_companies = companies_result.scalars().all()
-        company_name_to_id = {}
-        for company in all_companies:
-            if company.name:
-                company_name_to_id[company.name.lower().strip()] = company.id
-    
-    company_name_normalized = company_name.strip().lower()
-    # Remove common prefixes/suffixes for better matching
-    company_name_clean = company_name_normalized.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-    
-    # Try exact match first
-    if company_name_normalized in company_name_to_id:
-        return company_name_to_id[company_name_normalized]
-    
-    # Try match without legal form
-    if company_name_clean and company_name_clean in company_name_to_id:
-        return company_name_to_id[company_name_clean]
-    
-    # Try partial match (contains)
-    matched_company_id = None
-    for stored_name, stored_id in company_name_to_id.items():
-        stored_clean = stored_name.replace('sarl', '').replace('sa', '').replace('sas', '').replace('eurl', '').strip()
-        if (company_name_clean and stored_clean and 
-            (company_name_clean in stored_clean or stored_clean in company_name_clean)):
-            matched_company_id = stored_id
-            break
-    
-    # If no match with cleaned, try original normalized
-    if not matched_company_id:
-        for stored_name, stored_id in company_name_to_id.items():
-            if (company_name_normalized in stored_name or stored_name in company_name_normalized):
-                matched_company_id = stored_id
-                break
-    
-    return matched_company_id
-
-
 async def find_contact_by_name(
     first_name: str,
     last_name: str,
@@ -193,190 +128,34 @@ async def find_contact_by_name(
     return None
 
 
-def regenerate_logo_url(logo_url: Optional[str], testimonial_id: Optional[int] = None) -> Optional[str]:
+async def regenerate_logo_url(logo_url: Optional[str], testimonial_id: Optional[int] = None) -> Optional[str]:
     """
     Regenerate presigned URL for a testimonial logo.
     
     Args:
         logo_url: The logo URL (can be a file_key or presigned URL)
-        testimonial_id: Optional testimonial ID for logging
+        testimonial_id: Optional testimonial ID (kept for call-site compatibility)
         
     Returns:
-        Presigned URL if successful, None if generation fails or no logo_url
+        Presigned URL if successful, the original value if S3 is not configured
+        or no file_key can be extracted, None if generation fails or no logo_url
     """
-    if not logo_url:
-        return None
-    
-    if not S3Service.is_configured():
-        # If S3 is not configured, return the original URL (might be a direct URL)
-        logger.warning(f"S3 not configured, returning original logo_url for testimonial {testimonial_id}")
-        return logo_url
-    
-    try:
-        s3_service = S3Service()
-        file_key = None
-        
-        # If it's a presigned URL, try to extract the file_key from it
-        if logo_url.startswith('http'):
-            # Try to extract file_key from presigned URL
-            from urllib.parse import urlparse, parse_qs, unquote
-            parsed = urlparse(logo_url)
-            
-            # Check query params for 'key' parameter (some S3 presigned URLs have it)
-            query_params = parse_qs(parsed.query)
-            if 'key' in query_params:
-                file_key = unquote(query_params['key'][0])
-            else:
-                # Extract from path - remove bucket name if present
-                path = parsed.path.strip('/')
-                # Look for 'testimonials/logos' in the path
-                if 'testimonials/logos' in path:
-                    # Find the position of 'testimonials/logos' and take everything after
-                    idx = path.find('testimonials/logos')
-                    if idx != -1:
-                        file_key = path[idx:]
-        else:
-            # Assume it's already a file_key
-            file_key = logo_url
-        
-        if file_key:
-            # Check cache first
-            import time
-            if file_key in _presigned_url_cache:
-                cached_url, expiration_timestamp = _presigned_url_cache[file_key]
-                # If URL is still valid (not expired and not close to expiration), return cached version
-                current_time = time.time()
-                buffer_seconds = 3600  # Regenerate 1 hour before expiration
-                if current_time < (expiration_timestamp - buffer_seconds):
-                    logger.debug(f"Using cached presigned URL for testimonial {testimonial_id} with file_key: {file_key[:60]}...")
-                    return cached_url
-                # Remove expired entry from cache
-                else:
-                    del _presigned_url_cache[file_key]
-            
-            # Generate new presigned URL
-            try:
-                expiration_seconds = 604800  # 7 days (AWS S3 maximum)
-                presigned_url = s3_service.generate_presigned_url(file_key, expiration=expiration_seconds)
-                if presigned_url:
-                    # Cache the URL with expiration timestamp
-                    expiration_timestamp = time.time() + expiration_seconds
-                    _presigned_url_cache[file_key] = (presigned_url, expiration_timestamp)
-                    
-                    # Limit cache size (LRU eviction - remove oldest entry)
-                    if len(_presigned_url_cache) > _cache_max_size:
-                        oldest_key = next(iter(_presigned_url_cache))
-                        del _presigned_url_cache[oldest_key]
-                    
-                    logger.debug(f"Generated and cached presigned URL for testimonial {testimonial_id} with file_key: {file_key[:60]}...")
-                    return presigned_url
-                else:
-                    logger.error(f"generate_presigned_url returned None for testimonial {testimonial_id} with file_key: {file_key}")
-                    return None
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL for testimonial {testimonial_id} with file_key '{file_key}': {e}", exc_info=True)
-                return None
-        else:
-            # Could not extract file_key, return original URL
-            logger.warning(f"Could not extract file_key from logo_url for testimonial {testimonial_id}: {logo_url}")
-            return logo_url  # Return original URL instead of None
-    except Exception as e:
-        logger.error(f"Failed to regenerate presigned URL for testimonial {testimonial_id}: {e}", exc_info=True)
-        return None
+    return await presign_stored_url(logo_url, TESTIMONIAL_LOGO_PREFIX)
 
 
-def regenerate_company_logo_url(logo_url: Optional[str], company_id: Optional[int] = None) -> Optional[str]:
+async def regenerate_company_logo_url(logo_url: Optional[str], company_id: Optional[int] = None) -> Optional[str]:
     """
     Regenerate presigned URL for a company logo.
     
     Args:
         logo_url: The logo URL (can be a file_key or presigned URL)
-        company_id: Optional company ID for logging
+        company_id: Optional company ID (kept for call-site compatibility)
         
     Returns:
-        Presigned URL if successful, None if generation fails or no logo_url
+        Presigned URL if successful, the original value if S3 is not configured
+        or no file_key can be extracted, None if generation fails or no logo_url
     """
-    if not logo_url:
-        return None
-    
-    if not S3Service.is_configured():
-        # If S3 is not configured, return the original URL (might be a direct URL)
-        logger.warning(f"S3 not configured, returning original logo_url for company {company_id}")
-        return logo_url
-    
-    try:
-        s3_service = S3Service()
-        file_key = None
-        
-        # If it's a presigned URL, try to extract the file_key from it
-        if logo_url.startswith('http'):
-            # Try to extract file_key from presigned URL
-            from urllib.parse import urlparse, parse_qs, unquote
-            parsed = urlparse(logo_url)
-            
-            # Check query params for 'key' parameter (some S3 presigned URLs have it)
-            query_params = parse_qs(parsed.query)
-            if 'key' in query_params:
-                file_key = unquote(query_params['key'][0])
-            else:
-                # Extract from path - remove bucket name if present
-                path = parsed.path.strip('/')
-                # Look for 'companies/logos' in the path
-                if 'companies/logos' in path:
-                    # Find the position of 'companies/logos' and take everything after
-                    idx = path.find('companies/logos')
-                    if idx != -1:
-                        file_key = path[idx:]
-                elif path.startswith('companies/'):
-                    file_key = path
-        else:
-            # Assume it's already a file_key
-            file_key = logo_url
-        
-        if file_key:
-            # Check cache first
-            import time
-            if file_key in _presigned_url_cache:
-                cached_url, expiration_timestamp = _presigned_url_cache[file_key]
-                # If URL is still valid (not expired and not close to expiration), return cached version
-                current_time = time.time()
-                buffer_seconds = 3600  # Regenerate 1 hour before expiration
-                if current_time < (expiration_timestamp - buffer_seconds):
-                    logger.debug(f"Using cached presigned URL for company {company_id} with file_key: {file_key[:60]}...")
-                    return cached_url
-                # Remove expired entry from cache
-                else:
-                    del _presigned_url_cache[file_key]
-            
-            # Generate new presigned URL
-            try:
-                expiration_seconds = 604800  # 7 days (AWS S3 maximum)
-                presigned_url = s3_service.generate_presigned_url(file_key, expiration=expiration_seconds)
-                if presigned_url:
-                    # Cache the URL with expiration timestamp
-                    expiration_timestamp = time.time() + expiration_seconds
-                    _presigned_url_cache[file_key] = (presigned_url, expiration_timestamp)
-                    
-                    # Limit cache size (LRU eviction - remove oldest entry)
-                    if len(_presigned_url_cache) > _cache_max_size:
-                        oldest_key = next(iter(_presigned_url_cache))
-                        del _presigned_url_cache[oldest_key]
-                    
-                    logger.debug(f"Generated and cached presigned URL for company {company_id} with file_key: {file_key[:60]}...")
-                    return presigned_url
-                else:
-                    logger.error(f"generate_presigned_url returned None for company {company_id} with file_key: {file_key}")
-                    return None
-            except Exception as e:
-                logger.error(f"Failed to generate presigned URL for company {company_id} with file_key '{file_key}': {e}", exc_info=True)
-                return None
-        else:
-            # Could not extract file_key, return original URL
-            logger.warning(f"Could not extract file_key from logo_url for company {company_id}: {logo_url}")
-            return logo_url  # Return original URL instead of None
-    except Exception as e:
-        logger.error(f"Failed to regenerate presigned URL for company {company_id}: {e}", exc_info=True)
-        return None
+    return await presign_stored_url(logo_url, COMPANY_LOGO_PREFIX)
 
 
 @router.get("/", response_model=List[TestimonialSchema])
@@ -448,9 +227,17 @@ async def list_testimonials(
     # Convert to response format
     testimonial_list = []
     
+    # Sign every logo of the page in two batches (shared URL cache, local signing)
+    logo_urls = await presign_stored_urls(
+        (testimonial.logo_url for testimonial in testimonials), TESTIMONIAL_LOGO_PREFIX
+    )
+    company_logo_urls = await presign_stored_urls(
+        (testimonial.company.logo_url for testimonial in testimonials if testimonial.company),
+        COMPANY_LOGO_PREFIX,
+    )
+    
     for testimonial in testimonials:
-        # Regenerate presigned URL for logo if it exists
-        logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+        logo_url = logo_urls.get(testimonial.logo_url)
         
         # Get contact name
         contact_name = None
@@ -466,7 +253,7 @@ async def list_testimonials(
         # Regenerate presigned URL for company logo if it exists
         company_logo_url = None
         if testimonial.company and testimonial.company.logo_url:
-            company_logo_url = regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
+            company_logo_url = company_logo_urls.get(testimonial.company.logo_url)
         
         testimonial_dict = {
             "id": testimonial.id,
@@ -531,7 +318,7 @@ async def get_testimonial(
     await db.refresh(testimonial, ["company", "contact"])
     
     # Regenerate presigned URL for logo if it exists
-    logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+    logo_url = await regenerate_logo_url(testimonial.logo_url, testimonial.id)
     
     # Get contact name
     contact_name = None
@@ -541,7 +328,7 @@ async def get_testimonial(
     # Regenerate presigned URL for company logo if it exists
     company_logo_url = None
     if testimonial.company and testimonial.company.logo_url:
-        company_logo_url = regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
+        company_logo_url = await regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
     
     testimonial_dict = {
         "id": testimonial.id,
@@ -675,7 +462,7 @@ async def create_testimonial(
     await db.refresh(testimonial, ["company", "contact"])
     
     # Regenerate presigned URL for logo if it exists
-    logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+    logo_url = await regenerate_logo_url(testimonial.logo_url, testimonial.id)
     
     # Get contact name
     contact_name = None
@@ -685,7 +472,7 @@ async def create_testimonial(
     # Regenerate presigned URL for company logo if it exists
     company_logo_url = None
     if testimonial.company and testimonial.company.logo_url:
-        company_logo_url = regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
+        company_logo_url = await regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
     
     # Convert to response format
     testimonial_dict = {
@@ -828,7 +615,7 @@ async def update_testimonial(
     await db.refresh(testimonial, ["company", "contact"])
     
     # Regenerate presigned URL for logo if it exists
-    logo_url = regenerate_logo_url(testimonial.logo_url, testimonial.id)
+    logo_url = await regenerate_logo_url(testimonial.logo_url, testimonial.id)
     
     # Get contact name
     contact_name = None
@@ -838,7 +625,7 @@ async def update_testimonial(
     # Regenerate presigned URL for company logo if it exists
     company_logo_url = None
     if testimonial.company and testimonial.company.logo_url:
-        company_logo_url = regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
+        company_logo_url = await regenerate_company_logo_url(testimonial.company.logo_url, testimonial.company.id)
     
     testimonial_dict = {
         "id": testimonial.id,
@@ -933,40 +720,6 @@ async def delete_testimonial(
     await db.commit()
 
 
-def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
-    """Add a log entry to the import logs"""
-    if import_id not in import_logs:
-        import_logs[import_id] = []
-    
-    log_entry = {
-        "timestamp": dt.now().isoformat(),
-        "level": level,
-        "message": message,
-        "data": data or {}
-    }
-    import_logs[import_id].append(log_entry)
-    
-    # Keep only last 1000 logs per import
-    if len(import_logs[import_id]) > 1000:
-        import_logs[import_id] = import_logs[import_id][-1000:]
-
-
-def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
-    """Update import status"""
-    if import_id not in import_status:
-        import_status[import_id] = {}
-    
-    import_status[import_id].update({
-        "status": status,
-        "updated_at": dt.now().isoformat()
-    })
-    
-    if progress is not None:
-        import_status[import_id]["progress"] = progress
-    if total is not None:
-        import_status[import_id]["total"] = total
-
-
 async def get_current_user_from_query(
     request: Request,
     db: AsyncSession = Depends(get_db),
@@ -1026,42 +779,9 @@ async def stream_import_logs(
     Stream import logs via Server-Sent Events (SSE)
     Note: Uses query parameter authentication because EventSource doesn't support custom headers
     """
-    async def event_generator():
-        last_index = 0
-        
-        while True:
-            # Check if import is complete
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                if status_info.get("status") == "completed" or status_info.get("status") == "failed":
-                    # Send final logs
-                    if import_id in import_logs:
-                        logs = import_logs[import_id]
-                        for log in logs[last_index:]:
-                            yield f"data: {json.dumps(log)}\n\n"
-                    
-                    # Send final status
-                    yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
-                    break
-            
-            # Send new logs
-            if import_id in import_logs:
-                logs = import_logs[import_id]
-                if len(logs) > last_index:
-                    for log in logs[last_index:]:
-                        yield f"data: {json.dumps(log)}\n\n"
-                    last_index = len(logs)
-            
-            # Send status update
-            if import_id in import_status:
-                status_info = import_status[import_id]
-                yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-            
-            await asyncio.sleep(0.5)  # Check every 500ms
-    
+    await require_import_job(import_id)
     return StreamingResponse(
-        event_generator(),
+        stream_import_logs_generator(import_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -1113,13 +833,7 @@ async def import_testimonials(
         import_id = str(uuid.uuid4())
     
     # Initialize logs and status
-    import_logs[import_id] = []
-    import_status[import_id] = {
-        "status": "started",
-        "progress": 0,
-        "total": 0,
-        "created_at": dt.now().isoformat()
-    }
+    start_import_job(import_id)
     
     add_import_log(import_id, f"Début de l'import du fichier: {file.filename}", "info")
     
@@ -1198,13 +912,8 @@ async def import_testimonials(
         # Load all companies once
         add_import_log(import_id, "Chargement des entreprises existantes...", "info")
         try:
-            companies_result = await db.execute(select(Company))
-            all_companies = companies_result.scalars().all()
-            company_name_to_id = {}
-            for company in all_companies:
-                if company.name:
-                    company_name_to_id[company.name.lower().strip()] = company.id
-            add_import_log(import_id, f"{len(company_name_to_id)} entreprise(s) chargée(s) pour le matching", "info")
+            company_matcher = await CompanyMatcher.load(db)
+            add_import_log(import_id, f"{len(company_matcher)} entreprise(s) chargée(s) pour le matching", "info")
         except Exception as e:
             add_import_log(import_id, f"ERREUR lors du chargement des entreprises: {str(e)}", "error")
             logger.error(f"Error loading companies: {e}", exc_info=True)
@@ -1338,8 +1047,7 @@ async def import_testimonials(
                             matched_company_id = await find_company_by_name(
                                 company_name=str(company_id_raw).strip(),
                                 db=db,
-                                all_companies=all_companies,
-                                company_name_to_id=company_name_to_id
+                                matcher=company_matcher
                             )
                             if matched_company_id:
                                 company_id = matched_company_id
@@ -1351,8 +1059,7 @@ async def import_testimonials(
                         matched_company_id = await find_company_by_name(
                             company_name=str(company_id_raw).strip(),
                             db=db,
-                            all_companies=all_companies,
-                            company_name_to_id=company_name_to_id
+                            matcher=company_matcher
                         )
                         if matched_company_id:
                             company_id = matched_company_id
@@ -1364,8 +1071,7 @@ async def import_testimonials(
                     matched_company_id = await find_company_by_name(
                         company_name=company_name,
                         db=db,
-                        all_companies=all_companies,
-                        company_name_to_id=company_name_to_id
+                        matcher=company_matcher
                     )
                     if matched_company_id:
                         company_id = matched_company_id
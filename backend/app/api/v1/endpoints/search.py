@@ -3,23 +3,34 @@ Search API Endpoints
 Advanced search and filtering
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
 
 from app.services.search_service import SearchService
+from app.models.search_document import SEARCH_SPECS
 from app.models.user import User
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, is_superadmin
 from app.core.database import AsyncSession, get_db
 from app.core.logging import logger
 
 router = APIRouter()
 
+# Indexed entity types whose own endpoints require superadmin
+SUPERADMIN_ENTITY_TYPES = {"employees"}
+
+
+async def _searchable_entity_types(current_user: User, db: AsyncSession) -> List[str]:
+    """Indexed entity types the user may search (same access as their list endpoints)"""
+    if await is_superadmin(current_user, db):
+        return list(SEARCH_SPECS)
+    return [entity_type for entity_type in SEARCH_SPECS if entity_type not in SUPERADMIN_ENTITY_TYPES]
+
 
 class SearchRequest(BaseModel):
     """Search request model"""
     query: str = Field(..., min_length=1, description="Search query")
-    entity_type: str = Field(..., description="Entity type to search: users, projects, etc.")
+    entity_type: str = Field(..., description="Entity type to search: users, projects, contacts, companies, opportunities, employees (superadmin), or all")
     filters: Optional[Dict[str, Any]] = Field(None, description="Additional filters")
     limit: int = Field(50, ge=1, le=100, description="Maximum number of results")
     offset: int = Field(0, ge=0, description="Offset for pagination")
@@ -78,10 +89,30 @@ async def search(
                 limit=request.limit,
                 offset=request.offset
             )
+        elif request.entity_type == 'all':
+            result = await service.search_all(
+                search_query=request.query,
+                entity_types=await _searchable_entity_types(current_user, db),
+                limit=request.limit,
+                offset=request.offset
+            )
+        elif request.entity_type in SEARCH_SPECS:
+            if request.entity_type not in await _searchable_entity_types(current_user, db):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Superadmin access required"
+                )
+            result = await service.search_indexed(
+                entity_type=request.entity_type,
+                search_query=request.query,
+                filters=request.filters,
+                limit=request.limit,
+                offset=request.offset
+            )
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Unsupported entity type: {request.entity_type}. Supported: users, projects"
+                detail=f"Unsupported entity type: {request.entity_type}. Supported: users, all, {', '.join(SEARCH_SPECS)}"
             )
         
         return SearchResponse(
@@ -93,6 +124,8 @@ async def search(
             query=request.query
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(
@@ -144,6 +177,13 @@ async def autocomplete(
                 limit=limit,
                 offset=0
             )
+        elif entity_type == 'all':
+            result = await service.search_all(
+                search_query=q,
+                entity_types=await _searchable_entity_types(current_user, db),
+                limit=limit,
+                offset=0
+            )
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -165,12 +205,20 @@ async def autocomplete(
                     'label': item.get('name'),
                     'value': item.get('id'),
                 })
+            else:
+                suggestions.append({
+                    'id': item.get('entity_id'),
+                    'label': item.get('title'),
+                    'value': f"{item.get('entity_type')}:{item.get('entity_id')}",
+                })
         
         return {
             'suggestions': suggestions,
             'query': q
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Autocomplete error: {e}")
         raise HTTPException(
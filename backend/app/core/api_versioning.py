@@ -4,13 +4,14 @@ Handles API versioning through headers and URL paths
 """
 
 from typing import Optional
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Message, Receive, Scope, Send
 
+from app.core.asgi import HTTPMiddleware, on_response_start
 from app.core.logging import logger
 
 
-class APIVersioningMiddleware(BaseHTTPMiddleware):
+class APIVersioningMiddleware(HTTPMiddleware):
     """Middleware to handle API versioning"""
     
     def __init__(self, app, default_version: str = "v1", supported_versions: list = None):
@@ -18,9 +19,8 @@ class APIVersioningMiddleware(BaseHTTPMiddleware):
         self.default_version = default_version
         self.supported_versions = supported_versions or ["v1"]
     
-    def get_version_from_header(self, request: Request) -> Optional[str]:
+    def get_version_from_header(self, accept_header: str) -> Optional[str]:
         """Get API version from Accept header"""
-        accept_header = request.headers.get("Accept", "")
         
         # Check for version in Accept header: application/vnd.api+json;version=v1
         if "version=" in accept_header:
@@ -39,10 +39,8 @@ class APIVersioningMiddleware(BaseHTTPMiddleware):
         
         return None
     
-    def get_version_from_path(self, request: Request) -> Optional[str]:
+    def get_version_from_path(self, path: str) -> Optional[str]:
         """Get API version from URL path"""
-        path = str(request.url.path)
-        
         # Check for /api/v1/, /api/v2/, etc.
         for version in self.supported_versions:
             if f"/api/{version}/" in path:
@@ -50,31 +48,31 @@ class APIVersioningMiddleware(BaseHTTPMiddleware):
         
         return None
     
-    def get_api_version(self, request: Request) -> str:
+    def get_api_version(self, scope: Scope) -> str:
         """Get API version from request (header, path, or default)"""
         # Priority: path > header > default
-        version = self.get_version_from_path(request)
+        version = self.get_version_from_path(scope["path"])
         if version:
             return version
         
-        version = self.get_version_from_header(request)
+        version = self.get_version_from_header(Headers(scope=scope).get("Accept", ""))
         if version:
             return version
         
         return self.default_version
     
-    async def dispatch(self, request: Request, call_next):
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and add version info"""
-        version = self.get_api_version(request)
+        version = self.get_api_version(scope)
         
-        # Store version in request state
-        request.state.api_version = version
+        # Store version in request state (scope["state"] backs request.state)
+        scope.setdefault("state", {})["api_version"] = version
         
         # Add version to response headers
-        response = await call_next(request)
-        response.headers["X-API-Version"] = version
+        def add_version_header(message: Message, headers: MutableHeaders) -> None:
+            headers["X-API-Version"] = version
         
-        return response
+        await self.app(scope, receive, on_response_start(send, add_version_header))
 
 
 def setup_api_versioning(app, default_version: str = "v1", supported_versions: list = None) -> None:
@@ -0,0 +1,78 @@
+"""
+ASGI Helpers
+Shared building blocks for the pure-ASGI middleware stack
+"""
+
+from typing import Callable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class StopResponse(Exception):
+    """
+    Raised from a wrapped ``send`` once a middleware has answered on its own
+    (e.g. a 304), to stop the app from producing a body nobody will read
+
+    The middleware that raised it catches it around its call to the app;
+    layers in between must let it through.
+    """
+
+
+def on_response_start(send: Send, callback: Callable[[Message, MutableHeaders], None]) -> Send:
+    """
+    Wrap ``send`` so ``callback(message, headers)`` can edit the response
+    headers in place before they go out
+
+    Body chunks are forwarded untouched, so the response keeps streaming.
+    """
+
+    async def wrapped_send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            callback(message, MutableHeaders(scope=message))
+        await send(message)
+
+    return wrapped_send
+
+
+def append_vary(headers: MutableHeaders, *fields: str) -> None:
+    """Add fields to the Vary header without duplicating existing ones"""
+    vary = headers.get("Vary", "")
+    present = {field.strip().lower() for field in vary.split(",") if field.strip()}
+    missing = [field for field in fields if field.lower() not in present]
+    if missing:
+        headers["Vary"] = ", ".join(([vary] if vary else []) + missing)
+
+
+def error_response(status_code: int, detail: str, headers: Optional[dict] = None) -> JSONResponse:
+    """
+    JSON error response with the same body as an unhandled HTTPException
+
+    Middlewares sit outside the exception handlers, so they answer with this
+    response instead of raising HTTPException.
+    """
+    return JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class HTTPMiddleware:
+    """
+    Base class for pure-ASGI middlewares
+
+    Non-HTTP scopes (websocket, lifespan) are passed straight through;
+    subclasses implement ``handle(scope, receive, send)`` for HTTP requests.
+    Unlike BaseHTTPMiddleware there is no Request/Response object, no extra
+    task and no body re-buffering between layers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        await self.handle(scope, receive, send)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
@@ -4,8 +4,15 @@ Cache backend pour améliorer les performances
 Utilise MessagePack pour sérialisation binaire rapide
 """
 
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, Dict
+from collections import OrderedDict
+import asyncio
+import enum
+import fnmatch
+import inspect
 import json
+import time
+import uuid
 import zlib
 from functools import wraps
 import hashlib
@@ -28,14 +35,137 @@ from app.core.config import settings
 from app.core.logging import logger
 
 
+# Canal pub/sub utilisé pour propager les invalidations du cache L1 entre workers
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+# Préfixe des index tag -> clés de cache (sets Redis)
+TAG_INDEX_PREFIX = "cache:tag:"
+
+# Verrou de recalcul partagé entre workers (anti cache stampede)
+LOCK_PREFIX = "cache:lock:"
+
+# Ne libérer le verrou que s'il nous appartient encore
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS: index de tags, ARGV[1]: clé de cache, ARGV[2]: expiration minimale des index
+_TAG_KEY_SCRIPT = """
+for _, index_key in ipairs(KEYS) do
+    redis.call('SADD', index_key, ARGV[1])
+    if redis.call('TTL', index_key) < tonumber(ARGV[2]) then
+        redis.call('EXPIRE', index_key, ARGV[2])
+    end
+end
+return #KEYS
+"""
+
+# KEYS: index de tags; supprime les clés référencées par lots et retourne leur liste
+_INVALIDATE_INDEXES_SCRIPT = """
+local invalidated = {}
+for _, index_key in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', index_key)
+    for i = 1, #members, 500 do
+        redis.call('UNLINK', unpack(members, i, math.min(i + 499, #members)))
+    end
+    for _, member in ipairs(members) do
+        invalidated[#invalidated + 1] = member
+    end
+    redis.call('UNLINK', index_key)
+end
+return invalidated
+"""
+
+
+class LocalCache:
+    """
+    Cache L1 en mémoire du processus (LRU borné + TTL)
+
+    Conserve les objets déjà désérialisés pour éviter l'aller-retour Redis
+    et le décodage MessagePack. Les valeurs retournées sont partagées entre
+    les appels et doivent être traitées en lecture seule.
+    """
+
+    def __init__(self, max_entries: int = 1000, default_ttl: int = 30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Récupérer une valeur (None si absente ou expirée)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, expire: Optional[int] = None) -> None:
+        """Stocker une valeur; le TTL est plafonné par default_ttl"""
+        ttl = self.default_ttl if expire is None else min(expire, self.default_ttl)
+        if ttl <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        """Supprimer une clé"""
+        return self._entries.pop(key, None) is not None
+
+    def clear_pattern(self, pattern: str) -> int:
+        """Supprimer les clés correspondant à un pattern glob (syntaxe Redis MATCH)"""
+        keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Vider le cache"""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compteurs du cache L1"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
 class CacheBackend:
-    """Backend de cache abstrait"""
-    
+    """Backend de cache abstrait (L1 en mémoire optionnel + L2 Redis)"""
+
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
         self.use_redis = REDIS_AVAILABLE and hasattr(settings, 'REDIS_URL')
         self.use_msgpack = MSGPACK_AVAILABLE
-        
+        self.local_cache: Optional[LocalCache] = None
+        self.instance_id = uuid.uuid4().hex
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self._invalidation_task: Optional[asyncio.Task] = None
+
         if self.use_redis and settings.REDIS_URL:
             try:
                 # Ne pas utiliser decode_responses=True car on stocke des bytes avec MessagePack
@@ -48,36 +178,60 @@ class CacheBackend:
             except Exception as e:
                 logger.warning(f"Failed to initialize Redis: {e}")
                 self.use_redis = False
-    
+
+        # Le tier L1 n'est activé qu'avec Redis: sans pub/sub, les workers
+        # ne pourraient pas s'invalider mutuellement
+        if self.redis_client and getattr(settings, 'CACHE_L1_ENABLED', False):
+            self.local_cache = LocalCache(
+                max_entries=settings.CACHE_L1_MAX_ENTRIES,
+                default_ttl=settings.CACHE_L1_TTL,
+            )
+
     async def get(self, key: str) -> Optional[Any]:
-        """Récupérer une valeur du cache avec décompression automatique"""
+        """Récupérer une valeur du cache (L1 puis Redis) avec décompression automatique"""
         if not self.use_redis or not self.redis_client:
             return None
-        
+
+        if self.local_cache is not None:
+            local_value = self.local_cache.get(key)
+            if local_value is not None:
+                return local_value
+
         try:
-            value = await self.redis_client.get(key)
+            if self.local_cache is not None:
+                # GET + TTL en un seul aller-retour pour aligner l'expiration L1 sur Redis
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.ttl(key)
+                    value, ttl = await pipe.execute()
+            else:
+                value, ttl = await self.redis_client.get(key), None
+
             if not value:
+                self.redis_misses += 1
                 return None
-            
-            # Vérifier si compressé (préfixe binaire)
-            if value.startswith(b"zlib:"):
-                # DÃ©compresser
-                compressed = value[len(b"zlib:"):]
-                decompressed = zlib.decompress(compressed)
-                # Désérialiser avec MessagePack ou JSON
-                if self.use_msgpack:
-                    return msgpack.unpackb(decompressed, raw=False)
-                else:
-                    return json.loads(decompressed.decode('utf-8'))
-            else:
-                # Non compressé, désérialiser directement
-                if self.use_msgpack:
-                    return msgpack.unpackb(value, raw=False)
-                else:
-                    return json.loads(value.decode('utf-8'))
+
+            self.redis_hits += 1
+            decoded = self._decode(value)
+            if self.local_cache is not None:
+                # ttl < 0: clé sans expiration (-1) ou disparue entre-temps (-2)
+                self.local_cache.set(key, decoded, ttl if ttl and ttl > 0 else None)
+            return decoded
         except Exception as e:
             logger.error(f"Cache get error: {e}")
         return None
+
+    def _decode(self, value: bytes) -> Any:
+        """Désérialiser une valeur brute lue dans Redis"""
+        # Vérifier si compressé (préfixe binaire)
+        if value.startswith(b"zlib:"):
+            # Décompresser
+            value = zlib.decompress(value[len(b"zlib:"):])
+
+        # Désérialiser avec MessagePack ou JSON
+        if self.use_msgpack:
+            return msgpack.unpackb(value, raw=False)
+        return json.loads(value.decode('utf-8'))
     
     async def set(self, key: str, value: Any, expire: int = 300, compress: bool = True) -> bool:
         """Stocker une valeur dans le cache avec MessagePack et compression optionnelle"""
@@ -100,7 +254,15 @@ class CacheBackend:
             else:
                 final_value = serialized
             
-            await self.redis_client.setex(key, expire, final_value)
+            if self.local_cache is not None:
+                # Les autres workers peuvent détenir une ancienne valeur en L1
+                self.local_cache.delete(key)
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.setex(key, expire, final_value)
+                    pipe.publish(INVALIDATION_CHANNEL, self._invalidation_message("delete", key))
+                    await pipe.execute()
+            else:
+                await self.redis_client.setex(key, expire, final_value)
             return True
         except Exception as e:
             logger.error(f"Cache set error: {e}")
@@ -113,6 +275,7 @@ class CacheBackend:
         
         try:
             await self.redis_client.delete(key)
+            await self._invalidate_local("delete", key)
             return True
         except Exception as e:
             logger.error(f"Cache delete error: {e}")
@@ -141,57 +304,512 @@ class CacheBackend:
                 if cursor == 0:  # SCAN terminé
                     break
             
+            await self._invalidate_local("pattern", pattern)
             return deleted_count
         except Exception as e:
             logger.error(f"Cache clear_pattern error: {e}")
         return 0
 
+    async def add_to_indexes(self, index_keys: list[str], key: str, expire: int) -> bool:
+        """
+        Enregistrer une clé de cache dans des index (sets Redis) en un seul appel Lua
+
+        Chaque index vit au moins aussi longtemps que les entrées qu'il référence.
+        """
+        if not self.use_redis or not self.redis_client or not index_keys:
+            return False
+
+        try:
+            await self.redis_client.eval(_TAG_KEY_SCRIPT, len(index_keys), *index_keys, key, expire)
+            return True
+        except Exception as e:
+            logger.error(f"Cache index error: {e}")
+            return False
+
+    async def invalidate_indexes(self, index_keys: list[str]) -> int:
+        """
+        Supprimer toutes les clés référencées par des index, puis les index eux-mêmes
+
+        Exécuté côté Redis (Lua): le coût dépend du nombre de clés concernées,
+        pas de la taille du keyspace.
+        """
+        if not self.use_redis or not self.redis_client or not index_keys:
+            return 0
+
+        try:
+            members = await self.redis_client.eval(_INVALIDATE_INDEXES_SCRIPT, len(index_keys), *index_keys)
+            keys = [m.decode('utf-8') if isinstance(m, bytes) else m for m in members or []]
+            if keys:
+                await self._invalidate_local("keys", keys)
+            return len(keys)
+        except Exception as e:
+            logger.error(f"Cache invalidate_indexes error: {e}")
+        return 0
+
+    async def acquire_lock(self, name: str, timeout: int) -> Optional[str]:
+        """
+        Acquérir un verrou Redis (SET NX PX)
+
+        Returns:
+            Jeton à passer à release_lock, ou None si un autre worker le détient.
+            Sans Redis, il n'y a rien à coordonner: un jeton local est retourné.
+        """
+        token = uuid.uuid4().hex
+        if not self.use_redis or not self.redis_client:
+            return token
+
+        try:
+            acquired = await self.redis_client.set(f"{LOCK_PREFIX}{name}", token, nx=True, px=timeout * 1000)
+            return token if acquired else None
+        except Exception as e:
+            logger.warning(f"Cache lock error: {e}")
+            return token
+
+    async def release_lock(self, name: str, token: str) -> None:
+        """Libérer un verrou acquis avec acquire_lock"""
+        if not self.use_redis or not self.redis_client:
+            return
+
+        try:
+            await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, f"{LOCK_PREFIX}{name}", token)
+        except Exception as e:
+            logger.warning(f"Cache lock release error: {e}")
+
+    def _invalidation_message(self, op: str, target: Any) -> bytes:
+        """Construire le message pub/sub d'invalidation L1"""
+        return json.dumps({"origin": self.instance_id, "op": op, "target": target}).encode('utf-8')
+
+    def _apply_local_invalidation(self, op: str, target: Any) -> None:
+        """Appliquer une invalidation sur le cache L1 de ce processus"""
+        if self.local_cache is None:
+            return
+        if op == "delete":
+            self.local_cache.delete(target)
+        elif op == "keys":
+            for key in target:
+                self.local_cache.delete(key)
+        elif op == "pattern":
+            self.local_cache.clear_pattern(target)
+
+    async def _invalidate_local(self, op: str, target: Any) -> None:
+        """Invalider le L1 local puis notifier les autres workers"""
+        if self.local_cache is None:
+            return
+        self._apply_local_invalidation(op, target)
+        try:
+            await self.redis_client.publish(INVALIDATION_CHANNEL, self._invalidation_message(op, target))
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish error: {e}")
+
+    async def _listen_invalidations(self) -> None:
+        """Écouter les invalidations publiées par les autres workers (reconnexion automatique)"""
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        payload = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    if payload.get("origin") == self.instance_id:
+                        continue
+                    self._apply_local_invalidation(payload.get("op"), payload.get("target", ""))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Messages perdus pendant la coupure: repartir d'un L1 vide
+                logger.warning(f"Cache invalidation listener error: {e}")
+                if self.local_cache is not None:
+                    self.local_cache.clear()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def start_invalidation_listener(self) -> None:
+        """Démarrer l'écoute des invalidations L1 (no-op sans tier L1)"""
+        if self.local_cache is None or self._invalidation_task is not None:
+            return
+        self._invalidation_task = asyncio.create_task(self._listen_invalidations())
+
+    async def stop_invalidation_listener(self) -> None:
+        """Arrêter l'écoute des invalidations L1"""
+        if self._invalidation_task is None:
+            return
+        self._invalidation_task.cancel()
+        try:
+            await self._invalidation_task
+        except asyncio.CancelledError:
+            pass
+        self._invalidation_task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Compteurs hit/miss par tier"""
+        return {
+            "l1": self.local_cache.get_stats() if self.local_cache is not None else None,
+            "l2": {
+                "hits": self.redis_hits,
+                "misses": self.redis_misses,
+            },
+        }
+
 
 # Instance globale
 cache_backend = CacheBackend()
 
 
+def redis_client_or_none():
+    """Client Redis partagé, ou None quand Redis n'est pas disponible"""
+    return cache_backend.redis_client if cache_backend.use_redis else None
+
+
+# Paramètres d'infrastructure FastAPI ignorés lors de la construction des clés
+_INFRASTRUCTURE_TYPES: tuple = ()
+
+
+def _infrastructure_types() -> tuple:
+    """Types injectés par FastAPI qui n'influencent pas le résultat (import paresseux)"""
+    global _INFRASTRUCTURE_TYPES
+    if not _INFRASTRUCTURE_TYPES:
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from sqlalchemy.orm import Session
+        from starlette.background import BackgroundTasks
+        from starlette.requests import HTTPConnection
+        from starlette.responses import Response
+        _INFRASTRUCTURE_TYPES = (HTTPConnection, Response, BackgroundTasks, AsyncSession, Session)
+    return _INFRASTRUCTURE_TYPES
+
+
 def cache_key(*args, **kwargs) -> str:
     """Générer une clé de cache à partir d'arguments"""
     key_data = f"{args}:{sorted(kwargs.items())}"
     return hashlib.md5(key_data.encode()).hexdigest()
 
 
-def cached(expire: int = 300, key_prefix: str = ""):
+def _normalize_key_value(value: Any) -> Any:
+    """Réduire une valeur d'argument à une forme stable pour la clé"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_normalize_key_value(v) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        return {str(k): _normalize_key_value(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, enum.Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+
+    # Instance ORM: clé sur la table et la clé primaire plutôt que sur repr()
+    tablename = getattr(type(value), "__tablename__", None)
+    if tablename is not None:
+        return f"{tablename}:{getattr(value, 'id', None)}"
+    if hasattr(value, "model_dump"):
+        return _normalize_key_value(value.model_dump())
+    return repr(value)
+
+
+def endpoint_cache_key(func, args: tuple, kwargs: dict) -> str:
+    """
+    Construire une clé de cache stable pour un endpoint FastAPI
+
+    Les dépendances d'infrastructure (Request, AsyncSession, Response...)
+    sont ignorées, l'utilisateur courant est réduit à son id, et les
+    paramètres de requête sont normalisés après application des valeurs
+    par défaut (``?limit=100`` et l'absence de ``limit`` donnent la même clé).
+
+    Returns:
+        ``"<scope>:<hash>"`` où scope identifie le tenant et l'utilisateur
+    """
+    infrastructure = _infrastructure_types()
+    try:
+        bound = inspect.signature(func).bind_partial(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except (TypeError, ValueError):
+        arguments = {f"arg{i}": a for i, a in enumerate(args)}
+        arguments.update(kwargs)
+
+    user_id = None
+    normalized: Dict[str, Any] = {}
+    for name, value in arguments.items():
+        if isinstance(value, infrastructure):
+            continue
+        if getattr(type(value), "__tablename__", None) == "users":
+            user_id = getattr(value, "id", None)
+            continue
+        # Valeur par défaut FastAPI non résolue (appel direct hors requête)
+        if type(value).__module__.startswith("fastapi.params"):
+            value = getattr(value, "default", None)
+        normalized[name] = _normalize_key_value(value)
+
+    from app.core.tenancy import get_current_tenant
+    tenant_id = get_current_tenant()
+
+    scope = f"t{tenant_id if tenant_id is not None else '-'}.u{user_id if user_id is not None else '-'}"
+    digest = hashlib.md5(
+        json.dumps(normalized, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f"{scope}:{digest}"
+
+
+def _to_cacheable(value: Any) -> Any:
+    """Convertir un résultat (modèles Pydantic, ORM...) en structure sérialisable"""
+    from fastapi.encoders import jsonable_encoder
+    return jsonable_encoder(value)
+
+
+async def invalidate_cache_tables(*tables: str) -> int:
+    """
+    Invalider toutes les entrées de cache dérivées des tables données
+
+    Usage:
+        await invalidate_cache_tables("projects")
+    """
+    return await cache_backend.invalidate_indexes([f"{TAG_INDEX_PREFIX}{table}" for table in tables])
+
+
+# Calculs en cours dans ce processus (single-flight): clé -> future partagée
+_inflight: Dict[str, asyncio.Future] = {}
+
+# Tâches de rafraîchissement en arrière-plan (références pour éviter le GC)
+_refresh_tasks: set = set()
+
+# Résultat d'un rafraîchissement en arrière-plan abandonné (un autre worker s'en charge)
+_NOT_REFRESHED = object()
+
+# Marqueur des enveloppes stale-while-revalidate stockées dans le cache
+_SWR_MARKER = "__swr__"
+
+
+def _wrap_swr(value: Any, expire: int) -> Dict[str, Any]:
+    """Envelopper une valeur avec sa date de fraîcheur (soft TTL)"""
+    return {_SWR_MARKER: 1, "fresh_until": time.time() + expire, "value": value}
+
+
+def _unwrap_swr(cached_value: Any) -> tuple[Any, bool]:
+    """Retourner (valeur, fraîche?) pour une entrée lue dans le cache"""
+    if isinstance(cached_value, dict) and cached_value.get(_SWR_MARKER) == 1:
+        return cached_value.get("value"), cached_value.get("fresh_until", 0) > time.time()
+    return cached_value, True
+
+
+async def get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    expire: int = 300,
+    compress: bool = True,
+    stale_ttl: int = 0,
+    single_flight: bool = True,
+    lock_timeout: int = 30,
+    prepare: Optional[Callable[[Any], Any]] = None,
+    on_stored: Optional[Callable[[], Awaitable[Any]]] = None,
+    refresh: Optional[Callable[[], Awaitable[Any]]] = None,
+    backend: Optional["CacheBackend"] = None,
+) -> Any:
+    """
+    Lire une clé ou la calculer, avec protection contre le cache stampede
+
+    - single_flight: un seul calcul par clé et par processus (future partagée),
+      et un seul par cluster grâce à un verrou Redis; les autres workers
+      attendent que la valeur apparaisse dans le cache.
+    - stale_ttl > 0: mode stale-while-revalidate. Après ``expire`` secondes,
+      la valeur reste servie pendant ``stale_ttl`` secondes pendant qu'un
+      worker la recalcule en arrière-plan.
+
+    Args:
+        key: Clé de cache
+        compute: Coroutine sans argument produisant la valeur
+        expire: Durée de fraîcheur (secondes)
+        stale_ttl: Durée supplémentaire pendant laquelle servir la valeur périmée
+        prepare: Conversion de la valeur avant stockage (une exception = pas de cache)
+        on_stored: Appelé après un stockage réussi (ex: indexation par tags)
+        refresh: Variante de ``compute`` pour le rafraîchissement en arrière-plan
+        backend: Backend de cache (cache_backend par défaut)
+    """
+    backend = backend or cache_backend
+
+    cached_value = await backend.get(key)
+    if cached_value is not None:
+        value, fresh = _unwrap_swr(cached_value)
+        if fresh:
+            logger.debug(f"Cache hit: {key}")
+            return value
+
+        logger.debug(f"Cache stale: {key}")
+        if key not in _inflight:
+            task = asyncio.create_task(_single_flight(
+                key, refresh or compute, expire, compress, stale_ttl, lock_timeout,
+                prepare, on_stored, backend, wait_for_peer=False,
+            ))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+            task.add_done_callback(_log_refresh_error)
+        return value
+
+    logger.debug(f"Cache miss: {key}")
+    if not single_flight:
+        return await _compute_and_store(key, compute, expire, compress, stale_ttl, prepare, on_stored, backend)
+    return await _single_flight(
+        key, compute, expire, compress, stale_ttl, lock_timeout, prepare, on_stored, backend,
+    )
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Cache background refresh failed: {task.exception()}")
+
+
+async def _single_flight(
+    key, compute, expire, compress, stale_ttl, lock_timeout, prepare, on_stored, backend,
+    wait_for_peer: bool = True,
+) -> Any:
+    """Partager un calcul en cours dans le processus, et le verrouiller entre workers"""
+    future = _inflight.get(key)
+    if future is not None:
+        result = await asyncio.shield(future)
+        if result is not _NOT_REFRESHED or not wait_for_peer:
+            return result
+        # Le calcul partagé était un rafraîchissement abandonné: pas de valeur à servir
+        return await _single_flight(
+            key, compute, expire, compress, stale_ttl, lock_timeout, prepare, on_stored, backend,
+        )
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await _locked_compute(
+            key, compute, expire, compress, stale_ttl, lock_timeout, prepare, on_stored, backend,
+            wait_for_peer,
+        )
+    except BaseException as e:
+        future.set_exception(e)
+        # Éviter "Future exception was never retrieved" quand personne n'attend
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _locked_compute(
+    key, compute, expire, compress, stale_ttl, lock_timeout, prepare, on_stored, backend,
+    wait_for_peer: bool,
+) -> Any:
+    token = await backend.acquire_lock(key, lock_timeout)
+    if token is None:
+        if not wait_for_peer:
+            # Rafraîchissement déjà en cours sur un autre worker
+            return _NOT_REFRESHED
+
+        # Un autre worker calcule: attendre que la valeur apparaisse
+        deadline = time.monotonic() + lock_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            cached_value = await backend.get(key)
+            if cached_value is not None:
+                return _unwrap_swr(cached_value)[0]
+            delay = min(delay * 2, 0.5)
+        logger.warning(f"Cache lock wait timed out, computing locally: {key}")
+        return await _compute_and_store(key, compute, expire, compress, stale_ttl, prepare, on_stored, backend)
+
+    try:
+        return await _compute_and_store(key, compute, expire, compress, stale_ttl, prepare, on_stored, backend)
+    finally:
+        await backend.release_lock(key, token)
+
+
+async def _compute_and_store(key, compute, expire, compress, stale_ttl, prepare, on_stored, backend) -> Any:
+    result = await compute()
+
+    try:
+        cacheable = prepare(result) if prepare else result
+    except Exception as e:
+        logger.debug(f"Cache skip (unserializable result): {key}: {e}")
+        return result
+
+    if stale_ttl > 0:
+        stored = await backend.set(key, _wrap_swr(cacheable, expire), expire + stale_ttl, compress)
+    else:
+        stored = await backend.set(key, cacheable, expire, compress)
+    if stored and on_stored is not None:
+        await on_stored()
+    return result
+
+
+def cached(
+    expire: int = 300,
+    key_prefix: str = "",
+    tables: Optional[list[str]] = None,
+    key_builder: Optional[Callable[[Callable, tuple, dict], str]] = None,
+    stale_ttl: int = 0,
+    single_flight: bool = True,
+):
     """
     Décorateur pour mettre en cache le résultat d'une fonction
     
+    La clé est construite par ``endpoint_cache_key`` (ou ``key_builder``):
+    elle ignore Request/AsyncSession et se base sur l'utilisateur, le tenant
+    et les paramètres normalisés. ``tables`` enregistre les tables dont le
+    résultat dépend (comme tags) pour que ``invalidate_cache_tables`` puisse
+    l'invalider.
+
+    Un seul recalcul par clé est lancé à la fois (``single_flight``). Avec
+    ``stale_ttl``, la valeur expirée reste servie pendant son recalcul en
+    arrière-plan; celui-ci utilise sa propre session de base de données.
+
     Usage:
-        @cached(expire=600, key_prefix="users")
+        @cached(expire=600, key_prefix="users", tables=["users"], stale_ttl=300)
         async def get_users():
             ...
     """
+    build_key = key_builder or endpoint_cache_key
+
     def decorator(func):
+        def make_key(args, kwargs) -> str:
+            return f"{key_prefix}:{func.__name__}:{build_key(func, args, kwargs)}"
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # Générer la clé de cache
-            cache_key_str = f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
-            
-            # VÃ©rifier le cache
-            cached_value = await cache_backend.get(cache_key_str)
-            if cached_value is not None:
-                logger.debug(f"Cache hit: {cache_key_str}")
-                return cached_value
-            
-            # Exécuter la fonction
-            logger.debug(f"Cache miss: {cache_key_str}")
-            result = await func(*args, **kwargs)
-            
-            # Mettre en cache (compression automatique si > 1KB)
-            await cache_backend.set(cache_key_str, result, expire, compress=True)
-            
-            return result
+            cache_key_str = make_key(args, kwargs)
+
+            async def compute():
+                return await func(*args, **kwargs)
+
+            async def refresh():
+                # La session de la requête sera fermée avant la fin du rafraîchissement
+                return await _call_with_fresh_sessions(func, args, kwargs)
+
+            async def on_stored():
+                await cache_backend.add_to_indexes(
+                    [f"{TAG_INDEX_PREFIX}{table}" for table in tables], cache_key_str, expire + stale_ttl
+                )
+
+            return await get_or_compute(
+                cache_key_str,
+                compute,
+                expire=expire,
+                compress=True,
+                stale_ttl=stale_ttl,
+                single_flight=single_flight,
+                prepare=_to_cacheable,
+                on_stored=on_stored if tables else None,
+                refresh=refresh,
+            )
         
-        # Ajouter mÃ©thode d'invalidation
+        # Ajouter méthode d'invalidation
         async def invalidate(*args, **kwargs):
-            """Invalider le cache pour cette fonction avec les mÃªmes arguments"""
-            cache_key_str = f"{key_prefix}:{func.__name__}:{cache_key(*args, **kwargs)}"
-            await cache_backend.delete(cache_key_str)
+            """Invalider le cache pour cette fonction avec les mêmes arguments"""
+            await cache_backend.delete(make_key(args, kwargs))
         
         async def invalidate_all():
             """Invalider tout le cache pour ce préfixe"""
@@ -200,10 +818,25 @@ def cached(expire: int = 300, key_prefix: str = ""):
         
         wrapper.invalidate = invalidate
         wrapper.invalidate_all = invalidate_all
+        wrapper.cache_tables = tuple(tables or ())
         return wrapper
     return decorator
 
 
+async def _call_with_fresh_sessions(func, args: tuple, kwargs: dict) -> Any:
+    """Appeler func en remplaçant les AsyncSession reçues par une nouvelle session"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.core.database import AsyncSessionLocal
+
+    if not any(isinstance(v, AsyncSession) for v in (*args, *kwargs.values())):
+        return await func(*args, **kwargs)
+
+    async with AsyncSessionLocal() as session:
+        new_args = tuple(session if isinstance(v, AsyncSession) else v for v in args)
+        new_kwargs = {k: session if isinstance(v, AsyncSession) else v for k, v in kwargs.items()}
+        return await func(*new_args, **new_kwargs)
+
+
 def invalidate_cache_pattern(pattern: str):
     """
     Décorateur pour invalider le cache par pattern après l'exécution d'une fonction
@@ -223,6 +856,25 @@ def invalidate_cache_pattern(pattern: str):
     return decorator
 
 
+def invalidate_cache_tables_after(*tables: str):
+    """
+    Décorateur pour invalider les entrées dérivées de tables après une écriture
+
+    Usage:
+        @invalidate_cache_tables_after("projects")
+        async def create_project(...):
+            ...
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            await invalidate_cache_tables(*tables)
+            return result
+        return wrapper
+    return decorator
+
+
 async def invalidate_cache_pattern_async(pattern: str) -> int:
     """
     Fonction utilitaire pour invalider le cache par pattern (version async)
@@ -236,14 +888,18 @@ async def invalidate_cache_pattern_async(pattern: str) -> int:
 
 async def init_cache():
     """Initialiser le cache"""
-    if cache_backend.use_redis:
-        logger.info("Cache backend ready")
+    if cache_backend.use_redis and cache_backend.redis_client:
+        from app.core.cache_invalidation import install_cache_invalidation_hooks
+        install_cache_invalidation_hooks()
+        cache_backend.start_invalidation_listener()
+        logger.info(f"Cache backend ready (L1: {cache_backend.local_cache is not None})")
     else:
         logger.warning("Cache backend not available (Redis not configured)")
 
 
 async def close_cache():
     """Fermer les connexions cache"""
+    await cache_backend.stop_invalidation_listener()
     if cache_backend.redis_client:
         await cache_backend.redis_client.close()
         logger.info("Cache connections closed")
@@ -9,7 +9,7 @@ import hashlib
 import json
 import asyncio
 
-from app.core.cache import cache_backend, CacheBackend
+from app.core.cache import cache_backend, CacheBackend, TAG_INDEX_PREFIX, get_or_compute
 from app.core.logging import logger
 
 
@@ -26,38 +26,43 @@ class EnhancedCache:
         expire: int = 300,
         compress: bool = True,
         *args,
+        stale_ttl: int = 0,
+        single_flight: bool = True,
         **kwargs
     ) -> Any:
         """
         Get value from cache or set it using callable
         
+        Concurrent misses on the same key share one computation (in-process
+        future + Redis lock across workers). With ``stale_ttl``, an expired
+        value keeps being served while one worker refreshes it in background.
+        
         Args:
             key: Cache key
             callable_fn: Function to call if cache miss
             expire: Cache expiration in seconds
             compress: Whether to compress large values
+            stale_ttl: Seconds during which a stale value may be served
+            single_flight: Whether to deduplicate concurrent recomputations
             *args, **kwargs: Arguments to pass to callable_fn
         
         Returns:
             Cached or computed value
         """
-        # Try to get from cache
-        cached_value = await self.cache.get(key)
-        if cached_value is not None:
-            logger.debug(f"Cache hit: {key}")
-            return cached_value
-        
-        # Cache miss - compute value
-        logger.debug(f"Cache miss: {key}")
-        if asyncio.iscoroutinefunction(callable_fn):
-            value = await callable_fn(*args, **kwargs)
-        else:
-            value = callable_fn(*args, **kwargs) if args or kwargs else callable_fn()
-        
-        # Store in cache
-        await self.cache.set(key, value, expire, compress)
-        
-        return value
+        async def compute():
+            if asyncio.iscoroutinefunction(callable_fn):
+                return await callable_fn(*args, **kwargs)
+            return callable_fn(*args, **kwargs) if args or kwargs else callable_fn()
+        
+        return await get_or_compute(
+            key,
+            compute,
+            expire=expire,
+            compress=compress,
+            stale_ttl=stale_ttl,
+            single_flight=single_flight,
+            backend=self.cache,
+        )
     
     async def cache_query_result(
         self,
@@ -79,16 +84,12 @@ class EnhancedCache:
             True if cached successfully
         """
         # Store result
-        success = await self.cache.set(f"query:{query_hash}", result, expire)
+        key = f"query:{query_hash}"
+        success = await self.cache.set(key, result, expire)
         
-        # Store tags for invalidation
+        # Index the key in one Redis set per tag (atomic SADD, no read-modify-write)
         if tags and success:
-            for tag in tags:
-                tag_key = f"tag:{tag}"
-                existing_queries = await self.cache.get(tag_key) or []
-                if query_hash not in existing_queries:
-                    existing_queries.append(query_hash)
-                    await self.cache.set(tag_key, existing_queries, expire=86400)  # 24h
+            await self.cache.add_to_indexes([f"{TAG_INDEX_PREFIX}{tag}" for tag in tags], key, expire)
         
         return success
     
@@ -96,26 +97,18 @@ class EnhancedCache:
         """
         Invalidate cache entries by tags
         
+        Tagged keys and tag sets are removed server-side in a single Lua call,
+        so the cost scales with the number of affected keys, not the keyspace.
+        
         Args:
             tags: List of tags to invalidate
         
         Returns:
             Number of cache entries invalidated
         """
-        invalidated = 0
-        
-        for tag in tags:
-            tag_key = f"tag:{tag}"
-            query_hashes = await self.cache.get(tag_key) or []
-            
-            for query_hash in query_hashes:
-                if await self.cache.delete(f"query:{query_hash}"):
-                    invalidated += 1
-            
-            # Clear tag
-            await self.cache.delete(tag_key)
-        
-        return invalidated
+        if not tags:
+            return 0
+        return await self.cache.invalidate_indexes([f"{TAG_INDEX_PREFIX}{tag}" for tag in tags])
     
     async def warm_cache(self, keys_and_callables: dict[str, Callable]) -> dict[str, bool]:
         """
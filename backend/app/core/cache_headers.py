@@ -3,100 +3,169 @@ Cache Headers Middleware
 Adds Cache-Control and ETag headers to API responses
 """
 
-from fastapi import Request
-from fastapi.responses import Response
-from starlette.middleware.base import BaseHTTPMiddleware
 import hashlib
-import json
-from typing import Callable
+from typing import Any, Optional
 from datetime import datetime, timedelta, timezone
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import Message, Receive, Scope, Send
 
-class CacheHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware for adding cache headers to responses"""
+from app.core.asgi import HTTPMiddleware, StopResponse, append_vary, on_response_start
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    etag = etag.removeprefix("W/")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def version_etag(*versions: Any) -> str:
+    """
+    Weak ETag derived from row versions instead of the response body
+
+    Pass whatever changes when the payload changes, e.g. the row count and
+    ``max(updated_at)`` of the listed rows plus the query filters.
+    """
+    digest = hashlib.md5("|".join(map(str, versions)).encode("utf-8"), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether the client already holds ``etag``: answer 304 before building the payload"""
+    return etag_matches(request.headers.get("if-none-match"), etag)
+
+
+class CacheHeadersMiddleware(HTTPMiddleware):
+    """
+    Middleware for adding cache headers to responses
+
+    An ETag set by the endpoint (see ``version_etag``) is checked against
+    If-None-Match as soon as the headers are sent: on a match the 304 goes
+    out and the body iterator is stopped before producing anything.
+    Otherwise bodies sent in one message get an MD5 ETag; streamed bodies
+    are forwarded chunk by chunk without one, since headers go out before
+    the body is known.
+    """
 
     def __init__(self, app, default_max_age: int = 300):
         super().__init__(app)
         self.default_max_age = default_max_age
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip cache headers for non-GET requests
-        if request.method != "GET":
-            response = await call_next(request)
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-            return response
-        
-        # Call the next middleware/endpoint
-        response = await call_next(request)
-        
-        # Skip cache headers for error responses
-        if response.status_code >= 400:
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-            return response
-        
-        # Get path from request URL (works with both Request and _CachedRequest)
-        path = request.url.path if hasattr(request, 'url') else getattr(request, 'path', '/')
-        
-        # Skip ETag generation for responses without body attribute (e.g., StreamingResponse, RedirectResponse)
-        if not hasattr(response, 'body'):
-            # Still add cache headers but skip ETag
-            max_age = self._get_cache_max_age(path)
-            response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
-            response.headers["Vary"] = "Accept, Accept-Encoding"
-            expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
-            response.headers["Expires"] = expires.strftime("%a, %d %b %Y %H:%M:%S GMT")
-            return response
-        
-        # Generate ETag from response body
-        try:
-            body = response.body
-            etag = hashlib.md5(body).hexdigest()
-            response.headers["ETag"] = f'"{etag}"'
-            
-            # Check if client sent If-None-Match header
-            if_none_match = request.headers.get("If-None-Match")
-            if if_none_match and if_none_match.strip() == f'"{etag}"':
-                # Response hasn't changed, return 304 Not Modified
-                return Response(status_code=304, headers=response.headers)
-        except AttributeError:
-            # Response doesn't have body attribute, skip ETag
-            pass
-        
+    def _set_no_cache(self, message: Message, headers: MutableHeaders) -> None:
+        headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+        headers["Pragma"] = "no-cache"
+        headers["Expires"] = "0"
+
+    def _set_cache_headers(self, headers: MutableHeaders, path: str) -> None:
+        # Respect a Cache-Control chosen by the endpoint
+        if "cache-control" in headers:
+            return
+
         # Determine cache max-age based on endpoint
         max_age = self._get_cache_max_age(path)
-        
-        # Add cache headers
-        response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
-        response.headers["Vary"] = "Accept, Accept-Encoding"
-        
-        # Add Expires header
+        headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+        append_vary(headers, "Accept", "Accept-Encoding")
         expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
-        response.headers["Expires"] = expires.strftime("%a, %d %b %Y %H:%M:%S GMT")
-        
-        return response
+        headers["Expires"] = expires.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+    @staticmethod
+    def _not_modified(start: Message) -> Message:
+        start["status"] = 304
+        headers = MutableHeaders(scope=start)
+        for name in ("content-length", "content-type", "content-encoding"):
+            if name in headers:
+                del headers[name]
+        return start
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip cache headers for non-GET requests
+        if scope["method"] != "GET":
+            await self.app(scope, receive, on_response_start(send, self._set_no_cache))
+            return
+
+        path = scope["path"]
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        # Start message held back until the first body chunk tells whether
+        # the whole body is available for the ETag
+        pending_start: Optional[Message] = None
+        # Set once a 304 has been sent: the rest of the body is dropped
+        answered = False
+
+        async def send_with_cache_headers(message: Message) -> None:
+            nonlocal pending_start, answered
+            message_type = message["type"]
+
+            if answered:
+                return
+
+            if message_type == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                # Skip cache headers for error responses
+                if message["status"] >= 400:
+                    self._set_no_cache(message, headers)
+                    await send(message)
+                    return
+                self._set_cache_headers(headers, path)
+                if message["status"] == 200:
+                    etag = headers.get("etag")
+                    if etag is None:
+                        pending_start = message
+                        return
+                    # ETag chosen by the endpoint: no need to see the body
+                    if etag_matches(if_none_match, etag):
+                        answered = True
+                        await send(self._not_modified(message))
+                        await send({"type": "http.response.body", "body": b""})
+                        raise StopResponse()
+                await send(message)
+                return
+
+            if pending_start is None:
+                await send(message)
+                return
+
+            start, pending_start = pending_start, None
+            # Streamed bodies (more_body) are forwarded without an ETag
+            if message_type == "http.response.body" and not message.get("more_body", False):
+                etag = f'"{hashlib.md5(message.get("body", b""), usedforsecurity=False).hexdigest()}"'
+                MutableHeaders(scope=start)["ETag"] = etag
+
+                # Response hasn't changed, return 304 Not Modified
+                if etag_matches(if_none_match, etag):
+                    answered = True
+                    await send(self._not_modified(start))
+                    await send({"type": "http.response.body", "body": b""})
+                    return
+
+            await send(start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cache_headers)
+        except StopResponse:
+            pass
 
     def _get_cache_max_age(self, path: str) -> int:
         """Determine cache max-age based on endpoint"""
         # Static/rarely changing data - longer cache
         if "/health" in path or "/docs" in path:
             return 60  # 1 minute
-        
+
         # User data - shorter cache
         if "/users/me" in path:
             return 60  # 1 minute
-        
+
         # List endpoints - medium cache
         if "/users" in path and path.endswith("/users"):
             return 300  # 5 minutes
-        
+
         # Individual resources - medium cache
         if "/users/" in path or "/resources/" in path:
             return 300  # 5 minutes
-        
+
         # Default cache
         return self.default_max_age
-
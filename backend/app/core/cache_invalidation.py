@@ -0,0 +1,96 @@
+"""
+Automatic Cache Invalidation
+Emits tag invalidations when tracked models are written through the ORM
+"""
+
+import asyncio
+from typing import Dict, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, ORMExecuteState
+
+from app.core.cache import invalidate_cache_tables
+from app.core.logging import logger
+
+
+# Table name -> cache tags invalidated when a row of that table is written.
+# Tags are shared by @cached(tables=[...]) and EnhancedCache.cache_query_result(tags=[...]).
+TRACKED_TABLES: Dict[str, Tuple[str, ...]] = {
+    "contacts": ("contacts",),
+    "companies": ("companies",),
+    "projects": ("projects",),
+    # Client and employee names are part of the project responses
+    "clients": ("clients",),
+    "employees": ("employees",),
+    "transactions": ("transactions",),
+    "finance_invoices": ("finance_invoices",),
+    "finance_invoice_payments": ("finance_invoices",),
+}
+
+_SESSION_INFO_KEY = "cache_invalidation_tags"
+
+# Keep references so pending invalidation tasks are not garbage-collected
+_pending_tasks: Set[asyncio.Task] = set()
+_installed = False
+
+
+def _record_tables(session: Session, tablenames) -> None:
+    """Remember the tags to invalidate once the session commits"""
+    tags = set()
+    for tablename in tablenames:
+        tags.update(TRACKED_TABLES.get(tablename, ()))
+    if tags:
+        session.info.setdefault(_SESSION_INFO_KEY, set()).update(tags)
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    _record_tables(session, {getattr(obj, "__tablename__", None) for obj in objects})
+
+
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    # Bulk insert()/update()/delete() statements bypass the flush
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        _record_tables(state.session, {state.bind_mapper.local_table.name})
+
+
+def _after_commit(session: Session) -> None:
+    tags = session.info.pop(_SESSION_INFO_KEY, None)
+    if not tags:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync session outside of the event loop (scripts, migrations)
+        return
+
+    task = loop.create_task(_invalidate(sorted(tags)))
+    _pending_tasks.add(task)
+    task.add_done_callback(_pending_tasks.discard)
+
+
+def _after_rollback(session: Session) -> None:
+    # Writes were discarded: nothing to invalidate
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+async def _invalidate(tags: list[str]) -> None:
+    try:
+        invalidated = await invalidate_cache_tables(*tags)
+        logger.debug(f"Cache invalidated for tags {tags}: {invalidated} entries")
+    except Exception as e:
+        logger.warning(f"Cache tag invalidation failed for {tags}: {e}")
+
+
+def install_cache_invalidation_hooks() -> None:
+    """Attach the ORM session listeners (idempotent)"""
+    global _installed
+    if _installed:
+        return
+
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
+    _installed = True
@@ -1,160 +1,285 @@
 """
 HTTP Compression Middleware
-Enhanced GZip/Brotli compression for API responses with streaming support
+Enhanced GZip/Brotli/Zstandard compression for API responses with streaming support
 """
 
-from fastapi import Request
-from fastapi.responses import Response, StreamingResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-import gzip
+import zlib
 import brotli
-from typing import Callable, AsyncGenerator, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.asgi import HTTPMiddleware, append_vary
 from app.core.logging import logger
 
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+# Only compress JSON, text, and JavaScript responses
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+)
+
+# Streams whose chunks must reach the client as soon as they are produced
+FLUSH_EVERY_CHUNK_TYPES = ("text/event-stream",)
+
+# Server preference when the client weighs encodings equally
+ENCODING_PREFERENCE = ("br", "zstd", "gzip")
+
+
+class GzipEncoder:
+    """Streaming gzip encoder"""
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    """Streaming Brotli encoder"""
+
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    """Streaming Zstandard encoder (requires the zstandard package)"""
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}, e.g. 'br;q=1.0, gzip;q=0.5' -> {'br': 1.0, 'gzip': 0.5}"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """Best encoding among ``available`` for the client, None for identity"""
+    weights = parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
 
-class CompressionMiddleware(BaseHTTPMiddleware):
-    """Enhanced middleware for response compression (GZip/Brotli) with streaming support"""
 
-    def __init__(self, app, min_size: int = 1024, compress_level: int = 6, use_brotli: bool = True):
+class CompressionMiddleware(HTTPMiddleware):
+    """
+    Enhanced middleware for response compression with streaming support
+
+    Bodies sent in one message are compressed in one shot. Streamed bodies
+    (exports, SSE) are buffered only up to ``min_size`` and then pushed
+    through a streaming encoder chunk by chunk, so the compressed copy never
+    holds more than what the encoder keeps internally. Event streams are
+    flushed after every chunk; other streams let the encoder fill its blocks.
+
+    A strong ETag becomes weak once the body is compressed, so conditional
+    requests still match whatever the negotiated encoding.
+    """
+
+    def __init__(
+        self,
+        app,
+        min_size: int = 1024,
+        compress_level: int = 6,
+        use_brotli: bool = True,
+        use_zstd: bool = True,
+        zstd_level: int = 3,
+    ):
         super().__init__(app)
         self.min_size = min_size  # Minimum size to compress (bytes)
-        self.compress_level = compress_level  # Compression level (1-9)
+        self.compress_level = compress_level  # Compression level (1-9) for gzip and Brotli
         self.use_brotli = use_brotli  # Use Brotli if available
-    
-    def _supports_compression(self, accept_encoding: str) -> tuple[bool, bool]:
-        """Check if client supports compression"""
-        accept_encoding_lower = accept_encoding.lower()
-        supports_gzip = "gzip" in accept_encoding_lower
-        supports_brotli = "br" in accept_encoding_lower and self.use_brotli
-        return supports_gzip, supports_brotli
-    
-    def _compress_gzip(self, data: bytes) -> bytes:
-        """Compress data using GZip"""
-        return gzip.compress(data, compresslevel=self.compress_level)
-    
-    def _compress_brotli(self, data: bytes) -> Optional[bytes]:
-        """Compress data using Brotli"""
+        self.zstd_level = zstd_level
+        self.encoders = {"gzip": GzipEncoder}
+        if use_brotli:
+            self.encoders["br"] = BrotliEncoder
+        if use_zstd and ZSTD_AVAILABLE:
+            self.encoders["zstd"] = ZstdEncoder
+        self.available_encodings = [coding for coding in ENCODING_PREFERENCE if coding in self.encoders]
+
+    def _new_encoder(self, encoding: str):
+        level = self.zstd_level if encoding == "zstd" else self.compress_level
+        return self.encoders[encoding](level)
+
+    def _compress_body(self, body: bytes, encoding: str) -> Optional[bytes]:
+        """Compress a complete body, only if it gets smaller"""
         try:
-            return brotli.compress(data, quality=self.compress_level)
-        except Exception:
+            encoder = self._new_encoder(encoding)
+            compressed = encoder.compress(body) + encoder.finish()
+        except Exception as e:
+            logger.error(f"Compression error: {e}")
             return None
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Check if client accepts compression
-        accept_encoding = request.headers.get("Accept-Encoding", "")
-        supports_gzip, supports_brotli = self._supports_compression(accept_encoding)
-        
-        # Call the next middleware/endpoint
-        response = await call_next(request)
-        
-        # Skip compression for certain status codes
-        if response.status_code >= 400:
-            return response
-        
-        # Skip compression for streaming responses or responses without body
-        if not hasattr(response, 'body'):
-            return response
-        
-        # Get content type
-        content_type = response.headers.get("Content-Type", "")
-        
-        # Only compress JSON, text, and JavaScript responses
-        compressible_types = [
-            "application/json",
-            "text/",
-            "application/javascript",
-            "application/xml",
-            "application/xhtml+xml",
-        ]
-        
-        if not any(ct in content_type for ct in compressible_types):
-            return response
-        
+        return compressed if len(compressed) < len(body) else None
+
+    def _response_mode(self, message: Message) -> Tuple[bool, bool]:
+        """(compressible, flush every chunk) for a response start message"""
+        status = message["status"]
+        # Skip compression for error responses and bodiless statuses
+        if status >= 400 or status in (204, 206, 304):
+            return False, False
+        headers = Headers(raw=message["headers"])
         # Skip if already compressed
-        if response.headers.get("Content-Encoding"):
-            return response
-        
-        try:
-            body = response.body
-            
-            # Skip if too small (compression overhead not worth it)
-            if len(body) < self.min_size:
-                return response
-            
-            # Choose compression algorithm (Brotli preferred, fallback to GZip)
-            compressed_body: Optional[bytes] = None
-            encoding: Optional[str] = None
-            
-            if supports_brotli:
-                compressed_body = self._compress_brotli(body)
-                if compressed_body and len(compressed_body) < len(body):
-                    encoding = "br"
-            
-            if not encoding and supports_gzip:
-                compressed_body = self._compress_gzip(body)
-                if compressed_body and len(compressed_body) < len(body):
-                    encoding = "gzip"
-            
-            # Apply compression if beneficial
-            if encoding and compressed_body:
-                # For very large responses (>500KB), use streaming
-                if len(body) > 500 * 1024:
-                    async def compress_stream() -> AsyncGenerator[bytes, None]:
-                        if encoding == "br":
-                            compressor = brotli.Compressor(quality=self.compress_level)
-                        else:
-                            compressor = gzip.GzipFile(mode='wb', compresslevel=self.compress_level)
-                        
-                        chunk_size = 8192
-                        for i in range(0, len(body), chunk_size):
-                            chunk = body[i:i + chunk_size]
-                            if encoding == "br":
-                                compressed_chunk = compressor.process(chunk)
-                            else:
-                                compressed_chunk = compressor.compress(chunk)
-                            
-                            if compressed_chunk:
-                                yield compressed_chunk
-                        
-                        # Flush remaining data
-                        if encoding == "br":
-                            final = compressor.finish()
-                        else:
-                            final = compressor.flush()
-                        
-                        if final:
-                            yield final
-                    
-                    return StreamingResponse(
-                        compress_stream(),
-                        status_code=response.status_code,
-                        headers={
-                            **response.headers,
-                            "Content-Encoding": encoding,
-                            "Vary": "Accept-Encoding",
-                        },
-                        media_type=content_type
-                    )
+        if "content-encoding" in headers:
+            return False, False
+        content_type = headers.get("content-type", "")
+        if not any(ct in content_type for ct in COMPRESSIBLE_TYPES):
+            return False, False
+        return True, any(ct in content_type for ct in FLUSH_EVERY_CHUNK_TYPES)
+
+    @staticmethod
+    def _set_encoding_headers(headers: MutableHeaders, encoding: str) -> None:
+        headers["Content-Encoding"] = encoding
+        append_vary(headers, "Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Check which encoding the client prefers
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.available_encodings)
+        if scope["method"] == "HEAD" or encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        buffered: List[bytes] = []
+        buffered_size = 0
+        encoder = None
+        flush_every_chunk = False
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, buffered_size, encoder, flush_every_chunk, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                compressible, flush_every_chunk = self._response_mode(message)
+                if compressible:
+                    start_message = message
                 else:
-                    # In-memory compression for smaller responses
-                    response.body = compressed_body
-                    response.headers["Content-Encoding"] = encoding
-                    response.headers["Content-Length"] = str(len(compressed_body))
-                    
-                    # Update Vary header
-                    vary = response.headers.get("Vary", "")
-                    if "Accept-Encoding" not in vary:
-                        response.headers["Vary"] = (
-                            f"{vary}, Accept-Encoding".strip(", ") if vary else "Accept-Encoding"
-                        )
-                    
+                    passthrough = True
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body":
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                passthrough = True
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is not None:
+                data = encoder.compress(body) if body else b""
+                if not more_body:
+                    data += encoder.finish()
+                elif flush_every_chunk:
+                    data += encoder.flush()
+                # Skip empty messages while the encoder fills a block
+                if data or not more_body:
+                    await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            if not more_body and not buffered:
+                # Whole body in one message: one-shot compression
+                compressed = self._compress_body(body, encoding) if len(body) >= self.min_size else None
+                if compressed is not None:
                     logger.debug(
-                        f"Compressed response: {len(body)} -> {len(compressed_body)} bytes "
-                        f"({(1 - len(compressed_body)/len(body))*100:.1f}% reduction)"
+                        f"Compressed response ({encoding}): {len(body)} -> {len(compressed)} bytes "
+                        f"({(1 - len(compressed)/len(body))*100:.1f}% reduction)"
                     )
-        
-        except Exception as e:
-            logger.error(f"Compression error: {e}")
-            # Return uncompressed response on error
-        
-        return response
+                    headers = MutableHeaders(scope=start_message)
+                    self._set_encoding_headers(headers, encoding)
+                    headers["Content-Length"] = str(len(compressed))
+                    body = compressed
+                await send(start_message)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            buffered.append(body)
+            buffered_size += len(body)
+            if more_body and buffered_size < self.min_size and not flush_every_chunk:
+                return
+
+            data = b"".join(buffered)
+            buffered.clear()
+            if not more_body and buffered_size < self.min_size:
+                # Short stream: not worth compressing
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data})
+                return
+
+            # Streamed body: compress the rest chunk by chunk
+            encoder = self._new_encoder(encoding)
+            headers = MutableHeaders(scope=start_message)
+            self._set_encoding_headers(headers, encoding)
+            if "content-length" in headers:
+                del headers["content-length"]
+            await send(start_message)
+            data = encoder.compress(data)
+            if not more_body:
+                data += encoder.finish()
+            elif flush_every_chunk:
+                data += encoder.flush()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -175,6 +175,22 @@ class Settings(BaseSettings):
         default="",
         description="Redis connection URL for caching",
     )
+    CACHE_L1_ENABLED: bool = Field(
+        default=True,
+        description="Enable the in-process L1 cache tier in front of Redis (requires REDIS_URL)",
+    )
+    CACHE_L1_MAX_ENTRIES: int = Field(
+        default=1000,
+        ge=1,
+        le=100000,
+        description="Maximum number of decoded entries kept in the in-process L1 cache",
+    )
+    CACHE_L1_TTL: int = Field(
+        default=30,
+        ge=1,
+        le=3600,
+        description="Upper bound (seconds) on how long an entry stays in the L1 cache",
+    )
 
     # SendGrid Email Configuration
     SENDGRID_API_KEY: str = Field(
@@ -246,6 +262,70 @@ class Settings(BaseSettings):
         description="Threshold in seconds to log slow queries",
     )
 
+    # Bulk Import Configuration
+    BULK_IMPORT_CHUNK_SIZE: int = Field(
+        default=2000,
+        ge=100,
+        le=50000,
+        description="Number of rows parsed and written per batch by the bulk import engine",
+    )
+    BULK_IMPORT_WORKERS: int = Field(
+        default=2,
+        ge=0,
+        le=16,
+        description="Worker processes used to parse import rows (0 parses in a thread)",
+    )
+    BULK_IMPORT_CHECKPOINT_TTL: int = Field(
+        default=86400,
+        ge=60,
+        description="How long (seconds) an interrupted import can be resumed from its checkpoint",
+    )
+    IMPORT_JOB_TTL: int = Field(
+        default=3600,
+        ge=60,
+        description="How long (seconds) import job logs and status are kept for progress streaming",
+    )
+    PRESIGNED_URL_EXPIRATION: int = Field(
+        default=604800,
+        ge=60,
+        le=604800,
+        description="Lifetime (seconds) of presigned S3 URLs (7 days is the SigV4 maximum)",
+    )
+    PRESIGNED_URL_REFRESH_MARGIN: int = Field(
+        default=3600,
+        ge=0,
+        description="Cached presigned URLs are re-signed this many seconds before they expire",
+    )
+    PRESIGNED_URL_L1_MAX_ENTRIES: int = Field(
+        default=20000,
+        ge=0,
+        le=1000000,
+        description="Maximum number of presigned URLs kept in process memory in front of Redis",
+    )
+    PDF_RENDER_WORKERS: int = Field(
+        default=2,
+        ge=0,
+        le=16,
+        description="Worker processes used to render invoice and submission PDFs (0 renders in a thread)",
+    )
+    PDF_CACHE_TTL: int = Field(
+        default=604800,
+        ge=0,
+        description="How long (seconds) a rendered PDF stays cached by content hash (0 disables the Redis tier)",
+    )
+    RBAC_PERMISSION_CACHE_TTL: int = Field(
+        default=300,
+        ge=0,
+        le=86400,
+        description="How long (seconds) a user's resolved roles and permissions stay cached (0 disables)",
+    )
+    PRINCIPAL_CACHE_TTL: int = Field(
+        default=300,
+        ge=0,
+        le=86400,
+        description="How long (seconds) the authenticated user looked up from a token stays cached (0 disables)",
+    )
+
     # Multi-Tenancy Configuration
     TENANCY_MODE: str = Field(
         default="single",
@@ -331,6 +411,44 @@ class Settings(BaseSettings):
         description="Temperature for Anthropic responses",
     )
 
+    # Leo ERP context retrieval
+    LEO_RETRIEVAL_TIMEOUT: float = Field(
+        default=3.0,
+        gt=0,
+        le=60,
+        description="Time limit (seconds) for one data type when Leo gathers ERP context",
+    )
+    LEO_RETRIEVAL_BUDGET: float = Field(
+        default=5.0,
+        gt=0,
+        le=120,
+        description="Overall time limit (seconds) for gathering Leo's ERP context; late data types are dropped",
+    )
+    LEO_RETRIEVAL_CONCURRENCY: int = Field(
+        default=4,
+        ge=1,
+        le=16,
+        description="Database sessions used at once when Leo gathers ERP context",
+    )
+    LEO_CONTEXT_MAX_TOKENS: int = Field(
+        default=2000,
+        ge=100,
+        le=100000,
+        description="Token budget of the ERP context added to Leo's system prompt (sections are ranked and truncated to fit)",
+    )
+    LEO_INSTRUCTIONS_MAX_TOKENS: int = Field(
+        default=4000,
+        ge=100,
+        le=100000,
+        description="Token budget of the Markdown instructions uploaded in Leo settings",
+    )
+    LEO_PROMPT_CACHE_TTL: int = Field(
+        default=300,
+        ge=0,
+        le=86400,
+        description="How long (seconds) a user's Leo settings and persona prompt stay cached (0 disables)",
+    )
+
     # SendGrid Marketing Lists
     SENDGRID_NEWSLETTER_LIST_ID: str = Field(
         default="",
@@ -3,16 +3,14 @@ Database Health Middleware
 Monitors database health and provides early warning for schema issues
 """
 
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.asgi import HTTPMiddleware
 from app.core.logging import logger
 from app.core.database import AsyncSessionLocal
 from app.core.schema_validator import SchemaValidator
 
 
-class DatabaseHealthMiddleware(BaseHTTPMiddleware):
+class DatabaseHealthMiddleware(HTTPMiddleware):
     """
     Middleware that monitors database health and logs warnings
     for schema compatibility issues
@@ -29,7 +27,7 @@ class DatabaseHealthMiddleware(BaseHTTPMiddleware):
         self.request_count = 0
         self.last_check_result = None
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and check database health periodically"""
         self.request_count += 1
         
@@ -53,7 +51,7 @@ class DatabaseHealthMiddleware(BaseHTTPMiddleware):
                             context={
                                 "has_client_id": has_client_id,
                                 "has_responsable_id": has_responsable_id,
-                                "request_path": request.url.path
+                                "request_path": scope["path"]
                             }
                         )
             except Exception as e:
@@ -62,5 +60,4 @@ class DatabaseHealthMiddleware(BaseHTTPMiddleware):
                     logger.debug(f"Database health check error: {e}")
         
         # Process the request
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
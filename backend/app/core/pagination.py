@@ -1,13 +1,27 @@
 """
 Pagination Utilities
-Provides pagination support for database queries
+Provides offset and keyset (cursor) pagination support for database queries
 """
 
-from typing import Generic, TypeVar, Optional, List, Annotated
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Generic, TypeVar, Optional, List, Literal, Sequence, Tuple
+from uuid import UUID
+
 from pydantic import BaseModel, Field
-from fastapi import Query, Depends
-from sqlalchemy import select, func
+from fastapi import Query
+from sqlalchemy import Table, and_, func, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.core.logging import logger
 
 T = TypeVar('T')
 
@@ -93,36 +107,16 @@ async def paginate_query(
     Returns:
         PaginatedResponse with items and metadata
     """
-    # Get total count
+    # Count the filtered query itself (WHERE, joins and GROUP BY included)
     if count_query is None:
-        # Use a subquery for counting - create a simple count query
-        # Remove any eager loading or joins that might cause issues
-        from sqlalchemy import func
-        # Create a simple count query from the base model
-        # Extract the base model from the query
-        try:
-            # Try to get the entity from the query
-            if hasattr(query, 'column_descriptions') and query.column_descriptions:
-                entity = query.column_descriptions[0]['entity']
-                count_query = select(func.count()).select_from(entity)
-            else:
-                # Fallback: use subquery
-                count_query = select(func.count()).select_from(query.subquery())
-        except Exception:
-            # Last resort: use subquery
-            count_query = select(func.count()).select_from(query.subquery())
+        count_query = build_count_query(query)
     
     try:
         total_result = await session.execute(count_query)
         total = total_result.scalar_one() or 0
     except Exception as e:
-        # If count query fails, try a simpler approach
-        from app.core.logging import logger
-        logger.warning(f"Count query failed, using fallback: {e}")
-        # Fallback: execute the main query and count results (less efficient but works)
-        all_results = await session.execute(query)
-        all_items = all_results.scalars().all()
-        total = len(all_items)
+        logger.error(f"Count query failed: {e}", exc_info=True)
+        raise
     
     # Apply pagination to query
     paginated_query = query.offset(pagination.offset).limit(pagination.limit)
@@ -166,3 +160,295 @@ def create_pagination_links(
     
     return links
 
+
+
+# ---------------------------------------------------------------------------
+# Keyset (cursor) pagination
+# ---------------------------------------------------------------------------
+#
+# A cursor holds the sort values of the last row of a page; the next page is
+# the rows strictly after it in the sort order. The database seeks straight
+# to that position through the index, so page 500 costs the same as page 1,
+# and rows inserted meanwhile do not shift or duplicate items.
+
+CountMode = Literal["none", "exact", "estimate"]
+
+# Truncated HMAC-SHA256: cursors stay short and cannot be forged
+CURSOR_SIGNATURE_BYTES = 16
+
+
+class InvalidCursorError(ValueError):
+    """Cursor that was not issued for this sort order, or was tampered with"""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON form of a sort value, tagged so that it decodes to the same type"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"u": str(value)}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    raise TypeError(f"Unsupported cursor value type: {type(value).__name__}")
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    (tag, raw), = value.items()
+    decoders = {
+        "dt": datetime.fromisoformat,
+        "d": date.fromisoformat,
+        "t": time.fromisoformat,
+        "u": UUID,
+        "n": Decimal,
+    }
+    return decoders[tag](raw)
+
+
+def _sign(scope: str, payload: bytes) -> bytes:
+    message = scope.encode("utf-8") + b"\0" + payload
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).digest()[:CURSOR_SIGNATURE_BYTES]
+
+
+def encode_cursor(values: Sequence[Any], scope: str = "") -> str:
+    """
+    Opaque, signed cursor for a row position
+    
+    Args:
+        values: Sort values of the row, in sort order
+        scope: Sort order the values belong to; a cursor only decodes
+            with the scope it was issued for
+    """
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":")).encode("utf-8")
+    return f"{_b64encode(payload)}.{_b64encode(_sign(scope, payload))}"
+
+
+def decode_cursor(cursor: str, scope: str = "") -> List[Any]:
+    """
+    Sort values of a cursor issued by ``encode_cursor``
+    
+    Raises:
+        InvalidCursorError: If the cursor is malformed, was signed with another
+            key or scope, or was modified
+    """
+    try:
+        payload_part, signature_part = cursor.split(".")
+        payload, signature = _b64decode(payload_part), _b64decode(signature_part)
+    except (ValueError, binascii.Error) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not hmac.compare_digest(signature, _sign(scope, payload)):
+        raise InvalidCursorError("Invalid cursor")
+    try:
+        return [_decode_value(value) for value in json.loads(payload)]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+class Keyset:
+    """
+    Sort order usable for keyset pagination
+    
+    Sort columns must be NOT NULL and the last one unique (usually the
+    primary key) so that every row has exactly one position.
+    
+    Usage:
+        CONTACT_KEYSET = Keyset(Contact.created_at.desc(), Contact.id.desc())
+        
+        query = CONTACT_KEYSET.window(select(Contact), limit, cursor)
+        rows = (await db.execute(query)).scalars().all()
+        contacts, next_cursor = CONTACT_KEYSET.page(rows, limit)
+    """
+    
+    def __init__(self, *order_by: Any):
+        self.columns: List[Tuple[ColumnElement, bool]] = []
+        for clause in order_by:
+            if hasattr(clause, "__clause_element__"):
+                clause = clause.__clause_element__()
+            modifier = getattr(clause, "modifier", None)
+            if modifier in (operators.desc_op, operators.asc_op):
+                self.columns.append((clause.element, modifier is operators.desc_op))
+            else:
+                self.columns.append((clause, False))
+        # Cursors of one sort order are rejected by another
+        self.scope = ",".join(
+            f"{getattr(getattr(column, 'table', None), 'name', '')}.{column.key}:{'desc' if descending else 'asc'}"
+            for column, descending in self.columns
+        )
+    
+    def order_by(self) -> List[ColumnElement]:
+        """ORDER BY clauses of the keyset"""
+        return [column.desc() if descending else column.asc() for column, descending in self.columns]
+    
+    def after(self, cursor: str) -> ColumnElement:
+        """
+        Predicate selecting the rows strictly after ``cursor``
+        
+        (a, b, id) > (x, y, z) expands to
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z),
+        with < for descending columns.
+        
+        Raises:
+            InvalidCursorError: If the cursor does not belong to this keyset
+        """
+        values = decode_cursor(cursor, self.scope)
+        if len(values) != len(self.columns):
+            raise InvalidCursorError("Invalid cursor")
+        branches = []
+        for index, ((column, descending), value) in enumerate(zip(self.columns, values)):
+            equal_prefix = [prefix == prefix_value for (prefix, _), prefix_value in zip(self.columns[:index], values)]
+            branches.append(and_(*equal_prefix, column < value if descending else column > value))
+        return or_(*branches)
+    
+    def cursor_for(self, row: Any) -> str:
+        """Cursor pointing after ``row`` (ORM instance or result row)"""
+        return encode_cursor([getattr(row, column.key) for column, _ in self.columns], self.scope)
+    
+    def window(self, query, limit: int, cursor: Optional[str] = None, skip: int = 0):
+        """
+        ``query`` ordered by the keyset, starting after ``cursor`` (or at
+        ``skip`` without one) and limited to ``limit + 1`` rows
+        
+        The extra row tells ``page`` whether a next page exists.
+        """
+        query = query.order_by(*self.order_by())
+        if cursor:
+            query = query.where(self.after(cursor))
+        elif skip:
+            query = query.offset(skip)
+        return query.limit(limit + 1)
+    
+    def page(self, rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[str]]:
+        """Rows of the page and the cursor of the next one (None on the last page)"""
+        items = list(rows[:limit])
+        next_cursor = self.cursor_for(items[-1]) if len(rows) > limit else None
+        return items, next_cursor
+
+
+class CursorParams(BaseModel):
+    """Cursor pagination parameters"""
+    cursor: Optional[str] = Field(default=None, description="Cursor returned by the previous page")
+    limit: int = Field(default=20, ge=1, le=100, description="Items per page (max 100)")
+
+
+def get_cursor_params(
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(20, ge=1, le=100, description="Items per page (max 100)"),
+) -> CursorParams:
+    """FastAPI dependency to extract cursor pagination parameters from query string"""
+    return CursorParams(cursor=cursor, limit=limit)
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """Cursor-paginated response model"""
+    items: List[T] = Field(description="List of items for current page")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page (null on the last page)")
+    has_more: bool = Field(description="Whether there is a next page")
+    limit: int = Field(description="Items per page")
+    total: Optional[int] = Field(default=None, description="Total number of items, if requested")
+    total_is_estimate: bool = Field(default=False, description="Whether total comes from planner statistics")
+
+
+def build_count_query(query):
+    """COUNT(*) over ``query`` as a subquery, so its filters are kept"""
+    return select(func.count()).select_from(query.order_by(None).limit(None).offset(None).subquery())
+
+
+async def estimate_count(session: AsyncSession, query) -> Tuple[int, bool]:
+    """
+    Row count of ``query`` from PostgreSQL planner statistics
+    
+    An unfiltered single-table query reads ``pg_class.reltuples``; anything
+    else reads the row estimate of ``EXPLAIN``. Both skip the table scan of
+    an exact COUNT(*), at the price of accuracy. Falls back to an exact count
+    on other databases or when no estimate is available.
+    
+    Returns:
+        (count, is_estimate)
+    """
+    query = query.order_by(None).limit(None).offset(None)
+    bind = session.get_bind()
+    if bind.dialect.name == "postgresql":
+        try:
+            froms = query.get_final_froms()
+            if query.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+                result = await session.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                    {"name": froms[0].fullname},
+                )
+                estimate = result.scalar()
+                # -1 (or 0 on older versions) until the table is analyzed
+                if estimate and estimate > 0:
+                    return int(estimate), True
+            else:
+                sql = str(query.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+                # Savepoint: a failed EXPLAIN must not abort the transaction
+                async with session.begin_nested():
+                    connection = await session.connection()
+                    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+                    plan = result.scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]["Plan"]["Plan Rows"]), True
+        except Exception as e:
+            logger.warning(f"Count estimate failed, counting rows: {e}")
+    total = (await session.execute(build_count_query(query))).scalar_one() or 0
+    return total, False
+
+
+async def paginate_keyset(
+    session: AsyncSession,
+    query,
+    keyset: Keyset,
+    params: CursorParams,
+    count: CountMode = "none",
+) -> CursorPage:
+    """
+    Paginate a SQLAlchemy query by keyset
+    
+    Args:
+        session: Database session
+        query: SQLAlchemy select query (filters only, no ORDER BY/LIMIT)
+        keyset: Sort order of the pages
+        params: Cursor pagination parameters
+        count: "none" (default, cheapest), "exact" (COUNT(*)) or "estimate"
+            (planner statistics on PostgreSQL)
+    
+    Returns:
+        CursorPage with items and the cursor of the next page
+    
+    Raises:
+        InvalidCursorError: If the cursor does not belong to this keyset
+    """
+    result = await session.execute(keyset.window(query, params.limit, params.cursor))
+    rows = result.scalars().all() if len(query.column_descriptions) == 1 else result.all()
+    items, next_cursor = keyset.page(rows, params.limit)
+    
+    total, total_is_estimate = None, False
+    if count == "exact":
+        total = (await session.execute(build_count_query(query))).scalar_one() or 0
+    elif count == "estimate":
+        total, total_is_estimate = await estimate_count(session, query)
+    
+    return CursorPage(
+        items=items,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None,
+        limit=params.limit,
+        total=total,
+        total_is_estimate=total_is_estimate,
+    )
@@ -3,51 +3,69 @@ Request Size Limits Middleware
 Prevents DoS attacks by limiting request body size
 """
 
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+from starlette.types import Message, Receive, Scope, Send
 
+from app.core.asgi import HTTPMiddleware, error_response
 
-class RequestSizeLimitMiddleware(BaseHTTPMiddleware):
+
+class RequestSizeLimitMiddleware(HTTPMiddleware):
     """Middleware to limit request body size"""
-    
+
     # Default limits (in bytes)
     DEFAULT_LIMIT = 10 * 1024 * 1024  # 10 MB
     JSON_LIMIT = 1 * 1024 * 1024  # 1 MB for JSON
     FILE_UPLOAD_LIMIT = 50 * 1024 * 1024  # 50 MB for file uploads
-    
+
     def __init__(self, app, default_limit: int = None, json_limit: int = None, file_upload_limit: int = None):
         super().__init__(app)
         self.default_limit = default_limit or self.DEFAULT_LIMIT
         self.json_limit = json_limit or self.JSON_LIMIT
         self.file_upload_limit = file_upload_limit or self.FILE_UPLOAD_LIMIT
-    
-    async def dispatch(self, request: Request, call_next):
+
+    def _get_limit(self, content_type: str) -> int:
+        """Determine limit based on content type"""
+        if "multipart/form-data" in content_type or "application/octet-stream" in content_type:
+            return self.file_upload_limit
+        if "application/json" in content_type:
+            return self.json_limit
+        return self.default_limit
+
+    def _too_large_detail(self, limit: int) -> str:
+        return f"Request body too large. Maximum size: {limit / (1024 * 1024):.1f} MB"
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Check request size before processing"""
-        
-        content_length = request.headers.get("content-length")
-        
+        headers = Headers(scope=scope)
+        limit = self._get_limit(headers.get("content-type", "").lower())
+
+        content_length = headers.get("content-length")
         if content_length:
             try:
-                size = int(content_length)
-                content_type = request.headers.get("content-type", "").lower()
-                
-                # Determine limit based on content type
-                if "multipart/form-data" in content_type or "application/octet-stream" in content_type:
-                    limit = self.file_upload_limit
-                elif "application/json" in content_type:
-                    limit = self.json_limit
-                else:
-                    limit = self.default_limit
-                
-                if size > limit:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"Request body too large. Maximum size: {limit / (1024 * 1024):.1f} MB"
-                    )
+                if int(content_length) > limit:
+                    response = error_response(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, self._too_large_detail(limit))
+                    await response(scope, receive, send)
+                    return
             except ValueError:
                 # Invalid content-length header, continue
                 pass
-        
-        response = await call_next(request)
-        return response
 
+        # Chunked uploads have no Content-Length: count bytes as the body is read
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the endpoint's body read, so the app's
+                    # exception handlers turn it into a 413 response
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=self._too_large_detail(limit),
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,53 @@
+"""
+Request Logging Middleware
+Logs every request with its status code and duration
+"""
+
+import time
+
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.asgi import HTTPMiddleware, StopResponse
+from app.core.logging import logger
+
+
+class RequestLoggingMiddleware(HTTPMiddleware):
+    """
+    Log incoming requests and their outcome
+
+    Errors are logged and re-raised so the CORS and error handling layers
+    can still build the response.
+    """
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        start_time = time.time()
+        logger.info(f"Incoming request: {method} {path} from {client[0] if client else 'unknown'}")
+
+        status_code = None
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except StopResponse:
+            # Answered by an outer middleware (e.g. 304 Not Modified)
+            logger.info(f"Request completed: {method} {path} - not modified ({time.time() - start_time:.4f}s)")
+            raise
+        except Exception as e:
+            process_time = time.time() - start_time
+            logger.error(f"Request failed: {method} {path} - {str(e)} ({process_time:.4f}s)", exc_info=True)
+            # Re-raise the exception so CORS middleware can catch it and add headers
+            raise
+
+        process_time = time.time() - start_time
+        if status_code is not None:
+            logger.info(f"Request completed: {method} {path} - {status_code} ({process_time:.4f}s)")
+        else:
+            logger.info(f"Request completed: {method} {path} ({process_time:.4f}s)")
@@ -7,14 +7,16 @@ import hmac
 import hashlib
 import time
 from typing import Optional
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request, status
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
 
+from app.core.asgi import HTTPMiddleware, error_response
 from app.core.config import settings
 from app.core.logging import logger
 
 
-class RequestSigningMiddleware(BaseHTTPMiddleware):
+class RequestSigningMiddleware(HTTPMiddleware):
     """Middleware to verify request signatures"""
     
     def __init__(self, app, secret_key: str, header_name: str = "X-Signature", timestamp_header: str = "X-Timestamp", max_age: int = 300):
@@ -70,35 +72,34 @@ class RequestSigningMiddleware(BaseHTTPMiddleware):
         # Use constant-time comparison to prevent timing attacks
         return hmac.compare_digest(signature, expected_signature)
     
-    async def dispatch(self, request: Request, call_next):
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and verify signature"""
         
         # Skip signature verification for safe methods (GET, HEAD, OPTIONS)
-        if request.method in ("GET", "HEAD", "OPTIONS"):
-            return await call_next(request)
+        if scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            await self.app(scope, receive, send)
+            return
         
         # Get signature and timestamp from headers
-        signature = request.headers.get(self.header_name)
-        timestamp = request.headers.get(self.timestamp_header)
+        headers = Headers(scope=scope)
+        signature = headers.get(self.header_name)
+        timestamp = headers.get(self.timestamp_header)
         
         # If signature is not provided, allow request (optional signing)
         # For strict mode, uncomment the following:
         # if not signature or not timestamp:
-        #     raise HTTPException(
-        #         status_code=status.HTTP_401_UNAUTHORIZED,
-        #         detail="Request signature required"
-        #     )
+        #     response = error_response(status.HTTP_401_UNAUTHORIZED, "Request signature required")
+        #     await response(scope, receive, send)
+        #     return
         
         if signature and timestamp:
             # Verify signature
-            if not self.verify_signature(request, signature, timestamp):
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid request signature"
-                )
+            if not self.verify_signature(Request(scope), signature, timestamp):
+                response = error_response(status.HTTP_401_UNAUTHORIZED, "Invalid request signature")
+                await response(scope, receive, send)
+                return
         
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
 
 
 def compute_request_signature(method: str, path: str, body: str, timestamp: str, secret_key: str) -> str:
@@ -3,15 +3,20 @@ Security Headers Middleware
 Adds security headers to all HTTP responses
 """
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.asgi import HTTPMiddleware, on_response_start
 from app.core.config import settings
 from app.core.logging import logger
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware(HTTPMiddleware):
     """
     Middleware to add security headers to all HTTP responses.
     
@@ -35,22 +40,20 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         self.force_https = force_https
         self.strict_transport_security = strict_transport_security
     
-    async def dispatch(self, request: Request, call_next):
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request and add security headers to response."""
         # Force HTTPS in production
         if self.force_https and settings.ENVIRONMENT == "production":
-            if request.url.scheme != "https":
-                logger.warning(f"Insecure request detected: {request.url}")
+            if scope.get("scheme") != "https":
+                logger.warning(f"Insecure request detected: {scope['path']}")
         
-        response: Response = await call_next(request)
-        self._add_security_headers(response, request)
-        return response
+        await self.app(scope, receive, on_response_start(send, self._add_security_headers))
     
-    def _add_security_headers(self, response: Response, request: Request):
+    def _add_security_headers(self, message: Message, headers: MutableHeaders):
         """Add security headers to response."""
         # Strict Transport Security (HSTS)
         if self.strict_transport_security and settings.ENVIRONMENT == "production":
-            response.headers["Strict-Transport-Security"] = (
+            headers["Strict-Transport-Security"] = (
                 "max-age=31536000; includeSubDomains; preload"
             )
         
@@ -91,19 +94,19 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 "base-uri 'self'; "
                 "form-action 'self'"
             )
-        response.headers["Content-Security-Policy"] = csp_policy
+        headers["Content-Security-Policy"] = csp_policy
         
         # X-Content-Type-Options
-        response.headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-Content-Type-Options"] = "nosniff"
         
         # X-Frame-Options
-        response.headers["X-Frame-Options"] = "DENY"
+        headers["X-Frame-Options"] = "DENY"
         
         # X-XSS-Protection
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+        headers["X-XSS-Protection"] = "1; mode=block"
         
         # Referrer-Policy
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
         
         # Permissions-Policy
         permissions_policy = (
@@ -116,8 +119,92 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             "gyroscope=(), "
             "speaker=()"
         )
-        response.headers["Permissions-Policy"] = permissions_policy
+        headers["Permissions-Policy"] = permissions_policy
         
         # Remove server header
-        if "server" in response.headers:
-            del response.headers["server"]
+        if "server" in headers:
+            del headers["server"]
+
+
+class ResponseHeadersMiddleware(HTTPMiddleware):
+    """
+    Timing and security headers added to every response of the main app
+
+    The static headers are encoded once; per request only the timing
+    headers are built.
+    """
+    
+    def __init__(self, app: ASGIApp, environment: Optional[str] = None):
+        super().__init__(app)
+        environment = environment or os.getenv("ENVIRONMENT", "development")
+        
+        # Content Security Policy (strict in production, relaxed in development)
+        if environment == "production":
+            # Strict CSP for production - no unsafe-inline or unsafe-eval
+            # 
+            # SECURITY: Production CSP is strict (no unsafe-inline/unsafe-eval)
+            # Use nonces for inline scripts/styles in production
+            # See: https://developer.mozilla.org/en-US/docs/Web/HTTP/CSP
+            csp_policy = (
+                "default-src 'self'; "
+                "script-src 'self'; "  # Strict: no unsafe-inline/eval (use nonces)
+                "style-src 'self'; "  # Strict: no unsafe-inline (use nonces)
+                "img-src 'self' data: https:; "
+                "font-src 'self' data:; "
+                "connect-src 'self' https://api.stripe.com; "
+                "frame-ancestors 'none'; "
+                "base-uri 'self'; "
+                "form-action 'self';"
+            )
+        else:
+            # Relaxed CSP for development
+            # 
+            # SECURITY: CSP is relaxed in development (unsafe-inline/unsafe-eval)
+            # This is acceptable for dev but MUST be tightened in production using nonces
+            # See: https://developer.mozilla.org/en-US/docs/Web/HTTP/CSP
+            csp_policy = (
+                "default-src 'self'; "
+                "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "  # Development only
+                "style-src 'self' 'unsafe-inline'; "  # Development only
+                "img-src 'self' data: https:; "
+                "font-src 'self' data:; "
+                "connect-src 'self' https://api.stripe.com; "
+                "frame-ancestors 'none';"
+            )
+        
+        static_headers = {
+            "strict-transport-security": "max-age=31536000; includeSubDomains",
+            "x-content-type-options": "nosniff",
+            "x-frame-options": "DENY",
+            "x-xss-protection": "1; mode=block",
+            "referrer-policy": "strict-origin-when-cross-origin",
+            "permissions-policy": "geolocation=(), microphone=(), camera=()",
+            "content-security-policy": csp_policy,
+        }
+        self._static_headers: List[Tuple[bytes, bytes]] = [
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in static_headers.items()
+        ]
+        self._replaced_names = {name for name, _ in self._static_headers} | {
+            b"x-response-time", b"x-process-time", b"x-timestamp",
+        }
+    
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start_time = time.time()
+        
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                process_time = time.time() - start_time
+                headers = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in self._replaced_names
+                ]
+                # Add timestamp headers
+                headers.append((b"x-response-time", f"{process_time:.4f}s".encode("latin-1")))
+                headers.append((b"x-process-time", str(process_time).encode("latin-1")))
+                headers.append((b"x-timestamp", datetime.now(timezone.utc).isoformat().encode("latin-1")))
+                # Add security headers
+                headers.extend(self._static_headers)
+                message["headers"] = headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
@@ -11,14 +11,18 @@ This middleware is conditionally enabled based on TENANCY_MODE.
 """
 
 from typing import Optional
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from urllib.parse import parse_qs
 
+from fastapi import status
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+from app.core.asgi import HTTPMiddleware, error_response
 from app.core.tenancy import TenancyConfig, set_current_tenant, get_current_tenant, clear_current_tenant
 from app.core.logging import logger
 
 
-class TenancyMiddleware(BaseHTTPMiddleware):
+class TenancyMiddleware(HTTPMiddleware):
     """
     Middleware to extract tenant from request and set it in context.
     
@@ -29,6 +33,7 @@ class TenancyMiddleware(BaseHTTPMiddleware):
     3. User's primary team (if authenticated)
     
     The tenant ID is stored in a context variable for use in query scoping.
+    Being pure ASGI, the app runs in the same context as this middleware.
     """
     
     def __init__(self, app, header_name: str = "X-Tenant-ID", query_param: str = "tenant_id"):
@@ -36,7 +41,7 @@ class TenancyMiddleware(BaseHTTPMiddleware):
         self.header_name = header_name
         self.query_param = query_param
     
-    async def dispatch(self, request: Request, call_next):
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process request and extract tenant ID.
         
@@ -47,26 +52,29 @@ class TenancyMiddleware(BaseHTTPMiddleware):
         
         # If tenancy is disabled, skip middleware logic
         if TenancyConfig.is_single_mode():
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive, send)
+            return
         
         tenant_id: Optional[int] = None
         
         # Strategy 1: Check X-Tenant-ID header (highest priority)
-        tenant_header = request.headers.get(self.header_name)
+        tenant_header = Headers(scope=scope).get(self.header_name)
         if tenant_header:
             try:
                 tenant_id = int(tenant_header)
             except (ValueError, TypeError):
                 logger.warning(f"Invalid {self.header_name} header value: {tenant_header}")
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid {self.header_name} header. Must be an integer."
+                response = error_response(
+                    status.HTTP_400_BAD_REQUEST,
+                    f"Invalid {self.header_name} header. Must be an integer.",
                 )
+                await response(scope, receive, send)
+                return
         
         # Strategy 2: Check query parameter (for testing/admin)
-        if tenant_id is None:
-            tenant_query = request.query_params.get(self.query_param)
+        if tenant_id is None and scope.get("query_string"):
+            values = parse_qs(scope["query_string"].decode("latin-1")).get(self.query_param)
+            tenant_query = values[0] if values else None
             if tenant_query:
                 try:
                     tenant_id = int(tenant_query)
@@ -84,10 +92,7 @@ class TenancyMiddleware(BaseHTTPMiddleware):
             logger.debug(f"Tenant context set: {tenant_id}")
         
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send)
         finally:
             # Always clear tenant context after request
             clear_current_tenant()
-        
-        return response
-
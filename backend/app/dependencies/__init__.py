@@ -5,13 +5,13 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.database import get_db
 from app.models import User
 from app.core.security import decode_token
 from app.services.subscription_service import SubscriptionService
 from app.services.stripe_service import StripeService
+from app.services.principal_service import load_principal
 from app.core.tenancy import (
     TenancyConfig,
     get_current_tenant,
@@ -39,8 +39,14 @@ def get_stripe_service(
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
     db: AsyncSession = Depends(get_db),
+    request: Request = None,
 ) -> User:
-    """Get current authenticated user."""
+    """
+    Get current authenticated user.
+    
+    Served from the principal cache (app.services.principal_service): no
+    query on a hit, and role checks later in the request reuse its roles.
+    """
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,24 +73,22 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Fetch user from database by email
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    principal = await load_principal(db, email, request)
 
-    if not user:
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User is inactive",
         )
 
-    return user
+    return principal.attach(db)
 
 
 
@@ -92,13 +96,14 @@ async def get_current_user(
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db),
+    request: Request = None,
 ) -> Optional[User]:
     """Get optional authenticated user."""
     if not credentials:
         return None
 
     try:
-        return await get_current_user(credentials, db)
+        return await get_current_user(credentials, db, request)
     except HTTPException:
         return None
 
@@ -106,29 +111,22 @@ async def get_optional_user(
 async def is_superadmin(
     user: User,
     db: AsyncSession,
+    request: Optional[Request] = None,
 ) -> bool:
     """
     Check if a user has the superadmin role.
     Returns True if user has superadmin role, False otherwise.
     """
-    from app.models import Role, UserRole
-    
-    result = await db.execute(
-        select(UserRole)
-        .join(Role)
-        .where(
-            UserRole.user_id == user.id,
-            Role.slug == "superadmin",
-            Role.is_active == True
-        )
-    )
-    user_role = result.scalar_one_or_none()
-    return user_role is not None
+    from app.services.rbac_service import RBACService
+
+    resolved = await RBACService(db, request).resolve_permissions(user.id)
+    return resolved.is_superadmin
 
 
 async def is_admin(
     user: User,
     db: AsyncSession,
+    request: Optional[Request] = None,
 ) -> bool:
     """
     Check if a user has the admin role (not superadmin).
@@ -137,60 +135,40 @@ async def is_admin(
     Note: Superadmins are automatically considered admins,
     but this function specifically checks for the "admin" role.
     """
-    from app.models import Role, UserRole
-    
-    result = await db.execute(
-        select(UserRole)
-        .join(Role)
-        .where(
-            UserRole.user_id == user.id,
-            Role.slug == "admin",
-            Role.is_active == True
-        )
-    )
-    admin_role = result.scalar_one_or_none()
-    return admin_role is not None
+    from app.services.rbac_service import RBACService
+
+    resolved = await RBACService(db, request).resolve_permissions(user.id)
+    return "admin" in resolved.roles
 
 
 async def is_admin_or_superadmin(
     user: User,
     db: AsyncSession,
+    request: Optional[Request] = None,
 ) -> bool:
     """
     Check if a user has admin OR superadmin role.
     Superadmins are automatically considered admins.
     
+    Uses the per-request resolved permission set, so repeated checks in the
+    same request do not hit the database again.
+    
     Returns:
         True if user is admin or superadmin, False otherwise
     """
-    # Check superadmin first (superadmins are automatically admins)
-    if await is_superadmin(user, db):
-        return True
-    
-    # Check admin role
-    return await is_admin(user, db)
+    from app.services.rbac_service import RBACService
+
+    resolved = await RBACService(db, request).resolve_permissions(user.id)
+    return resolved.is_superadmin or "admin" in resolved.roles
 
 
 async def require_superadmin(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> None:
     """Dependency to require superadmin role."""
-    from app.models import Role, UserRole
-    
-    # Check if user has superadmin role via UserRole
-    result = await db.execute(
-        select(Role)
-        .join(UserRole, Role.id == UserRole.role_id)
-        .where(
-            UserRole.user_id == current_user.id,
-            Role.slug == "superadmin",
-            Role.is_active == True
-        )
-    )
-    superadmin_role = result.scalar_one_or_none()
-    
-    if not superadmin_role:
+    if not await is_superadmin(current_user, db, request):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Superadmin access required"
@@ -205,6 +183,7 @@ async def require_superadmin(
 async def get_tenant_scope(
     current_user: Optional[User] = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    request: Request = None,
 ) -> Optional[int]:
     """
     Get tenant scope for the current request.
@@ -235,9 +214,13 @@ async def get_tenant_scope(
     if tenant_id is not None:
         return tenant_id
     
-    # If user is authenticated, get their primary team
+    # If user is authenticated, get their primary team (resolved with the cached principal)
     if current_user:
-        tenant_id = await get_user_tenant_id(current_user.id, db)
+        principal = getattr(request.state, "principal", None) if request is not None else None
+        if principal is not None and principal.user_id == current_user.id:
+            tenant_id = principal.tenant_id
+        else:
+            tenant_id = await get_user_tenant_id(current_user.id, db)
         if tenant_id is not None:
             set_current_tenant(tenant_id)
             return tenant_id
@@ -21,7 +21,7 @@ async def require_permission(
     request: Optional[Request] = None,
 ) -> User:
     """Dependency to require a specific permission"""
-    rbac_service = RBACService(db)
+    rbac_service = RBACService(db, request)
     has_permission = await rbac_service.has_permission(current_user.id, permission)
     
     if not has_permission:
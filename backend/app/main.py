@@ -6,7 +6,7 @@ Configured with OpenAPI/Swagger auto-generation
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
@@ -35,6 +35,8 @@ from app.core.cors import setup_cors
 from app.core.api_versioning import setup_api_versioning
 from app.core.ip_whitelist import setup_ip_whitelist
 from app.core.request_signing import RequestSigningMiddleware
+from app.core.request_logging import RequestLoggingMiddleware
+from app.core.security_headers import ResponseHeadersMiddleware
 from app.api.v1.router import api_router
 from app.api import email as email_router
 from app.api.webhooks import stripe as stripe_webhook_router
@@ -263,6 +265,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         if logger:
             logger.warning(f"Cache shutdown error: {e}")
+    try:
+        from app.services.bulk_import import shutdown_import_workers
+        shutdown_import_workers()
+    except Exception as e:
+        if logger:
+            logger.warning(f"Import workers shutdown error: {e}")
+    try:
+        from app.services.pdf_render_service import shutdown_pdf_workers
+        shutdown_pdf_workers()
+    except Exception as e:
+        if logger:
+            logger.warning(f"PDF workers shutdown error: {e}")
     try:
         await close_db()
     except Exception as e:
@@ -303,41 +317,23 @@ def create_app() -> FastAPI:
     # Note: FastAPI executes middlewares in reverse order of addition
     # So this middleware runs BEFORE CORS middleware (which was added first)
     # We need to let errors propagate to CORS middleware so it can add headers
-    @app.middleware("http")
-    async def log_requests_middleware(request: Request, call_next):
-        from app.core.logging import logger
-        from starlette.responses import Response
-        import time
-        start_time = time.time()
-        logger.info(f"Incoming request: {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
-        try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-            # Ensure response is a Response instance before accessing status_code
-            if isinstance(response, Response):
-                logger.info(f"Request completed: {request.method} {request.url.path} - {response.status_code} ({process_time:.4f}s)")
-            else:
-                logger.info(f"Request completed: {request.method} {request.url.path} ({process_time:.4f}s)")
-            return response
-        except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(f"Request failed: {request.method} {request.url.path} - {str(e)} ({process_time:.4f}s)", exc_info=True)
-            # Re-raise the exception so CORS middleware can catch it and add headers
-            # The CORS middleware will handle the error response with proper headers
-            raise
+    app.add_middleware(RequestLoggingMiddleware)
+
+    # Cache Headers Middleware
+    # Added before compression so it runs inside it: ETags are computed on the
+    # uncompressed body and a 304 skips compression entirely
+    app.add_middleware(CacheHeadersMiddleware, default_max_age=300)
 
     # Compression Middleware (after CORS)
-    # Enhanced compression with Brotli support
+    # Streaming compression with Brotli/Zstandard/GZip support
     app.add_middleware(
         CompressionMiddleware,
         min_size=1024,  # Only compress responses > 1KB
         compress_level=6,  # Balance between speed and compression ratio
         use_brotli=True,  # Use Brotli if client supports it
+        use_zstd=True,  # Use Zstandard if installed and client supports it
     )
 
-    # Cache Headers Middleware
-    app.add_middleware(CacheHeadersMiddleware, default_max_age=300)
-
     # Request Size Limits Middleware (before CSRF to prevent large request processing)
     app.add_middleware(
         RequestSizeLimitMiddleware,
@@ -430,78 +426,7 @@ def create_app() -> FastAPI:
     app.add_exception_handler(Exception, general_exception_handler)
 
     # Add security headers middleware
-    @app.middleware("http")
-    async def add_security_headers_middleware(request: Request, call_next):
-        import time
-        from datetime import datetime, timezone
-        
-        # Log requests to /api/v1/projects/clients for debugging
-        if request.url.path == "/api/v1/projects/clients":
-            logger.error(
-                f"🔵 REQUEST TO /api/v1/projects/clients - Method: {request.method} | Query params: {dict(request.query_params)} | Full URL: {request.url}",
-                context={
-                    "path": request.url.path,
-                    "method": request.method,
-                    "query_params": dict(request.query_params),
-                    "full_url": str(request.url),
-                },
-            )
-        
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        
-        # Add timestamp headers
-        response.headers["X-Response-Time"] = f"{process_time:.4f}s"
-        response.headers["X-Process-Time"] = str(process_time)
-        response.headers["X-Timestamp"] = datetime.now(timezone.utc).isoformat()
-        
-        # Add security headers
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        
-        # Content Security Policy (strict in production, relaxed in development)
-        environment = os.getenv("ENVIRONMENT", "development")
-        
-        if environment == "production":
-            # Strict CSP for production - no unsafe-inline or unsafe-eval
-            # 
-            # SECURITY: Production CSP is strict (no unsafe-inline/unsafe-eval)
-            # Use nonces for inline scripts/styles in production
-            # See: https://developer.mozilla.org/en-US/docs/Web/HTTP/CSP
-            csp_policy = (
-                "default-src 'self'; "
-                "script-src 'self'; "  # Strict: no unsafe-inline/eval (use nonces)
-                "style-src 'self'; "  # Strict: no unsafe-inline (use nonces)
-                "img-src 'self' data: https:; "
-                "font-src 'self' data:; "
-                "connect-src 'self' https://api.stripe.com; "
-                "frame-ancestors 'none'; "
-                "base-uri 'self'; "
-                "form-action 'self';"
-            )
-        else:
-            # Relaxed CSP for development
-            # 
-            # SECURITY: CSP is relaxed in development (unsafe-inline/unsafe-eval)
-            # This is acceptable for dev but MUST be tightened in production using nonces
-            # See: https://developer.mozilla.org/en-US/docs/Web/HTTP/CSP
-            csp_policy = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "  # Development only
-                "style-src 'self' 'unsafe-inline'; "  # Development only
-                "img-src 'self' data: https:; "
-                "font-src 'self' data:; "
-                "connect-src 'self' https://api.stripe.com; "
-                "frame-ancestors 'none';"
-            )
-        response.headers["Content-Security-Policy"] = csp_policy
-        
-        return response
+    app.add_middleware(ResponseHeadersMiddleware)
 
     # Custom OpenAPI schema
     def custom_openapi() -> dict:
@@ -60,6 +60,9 @@ from app.models.project_attachment import ProjectAttachment
 from app.models.project_comment import ProjectComment
 from app.models.bank_account import BankAccount, BankAccountType
 from app.models.transaction import Transaction, TransactionStatus
+from app.models.treasury_ledger import TreasuryLedgerDay
+from app.models.search_document import SearchDocument
+from app.models.import_checkpoint import ImportCheckpoint
 from app.models.transaction_category import TransactionCategory, TransactionType
 from app.models.custom_widget import CustomWidget
 from app.models.automation_rule import AutomationRule, AutomationRuleExecutionLog
@@ -173,6 +176,9 @@ __all__ = [
     "BankAccountType",
     "Transaction",
     "TransactionStatus",
+    "TreasuryLedgerDay",
+    "SearchDocument",
+    "ImportCheckpoint",
     "TransactionCategory",
     "TransactionType",
     "CustomWidget",
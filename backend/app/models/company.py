@@ -4,7 +4,7 @@ SQLAlchemy model for commercial companies
 """
 
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String, Boolean, ForeignKey, func, Index
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, ForeignKey, event, func, Index
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -25,6 +25,9 @@ class Company(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
+    # Name without case, accents, punctuation or legal form (app.services.entity_matcher.name_key),
+    # set with the name: exact and trigram lookups of CompanyMatcher.search
+    name_key = Column(String(255), nullable=True, index=True)
     parent_company_id = Column(Integer, ForeignKey("companies.id", ondelete="SET NULL"), nullable=True, index=True)
     description = Column(String(1000), nullable=True)
     website = Column(String(500), nullable=True)
@@ -53,3 +56,10 @@ class Company(Base):
 
     def __repr__(self) -> str:
         return f"<Company(id={self.id}, name={self.name})>"
+
+
+@event.listens_for(Company.name, "set")
+def _set_name_key(target: Company, value, oldvalue, initiator) -> None:
+    from app.services.entity_matcher import name_key
+
+    target.name_key = name_key(value)
@@ -83,6 +83,12 @@ class FinanceInvoice(Base):
     # Relationships
     user = relationship("User", foreign_keys=[user_id])
     project = relationship("Project", foreign_keys=[project_id])
+    payments = relationship(
+        "FinanceInvoicePayment",
+        back_populates="invoice",
+        order_by="FinanceInvoicePayment.payment_date",
+        passive_deletes=True,
+    )
 
     def __repr__(self) -> str:
         return f"<FinanceInvoice(id={self.id}, invoice_number={self.invoice_number}, status={self.status})>"
@@ -117,7 +123,25 @@ class FinanceInvoicePayment(Base):
     )
 
     # Relationships
-    invoice = relationship("FinanceInvoice", foreign_keys=[invoice_id])
+    invoice = relationship("FinanceInvoice", foreign_keys=[invoice_id], back_populates="payments")
 
     def __repr__(self) -> str:
         return f"<FinanceInvoicePayment(id={self.id}, invoice_id={self.invoice_id}, amount={self.amount})>"
+
+
+class FinanceInvoiceNumberSequence(Base):
+    """
+    Invoice number counter, one row per prefix and year
+
+    ``last_value`` is the last sequence number handed out. It is incremented
+    in the transaction that creates the invoice, so the row lock serializes
+    concurrent creations and a rolled-back creation leaves no gap.
+    """
+    __tablename__ = "finance_invoice_number_sequences"
+
+    prefix = Column(String(20), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<FinanceInvoiceNumberSequence(prefix={self.prefix}, year={self.year}, last_value={self.last_value})>"
@@ -0,0 +1,27 @@
+"""
+Import Checkpoint Model
+Rows of an interrupted bulk import already committed, per import key
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String, func
+
+from app.core.database import Base
+
+
+class ImportCheckpoint(Base):
+    """
+    Bulk import progress
+
+    ``offset`` is the number of source rows committed. It is written in the
+    same transaction as each chunk (see app.services.bulk_import), so a
+    resumed import never writes a committed chunk again.
+    """
+
+    __tablename__ = "import_checkpoints"
+
+    key = Column(String(255), primary_key=True)  # e.g. transactions:<user_id>:<file sha256>
+    offset = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ImportCheckpoint(key={self.key}, offset={self.offset})>"
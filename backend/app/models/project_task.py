@@ -5,8 +5,12 @@ SQLAlchemy model for project tasks
 
 from datetime import datetime
 import enum
-from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, Enum as SQLEnum, Numeric, func, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, DateTime, Integer, String, Text, ForeignKey, Enum as SQLEnum, Numeric, func, Index,
+    bindparam, event, select, update,
+)
+from sqlalchemy.orm import Session, relationship
+from sqlalchemy.orm.attributes import get_history
 
 from app.core.database import Base
 
@@ -40,6 +44,8 @@ class ProjectTask(Base):
         Index("idx_project_tasks_status", "status"),
         Index("idx_project_tasks_priority", "priority"),
         Index("idx_project_tasks_created_at", "created_at"),
+        Index("idx_project_tasks_assignee_due_date", "assignee_id", "due_date"),
+        Index("idx_project_tasks_rank", "rank"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -52,6 +58,9 @@ class ProjectTask(Base):
     team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), nullable=False, index=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=True, index=True)
     assignee_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Copied from the assignee so that board reads need no join (kept in sync on flush, see below)
+    assignee_name = Column(String(255), nullable=True)
+    assignee_email = Column(String(255), nullable=True)
     created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     
     # Dates
@@ -64,6 +73,9 @@ class ProjectTask(Base):
     
     # Order for drag & drop
     order = Column(Integer, default=0, nullable=False)
+    # Lexicographic board position (see app.services.task_board_service.rank_between):
+    # moving a task rewrites its own rank only. New tasks go to the end (set on flush, see below)
+    rank = Column(String(64), nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
@@ -82,3 +94,79 @@ class ProjectTask(Base):
 
     def __repr__(self) -> str:
         return f"<ProjectTask(id={self.id}, title={self.title}, status={self.status})>"
+
+
+ASSIGNEE_SYNC_ATTRIBUTES = ("first_name", "last_name", "email")
+
+
+def assignee_fields(first_name, last_name, email) -> dict:
+    """Denormalized assignee columns of a task"""
+    return {
+        "assignee_name": f"{first_name or ''} {last_name or ''}".strip() or None,
+        "assignee_email": email,
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _copy_assignee_fields(session: Session, flush_context, instances) -> None:
+    """Fill assignee_name/assignee_email of tasks created or reassigned in this flush"""
+    from app.models.user import User
+
+    tasks = [
+        obj for obj in (*session.new, *session.dirty)
+        if isinstance(obj, ProjectTask)
+        and (obj in session.new or get_history(obj, "assignee_id").has_changes())
+    ]
+    if not tasks:
+        return
+
+    user_ids = {task.assignee_id for task in tasks if task.assignee_id}
+    users = {}
+    if user_ids:
+        with session.no_autoflush:
+            result = session.execute(
+                select(User.id, User.first_name, User.last_name, User.email).where(User.id.in_(user_ids))
+            )
+            users = {row.id: row for row in result}
+    for task in tasks:
+        user = users.get(task.assignee_id)
+        fields = assignee_fields(user.first_name, user.last_name, user.email) if user else assignee_fields(None, None, None)
+        for key, value in fields.items():
+            setattr(task, key, value)
+
+
+@event.listens_for(Session, "before_flush")
+def _rank_new_tasks(session: Session, flush_context, instances) -> None:
+    """Place tasks created without a rank at the end of the board"""
+    from app.services.task_board_service import rank_after
+
+    tasks = [obj for obj in session.new if isinstance(obj, ProjectTask) and obj.rank is None]
+    if not tasks:
+        return
+
+    with session.no_autoflush:
+        rank = session.execute(select(func.max(ProjectTask.rank))).scalar()
+    for task in tasks:
+        rank = task.rank = rank_after(rank)
+
+
+@event.listens_for(Session, "after_flush")
+def _propagate_assignee_changes(session: Session, flush_context) -> None:
+    """Rewrite the copies on assigned tasks when a user's name or email changes (same DB transaction)"""
+    from app.models.user import User
+
+    changes = [
+        {"user_id": user.id, "user_name": fields["assignee_name"], "user_email": fields["assignee_email"]}
+        for user in session.dirty
+        if isinstance(user, User)
+        and any(get_history(user, attribute).has_changes() for attribute in ASSIGNEE_SYNC_ATTRIBUTES)
+        for fields in [assignee_fields(user.first_name, user.last_name, user.email)]
+    ]
+    if changes:
+        table = ProjectTask.__table__
+        session.connection().execute(
+            update(table)
+            .where(table.c.assignee_id == bindparam("user_id"))
+            .values(assignee_name=bindparam("user_name"), assignee_email=bindparam("user_email")),
+            changes,
+        )
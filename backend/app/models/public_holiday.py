@@ -4,7 +4,7 @@ SQLAlchemy model for public holidays
 """
 
 from datetime import date
-from sqlalchemy import Column, Integer, String, Date, Boolean, func, Index
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, func, Index
 from app.core.database import Base
 
 
@@ -21,8 +21,8 @@ class PublicHoliday(Base):
     date = Column(Date, nullable=False, index=True)
     year = Column(Integer, nullable=True)  # NULL means recurring every year
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(func.now(), nullable=False)
-    updated_at = Column(func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     def __repr__(self) -> str:
         return f"<PublicHoliday(id={self.id}, name={self.name}, date={self.date})>"
@@ -0,0 +1,210 @@
+"""
+Search Document Model
+One row per searchable ERP record, the shared full-text index of Leo and /search
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, Index, UniqueConstraint, event, func, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.employee import Employee
+from app.models.pipeline import Opportunite
+from app.models.project import Project
+
+
+class SearchDocument(Base):
+    """
+    Full-text search index
+
+    ``search_title`` and ``search_text`` hold the record's text lowercased and
+    without accents (see ``normalize_search_text``). On PostgreSQL, migration
+    084 adds a generated ``search_vector`` (French and English configs, title
+    weighted A) with a GIN index, and trigram GIN indexes when pg_trgm is
+    installed; the column is not mapped so other databases use LIKE. Rows are
+    maintained on every flush that touches an indexed model (see
+    ``_maintain_search_index`` below).
+    """
+
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_search_documents_entity"),
+        Index("idx_search_documents_team_id", "team_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(50), nullable=False)  # contacts, companies, opportunities, ...
+    entity_id = Column(String(64), nullable=False)  # str() of the record id (opportunities use UUIDs)
+    team_id = Column(Integer, nullable=True)  # Copied from models having team_id
+
+    title = Column(String(255), nullable=False)  # Display
+    subtitle = Column(String(500), nullable=True)  # Display
+    search_title = Column(String(255), nullable=False)  # Normalized title
+    search_text = Column(Text, nullable=False)  # Normalized title, subtitle and body
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SearchDocument(entity_type={self.entity_type}, entity_id={self.entity_id}, title={self.title})>"
+
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_search_text(value: Any) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    if value is None:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value).lower())
+    value = ''.join(char for char in value if unicodedata.category(char) != 'Mn')
+    return _NON_ALNUM.sub(' ', value).strip()
+
+
+def _join(*parts: Any) -> str:
+    return ' '.join(str(getattr(part, 'value', part)) for part in parts if part not in (None, ''))
+
+
+@dataclass(frozen=True)
+class SearchSpec:
+    """How one model is indexed: display title/subtitle and the searched fields"""
+    entity_type: str
+    model: type
+    fields: Tuple[str, ...]
+    title: Callable[[Any], str]
+    subtitle: Callable[[Any], Optional[str]]
+
+
+# The index is scoped by tenant (team_id), not by owner: records owned through
+# user_id, such as invoices, stay out of it
+SEARCH_SPECS: Dict[str, SearchSpec] = {
+    spec.entity_type: spec
+    for spec in (
+        SearchSpec(
+            "contacts", Contact,
+            ("first_name", "last_name", "email", "position", "city", "country", "circle"),
+            lambda c: _join(c.first_name, c.last_name),
+            lambda c: _join(c.position, c.email) or None,
+        ),
+        SearchSpec(
+            "companies", Company,
+            ("name", "description", "email", "city", "country"),
+            lambda c: c.name,
+            lambda c: _join(c.city, c.country) or None,
+        ),
+        SearchSpec(
+            "opportunities", Opportunite,
+            ("name", "description", "segment", "region", "status"),
+            lambda o: o.name,
+            lambda o: _join(o.status, o.segment) or None,
+        ),
+        SearchSpec(
+            "projects", Project,
+            ("name", "description", "etape", "contact", "annee_realisation", "status"),
+            lambda p: p.name,
+            lambda p: _join(p.etape, p.contact) or None,
+        ),
+        SearchSpec(
+            "employees", Employee,
+            ("first_name", "last_name", "email", "employee_number"),
+            lambda e: _join(e.first_name, e.last_name),
+            lambda e: e.email,
+        ),
+    )
+}
+
+_SPECS_BY_MODEL: Dict[type, SearchSpec] = {spec.model: spec for spec in SEARCH_SPECS.values()}
+
+
+def search_document_row(spec: SearchSpec, obj: Any) -> Dict[str, Any]:
+    """Index row of a record (plain values, ready for executemany)"""
+    title = (spec.title(obj) or '')[:255]
+    subtitle = spec.subtitle(obj)
+    body = _join(*(getattr(obj, name, None) for name in spec.fields))
+    return {
+        "entity_type": spec.entity_type,
+        "entity_id": str(obj.id),
+        "team_id": getattr(obj, "team_id", None),
+        "title": title,
+        "subtitle": subtitle[:500] if subtitle else None,
+        "search_title": normalize_search_text(title)[:255],
+        "search_text": normalize_search_text(_join(title, subtitle, body)),
+    }
+
+
+_UPSERT_SQL = text("""
+    INSERT INTO search_documents
+        (entity_type, entity_id, team_id, title, subtitle, search_title, search_text, updated_at)
+    VALUES
+        (:entity_type, :entity_id, :team_id, :title, :subtitle, :search_title, :search_text, CURRENT_TIMESTAMP)
+    ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+        team_id = excluded.team_id,
+        title = excluded.title,
+        subtitle = excluded.subtitle,
+        search_title = excluded.search_title,
+        search_text = excluded.search_text,
+        updated_at = excluded.updated_at
+""")
+
+_DELETE_SQL = text("DELETE FROM search_documents WHERE entity_type = :entity_type AND entity_id = :entity_id")
+
+
+def apply_search_documents(connection, rows: Sequence[Dict[str, Any]], deleted: Sequence[Dict[str, Any]] = ()) -> None:
+    """Upsert and delete index rows on the given connection (one executemany each)"""
+    if rows:
+        connection.execute(_UPSERT_SQL, list(rows))
+    if deleted:
+        connection.execute(_DELETE_SQL, list(deleted))
+
+
+# Engine -> whether search_documents exists (databases where migration 084 has not run skip indexing)
+_index_tables: "WeakKeyDictionary[Any, bool]" = WeakKeyDictionary()
+
+
+def _index_table_exists(connection) -> bool:
+    engine = connection.engine
+    exists = _index_tables.get(engine)
+    if exists is None:
+        exists = _index_tables[engine] = inspect(connection).has_table(SearchDocument.__tablename__)
+    return exists
+
+
+def _indexed_fields_changed(spec: SearchSpec, obj: Any) -> bool:
+    state = inspect(obj)
+    return any(
+        state.attrs[name].history.has_changes()
+        for name in (*spec.fields, "team_id")
+        if name in state.attrs
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_search_index(session: Session, flush_context) -> None:
+    """Keep search_documents in sync with indexed inserts, updates and deletes (same DB transaction)"""
+    rows: List[Dict[str, Any]] = []
+    deleted: List[Dict[str, Any]] = []
+
+    for obj in session.new:
+        spec = _SPECS_BY_MODEL.get(type(obj))
+        if spec is not None:
+            rows.append(search_document_row(spec, obj))
+    for obj in session.dirty:
+        spec = _SPECS_BY_MODEL.get(type(obj))
+        if spec is not None and _indexed_fields_changed(spec, obj):
+            rows.append(search_document_row(spec, obj))
+    for obj in session.deleted:
+        spec = _SPECS_BY_MODEL.get(type(obj))
+        if spec is not None:
+            deleted.append({"entity_type": spec.entity_type, "entity_id": str(obj.id)})
+
+    if not rows and not deleted:
+        return
+    connection = session.connection()
+    if _index_table_exists(connection):
+        apply_search_documents(connection, rows, deleted)
@@ -0,0 +1,250 @@
+"""
+Treasury Ledger Model
+Per-user, per-day aggregate of transactions with a running balance
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Column, Integer, Date, Numeric, ForeignKey, Index, UniqueConstraint, bindparam, event, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+
+
+class TreasuryLedgerDay(Base):
+    """
+    Materialized treasury ledger
+
+    One row per user and per day having at least one non-cancelled
+    transaction. ``running_balance`` is the cumulative net (revenues minus
+    expenses) up to and including ``day``; bank account opening balances are
+    added at read time. Rows are maintained incrementally on every flush that
+    touches a Transaction (see ``_maintain_ledger`` below).
+    """
+
+    __tablename__ = "treasury_ledger_days"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_treasury_ledger_days_user_day"),
+        Index("idx_treasury_ledger_days_user_day", "user_id", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    entries = Column(Numeric(14, 2), nullable=False, default=0)  # Revenues of the day
+    exits = Column(Numeric(14, 2), nullable=False, default=0)  # Expenses of the day
+    transaction_count = Column(Integer, nullable=False, default=0)
+    running_balance = Column(Numeric(14, 2), nullable=False, default=0)  # Cumulative net at end of day
+
+    def __repr__(self) -> str:
+        return f"<TreasuryLedgerDay(user_id={self.user_id}, day={self.day}, balance={self.running_balance})>"
+
+
+# (user_id, day) -> [entries, exits, count]
+LedgerDelta = Dict[Tuple[int, date], list]
+
+_LEDGER_ATTRIBUTES = ("user_id", "transaction_date", "type", "amount", "status")
+
+_INSERT_DAY_SQL = text("""
+    INSERT INTO treasury_ledger_days (user_id, day, entries, exits, transaction_count, running_balance)
+    VALUES (
+        :user_id, :day, 0, 0, 0,
+        COALESCE((
+            SELECT running_balance FROM treasury_ledger_days
+            WHERE user_id = :user_id AND day < :day
+            ORDER BY day DESC LIMIT 1
+        ), 0)
+    )
+    ON CONFLICT (user_id, day) DO NOTHING
+""").bindparams(bindparam("day", type_=Date))
+
+_UPDATE_DAY_SQL = text("""
+    UPDATE treasury_ledger_days
+    SET entries = entries + :entries,
+        exits = exits + :exits,
+        transaction_count = transaction_count + :count
+    WHERE user_id = :user_id AND day = :day
+""").bindparams(
+    bindparam("day", type_=Date),
+    bindparam("entries", type_=Numeric(14, 2)),
+    bindparam("exits", type_=Numeric(14, 2)),
+)
+
+_SHIFT_BALANCES_SQL = text("""
+    UPDATE treasury_ledger_days
+    SET running_balance = running_balance + :net
+    WHERE user_id = :user_id AND day >= :day
+""").bindparams(bindparam("day", type_=Date), bindparam("net", type_=Numeric(14, 2)))
+
+
+# Transaction-scoped lock serializing ledger writes of one user (PostgreSQL):
+# a new day copies the previous balance and shifts add to later ones, so two
+# concurrent transactions must not work from each other's uncommitted rows
+_LOCK_USER_SQL = text("SELECT pg_advisory_xact_lock(hashtext('treasury_ledger_days'), :user_id)")
+
+
+def lock_ledger_users(connection, user_ids) -> None:
+    """Wait for other transactions writing the ledger of these users (no-op outside PostgreSQL)"""
+    if connection.dialect.name != "postgresql":
+        return
+    # Always in the same order, so two writers cannot deadlock
+    for user_id in sorted(set(user_ids)):
+        connection.execute(_LOCK_USER_SQL, {"user_id": user_id})
+
+
+def ledger_day_sql(dialect_name: str) -> str:
+    """SQL expression of the ledger day of transactions.transaction_date (UTC, as _ledger_day)"""
+    if dialect_name == "postgresql":
+        return "CAST(transaction_date AT TIME ZONE 'UTC' AS DATE)"
+    if dialect_name == "sqlite":
+        return "DATE(transaction_date)"
+    return "CAST(transaction_date AS DATE)"
+
+
+def ledger_backfill_sql(dialect_name: str, user_filter: str = ""):
+    """
+    INSERT ... SELECT of the whole ledger from transactions (empty ledger rows
+    of the users concerned expected); ``user_filter`` is an extra WHERE clause
+    """
+    day = ledger_day_sql(dialect_name)
+    return text(f"""
+        INSERT INTO treasury_ledger_days (user_id, day, entries, exits, transaction_count, running_balance)
+        SELECT user_id, day, entries, exits, transaction_count,
+               SUM(entries - exits) OVER (PARTITION BY user_id ORDER BY day)
+        FROM (
+            SELECT user_id,
+                   {day} AS day,
+                   SUM(CASE WHEN LOWER(CAST(type AS VARCHAR)) = 'revenue' THEN amount ELSE 0 END) AS entries,
+                   SUM(CASE WHEN LOWER(CAST(type AS VARCHAR)) = 'revenue' THEN 0 ELSE amount END) AS exits,
+                   COUNT(*) AS transaction_count
+            FROM transactions
+            WHERE LOWER(CAST(status AS VARCHAR)) != 'cancelled'
+            AND transaction_date IS NOT NULL
+            {user_filter}
+            GROUP BY user_id, {day}
+        ) AS daily
+    """)
+
+
+def _ledger_day(value: Optional[datetime]) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def _contribution(values: dict) -> Optional[Tuple[Tuple[int, date], Decimal, Decimal]]:
+    """Return ((user_id, day), entries, exits) for a transaction snapshot, None if it does not count"""
+    status = values.get("status")
+    status = getattr(status, "value", status)
+    day = _ledger_day(values.get("transaction_date"))
+    if status == TransactionStatus.CANCELLED.value or day is None or values.get("user_id") is None:
+        return None
+
+    amount = Decimal(str(values.get("amount") or 0))
+    tx_type = values.get("type")
+    tx_type = getattr(tx_type, "value", tx_type)
+    if tx_type == TransactionType.REVENUE.value:
+        return (values["user_id"], day), amount, Decimal(0)
+    return (values["user_id"], day), Decimal(0), amount
+
+
+def _current_values(obj: Transaction) -> dict:
+    return {attr: getattr(obj, attr, None) for attr in _LEDGER_ATTRIBUTES}
+
+
+def _previous_values(obj: Transaction) -> dict:
+    """Values as they were before the pending changes of this flush"""
+    from sqlalchemy import inspect as sa_inspect
+
+    state = sa_inspect(obj)
+    values = {}
+    for attr in _LEDGER_ATTRIBUTES:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        else:
+            values[attr] = getattr(obj, attr, None)
+    return values
+
+
+def _accumulate(deltas: LedgerDelta, values: dict, sign: int) -> None:
+    contribution = _contribution(values)
+    if contribution is None:
+        return
+    key, entries, exits = contribution
+    delta = deltas[key]
+    delta[0] += sign * entries
+    delta[1] += sign * exits
+    delta[2] += sign
+
+
+def ledger_deltas_for_rows(rows) -> LedgerDelta:
+    """Per-day deltas for plain transaction dicts (bulk inserts bypass the flush listener)"""
+    deltas: LedgerDelta = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+    for row in rows:
+        _accumulate(deltas, row, +1)
+    return deltas
+
+
+def apply_ledger_deltas(connection, deltas: LedgerDelta) -> None:
+    """
+    Apply aggregated per-day deltas to the ledger on the given connection
+
+    Three executemany batches whatever the number of days: missing days are
+    inserted first (each copies the balance of the day before), then daily
+    totals are updated, then every later balance is shifted by each day's net.
+    Shifts are additive, so their order does not matter. The users' ledgers
+    are locked until the end of the transaction (see lock_ledger_users).
+    """
+    changes = [
+        ({"user_id": user_id, "day": day}, entries, exits, count)
+        for (user_id, day), (entries, exits, count) in sorted(deltas.items())
+        if entries or exits or count
+    ]
+    if not changes:
+        return
+
+    lock_ledger_users(connection, [params["user_id"] for params, _, _, _ in changes])
+    connection.execute(_INSERT_DAY_SQL, [params for params, _, _, _ in changes])
+    connection.execute(_UPDATE_DAY_SQL, [
+        {**params, "entries": entries, "exits": exits, "count": count}
+        for params, entries, exits, count in changes
+    ])
+    shifts = [
+        {**params, "net": entries - exits}
+        for params, entries, exits, _ in changes
+        if entries != exits
+    ]
+    if shifts:
+        connection.execute(_SHIFT_BALANCES_SQL, shifts)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_ledger(session: Session, flush_context) -> None:
+    """Keep the ledger in sync with Transaction inserts, updates and deletes (same DB transaction)"""
+    deltas: LedgerDelta = defaultdict(lambda: [Decimal(0), Decimal(0), 0])
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            _accumulate(deltas, _current_values(obj), +1)
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj, include_collections=False):
+            _accumulate(deltas, _previous_values(obj), -1)
+            _accumulate(deltas, _current_values(obj), +1)
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            _accumulate(deltas, _previous_values(obj), -1)
+
+    if deltas:
+        apply_ledger_deltas(session.connection(), deltas)
@@ -291,3 +291,16 @@ class CalendarEvent(CalendarEventBase):
 class CalendarEventInDB(CalendarEvent):
     """Calendar event in database schema"""
     pass
+
+
+class CalendarItem(BaseModel):
+    """One entry of the merged agenda (event, vacation, holiday, task or scheduled task)"""
+    source: str = Field(..., description="event, vacation, holiday, task or scheduled_task")
+    id: int = Field(..., description="ID of the row in its source")
+    title: str
+    start_date: date
+    end_date: Optional[date] = Field(None, description="Last day of multi-day items")
+    time: Optional[str] = Field(None, description="Time of day (HH:MM:SS), null for all-day items")
+    category: str = Field(..., description="Event type, task status or scheduled task type")
+    color: Optional[str] = None
+    recurring: bool = Field(False, description="Occurrence expanded from a recurring item")
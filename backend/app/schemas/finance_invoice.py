@@ -104,6 +104,7 @@ class FinanceInvoiceResponse(FinanceInvoiceBase):
     """Finance invoice response schema"""
     id: int
     user_id: int
+    project_name: Optional[str] = None
     status: str
     amount_paid: Decimal
     amount_due: Decimal
@@ -123,3 +124,4 @@ class FinanceInvoiceListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
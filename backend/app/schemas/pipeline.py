@@ -123,3 +123,49 @@ class OpportuniteResponse(OpportuniteBase):
 
     class Config:
         from_attributes = True
+
+
+class PipelineBoardCard(BaseModel):
+    """Carte d'opportunité affichée dans une colonne du Kanban"""
+    id: UUID
+    name: str
+    amount: Optional[float] = None
+    probability: Optional[int] = None
+    status: Optional[str] = None
+    expected_close_date: Optional[datetime] = None
+    stage_id: Optional[UUID] = None
+    company_id: Optional[int] = None
+    company_name: Optional[str] = None
+    assigned_to_id: Optional[int] = None
+    assigned_to_name: Optional[str] = None
+    created_at: datetime
+
+
+class PipelineBoardCardsPage(BaseModel):
+    """Page de cartes d'une étape (pagination par curseur)"""
+    items: List[PipelineBoardCard] = []
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, null on the last page")
+
+
+class PipelineBoardColumn(PipelineBoardCardsPage):
+    """Colonne du Kanban: étape, agrégats et premières cartes"""
+    stage_id: Optional[UUID] = Field(None, description="Null for opportunities without stage")
+    name: str
+    color: Optional[str] = None
+    order: int = 0
+    count: int = 0
+    total_amount: float = 0.0
+    weighted_amount: float = Field(0.0, description="Sum of amount * probability (50% when unset)")
+
+
+class PipelineBoardResponse(BaseModel):
+    """Kanban complet d'un pipeline en une seule réponse"""
+    id: UUID
+    name: str
+    description: Optional[str] = None
+    is_default: bool = False
+    is_active: bool = True
+    count: int = 0
+    total_amount: float = 0.0
+    weighted_amount: float = 0.0
+    columns: List[PipelineBoardColumn] = []
@@ -4,7 +4,7 @@ Pydantic schemas for project tasks
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
 
 from app.models.project_task import TaskStatus, TaskPriority
@@ -147,6 +147,7 @@ class ProjectTaskResponse(ProjectTaskBase):
     completed_at: Optional[datetime] = None
     estimated_hours: Optional[float] = None
     order: int
+    rank: Optional[str] = None  # Board position, compare as strings
     created_at: datetime
     updated_at: datetime
 
@@ -158,3 +159,23 @@ class ProjectTaskWithAssignee(ProjectTaskResponse):
     """Project task with assignee information"""
     assignee_name: Optional[str] = None
     assignee_email: Optional[str] = None
+
+
+class ProjectTaskMove(BaseModel):
+    """Move a task between two neighbours on the board (no neighbour: end of the board)"""
+    task_id: int
+    after_id: Optional[int] = None  # Task right above the new position
+    before_id: Optional[int] = None  # Task right below the new position
+    status: Optional[TaskStatus] = None  # New column, if the task changes column
+
+
+class ProjectTaskMoveBatch(BaseModel):
+    """Moves applied in order in a single request"""
+    moves: List[ProjectTaskMove] = Field(..., min_length=1, max_length=500)
+
+
+class ProjectTaskPosition(BaseModel):
+    """Position of a task after a move"""
+    id: int
+    rank: str
+    status: TaskStatus
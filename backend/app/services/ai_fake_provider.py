@@ -0,0 +1,87 @@
+"""
+Fake AI Provider
+Local stand-in for OpenAI/Anthropic: deterministic replies, streamed word by
+word, for development and tests without network access or API keys
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+def fake_provider_enabled() -> bool:
+    """Whether the fake provider may be used (AI_FAKE_PROVIDER=true)"""
+    return os.getenv("AI_FAKE_PROVIDER", "").lower() in ("1", "true", "yes")
+
+
+def _count_tokens(text: str) -> int:
+    """Whitespace-separated words stand for tokens"""
+    return len(text.split())
+
+
+class FakeAIProvider:
+    """
+    Replies with AI_FAKE_REPLY, or echoes the last user message
+
+    ``delay`` is spent before each delta and ``connect_delay`` in warm_up,
+    so tests can check that deltas arrive one by one and that connection
+    setup overlaps other work.
+    """
+
+    model = "fake-echo"
+
+    def __init__(self, reply: Optional[str] = None, delay: float = 0.0, connect_delay: float = 0.0):
+        self.reply = reply if reply is not None else os.getenv("AI_FAKE_REPLY")
+        self.delay = delay
+        self.connect_delay = connect_delay
+        self.connected = False
+
+    async def warm_up(self) -> None:
+        await asyncio.sleep(self.connect_delay)
+        self.connected = True
+
+    def _reply_for(self, messages: List[Dict[str, str]]) -> str:
+        if self.reply is not None:
+            return self.reply
+        last_user_message = next(
+            (msg.get("content", "") for msg in reversed(messages) if msg.get("role") == "user"), ""
+        )
+        return f"Echo: {last_user_message}"
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str],
+        max_tokens: int,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Delta events, then a done event shaped like AIService.chat_completion's response"""
+        if not self.connected:
+            await self.warm_up()
+        words = self._reply_for(messages).split(" ")
+        finish_reason = "stop"
+        if len(words) > max_tokens:
+            words, finish_reason = words[:max_tokens], "length"
+
+        content = ""
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.delay)
+            delta = word if index == 0 else f" {word}"
+            content += delta
+            yield {"type": "delta", "content": delta}
+
+        prompt_tokens = _count_tokens(system_prompt or "") + sum(
+            _count_tokens(msg.get("content", "")) for msg in messages
+        )
+        completion_tokens = _count_tokens(content)
+        yield {
+            "type": "done",
+            "content": content,
+            "model": self.model,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            "finish_reason": finish_reason,
+            "provider": "fake",
+        }
@@ -4,7 +4,7 @@ Supports both OpenAI and Anthropic (Claude) APIs
 """
 
 import os
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, AsyncIterator, Literal
 from enum import Enum
 
 try:
@@ -22,12 +22,14 @@ except ImportError:
     AsyncAnthropic = None
 
 from app.core.logging import logger
+from app.services.ai_fake_provider import FakeAIProvider, fake_provider_enabled
 
 
 class AIProvider(str, Enum):
     """Supported AI providers"""
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
+    FAKE = "fake"  # Local stub for offline development and tests (AI_FAKE_PROVIDER=true)
     AUTO = "auto"  # Auto-select based on availability
 
 
@@ -52,6 +54,8 @@ class AIService:
                 return AIProvider.OPENAI
             elif ANTHROPIC_AVAILABLE and self._is_anthropic_configured():
                 return AIProvider.ANTHROPIC
+            elif fake_provider_enabled():
+                return AIProvider.FAKE
             else:
                 raise ValueError("No AI provider is configured. Set OPENAI_API_KEY or ANTHROPIC_API_KEY")
         
@@ -88,9 +92,34 @@ class AIService:
             self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
             self.max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "1024"))
             self.temperature = float(os.getenv("ANTHROPIC_TEMPERATURE", "0.7"))
+            
+        elif self.provider == AIProvider.FAKE:
+            if not fake_provider_enabled():
+                raise ValueError("The fake AI provider is disabled. Set AI_FAKE_PROVIDER=true to use it")
+            
+            self.client = FakeAIProvider()
+            self.model = FakeAIProvider.model
+            self.max_tokens = 1000
+            self.temperature = 0.7
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
+    async def warm_up(self) -> None:
+        """
+        Open the provider connection ahead of the first request (best effort).
+        
+        The SDK clients keep their HTTP connection pooled, so a cheap request
+        made while the prompt is being prepared saves the TCP/TLS setup on the
+        completion itself.
+        """
+        try:
+            if self.provider == AIProvider.FAKE:
+                await self.client.warm_up()
+            else:
+                await self.client.models.list()
+        except Exception as e:
+            logger.debug(f"AI provider warm-up failed ({self.provider.value}): {e}")
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -120,9 +149,84 @@ class AIService:
             return await self._anthropic_chat_completion(
                 messages, model, temperature, max_tokens, system_prompt
             )
+        elif self.provider == AIProvider.FAKE:
+            response = {}
+            async for event in self.client.stream(messages, system_prompt, max_tokens or self.max_tokens):
+                response = event
+            return {key: value for key, value in response.items() if key != "type"}
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        system_prompt: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Create a chat completion, yielding the text as it is generated.
+        
+        Args:
+            Same as chat_completion
+            
+        Yields:
+            {'type': 'delta', 'content': ...} for each text fragment, then one
+            {'type': 'done', ...} event carrying the chat_completion response
+            fields ('content', 'model', 'usage', 'finish_reason', 'provider')
+        """
+        if self.provider == AIProvider.OPENAI:
+            stream = self._openai_stream_chat_completion(
+                messages, model, temperature, max_tokens, system_prompt
+            )
+        elif self.provider == AIProvider.ANTHROPIC:
+            stream = self._anthropic_stream_chat_completion(
+                messages, model, temperature, max_tokens, system_prompt
+            )
+        elif self.provider == AIProvider.FAKE:
+            stream = self.client.stream(messages, system_prompt, max_tokens or self.max_tokens)
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+        
+        async for event in stream:
+            yield event
+    
+    def _openai_messages(self, messages: List[Dict[str, str]], system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        """Messages with the system prompt first (unless one is already there)"""
+        if system_prompt and (not messages or messages[0].get("role") != "system"):
+            return [{"role": "system", "content": system_prompt}, *messages]
+        return list(messages)
+    
+    def _anthropic_messages(self, messages: List[Dict[str, str]], system_prompt: Optional[str]):
+        """
+        Convert messages format for Anthropic
+        
+        Anthropic uses 'user' and 'assistant' roles, and system is separate.
+        Returns (system, messages).
+        """
+        anthropic_messages = []
+        
+        for msg in messages:
+            role = msg.get("role", "user")
+            content = msg.get("content", "")
+            
+            # Skip system messages (handled separately)
+            if role == "system":
+                if not system_prompt:
+                    system_prompt = content
+                continue
+            
+            # Convert to Anthropic format
+            if role in ["user", "assistant"]:
+                anthropic_messages.append({
+                    "role": role,
+                    "content": content,
+                })
+        
+        # Use system prompt parameter or the one from messages
+        return system_prompt or None, anthropic_messages
+    
     async def _openai_chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -132,15 +236,9 @@ class AIService:
         system_prompt: Optional[str],
     ) -> Dict[str, Any]:
         """OpenAI chat completion"""
-        # Add system prompt if provided
-        if system_prompt:
-            # Check if first message is already a system message
-            if not messages or messages[0].get("role") != "system":
-                messages.insert(0, {"role": "system", "content": system_prompt})
-        
         response = await self.client.chat.completions.create(
             model=model or self.model,
-            messages=messages,
+            messages=self._openai_messages(messages, system_prompt),
             temperature=temperature or self.temperature,
             max_tokens=max_tokens or self.max_tokens,
         )
@@ -166,29 +264,7 @@ class AIService:
         system_prompt: Optional[str],
     ) -> Dict[str, Any]:
         """Anthropic (Claude) chat completion"""
-        # Convert messages format for Anthropic
-        # Anthropic uses 'user' and 'assistant' roles, and system is separate
-        anthropic_messages = []
-        
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            
-            # Skip system messages (handled separately)
-            if role == "system":
-                if not system_prompt:
-                    system_prompt = content
-                continue
-            
-            # Convert to Anthropic format
-            if role in ["user", "assistant"]:
-                anthropic_messages.append({
-                    "role": role,
-                    "content": content,
-                })
-        
-        # Use system prompt parameter or the one from messages
-        system = system_prompt or None
+        system, anthropic_messages = self._anthropic_messages(messages, system_prompt)
         
         response = await self.client.messages.create(
             model=model or self.model,
@@ -217,6 +293,91 @@ class AIService:
             "provider": "anthropic",
         }
     
+    async def _openai_stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        system_prompt: Optional[str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """OpenAI streamed chat completion (usage comes with the last chunk)"""
+        stream = await self.client.chat.completions.create(
+            model=model or self.model,
+            messages=self._openai_messages(messages, system_prompt),
+            temperature=temperature or self.temperature,
+            max_tokens=max_tokens or self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        
+        content = ""
+        response_model = model or self.model
+        finish_reason = None
+        usage = {}
+        async for chunk in stream:
+            response_model = chunk.model or response_model
+            if chunk.usage:
+                usage = {
+                    "prompt_tokens": chunk.usage.prompt_tokens,
+                    "completion_tokens": chunk.usage.completion_tokens,
+                    "total_tokens": chunk.usage.total_tokens,
+                }
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                content += choice.delta.content
+                yield {"type": "delta", "content": choice.delta.content}
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        
+        yield {
+            "type": "done",
+            "content": content,
+            "model": response_model,
+            "usage": usage,
+            "finish_reason": finish_reason,
+            "provider": "openai",
+        }
+    
+    async def _anthropic_stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        system_prompt: Optional[str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Anthropic (Claude) streamed chat completion"""
+        system, anthropic_messages = self._anthropic_messages(messages, system_prompt)
+        
+        content = ""
+        async with self.client.messages.stream(
+            model=model or self.model,
+            max_tokens=max_tokens or self.max_tokens,
+            temperature=temperature or self.temperature,
+            system=system,
+            messages=anthropic_messages,
+        ) as stream:
+            async for text in stream.text_stream:
+                content += text
+                yield {"type": "delta", "content": text}
+            response = await stream.get_final_message()
+        
+        yield {
+            "type": "done",
+            "content": content,
+            "model": response.model,
+            "usage": {
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens,
+                "total_tokens": response.usage.input_tokens + response.usage.output_tokens,
+            },
+            "finish_reason": response.stop_reason,
+            "provider": "anthropic",
+        }
+    
     async def simple_chat(
         self,
         user_message: str,
@@ -253,6 +414,10 @@ class AIService:
             if ANTHROPIC_AVAILABLE and bool(os.getenv("ANTHROPIC_API_KEY")):
                 return True
         
+        if provider == AIProvider.FAKE or provider is None:
+            if fake_provider_enabled():
+                return True
+        
         return False
     
     @staticmethod
@@ -266,5 +431,8 @@ class AIService:
         if ANTHROPIC_AVAILABLE and bool(os.getenv("ANTHROPIC_API_KEY")):
             providers.append("anthropic")
         
+        if fake_provider_enabled():
+            providers.append("fake")
+        
         return providers
 
@@ -0,0 +1,498 @@
+"""
+Bulk Import Engine
+Streams CSV/Excel rows in bounded memory, parses them in worker processes and
+writes them in batched INSERT ... ON CONFLICT DO NOTHING statements
+"""
+
+import asyncio
+import csv
+import hashlib
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.import_checkpoint import ImportCheckpoint
+
+# Uploads larger than this are spooled to disk instead of memory
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+CSV_SNIFF_SIZE = 64 * 1024
+
+# A parser maps a raw row to (record, None) or (None, error message).
+# It must be a module-level function so it can be sent to worker processes.
+RowParser = Callable[[Dict[str, Any]], Tuple[Optional[Dict[str, Any]], Optional[str]]]
+
+
+# ==================== Field helpers ====================
+
+@lru_cache(maxsize=4096)
+def normalize_field_name(field_name: str) -> str:
+    """Normalize field name for flexible matching (headers repeat on every row: cached)"""
+    if not field_name:
+        return ""
+    # Remove accents, lowercase, strip
+    normalized = unicodedata.normalize('NFD', str(field_name).lower().strip())
+    normalized = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+    return normalized.replace(' ', '_').replace('-', '_')
+
+
+def get_field_value(row_data: Dict[str, Any], possible_names: List[str]) -> Optional[Any]:
+    """Get field value from row using multiple possible column names"""
+    for name in possible_names:
+        normalized_name = normalize_field_name(name)
+        for key, value in row_data.items():
+            if normalize_field_name(key) == normalized_name:
+                return value if value else None
+    return None
+
+
+def _clean_value(value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+# ==================== Sources ====================
+
+@dataclass
+class ImportSource:
+    """A tabular file (CSV or Excel) opened for streaming"""
+    fileobj: BinaryIO
+    format: str  # 'csv', 'xlsx' or 'xls'
+    name: str
+    instructions: Optional[str] = None
+    _owned: List[Any] = field(default_factory=list, repr=False)
+
+    def close(self) -> None:
+        for resource in reversed(self._owned):
+            try:
+                resource.close()
+            except Exception:
+                pass
+        self._owned.clear()
+
+
+def detect_format(filename: str) -> Optional[str]:
+    """Return 'csv', 'xlsx', 'xls' or 'zip' for a file name, None if unsupported"""
+    ext = os.path.splitext((filename or "").lower())[1]
+    return {'.csv': 'csv', '.xlsx': 'xlsx', '.xls': 'xls', '.zip': 'zip'}.get(ext)
+
+
+def open_import_source(fileobj: BinaryIO, filename: str) -> ImportSource:
+    """
+    Open an uploaded file for streaming
+
+    ZIP archives are inspected for the first Excel or CSV member (Excel wins)
+    and an optional INSTRUCTIONS.txt. CSV members are streamed straight out
+    of the archive; Excel members are spooled because openpyxl needs to seek.
+
+    Raises:
+        ValueError: unsupported format or no tabular file in the archive
+    """
+    file_format = detect_format(filename)
+    if file_format is None:
+        raise ValueError("Unsupported file format. Supported: CSV, Excel (.xlsx, .xls), or ZIP")
+
+    fileobj.seek(0)
+    if file_format != 'zip':
+        return ImportSource(fileobj=fileobj, format=file_format, name=filename)
+
+    try:
+        archive = zipfile.ZipFile(fileobj, 'r')
+    except zipfile.BadZipFile:
+        raise ValueError("Invalid ZIP file format")
+
+    excel_member = csv_member = None
+    instructions = None
+    for member in archive.namelist():
+        member_lower = member.lower()
+        if member_lower.endswith(('.xlsx', '.xls')):
+            if excel_member is None:
+                excel_member = member
+            else:
+                logger.warning(f"Multiple Excel files found in ZIP, using first: {excel_member}")
+        elif member_lower.endswith('.csv'):
+            if csv_member is None:
+                csv_member = member
+            else:
+                logger.warning(f"Multiple CSV files found in ZIP, using first: {csv_member}")
+        elif 'instructions' in member_lower and member_lower.endswith('.txt'):
+            instructions = archive.read(member).decode('utf-8', errors='replace')
+
+    member = excel_member or csv_member
+    if member is None:
+        archive.close()
+        raise ValueError("No Excel or CSV file found in ZIP")
+
+    source = ImportSource(
+        fileobj=None,
+        format=detect_format(member),
+        name=member,
+        instructions=instructions,
+        _owned=[archive],
+    )
+    if source.format == 'csv':
+        source.fileobj = archive.open(member)
+    else:
+        spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        with archive.open(member) as stream:
+            shutil.copyfileobj(stream, spooled)
+        spooled.seek(0)
+        source.fileobj = spooled
+    source._owned.append(source.fileobj)
+    logger.info(f"Extracted {source.format.upper()} from ZIP: {member}")
+    return source
+
+
+def fingerprint_file(fileobj: BinaryIO, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a seekable file, read block by block (position is reset to 0)"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _iter_csv_rows(fileobj: BinaryIO, encoding: str = 'utf-8-sig') -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(fileobj, encoding=encoding, errors='replace', newline='')
+    try:
+        sample = text.read(CSV_SNIFF_SIZE)
+        if sample and not sample.endswith(('\n', '\r')):
+            sample += text.readline()
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+        except csv.Error:
+            delimiter = ','
+
+        lines = _chain_lines(sample, text)
+        reader = csv.DictReader(lines, delimiter=delimiter)
+        for row in reader:
+            yield {key: _clean_value(value) for key, value in row.items() if key is not None}
+    finally:
+        # Leave the underlying file open: it belongs to the caller
+        text.detach()
+
+
+def _chain_lines(sample: str, text: io.TextIOWrapper) -> Iterator[str]:
+    yield from sample.splitlines(keepends=True)
+    yield from text
+
+
+def _iter_xlsx_rows(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        headers = [
+            str(value).strip() if value is not None else f"Unnamed: {index}"
+            for index, value in enumerate(header_row)
+        ]
+        for values in rows:
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+                continue
+            yield {header: _clean_value(value) for header, value in zip(headers, values)}
+    finally:
+        workbook.close()
+
+
+def _iter_xls_rows(fileobj: BinaryIO) -> Iterator[Dict[str, Any]]:
+    # Legacy .xls cannot be streamed by openpyxl: fall back to pandas
+    from app.services.import_service import ImportService
+
+    result = ImportService.import_from_excel(file_content=fileobj.read(), has_headers=True)
+    yield from result['data']
+
+
+def iter_rows(source: ImportSource) -> Iterator[Dict[str, Any]]:
+    """Yield the data rows of a source as dicts keyed by header (empty cells -> None)"""
+    if source.format == 'csv':
+        return _iter_csv_rows(source.fileobj)
+    if source.format == 'xlsx':
+        return _iter_xlsx_rows(source.fileobj)
+    return _iter_xls_rows(source.fileobj)
+
+
+async def read_import_rows(fileobj: BinaryIO, filename: str) -> Dict[str, Any]:
+    """
+    Read every row of an upload off the event loop
+
+    Drop-in replacement for ImportService.import_from_excel()/import_from_csv()
+    for imports that need the whole sheet at once (matching, photos).
+
+    Returns:
+        Dict with 'data', 'errors', 'warnings', 'total_rows', 'valid_rows', 'invalid_rows'
+    """
+    def _read() -> List[Dict[str, Any]]:
+        source = open_import_source(fileobj, filename)
+        try:
+            return list(iter_rows(source))
+        finally:
+            source.close()
+
+    data = await asyncio.to_thread(_read)
+    return {
+        'data': data,
+        'errors': [],
+        'warnings': [],
+        'total_rows': len(data),
+        'valid_rows': len(data),
+        'invalid_rows': 0,
+    }
+
+
+# ==================== Parsing ====================
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    if settings.BULK_IMPORT_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        # spawn: never fork a process that runs an event loop and DB pools
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.BULK_IMPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def shutdown_import_workers() -> None:
+    """Stop the parsing worker processes (called on application shutdown)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def parse_chunk(parser: RowParser, rows: List[Dict[str, Any]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Run a parser over a chunk of rows (executed in a worker process)"""
+    parsed = []
+    for row in rows:
+        try:
+            parsed.append(parser(row))
+        except Exception as e:
+            parsed.append((None, str(e)))
+    return parsed
+
+
+async def _parse_off_loop(parser: RowParser, rows: List[Dict[str, Any]]):
+    global _process_pool
+    pool = _get_process_pool()
+    if pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, parse_chunk, parser, rows)
+        except BrokenProcessPool:
+            logger.warning("Import worker pool broken, parsing in a thread instead")
+            _process_pool = None
+    return await asyncio.to_thread(parse_chunk, parser, rows)
+
+
+def _next_chunk(rows: Iterator[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+# ==================== Engine ====================
+
+@dataclass
+class BulkImportResult:
+    """Outcome of a bulk import run"""
+    total_rows: int = 0
+    valid_rows: int = 0
+    invalid_rows: int = 0
+    inserted: int = 0
+    resumed_from: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    warnings: List[Dict[str, Any]] = field(default_factory=list)
+    preview: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class BulkImporter:
+    """
+    Chunked import pipeline
+
+    For each chunk of ``chunk_size`` raw rows: parse in a worker process,
+    enrich in the event loop (``prepare``), write with one batched
+    INSERT ... ON CONFLICT DO NOTHING, run ``on_written`` and record the
+    checkpoint (import_checkpoints) in the same DB transaction, then commit.
+    Uploading the same file again after a failure resumes after the last
+    committed chunk: the checkpoint commits with the rows, so no chunk is
+    written twice even without a conflict target.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        model: Any,
+        parser: RowParser,
+        *,
+        chunk_size: Optional[int] = None,
+        conflict_columns: Optional[Sequence[str]] = None,
+        checkpoint_key: Optional[str] = None,
+        prepare: Optional[Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]] = None,
+        on_written: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        dry_run: bool = False,
+        max_errors: int = 1000,
+        preview_size: int = 10,
+    ):
+        self.db = db
+        self.model = model
+        self.parser = parser
+        self.chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+        self.conflict_columns = list(conflict_columns) if conflict_columns else None
+        self.checkpoint_key = checkpoint_key
+        self.prepare = prepare
+        self.on_written = on_written
+        self.dry_run = dry_run
+        self.max_errors = max_errors
+        self.preview_size = preview_size
+
+    async def run(self, rows: Iterator[Dict[str, Any]]) -> BulkImportResult:
+        result = BulkImportResult()
+        checkpoint = await self._load_checkpoint()
+        result.resumed_from = checkpoint
+        position = {'offset': 0}
+
+        async def read_and_parse():
+            # Reading the file is blocking I/O: keep it off the event loop too
+            chunk = await asyncio.to_thread(_next_chunk, rows, self.chunk_size)
+            start = position['offset']
+            position['offset'] += len(chunk)
+            end = position['offset']
+            if end <= checkpoint:
+                return chunk, start, end, None
+            if start < checkpoint:
+                chunk = chunk[checkpoint - start:]
+                start = checkpoint
+            return chunk, start, end, await _parse_off_loop(self.parser, chunk)
+
+        # The next chunk is read and parsed while the current one is written
+        pending = asyncio.ensure_future(read_and_parse())
+        try:
+            while True:
+                chunk, start, end, parsed = await pending
+                if not chunk:
+                    break
+                pending = asyncio.ensure_future(read_and_parse())
+                result.total_rows = end
+                if parsed is None:
+                    continue
+
+                records = []
+                for index, (record, error) in enumerate(parsed):
+                    if error is not None:
+                        result.invalid_rows += 1
+                        if len(result.errors) < self.max_errors:
+                            result.errors.append({'row': start + index + 1, 'data': chunk[index], 'error': error})
+                        continue
+                    records.append(record)
+                result.valid_rows += len(records)
+
+                if records and self.prepare is not None:
+                    records = await self.prepare(records)
+                if len(result.preview) < self.preview_size:
+                    result.preview.extend(records[:self.preview_size - len(result.preview)])
+
+                if self.dry_run:
+                    continue
+
+                if records:
+                    result.inserted += await self._write(records)
+                    if self.on_written is not None:
+                        await self.on_written(records)
+                await self._save_checkpoint(end)
+                await self.db.commit()
+        finally:
+            if not pending.done():
+                pending.cancel()
+
+        if not self.dry_run:
+            await self._clear_checkpoint()
+        if result.resumed_from:
+            logger.info(f"Bulk import of {self.model.__tablename__} resumed after row {result.resumed_from}")
+        return result
+
+    def _dialect_insert(self):
+        """INSERT construct supporting ON CONFLICT, None on other databases"""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            dialect_insert = None
+        return dialect_insert
+
+    async def _write(self, records: List[Dict[str, Any]]) -> int:
+        dialect_insert = self._dialect_insert()
+        if dialect_insert is not None:
+            stmt = dialect_insert(self.model).on_conflict_do_nothing(index_elements=self.conflict_columns)
+        else:
+            stmt = insert(self.model)
+
+        result = await self.db.execute(stmt, records)
+        rowcount = getattr(result, "rowcount", -1)
+        return rowcount if rowcount is not None and rowcount >= 0 else len(records)
+
+    async def _load_checkpoint(self) -> int:
+        if self.checkpoint_key is None or self.dry_run:
+            return 0
+        expired_before = datetime.now(timezone.utc) - timedelta(seconds=settings.BULK_IMPORT_CHECKPOINT_TTL)
+        result = await self.db.execute(
+            select(ImportCheckpoint.offset, ImportCheckpoint.updated_at)
+            .where(ImportCheckpoint.key == self.checkpoint_key)
+        )
+        row = result.first()
+        if row is None:
+            return 0
+        updated_at = row.updated_at if row.updated_at.tzinfo else row.updated_at.replace(tzinfo=timezone.utc)
+        return row.offset if updated_at >= expired_before else 0
+
+    async def _save_checkpoint(self, offset: int) -> None:
+        """Record progress in the current transaction (committed with the chunk)"""
+        if self.checkpoint_key is None:
+            return
+        values = {"key": self.checkpoint_key, "offset": offset, "updated_at": datetime.now(timezone.utc)}
+        dialect_insert = self._dialect_insert()
+        if dialect_insert is not None:
+            stmt = dialect_insert(ImportCheckpoint).values(**values)
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[ImportCheckpoint.key],
+                set_={"offset": stmt.excluded.offset, "updated_at": stmt.excluded.updated_at},
+            ))
+        else:
+            await self.db.execute(delete(ImportCheckpoint).where(ImportCheckpoint.key == self.checkpoint_key))
+            await self.db.execute(insert(ImportCheckpoint).values(**values))
+
+    async def _clear_checkpoint(self) -> None:
+        if self.checkpoint_key is None:
+            return
+        await self.db.execute(delete(ImportCheckpoint).where(ImportCheckpoint.key == self.checkpoint_key))
+        await self.db.commit()
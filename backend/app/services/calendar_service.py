@@ -0,0 +1,348 @@
+"""
+Calendar Service
+Agenda read model: events, approved vacations, public holidays, task due
+dates and scheduled tasks of a date window merged into one sorted stream
+"""
+
+import heapq
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Date, and_, func, literal, literal_column, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.calendar_event import CalendarEvent
+from app.models.employee import Employee
+from app.models.project_task import ProjectTask
+from app.models.public_holiday import PublicHoliday
+from app.models.scheduled_task import ScheduledTask, TaskStatus as ScheduledTaskStatus
+from app.models.vacation_request import VacationRequest
+
+try:
+    from croniter import croniter
+    CRONITER_AVAILABLE = True
+except ImportError:
+    CRONITER_AVAILABLE = False
+    croniter = None
+
+CALENDAR_SOURCES = ("event", "vacation", "holiday", "task", "scheduled_task")
+
+# Longest window served at once (a year view)
+MAX_WINDOW_DAYS = 366
+
+# Same steps as ScheduledTaskService._schedule_next_occurrence
+RECURRENCE_STEPS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "monthly": timedelta(days=30),
+}
+
+VACATION_COLOR = "#10B981"
+HOLIDAY_COLOR = "#EF4444"
+TASK_COLOR = "#8B5CF6"
+SCHEDULED_TASK_COLOR = "#6B7280"
+
+
+def date_span_overlaps(
+    dialect_name: str,
+    start_column: ColumnElement,
+    end_column: ColumnElement,
+    window_start: Optional[date],
+    window_end: Optional[date],
+) -> ColumnElement:
+    """
+    Rows whose [start, end] day span overlaps the window (None: unbounded)
+
+    On PostgreSQL the span is ``daterange(start, greatest(end, start), '[]')``
+    tested with ``&&``, the exact expression of the GiST indexes of migration
+    082, so a window is one index range scan. ``greatest`` ignores a NULL
+    end (single-day rows) and repairs an end before the start. Elsewhere the
+    same test is spelled with comparisons.
+    """
+    if dialect_name == "postgresql":
+        inclusive = literal_column("'[]'")
+        span = func.daterange(start_column, func.greatest(end_column, start_column), inclusive)
+        window = func.daterange(literal(window_start, Date), literal(window_end, Date), inclusive)
+        return span.op("&&", is_comparison=True)(window)
+
+    conditions = []
+    if window_end is not None:
+        conditions.append(start_column <= window_end)
+    if window_start is not None:
+        conditions.append(or_(start_column >= window_start, end_column >= window_start))
+    return and_(true(), *conditions)
+
+
+def recurrence_occurrences(
+    first: datetime,
+    recurrence: str,
+    window_start: datetime,
+    window_end: datetime,
+    config: Optional[Dict[str, Any]] = None,
+) -> Iterator[datetime]:
+    """
+    Occurrences of a recurring schedule within [window_start, window_end)
+
+    Fixed steps jump straight to the first occurrence of the window instead
+    of walking from ``first``. Cron schedules need croniter; without it only
+    ``first`` is returned.
+    """
+    step = RECURRENCE_STEPS.get(recurrence)
+    if step is not None:
+        current = first
+        if current < window_start:
+            current += step * -(-(window_start - first) // step)
+        while current < window_end:
+            yield current
+            current += step
+        return
+
+    if recurrence == "cron" and CRONITER_AVAILABLE and (config or {}).get("expression"):
+        current = first
+        if current < window_start:
+            current = croniter(config["expression"], window_start - timedelta(microseconds=1)).get_next(datetime)
+        schedule = croniter(config["expression"], current)
+        while current < window_end:
+            yield current
+            current = schedule.get_next(datetime)
+        return
+
+    if window_start <= first < window_end:
+        yield first
+
+
+def holiday_occurrences(holiday_date: date, window_start: date, window_end: date) -> Iterator[date]:
+    """Yearly occurrences of a recurring holiday within the window (Feb 29 only on leap years)"""
+    for year in range(window_start.year, window_end.year + 1):
+        try:
+            occurrence = holiday_date.replace(year=year)
+        except ValueError:
+            continue
+        if window_start <= occurrence <= window_end:
+            yield occurrence
+
+
+def _time_str(value: Optional[time]) -> Optional[str]:
+    return value.strftime("%H:%M:%S") if value is not None else None
+
+
+def _item(
+    source: str,
+    item_id: int,
+    title: str,
+    start_date: date,
+    end_date: Optional[date] = None,
+    time_value: Optional[time] = None,
+    category: Optional[str] = None,
+    color: Optional[str] = None,
+    recurring: bool = False,
+) -> Dict[str, Any]:
+    return {
+        "source": source,
+        "id": item_id,
+        "title": title,
+        "start_date": start_date,
+        "end_date": end_date,
+        "time": _time_str(time_value),
+        "category": category or source,
+        "color": color,
+        "recurring": recurring,
+    }
+
+
+def _holiday_items(holiday: PublicHoliday, dates: Iterable[date]) -> Iterator[Dict[str, Any]]:
+    for day in dates:
+        yield _item("holiday", holiday.id, holiday.name, day, color=HOLIDAY_COLOR, recurring=holiday.year is None)
+
+
+def _scheduled_task_items(
+    task: ScheduledTask, occurrences: Iterable[datetime], recurring: bool
+) -> Iterator[Dict[str, Any]]:
+    for occurrence in occurrences:
+        yield _item(
+            "scheduled_task", task.id, task.name, occurrence.date(), time_value=occurrence.time(),
+            category=getattr(task.task_type, "value", task.task_type),
+            color=SCHEDULED_TASK_COLOR, recurring=recurring,
+        )
+
+
+def _sort_key(item: Dict[str, Any]):
+    # All-day items first, then by time of day
+    return (
+        item["start_date"],
+        item["time"] is not None,
+        item["time"] or "",
+        CALENDAR_SOURCES.index(item["source"]),
+        item["id"],
+    )
+
+
+class CalendarQueryService:
+    """Agenda of one user over a date window, one indexed scan per source"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @property
+    def dialect_name(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def events_query(self, user_id: int, start: Optional[date], end: Optional[date]):
+        """Events of ``user_id`` overlapping the window (None: unbounded side)"""
+        query = select(CalendarEvent).where(CalendarEvent.user_id == user_id)
+        if start is None and end is None:
+            return query
+        return query.where(
+            date_span_overlaps(self.dialect_name, CalendarEvent.date, CalendarEvent.end_date, start, end)
+        )
+
+    async def _events(self, user_id: int, start: date, end: date) -> List[Dict[str, Any]]:
+        result = await self.db.execute(self.events_query(user_id, start, end))
+        return [
+            _item(
+                "event", event.id, event.title or "Untitled Event", event.date, event.end_date,
+                event.time, event.type or "other", event.color,
+            )
+            for event in result.scalars().all()
+        ]
+
+    async def _vacations(self, user_id: int, start: date, end: date, all_employees: bool) -> List[Dict[str, Any]]:
+        """
+        Approved vacations overlapping the window
+
+        The user's own vacations are skipped: approving a request already
+        copies it into their events. Without ``all_employees`` nothing else
+        is visible (same rule as the vacation requests listing).
+        """
+        if not all_employees:
+            return []
+        result = await self.db.execute(
+            select(VacationRequest, Employee.first_name, Employee.last_name)
+            .join(Employee, Employee.id == VacationRequest.employee_id)
+            .where(
+                VacationRequest.status == "approved",
+                or_(Employee.user_id.is_(None), Employee.user_id != user_id),
+                date_span_overlaps(
+                    self.dialect_name, VacationRequest.start_date, VacationRequest.end_date, start, end
+                ),
+            )
+        )
+        return [
+            _item(
+                "vacation", vacation.id, f"Vacances - {first_name} {last_name}",
+                vacation.start_date, vacation.end_date, color=VACATION_COLOR,
+            )
+            for vacation, first_name, last_name in result.all()
+        ]
+
+    async def _holidays(self, start: date, end: date) -> Iterator[Dict[str, Any]]:
+        """Dated holidays of the window plus yearly ones expanded into it"""
+        result = await self.db.execute(
+            select(PublicHoliday).where(
+                PublicHoliday.is_active.is_(True),
+                or_(PublicHoliday.year.is_(None), PublicHoliday.date.between(start, end)),
+            )
+        )
+        streams = []
+        for holiday in result.scalars().all():
+            dates = [holiday.date] if holiday.year is not None else holiday_occurrences(holiday.date, start, end)
+            streams.append(_holiday_items(holiday, dates))
+        return heapq.merge(*streams, key=_sort_key)
+
+    async def _tasks(self, user_id: int, start: date, end: date) -> List[Dict[str, Any]]:
+        """Project tasks assigned to the user and due in the window"""
+        window_start = datetime.combine(start, time.min, tzinfo=timezone.utc)
+        window_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        result = await self.db.execute(
+            select(ProjectTask.id, ProjectTask.title, ProjectTask.status, ProjectTask.due_date).where(
+                ProjectTask.assignee_id == user_id,
+                ProjectTask.due_date >= window_start,
+                ProjectTask.due_date < window_end,
+            )
+        )
+        return [
+            _item(
+                "task", task_id, title, due_date.date(), time_value=due_date.time(),
+                category=getattr(task_status, "value", task_status), color=TASK_COLOR,
+            )
+            for task_id, title, task_status, due_date in result.all()
+        ]
+
+    async def _scheduled_tasks(self, user_id: int, start: date, end: date) -> Iterator[Dict[str, Any]]:
+        """
+        Scheduled tasks of the window, recurring ones expanded lazily
+
+        Completing a recurring task creates the next instance, so only the
+        pending head of a series is expanded; past instances show as stored.
+        """
+        window_start = datetime.combine(start, time.min, tzinfo=timezone.utc)
+        window_end = datetime.combine(end + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        is_series_head = and_(
+            ScheduledTask.recurrence.isnot(None),
+            ScheduledTask.status == ScheduledTaskStatus.PENDING,
+        )
+        result = await self.db.execute(
+            select(ScheduledTask).where(
+                ScheduledTask.user_id == user_id,
+                ScheduledTask.scheduled_at < window_end,
+                or_(is_series_head, ScheduledTask.scheduled_at >= window_start),
+            )
+        )
+        streams = []
+        for task in result.scalars().all():
+            first = task.scheduled_at
+            if first.tzinfo is None:
+                first = first.replace(tzinfo=timezone.utc)
+            recurring = bool(task.recurrence) and task.status == ScheduledTaskStatus.PENDING
+            if recurring:
+                occurrences = recurrence_occurrences(
+                    first, task.recurrence, window_start, window_end, task.recurrence_config
+                )
+            else:
+                occurrences = iter([first])
+            streams.append(_scheduled_task_items(task, occurrences, recurring))
+        return heapq.merge(*streams, key=_sort_key)
+
+    async def agenda(
+        self,
+        user_id: int,
+        start: date,
+        end: date,
+        sources: Optional[Sequence[str]] = None,
+        all_vacations: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Calendar items of [start, end] sorted by day, then time of day
+
+        Args:
+            user_id: Owner of the events, assignee of the tasks
+            start: First day of the window
+            end: Last day of the window (inclusive)
+            sources: Subset of CALENDAR_SOURCES (default: all)
+            all_vacations: Include other employees' approved vacations
+
+        Raises:
+            ValueError: If the window is inverted, too long, or a source is unknown
+        """
+        if end < start:
+            raise ValueError("end_date must be on or after start_date")
+        if (end - start).days >= MAX_WINDOW_DAYS:
+            raise ValueError(f"Date window cannot exceed {MAX_WINDOW_DAYS} days")
+        sources = list(sources or CALENDAR_SOURCES)
+        unknown = set(sources) - set(CALENDAR_SOURCES)
+        if unknown:
+            raise ValueError(f"Unknown calendar sources: {', '.join(sorted(unknown))}")
+
+        streams: List[Iterable[Dict[str, Any]]] = []
+        if "event" in sources:
+            streams.append(sorted(await self._events(user_id, start, end), key=_sort_key))
+        if "vacation" in sources:
+            streams.append(sorted(await self._vacations(user_id, start, end, all_vacations), key=_sort_key))
+        if "holiday" in sources:
+            streams.append(await self._holidays(start, end))
+        if "task" in sources:
+            streams.append(sorted(await self._tasks(user_id, start, end), key=_sort_key))
+        if "scheduled_task" in sources:
+            streams.append(await self._scheduled_tasks(user_id, start, end))
+        return list(heapq.merge(*streams, key=_sort_key))
@@ -0,0 +1,270 @@
+"""
+Entity Matcher
+Indexed fuzzy name matching for companies (imports, auto-linking, Leo)
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from itertools import combinations
+from math import ceil
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.core.logging import logger
+
+# Legal forms removed as whole words before comparing names
+LEGAL_FORMS = frozenset({
+    'sarl', 'sa', 'sas', 'sasu', 'eurl', 'snc', 'sci', 'scop', 'selarl',
+    'inc', 'incorporated', 'ltd', 'ltee', 'limited', 'llc', 'llp', 'plc',
+    'corp', 'corporation', 'co', 'cie', 'senc', 'enr', 'gmbh', 'ag', 'bv', 'nv',
+})
+
+MATCH_EXACT = 'exact'
+MATCH_WITHOUT_LEGAL_FORM = 'without_legal_form'
+MATCH_PARTIAL = 'partial'
+
+DEFAULT_MIN_SCORE = 0.45
+
+# Longest name whose word subsets are looked up for containment matches
+MAX_SUBSET_WORDS = 6
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', str(name).lower())
+    name = ''.join(char for char in name if unicodedata.category(char) != 'Mn')
+    return _NON_ALNUM.sub(' ', name).strip()
+
+
+def strip_legal_form(normalized: str) -> str:
+    """Remove legal form words (SARL, Inc., Ltée...) from a normalized name"""
+    words = [word for word in normalized.split() if word not in LEGAL_FORMS]
+    return ' '.join(words)
+
+
+def name_key(name: Optional[str]) -> str:
+    """Normalized name without legal form, as stored in companies.name_key"""
+    normalized = normalize_name(name)
+    return strip_legal_form(normalized) or normalized
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Word trigrams padded like pg_trgm ('  w', ' wo', 'wor', 'ord', 'rd ')"""
+    grams: Set[str] = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+@dataclass
+class MatchResult:
+    """Best candidate for a looked-up name"""
+    id: int
+    name: str
+    score: float  # 1.0 for exact matches, trigram similarity otherwise
+    match_type: str  # MATCH_EXACT, MATCH_WITHOUT_LEGAL_FORM or MATCH_PARTIAL
+
+
+class NameMatcher:
+    """
+    In-memory matcher over (id, name) pairs
+
+    Built once per import: an exact dict on the normalized name, an exact
+    dict on the name without legal form, and a trigram inverted index over
+    the latter. A fuzzy lookup only walks the posting lists of the rarest
+    trigrams of the searched name, instead of scanning every entry.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, Optional[str]]], min_score: float = DEFAULT_MIN_SCORE):
+        self.min_score = min_score
+        self._ids: List[int] = []
+        self._names: List[str] = []
+        self._cores: List[str] = []
+        self._grams: List[Set[str]] = []
+        self._exact: Dict[str, int] = {}
+        self._without_legal_form: Dict[str, int] = {}
+        self._by_words: Dict[FrozenSet[str], int] = {}
+        self._index: Dict[str, List[int]] = defaultdict(list)
+
+        for entity_id, name in entries:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            core = strip_legal_form(normalized) or normalized
+            position = len(self._ids)
+            self._ids.append(entity_id)
+            self._names.append(name)
+            self._cores.append(core)
+            # First entry wins on duplicates, like the previous name -> id dicts
+            self._exact.setdefault(normalized, position)
+            self._without_legal_form.setdefault(core, position)
+            self._by_words.setdefault(frozenset(core.split()), position)
+            grams = trigrams(core)
+            self._grams.append(grams)
+            for gram in grams:
+                self._index[gram].append(position)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _result(self, position: int, score: float, match_type: str) -> MatchResult:
+        return MatchResult(self._ids[position], self._names[position], score, match_type)
+
+    def candidates(self, name: Optional[str], limit: int = 5) -> List[MatchResult]:
+        """Ranked candidates for ``name`` (best first), at most ``limit``"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+
+        if normalized in self._exact:
+            return [self._result(self._exact[normalized], 1.0, MATCH_EXACT)]
+        core = strip_legal_form(normalized) or normalized
+        if core in self._without_legal_form:
+            return [self._result(self._without_legal_form[core], 1.0, MATCH_WITHOUT_LEGAL_FORM)]
+
+        grams = trigrams(core)
+        if not grams:
+            return []
+
+        # Prefix filtering: an entry reaching min_score shares at least
+        # ceil(min_score * |grams|) trigrams with the name, hence at least one
+        # of its rarest |grams| - ceil(min_score * |grams|) + 1 trigrams.
+        # Common trigrams (long posting lists) are never walked.
+        by_rarity = sorted(grams, key=lambda gram: len(self._index.get(gram, ())))
+        prefix_size = len(grams) - ceil(self.min_score * len(grams)) + 1
+        positions: Set[int] = set()
+        for gram in by_rarity[:prefix_size]:
+            positions.update(self._index.get(gram, ()))
+
+        # Entries whose words are all part of the name ("Nukleo" for
+        # "Nukleo Digital Montréal") may share none of the rarest trigrams
+        words = core.split()
+        if len(words) <= MAX_SUBSET_WORDS:
+            for size in range(1, len(words)):
+                for subset in combinations(words, size):
+                    position = self._by_words.get(frozenset(subset))
+                    if position is not None:
+                        positions.add(position)
+
+        core_words = set(words)
+        scored = []
+        for position in positions:
+            count = len(grams & self._grams[position])
+            # Same formula as pg_trgm similarity()
+            score = count / (len(grams) + len(self._grams[position]) - count)
+            # One name being a whole-word part of the other ("Nukleo" / "Nukleo Digital")
+            candidate_words = set(self._cores[position].split())
+            if core_words <= candidate_words or candidate_words <= core_words:
+                score = max(score, 0.5 + score / 2)
+            if score >= self.min_score:
+                scored.append((score, -position))
+
+        scored.sort(reverse=True)
+        return [self._result(-neg_position, round(score, 4), MATCH_PARTIAL) for score, neg_position in scored[:limit]]
+
+    def match(self, name: Optional[str]) -> Optional[MatchResult]:
+        """Best candidate for ``name``, None when nothing scores above ``min_score``"""
+        found = self.candidates(name, limit=1)
+        return found[0] if found else None
+
+
+class CompanyMatcher(NameMatcher):
+    """NameMatcher over the companies table"""
+
+    @classmethod
+    async def load(cls, db: AsyncSession, min_score: float = DEFAULT_MIN_SCORE) -> "CompanyMatcher":
+        """Build the index from every company (ids and names only)"""
+        result = await db.execute(select(Company.id, Company.name).order_by(Company.id))
+        return cls(result.all(), min_score=min_score)
+
+    @classmethod
+    async def search(
+        cls,
+        db: AsyncSession,
+        name: str,
+        limit: int = 20,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> "CompanyMatcher":
+        """
+        Build a small matcher from the companies close to ``name``
+
+        Looks up companies.name_key, normalized like the matcher compares
+        names: exact keys first, then the pg_trgm '%' operator (backed by
+        idx_companies_name_key_trgm) when the extension is installed, so
+        single lookups do not load the table. Falls back to loading every
+        company otherwise.
+        """
+        if await pg_trgm_available(db):
+            key = name_key(name)
+            columns = select(Company.id, Company.name)
+            result = await db.execute(columns.where(Company.name_key == key).order_by(Company.id).limit(limit))
+            rows = result.all()
+            if not rows:
+                result = await db.execute(
+                    columns
+                    .where(Company.name_key.op('%')(key))
+                    .order_by(func.similarity(Company.name_key, key).desc())
+                    .limit(limit)
+                )
+                rows = result.all()
+            return cls(rows, min_score=min_score)
+        return await cls.load(db, min_score=min_score)
+
+
+_pg_trgm_available: Optional[bool] = None
+
+
+async def pg_trgm_available(db: AsyncSession) -> bool:
+    """Whether the pg_trgm extension is installed (checked once per process)"""
+    global _pg_trgm_available
+    if _pg_trgm_available is None:
+        if db.get_bind().dialect.name != 'postgresql':
+            _pg_trgm_available = False
+        else:
+            try:
+                result = await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+                _pg_trgm_available = result.scalar() is not None
+            except Exception as e:
+                logger.warning(f"Could not check pg_trgm availability: {e}")
+                _pg_trgm_available = False
+    return _pg_trgm_available
+
+
+async def find_company_by_name(
+    company_name: str,
+    db: AsyncSession,
+    matcher: Optional[NameMatcher] = None,
+) -> Optional[int]:
+    """
+    Find a company ID by name using intelligent matching.
+
+    Matching strategy:
+    1. Exact match (case and accent insensitive)
+    2. Match without legal form (SARL, SA, SAS, EURL, Inc., Ltée...)
+    3. Best trigram similarity above the matcher threshold
+
+    Args:
+        company_name: Company name to search for
+        db: Database session
+        matcher: Optional pre-built matcher (build it once per import)
+
+    Returns:
+        Company ID if found, None otherwise
+    """
+    if not company_name or not company_name.strip():
+        return None
+    if matcher is None:
+        matcher = await CompanyMatcher.search(db, company_name)
+    match = matcher.match(company_name)
+    return match.id if match else None
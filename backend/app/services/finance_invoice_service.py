@@ -0,0 +1,292 @@
+"""
+Finance Invoice Service
+Set-based reads for facturations (page listing and statistics) and the
+invoice number allocator
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, case, cast, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.pagination import Keyset
+from app.models.finance_invoice import FinanceInvoice, FinanceInvoiceNumberSequence, FinanceInvoiceStatus
+from app.models.project import Project
+
+INVOICE_NUMBER_PREFIX = "INV"
+
+# Newest first
+INVOICE_KEYSET = Keyset(FinanceInvoice.issue_date.desc(), FinanceInvoice.id.desc())
+
+# INV-2026-001: prefix, year, sequence number
+INVOICE_NUMBER_PATTERN = re.compile(r"^([A-Z]+)-(\d{4})-(\d+)$")
+
+
+def invoice_status_expression(now: datetime) -> ColumnElement:
+    """
+    SQL equivalent of ``calculate_invoice_status``
+
+    cancelled > paid (amount_paid >= total) > partial (amount_paid > 0) >
+    overdue (sent and due before ``now``) > sent > stored status.
+    """
+    return case(
+        (FinanceInvoice.status == FinanceInvoiceStatus.CANCELLED, literal("cancelled")),
+        (FinanceInvoice.amount_paid >= FinanceInvoice.total, literal("paid")),
+        (FinanceInvoice.amount_paid > 0, literal("partial")),
+        (
+            (FinanceInvoice.status == FinanceInvoiceStatus.SENT) & (FinanceInvoice.due_date < now),
+            literal("overdue"),
+        ),
+        (FinanceInvoice.status == FinanceInvoiceStatus.SENT, literal("sent")),
+        else_=func.lower(cast(FinanceInvoice.status, String)),
+    )
+
+
+class FinanceInvoiceQueryService:
+    """Invoice reads in a constant number of round-trips"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _filters(
+        user_id: int,
+        status: Optional[str] = None,
+        project_id: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> List[ColumnElement]:
+        filters = [FinanceInvoice.user_id == user_id]
+        if status:
+            filters.append(FinanceInvoice.status == status)
+        if project_id:
+            filters.append(FinanceInvoice.project_id == project_id)
+        if start_date:
+            filters.append(FinanceInvoice.issue_date >= start_date)
+        if end_date:
+            filters.append(FinanceInvoice.issue_date <= end_date)
+        return filters
+
+    async def list_page(
+        self,
+        user_id: int,
+        skip: int,
+        limit: int,
+        status: Optional[str] = None,
+        project_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Tuple[FinanceInvoice, Optional[str], str]], int, Optional[str]]:
+        """
+        One page of invoices with their project name and computed status
+
+        The project name comes from an outer join and the total from a
+        window count on the same statement; payments are loaded with one
+        IN query. With a ``cursor`` the page starts after it instead of at
+        ``skip``, and the total needs its own count.
+
+        Returns:
+            ([(invoice, project_name, status)], total, next_cursor)
+
+        Raises:
+            InvalidCursorError: If the cursor was not issued by this listing
+        """
+        now = now or datetime.now(timezone.utc)
+        filters = self._filters(user_id, status, project_id)
+        query = (
+            select(
+                FinanceInvoice,
+                Project.name,
+                invoice_status_expression(now),
+                func.count().over(),
+            )
+            .outerjoin(Project, Project.id == FinanceInvoice.project_id)
+            .where(*filters)
+            .options(selectinload(FinanceInvoice.payments))
+        )
+        rows = (await self.db.execute(INVOICE_KEYSET.window(query, limit, cursor, skip))).all()
+        _, next_cursor = INVOICE_KEYSET.page([invoice for invoice, *_ in rows], limit)
+        if rows and not cursor:
+            total = rows[0][3]
+        elif skip or cursor:
+            total = (await self.db.execute(select(func.count(FinanceInvoice.id)).where(*filters))).scalar() or 0
+        else:
+            total = 0
+        return [(invoice, project_name, computed) for invoice, project_name, computed, _ in rows[:limit]], total, next_cursor
+
+    async def stats(
+        self,
+        user_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Amounts and counts per bucket in one aggregate statement
+
+        Same buckets as before: ``pending`` uses the stored status (draft or
+        sent), ``partial`` and ``overdue`` use the computed status.
+        """
+        now = now or datetime.now(timezone.utc)
+        computed = invoice_status_expression(now)
+        stored = FinanceInvoice.status
+        pending = stored.in_([FinanceInvoiceStatus.SENT, FinanceInvoiceStatus.DRAFT])
+
+        def count_if(condition) -> ColumnElement:
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        def sum_if(condition, column) -> ColumnElement:
+            return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+        result = await self.db.execute(
+            select(
+                func.coalesce(func.sum(FinanceInvoice.total), 0),
+                func.count(FinanceInvoice.id),
+                func.coalesce(func.sum(FinanceInvoice.amount_paid), 0),
+                sum_if(pending, FinanceInvoice.amount_due),
+                count_if(pending),
+                sum_if(computed == "overdue", FinanceInvoice.amount_due),
+                count_if(computed == "overdue"),
+                count_if(stored == FinanceInvoiceStatus.DRAFT),
+                count_if(stored == FinanceInvoiceStatus.SENT),
+                count_if(stored == FinanceInvoiceStatus.PAID),
+                count_if(computed == "partial"),
+                count_if(stored == FinanceInvoiceStatus.CANCELLED),
+            ).where(*self._filters(user_id, start_date=start_date, end_date=end_date))
+        )
+        (
+            total_amount, total_count, paid_amount, pending_amount, pending_count,
+            overdue_amount, overdue_count, draft_count, sent_count, paid_count,
+            partial_count, cancelled_count,
+        ) = result.one()
+
+        return {
+            "total": {
+                "amount": float(total_amount),
+                "count": int(total_count),
+            },
+            "paid": {
+                "amount": float(paid_amount),
+                "count": int(paid_count),
+            },
+            "pending": {
+                "amount": float(pending_amount),
+                "count": int(pending_count),
+            },
+            "overdue": {
+                "amount": float(overdue_amount),
+                "count": int(overdue_count),
+            },
+            "by_status": {
+                "draft": int(draft_count),
+                "sent": int(sent_count),
+                "paid": int(paid_count),
+                "partial": int(partial_count),
+                "overdue": int(overdue_count),
+                "cancelled": int(cancelled_count),
+            },
+        }
+
+
+def format_invoice_number(year: int, number: int, prefix: str = INVOICE_NUMBER_PREFIX) -> str:
+    """INV-2026-001 (the sequence is padded to three digits, never truncated)"""
+    return f"{prefix}-{year}-{number:03d}"
+
+
+def _upsert_sequence(db: AsyncSession, prefix: str, year: int, initial: int, new_value):
+    """
+    INSERT ... ON CONFLICT DO UPDATE on the counter row, returning last_value
+
+    None when the dialect has no upsert (the caller locks the row instead).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    return (
+        dialect_insert(FinanceInvoiceNumberSequence)
+        .values(prefix=prefix, year=year, last_value=initial)
+        .on_conflict_do_update(
+            index_elements=[FinanceInvoiceNumberSequence.prefix, FinanceInvoiceNumberSequence.year],
+            set_={"last_value": new_value},
+        )
+        .returning(FinanceInvoiceNumberSequence.last_value)
+    )
+
+
+async def _lock_sequence(db: AsyncSession, prefix: str, year: int) -> FinanceInvoiceNumberSequence:
+    """Counter row locked with SELECT ... FOR UPDATE, created at 0 when missing"""
+    result = await db.execute(
+        select(FinanceInvoiceNumberSequence)
+        .where(FinanceInvoiceNumberSequence.prefix == prefix)
+        .where(FinanceInvoiceNumberSequence.year == year)
+        .with_for_update()
+    )
+    sequence = result.scalar_one_or_none()
+    if sequence is None:
+        sequence = FinanceInvoiceNumberSequence(prefix=prefix, year=year, last_value=0)
+        db.add(sequence)
+        await db.flush()
+    return sequence
+
+
+async def reserve_invoice_numbers(
+    db: AsyncSession,
+    year: int,
+    count: int = 1,
+    prefix: str = INVOICE_NUMBER_PREFIX,
+) -> List[str]:
+    """
+    Reserve ``count`` consecutive invoice numbers for ``year``
+
+    One statement increments the per-year counter row. The row stays locked
+    until the caller commits, so concurrent creations get distinct numbers,
+    and a rollback returns the numbers to the sequence (no gaps). Commit
+    promptly after using them.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    counter = FinanceInvoiceNumberSequence.last_value
+    stmt = _upsert_sequence(db, prefix, year, count, counter + count)
+    if stmt is not None:
+        last_value = (await db.execute(stmt)).scalar_one()
+    else:
+        sequence = await _lock_sequence(db, prefix, year)
+        sequence.last_value += count
+        await db.flush()
+        last_value = sequence.last_value
+
+    return [format_invoice_number(year, number, prefix) for number in range(last_value - count + 1, last_value + 1)]
+
+
+async def advance_invoice_sequence(db: AsyncSession, invoice_number: str) -> None:
+    """
+    Move the counter past a number chosen by hand (e.g. INV-2026-050)
+
+    Without this, the sequence would later hand out the same number.
+    Numbers outside the PREFIX-YEAR-NNN format are ignored.
+    """
+    match = INVOICE_NUMBER_PATTERN.match(invoice_number)
+    if not match:
+        return
+    prefix, year, number = match.group(1), int(match.group(2)), int(match.group(3))
+
+    counter = FinanceInvoiceNumberSequence.last_value
+    stmt = _upsert_sequence(db, prefix, year, number, case((counter < number, number), else_=counter))
+    if stmt is not None:
+        await db.execute(stmt)
+        return
+
+    sequence = await _lock_sequence(db, prefix, year)
+    if sequence.last_value < number:
+        sequence.last_value = number
+        await db.flush()
@@ -3,6 +3,7 @@ Invoice PDF Generation Service
 Generates PDF documents for finance invoices (facturations)
 """
 
+from functools import lru_cache
 from io import BytesIO
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -28,32 +29,15 @@ class InvoicePDFService:
     """Service for generating invoice PDFs"""
     
     @staticmethod
-    def generate_pdf(invoice_data: Dict[str, Any]) -> BytesIO:
-        """
-        Generate a PDF document from invoice data
-        
-        Args:
-            invoice_data: Dictionary containing invoice information
-            
-        Returns:
-            BytesIO buffer containing the PDF
-        """
-        if not REPORTLAB_AVAILABLE:
-            raise ImportError(
-                "reportlab is required for PDF generation. "
-                "Install with: pip install reportlab"
-            )
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
-        story = []
-        
-        styles = getSampleStyleSheet()
+    @lru_cache(maxsize=1)
+    def styles() -> Dict[str, Any]:
+        """Paragraph styles, built once per process and shared by every render"""
+        base = getSampleStyleSheet()
         
         # Custom styles
         title_style = ParagraphStyle(
             'InvoiceTitle',
-            parent=styles['Heading1'],
+            parent=base['Heading1'],
             fontSize=28,
             textColor=colors.HexColor('#1a1a1a'),
             spaceAfter=30,
@@ -63,7 +47,7 @@ class InvoicePDFService:
         
         heading_style = ParagraphStyle(
             'InvoiceHeading',
-            parent=styles['Heading2'],
+            parent=base['Heading2'],
             fontSize=14,
             textColor=colors.HexColor('#666666'),
             spaceAfter=8,
@@ -73,13 +57,41 @@ class InvoicePDFService:
         
         body_style = ParagraphStyle(
             'InvoiceBody',
-            parent=styles['Normal'],
+            parent=base['Normal'],
             fontSize=10,
             textColor=colors.HexColor('#333333'),
             spaceAfter=8,
             leading=12,
         )
         
+        return {'title': title_style, 'heading': heading_style, 'body': body_style}
+    
+    @staticmethod
+    def generate_pdf(invoice_data: Dict[str, Any]) -> BytesIO:
+        """
+        Generate a PDF document from invoice data
+        
+        Args:
+            invoice_data: Dictionary containing invoice information
+            
+        Returns:
+            BytesIO buffer containing the PDF
+        """
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError(
+                "reportlab is required for PDF generation. "
+                "Install with: pip install reportlab"
+            )
+        
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+        story = []
+        
+        styles = InvoicePDFService.styles()
+        title_style = styles['title']
+        heading_style = styles['heading']
+        body_style = styles['body']
+        
         # Header: Invoice Number and Date
         invoice_number = invoice_data.get('invoice_number', 'N/A')
         issue_date = invoice_data.get('issue_date', '')
@@ -267,3 +279,8 @@ class InvoicePDFService:
         buffer.seek(0)
         
         return buffer
+    
+    @staticmethod
+    def render(invoice_data: Dict[str, Any]) -> bytes:
+        """Render the PDF and return its bytes (used by the render workers)"""
+        return InvoicePDFService.generate_pdf(invoice_data).getvalue()
@@ -0,0 +1,311 @@
+"""
+Leo Aggregate Service
+Exact counts and totals for Leo: a question (entity, filters, group-by,
+metric) compiles to one tenant-scoped COUNT/SUM/AVG ... GROUP BY query
+instead of loading rows and counting them in Python
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.tenancy import scope_query
+
+AGGREGATES = ("count", "sum", "avg")
+
+# Builders receive the app.models module: models are resolved at query time,
+# like the lazy model getters of LeoContextService
+ExpressionBuilder = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """Group-by / filter column, with an optional readable label from an outer-joined table"""
+    column: ExpressionBuilder
+    label: Optional[ExpressionBuilder] = None
+    join: Optional[Callable[[Any], Tuple[Any, Any]]] = None
+
+
+@dataclass(frozen=True)
+class AggregateEntity:
+    """What Leo can aggregate on one table"""
+    model: str
+    dimensions: Dict[str, Dimension] = field(default_factory=dict)
+    metrics: Dict[str, ExpressionBuilder] = field(default_factory=dict)
+    date_column: Optional[str] = None
+    # Model joined for tenant scoping, for tables without team_id
+    scope_via: Optional[str] = None
+
+
+def _column(model: str, name: str) -> Dimension:
+    return Dimension(lambda models: getattr(getattr(models, model), name))
+
+
+def _full_name(model: str) -> ExpressionBuilder:
+    def label(models):
+        target = getattr(models, model)
+        return func.coalesce(target.first_name, "") + " " + func.coalesce(target.last_name, "")
+    return label
+
+
+ENTITIES: Dict[str, AggregateEntity] = {
+    "contacts": AggregateEntity("Contact", {"circle": _column("Contact", "circle")}),
+    "companies": AggregateEntity("Company", {"is_client": _column("Company", "is_client")}),
+    "employees": AggregateEntity("Employee"),
+    "opportunities": AggregateEntity(
+        "Opportunite",
+        {"status": _column("Opportunite", "status")},
+        {"amount": lambda models: models.Opportunite.amount},
+    ),
+    "projects": AggregateEntity("Project", {"status": _column("Project", "status")}),
+    "pipelines": AggregateEntity("Pipeline", {"is_active": _column("Pipeline", "is_active")}),
+    "tasks": AggregateEntity(
+        "ProjectTask",
+        {
+            "status": _column("ProjectTask", "status"),
+            "priority": _column("ProjectTask", "priority"),
+            "assignee": Dimension(
+                lambda models: models.ProjectTask.assignee_id,
+                label=lambda models: models.ProjectTask.assignee_name,
+            ),
+        },
+        date_column="due_date",
+    ),
+    "vacation_requests": AggregateEntity(
+        "VacationRequest",
+        {"status": _column("VacationRequest", "status")},
+        date_column="start_date",
+        scope_via="Employee",
+    ),
+    "expense_accounts": AggregateEntity(
+        "ExpenseAccount",
+        {"status": _column("ExpenseAccount", "status")},
+        {"amount": lambda models: models.ExpenseAccount.total_amount},
+        scope_via="Employee",
+    ),
+    "transactions": AggregateEntity(
+        "Transaction",
+        {"type": _column("Transaction", "type"), "status": _column("Transaction", "status")},
+        {"amount": lambda models: models.Transaction.amount},
+        date_column="transaction_date",
+    ),
+    "time_entries": AggregateEntity(
+        "TimeEntry",
+        {
+            "user": Dimension(
+                lambda models: models.TimeEntry.user_id,
+                label=_full_name("User"),
+                join=lambda models: (models.User, models.User.id == models.TimeEntry.user_id),
+            ),
+            "project": Dimension(
+                lambda models: models.TimeEntry.project_id,
+                label=lambda models: models.Project.name,
+                join=lambda models: (models.Project, models.Project.id == models.TimeEntry.project_id),
+            ),
+        },
+        {"hours": lambda models: models.TimeEntry.duration / 3600.0},
+        date_column="date",
+    ),
+    "invoices": AggregateEntity(
+        "Invoice",
+        {"status": _column("Invoice", "status")},
+        {
+            "amount_due": lambda models: models.Invoice.amount_due,
+            "amount_paid": lambda models: models.Invoice.amount_paid,
+        },
+        date_column="due_date",
+    ),
+    "quotes": AggregateEntity(
+        "Quote",
+        {"status": _column("Quote", "status")},
+        {"amount": lambda models: models.Quote.amount},
+    ),
+    "calendar_events": AggregateEntity(
+        "CalendarEvent", {"type": _column("CalendarEvent", "type")}, date_column="date"
+    ),
+}
+
+
+@dataclass
+class AggregateRequest:
+    """
+    One aggregate question
+
+    ``filters`` maps dimensions to a value or a list of accepted values;
+    ``metric`` is required for sum and avg.
+    """
+    entity: str
+    aggregate: str = "count"
+    metric: Optional[str] = None
+    group_by: Sequence[str] = ()
+    filters: Dict[str, Any] = field(default_factory=dict)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+@dataclass
+class AggregateResult:
+    """Totals over every matching row, and per group when grouped"""
+    entity: str
+    aggregate: str
+    metric: Optional[str]
+    count: int
+    value: Optional[float]
+    groups: List[Dict[str, Any]] = field(default_factory=list)
+
+    def group_value(self, dimension: str, key: Any, field_name: str = "count") -> float:
+        """Count or value of the groups whose ``dimension`` is ``key`` (or one of ``key``)"""
+        keys = set(key) if isinstance(key, (list, tuple, set, frozenset)) else {key}
+        return sum(
+            group.get(field_name) or 0
+            for group in self.groups
+            if _plain(group.get(dimension)) in {_plain(k) for k in keys}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "entity": self.entity,
+            "aggregate": self.aggregate,
+            "metric": self.metric,
+            "count": self.count,
+            "value": self.value,
+            "groups": self.groups,
+        }
+
+
+def _plain(value: Any) -> Any:
+    """Enum members compare by value"""
+    return getattr(value, "value", value)
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class LeoAggregateService:
+    """Compiles and runs aggregate questions"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def compile(self, request: AggregateRequest):
+        """
+        Single SELECT with COUNT(*), and SUM/COUNT of the metric, per group
+
+        Raises:
+            ValueError: Unknown entity, dimension, metric or aggregate
+        """
+        import app.models as models
+
+        entity = ENTITIES.get(request.entity)
+        if entity is None:
+            raise ValueError(f"Unknown entity: {request.entity}")
+        if request.aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {request.aggregate}")
+        if request.aggregate != "count" and request.metric not in entity.metrics:
+            raise ValueError(f"Unknown metric for {request.entity}: {request.metric}")
+        for name in (*request.group_by, *request.filters):
+            if name not in entity.dimensions:
+                raise ValueError(f"Unknown dimension for {request.entity}: {name}")
+
+        model = getattr(models, entity.model)
+        columns = []
+        joins = []
+        group_by = []
+        for name in request.group_by:
+            dimension = entity.dimensions[name]
+            key = dimension.column(models)
+            columns.append(key.label(name))
+            group_by.append(key)
+            if dimension.label is not None:
+                label = dimension.label(models)
+                columns.append(label.label(f"{name}_label"))
+                group_by.append(label)
+            if dimension.join is not None:
+                joins.append(dimension.join(models))
+
+        columns.append(func.count().label("count"))
+        if request.aggregate != "count":
+            metric = entity.metrics[request.metric](models)
+            columns += [func.sum(metric).label("metric_sum"), func.count(metric).label("metric_count")]
+
+        stmt = select(*columns).select_from(model)
+        if entity.scope_via:
+            scope_model = getattr(models, entity.scope_via)
+            stmt = scope_query(stmt.join(scope_model), scope_model)
+        else:
+            stmt = scope_query(stmt, model)
+        for target, onclause in joins:
+            stmt = stmt.outerjoin(target, onclause)
+
+        for name, value in request.filters.items():
+            column = entity.dimensions[name].column(models)
+            if isinstance(value, (list, tuple, set, frozenset)):
+                stmt = stmt.where(column.in_(list(value)))
+            else:
+                stmt = stmt.where(column == value)
+        if entity.date_column and (request.date_from or request.date_to):
+            date_column = getattr(model, entity.date_column)
+            if request.date_from:
+                stmt = stmt.where(date_column >= request.date_from)
+            if request.date_to:
+                stmt = stmt.where(date_column <= request.date_to)
+
+        if group_by:
+            stmt = stmt.group_by(*group_by)
+        return stmt
+
+    async def run(self, request: AggregateRequest) -> AggregateResult:
+        """
+        Run an aggregate question (one round trip)
+
+        Raises:
+            ValueError: Unknown entity, dimension, metric or aggregate
+        """
+        result = await self.db.execute(self.compile(request))
+        groups = []
+        total_count = 0
+        total_sum = None
+        total_metric_count = 0
+        for row in result.mappings().all():
+            group = {}
+            for name in request.group_by:
+                group[name] = row[name]
+                if f"{name}_label" in row:
+                    group[f"{name}_label"] = (row[f"{name}_label"] or "").strip() or None
+            group["count"] = row["count"]
+            total_count += row["count"]
+            if request.aggregate == "count":
+                group["value"] = row["count"]
+            else:
+                metric_sum = _number(row["metric_sum"])
+                if metric_sum is not None:
+                    total_sum = (total_sum or 0) + metric_sum
+                total_metric_count += row["metric_count"]
+                group["value"] = _value(request.aggregate, metric_sum, row["metric_count"])
+            groups.append(group)
+
+        if request.aggregate == "count":
+            value = total_count
+        else:
+            value = _value(request.aggregate, total_sum, total_metric_count)
+        return AggregateResult(
+            request.entity,
+            request.aggregate,
+            request.metric,
+            total_count,
+            value,
+            groups if request.group_by else [],
+        )
+
+
+def _value(aggregate: str, metric_sum: Optional[float], metric_count: int) -> Optional[float]:
+    if aggregate == "sum":
+        return metric_sum or 0
+    return metric_sum / metric_count if metric_count else None
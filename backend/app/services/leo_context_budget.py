@@ -0,0 +1,90 @@
+"""
+Leo Context Budget
+Token estimates and assembly of Leo's prompt sections within a token budget
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Sequence
+
+# Rough ratio for French/English text with the OpenAI and Anthropic tokenizers
+CHARS_PER_TOKEN = 4
+
+# Section tiers: lower tiers get the budget first
+PRIORITY_REQUIRED = 0  # Summaries and exact figures
+PRIORITY_DATA = 1  # Retrieved ERP records, structure, financial calculations
+PRIORITY_EXTRA = 2  # Suggestions and system reference
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens of ``text`` (no tokenizer round trip)"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Leading whole lines of ``text`` fitting ``max_tokens``, with a note of
+    the omitted lines; empty when not even the first line fits
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    kept: List[str] = []
+    used = 0
+    for index, line in enumerate(lines):
+        marker = f"... ({len(lines) - index} lignes omises)"
+        cost = estimate_tokens(line + "\n")
+        if used + cost + estimate_tokens(marker) > max_tokens:
+            if not kept:
+                return ""
+            kept.append(marker)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+@dataclass
+class ContextSection:
+    """Consecutive lines of the prompt, ranked by ``priority``"""
+    key: str
+    priority: int
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+def fit_sections(sections: Sequence[ContextSection], max_tokens: int) -> str:
+    """
+    Join the sections, truncated to ``max_tokens`` in total
+
+    Tiers are served in priority order. Within a tier the remaining budget is
+    shared evenly, small sections giving what they do not use to the larger
+    ones. A truncated section keeps its first lines (headers, then records as
+    ranked by retrieval); a section that cannot keep even its first line is
+    dropped. Sections stay in their original order.
+    """
+    sections = [section for section in sections if section.lines]
+    texts = {id(section): section.text for section in sections}
+    if sum(estimate_tokens(text) for text in texts.values()) <= max_tokens:
+        return "\n".join(texts.values())
+
+    allowances = {}
+    remaining = max_tokens
+    for priority in sorted({section.priority for section in sections}):
+        tier = sorted(
+            (section for section in sections if section.priority == priority),
+            key=lambda section: estimate_tokens(texts[id(section)]),
+        )
+        for index, section in enumerate(tier):
+            share = remaining // (len(tier) - index)
+            allowance = min(estimate_tokens(texts[id(section)]), share)
+            allowances[id(section)] = allowance
+            remaining -= allowance
+
+    fitted = (truncate_to_tokens(texts[id(section)], allowances[id(section)]) for section in sections)
+    return "\n".join(text for text in fitted if text)
@@ -3,6 +3,7 @@ Leo Context Service
 Service for building ERP context for Leo AI assistant
 """
 
+from dataclasses import replace
 from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, func, and_
@@ -13,8 +14,23 @@ import asyncio
 if TYPE_CHECKING:
     from datetime import datetime
 
+from app.core.config import settings
 from app.core.logging import logger
 from app.core.tenancy import scope_query
+from app.services.leo_context_budget import (
+    PRIORITY_DATA,
+    PRIORITY_EXTRA,
+    PRIORITY_REQUIRED,
+    ContextSection,
+    estimate_tokens,
+    fit_sections,
+)
+from app.services.leo_aggregate_service import AggregateRequest, AggregateResult, LeoAggregateService
+from app.services.retrieval_executor import RetrievalExecutor, RetrievalJob, RetrievalReport
+from app.services.search_index_service import SearchIndex
+
+# Executor job key suffix for the aggregate of a data type
+AGGREGATE_JOB_SUFFIX = ":aggregate"
 
 # Lazy imports to avoid MetaData conflicts - import from app.models which already has them registered
 OPPORTUNITIES_AVAILABLE = None
@@ -149,11 +165,67 @@ class LeoContextService:
     """Service for building ERP context for Leo"""
 
     MAX_ITEMS_PER_TYPE = 20  # Maximum items per data type
-    MAX_ITEMS_COUNTING_QUERY = 500  # Maximum items for counting queries
+    COUNTING_SAMPLE_SIZE = 5  # Example items for counting queries (counts come from COUNTING_AGGREGATES)
     MAX_ITEMS_DETAILED_QUERY = 50  # Maximum items for detailed listing queries
+    MAX_SEARCH_CANDIDATES = 200  # Search index matches considered per keyword lookup
+
+    # Exact figures for counting queries, one GROUP BY query per data type (see LeoAggregateService)
+    COUNTING_AGGREGATES = {
+        "contacts": AggregateRequest("contacts"),
+        "companies": AggregateRequest("companies", group_by=["is_client"]),
+        "opportunities": AggregateRequest("opportunities", "sum", "amount"),
+        "projects": AggregateRequest("projects", group_by=["status"]),
+        "employees": AggregateRequest("employees"),
+        "pipelines": AggregateRequest("pipelines", filters={"is_active": True}),
+        "tasks": AggregateRequest("tasks", group_by=["status"]),
+        "vacation_requests": AggregateRequest("vacation_requests", group_by=["status"]),
+        "expense_accounts": AggregateRequest("expense_accounts", "sum", "amount", group_by=["status"]),
+        "transactions": AggregateRequest("transactions", "sum", "amount", group_by=["type"]),
+        "time_entries": AggregateRequest("time_entries", "sum", "hours"),
+        "invoices": AggregateRequest("invoices", "sum", "amount_due", group_by=["status"]),
+        "quotes": AggregateRequest("quotes", "sum", "amount", group_by=["status"]),
+        "calendar_events": AggregateRequest("calendar_events"),
+    }
+
+    # Data type -> get_relevant_* method
+    RETRIEVERS = {
+        "contacts": "get_relevant_contacts",
+        "companies": "get_relevant_companies",
+        "opportunities": "get_relevant_opportunities",
+        "projects": "get_relevant_projects",
+        "employees": "get_relevant_employees",
+        "pipelines": "get_relevant_pipelines",
+        "tasks": "get_relevant_tasks",
+        "vacation_requests": "get_relevant_vacation_requests",
+        "expense_accounts": "get_relevant_expense_accounts",
+        "transactions": "get_relevant_transactions",
+        "time_entries": "get_relevant_time_entries",
+        "invoices": "get_relevant_invoices",
+        "quotes": "get_relevant_quotes",
+        "calendar_events": "get_relevant_calendar_events",
+    }
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        # Timing metadata of the last data retrieval
+        self.last_retrieval: Optional[RetrievalReport] = None
+
+    async def _indexed_match(self, entity_type: str, id_column, terms: List[str]):
+        """Condition keeping the records whose search index entry matches any of ``terms``"""
+        ids = await SearchIndex(self.db).entity_ids(entity_type, terms, limit=self.MAX_SEARCH_CANDIDATES)
+        return id_column.in_(ids)
+
+    def _aggregate_job(self, request: AggregateRequest) -> RetrievalJob:
+        """Aggregate question on the session the executor provides (one-item list)"""
+        async def job(session: AsyncSession) -> List[AggregateResult]:
+            return [await LeoAggregateService(session).run(request)]
+        return job
+
+    def _retrieval_job(self, method_name: str, user_id: int, query: str, limit: int) -> RetrievalJob:
+        """get_relevant_* call on a service bound to the session the executor provides"""
+        async def job(session: AsyncSession) -> List[Dict[str, Any]]:
+            return await getattr(type(self)(session), method_name)(user_id, query, limit)
+        return job
 
     def analyze_query(self, query: str) -> Dict[str, bool]:
         """Analyze the query to determine which data types are relevant"""
@@ -322,44 +394,13 @@ class LeoContextService:
             # Also check for single word queries that might be names (e.g., "fabien")
             is_single_word_name = len(words) == 1 and len(words[0].strip(".,!?;:()[]{}")) > 2 and words[0].strip(".,!?;:()[]{}").lower() not in ["le", "la", "les", "un", "une", "des", "de", "du", "et", "ou", "à", "dans", "sur", "pour", "avec", "sans", "par", "qui", "est", "sont", "nos", "mes", "contact", "contacts", "client", "clients"]
             
-            # Filter by keywords if any
+            # Filter by keywords if any (search index: names, email, position, city, country)
             if all_keywords:
-                conditions = []
-                for keyword in all_keywords:
-                    keyword_lower = keyword.lower()
-                    # Search in various fields (case-insensitive)
-                    conditions.extend([
-                        Contact.first_name.ilike(f"%{keyword_lower}%"),
-                        Contact.last_name.ilike(f"%{keyword_lower}%"),
-                        Contact.email.ilike(f"%{keyword_lower}%"),
-                        Contact.position.ilike(f"%{keyword_lower}%"),
-                        Contact.city.ilike(f"%{keyword_lower}%"),
-                        Contact.country.ilike(f"%{keyword_lower}%"),
-                    ])
-                    # Also try with original case for names (e.g., "Daly", "Ann")
-                    if keyword[0].isupper():
-                        conditions.extend([
-                            Contact.first_name.ilike(f"%{keyword}%"),
-                            Contact.last_name.ilike(f"%{keyword}%"),
-                            # Try combining first and last name (e.g., "Daly Ann" -> search for both)
-                            func.concat(Contact.first_name, ' ', Contact.last_name).ilike(f"%{keyword}%"),
-                            # Also try reversed (last name first)
-                            func.concat(Contact.last_name, ' ', Contact.first_name).ilike(f"%{keyword}%"),
-                        ])
-                stmt = stmt.where(or_(*conditions))
+                stmt = stmt.where(await self._indexed_match("contacts", Contact.id, all_keywords))
             elif is_single_word_name:
                 # Single word that might be a name (e.g., "fabien")
                 word = words[0].strip(".,!?;:()[]{}")
-                word_lower = word.lower()
-                conditions = [
-                    Contact.first_name.ilike(f"%{word_lower}%"),
-                    Contact.last_name.ilike(f"%{word_lower}%"),
-                    Contact.first_name.ilike(f"%{word.capitalize()}%"),
-                    Contact.last_name.ilike(f"%{word.capitalize()}%"),
-                    func.concat(Contact.first_name, ' ', Contact.last_name).ilike(f"%{word_lower}%"),
-                    func.concat(Contact.first_name, ' ', Contact.last_name).ilike(f"%{word.capitalize()}%"),
-                ]
-                stmt = stmt.where(or_(*conditions))
+                stmt = stmt.where(await self._indexed_match("contacts", Contact.id, [word]))
             elif is_general_query:
                 # For general queries, return all contacts (no filter, just limit)
                 limit = min(limit * 10, 500)  # Much higher limit for general queries
@@ -369,19 +410,7 @@ class LeoContextService:
                 # This handles cases like "Daly Ann" where stop words might filter everything
                 capitalized_words = [w.strip(".,!?;:()[]{}") for w in words if w and w[0].isupper() and len(w) > 2]
                 if capitalized_words:
-                    conditions = []
-                    for word in capitalized_words:
-                        word_lower = word.lower()
-                        conditions.extend([
-                            Contact.first_name.ilike(f"%{word_lower}%"),
-                            Contact.last_name.ilike(f"%{word_lower}%"),
-                            Contact.first_name.ilike(f"%{word}%"),
-                            Contact.last_name.ilike(f"%{word}%"),
-                            func.concat(Contact.first_name, ' ', Contact.last_name).ilike(f"%{word}%"),
-                            func.concat(Contact.first_name, ' ', Contact.last_name).ilike(f"%{word_lower}%"),
-                        ])
-                    if conditions:
-                        stmt = stmt.where(or_(*conditions))
+                    stmt = stmt.where(await self._indexed_match("contacts", Contact.id, capitalized_words))
             
             # Limit results
             stmt = stmt.limit(limit)
@@ -434,15 +463,7 @@ class LeoContextService:
             
             # Filter by keywords if any
             if keywords:
-                conditions = []
-                for keyword in keywords:
-                    conditions.extend([
-                        Company.name.ilike(f"%{keyword}%"),
-                        Company.description.ilike(f"%{keyword}%"),
-                        Company.city.ilike(f"%{keyword}%"),
-                        Company.country.ilike(f"%{keyword}%"),
-                    ])
-                stmt = stmt.where(or_(*conditions))
+                stmt = stmt.where(await self._indexed_match("companies", Company.id, keywords))
             
             # Check if query mentions "client" or "clients"
             query_lower = query.lower()
@@ -543,13 +564,7 @@ class LeoContextService:
             
             # Filter by keywords if any
             if keywords:
-                conditions = []
-                for keyword in keywords:
-                    conditions.extend([
-                        Opportunite.name.ilike(f"%{keyword}%"),
-                        Opportunite.description.ilike(f"%{keyword}%"),
-                    ])
-                stmt = stmt.where(or_(*conditions))
+                stmt = stmt.where(await self._indexed_match("opportunities", Opportunite.id, keywords))
             
             # Limit results
             stmt = stmt.limit(limit)
@@ -613,21 +628,9 @@ class LeoContextService:
             elif "archivé" in query_lower or "archived" in query_lower:
                 stmt = stmt.where(Project.status == ProjectStatus.ARCHIVED)
             
-            # For counting queries, increase limit significantly and don't filter by keywords
-            if is_counting_query:
-                limit = min(limit * 10, 500)  # Much higher limit for counting
-                logger.info(f"Counting project query detected - returning all projects (limit: {limit})")
             # Filter by keywords if any (but not for counting queries)
-            elif keywords:
-                conditions = []
-                for keyword in keywords:
-                    conditions.extend([
-                        Project.name.ilike(f"%{keyword}%"),
-                        Project.description.ilike(f"%{keyword}%"),
-                        Project.etape.ilike(f"%{keyword}%"),
-                    ])
-                if conditions:
-                    stmt = stmt.where(or_(*conditions))
+            if keywords and not is_counting_query:
+                stmt = stmt.where(await self._indexed_match("projects", Project.id, keywords))
             
             # Limit results
             stmt = stmt.limit(limit)
@@ -702,24 +705,7 @@ class LeoContextService:
             
             # Filter by keywords if any
             if all_keywords and not is_general_employee_query:
-                conditions = []
-                for keyword in all_keywords:
-                    keyword_lower = keyword.lower()
-                    # Search in various fields (case-insensitive)
-                    conditions.extend([
-                        Employee.first_name.ilike(f"%{keyword_lower}%"),
-                        Employee.last_name.ilike(f"%{keyword_lower}%"),
-                        Employee.email.ilike(f"%{keyword_lower}%"),
-                    ])
-                    # Also try with original case for names
-                    if keyword[0].isupper():
-                        conditions.extend([
-                            Employee.first_name.ilike(f"%{keyword}%"),
-                            Employee.last_name.ilike(f"%{keyword}%"),
-                            func.concat(Employee.first_name, ' ', Employee.last_name).ilike(f"%{keyword}%"),
-                            func.concat(Employee.last_name, ' ', Employee.first_name).ilike(f"%{keyword}%"),
-                        ])
-                stmt = stmt.where(or_(*conditions))
+                stmt = stmt.where(await self._indexed_match("employees", Employee.id, all_keywords))
             # If it's a general query about employees, return all employees (no filter needed)
             elif is_general_employee_query:
                 # Increase limit significantly for general queries
@@ -833,11 +819,6 @@ class LeoContextService:
             elif any(phrase in query_lower for phrase in ["bloqué", "blocked"]):
                 status_filter = TaskStatus.BLOCKED
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Build query with tenant scoping
             stmt = select(ProjectTask).options(
                 selectinload(ProjectTask.project),
@@ -849,11 +830,6 @@ class LeoContextService:
             if status_filter:
                 stmt = stmt.where(ProjectTask.status == status_filter)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting task query detected - returning all tasks (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -906,11 +882,6 @@ class LeoContextService:
             elif any(phrase in query_lower for phrase in ["refusé", "rejected", "refusée", "refusées"]):
                 status_filter = "rejected"
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Build query with tenant scoping via Employee
             # VacationRequest doesn't have team_id, so we scope via Employee
             Employee = _get_employee_model()
@@ -927,11 +898,6 @@ class LeoContextService:
             if status_filter:
                 stmt = stmt.where(VacationRequest.status == status_filter)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting vacation request query detected - returning all (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -991,11 +957,6 @@ class LeoContextService:
             elif any(phrase in query_lower for phrase in ["brouillon", "draft"]):
                 status_filter = ExpenseAccountStatus.DRAFT.value
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Build query with tenant scoping via Employee
             # ExpenseAccount doesn't have team_id, so we scope via Employee
             Employee = _get_employee_model()
@@ -1012,11 +973,6 @@ class LeoContextService:
             if status_filter:
                 stmt = stmt.where(ExpenseAccount.status == status_filter)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting expense account query detected - returning all (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -1061,11 +1017,6 @@ class LeoContextService:
         try:
             query_lower = query.lower()
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Detect if query is about expenses (outgoing money)
             is_expense_query = any(phrase in query_lower for phrase in [
                 "dépense", "dépenses", "expense", "expenses", "sortie", "sorties"
@@ -1080,11 +1031,6 @@ class LeoContextService:
                 from app.models import TransactionType
                 stmt = stmt.where(Transaction.type == TransactionType.EXPENSE)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting transaction query detected - returning all (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -1189,21 +1135,9 @@ class LeoContextService:
             limit = self.MAX_ITEMS_PER_TYPE
         
         try:
-            query_lower = query.lower()
-            
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Extract time range if present
             time_range = self._extract_time_range(query)
             
-            # Detect if query is about specific employee or project
-            Employee = _get_employee_model()
-            Project = _get_project_model()
-            Project = Project[0] if Project and isinstance(Project, tuple) else Project
-            
             # Build query with tenant scoping
             stmt = select(TimeEntry).options(
                 selectinload(TimeEntry.user),
@@ -1217,43 +1151,21 @@ class LeoContextService:
                 start_date, end_date = time_range
                 stmt = stmt.where(TimeEntry.date >= start_date, TimeEntry.date <= end_date)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting time entry query detected - returning all (limit: {limit})")
-            
-            # Limit results
+            # Limit results (totals come from the aggregate below, not from these rows)
             stmt = stmt.limit(limit)
             
             # Execute
             result = await self.db.execute(stmt)
             time_entries = result.scalars().all()
             
-            # Format results with aggregation
+            # Format results
             formatted = []
-            total_hours = 0
-            by_employee = {}
-            by_project = {}
-            
             for te in time_entries:
                 hours = te.duration / 3600.0 if te.duration else 0
-                total_hours += hours
-                
-                # Aggregate by employee
-                employee_name = None
-                if te.user:
-                    if Employee and te.user.employee:
-                        employee_name = f"{te.user.employee.first_name} {te.user.employee.last_name}"
-                    else:
-                        employee_name = f"{te.user.first_name} {te.user.last_name}"
-                
-                if employee_name:
-                    by_employee[employee_name] = by_employee.get(employee_name, 0) + hours
                 
-                # Aggregate by project
+                # Same name as the by_employee totals (User.employee is a lazy list)
+                employee_name = f"{te.user.first_name} {te.user.last_name}" if te.user else None
                 project_name = te.project.name if te.project else None
-                if project_name:
-                    by_project[project_name] = by_project.get(project_name, 0) + hours
                 
                 formatted.append({
                     "id": te.id,
@@ -1265,6 +1177,22 @@ class LeoContextService:
                     "task": te.task.title if te.task else None,
                 })
             
+            # Totals over every entry of the range: one GROUP BY user, project
+            aggregate = await LeoAggregateService(self.db).run(AggregateRequest(
+                "time_entries", "sum", "hours", group_by=["user", "project"],
+                date_from=time_range[0] if time_range else None,
+                date_to=time_range[1] if time_range else None,
+            ))
+            total_hours = aggregate.value or 0
+            by_employee = {}
+            by_project = {}
+            for group in aggregate.groups:
+                hours = group["value"] or 0
+                if group.get("user_label"):
+                    by_employee[group["user_label"]] = by_employee.get(group["user_label"], 0) + hours
+                if group.get("project_label"):
+                    by_project[group["project_label"]] = by_project.get(group["project_label"], 0) + hours
+            
             # Add aggregation info to first entry or as metadata
             if formatted:
                 formatted[0]["_aggregation"] = {
@@ -1307,11 +1235,6 @@ class LeoContextService:
             elif any(phrase in query_lower for phrase in ["brouillon", "draft"]):
                 status_filter = InvoiceStatus.DRAFT
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Build query with tenant scoping
             stmt = select(Invoice).options(
                 selectinload(Invoice.user)
@@ -1322,11 +1245,6 @@ class LeoContextService:
             if status_filter:
                 stmt = stmt.where(Invoice.status == status_filter)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting invoice query detected - returning all (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -1383,11 +1301,6 @@ class LeoContextService:
             elif any(phrase in query_lower for phrase in ["brouillon", "draft"]):
                 status_filter = "draft"
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Build query with tenant scoping
             stmt = select(Quote)
             stmt = scope_query(stmt, Quote)
@@ -1396,11 +1309,6 @@ class LeoContextService:
             if status_filter and hasattr(Quote, 'status'):
                 stmt = stmt.where(Quote.status == status_filter)
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting quote query detected - returning all (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -1448,11 +1356,6 @@ class LeoContextService:
             # Extract time range if present
             time_range = self._extract_time_range(query)
             
-            # Check if counting query
-            is_counting_query = any(phrase in query_lower for phrase in [
-                "combien", "how many", "nombre", "total", "count", "quantité"
-            ])
-            
             # Build query with tenant scoping
             stmt = select(CalendarEvent)
             stmt = scope_query(stmt, CalendarEvent)
@@ -1482,11 +1385,6 @@ class LeoContextService:
             elif hasattr(CalendarEvent, 'date'):
                 stmt = stmt.order_by(CalendarEvent.date.asc())
             
-            # For counting queries, increase limit significantly
-            if is_counting_query:
-                limit = min(limit * 10, 500)
-                logger.info(f"Counting calendar event query detected - returning all (limit: {limit})")
-            
             # Limit results
             stmt = stmt.limit(limit)
             
@@ -1550,6 +1448,9 @@ class LeoContextService:
                 
                 # Merge results (combine lists, avoid duplicates by ID)
                 for key, items in sub_result.items():
+                    if key == "aggregates":
+                        all_results.setdefault(key, {}).update(items)
+                        continue
                     if key not in all_results:
                         all_results[key] = []
                     # Add items that aren't already present (by ID)
@@ -1576,9 +1477,9 @@ class LeoContextService:
         """
         query_lower = query.lower()
         
-        # For counting queries, use higher limit
+        # Counting queries are answered by aggregates: only a few examples are needed
         if is_counting_query:
-            return self.MAX_ITEMS_COUNTING_QUERY
+            return self.COUNTING_SAMPLE_SIZE
         
         # Check for explicit requests for lists/details
         if any(phrase in query_lower for phrase in [
@@ -1609,7 +1510,10 @@ class LeoContextService:
     ) -> Dict[str, List[Dict[str, Any]]]:
         """
         Get relevant data for a single query
-        Uses parallel execution with asyncio.gather() for better performance
+        
+        Data types are fetched concurrently on separate sessions, within the
+        LEO_RETRIEVAL_* time limits; types that did not finish in time are
+        returned empty and reported in ``last_retrieval``.
         """
         # Determine if this is a counting query for adaptive limits
         query_lower = query.lower()
@@ -1618,98 +1522,38 @@ class LeoContextService:
         ])
         adaptive_limit = self._determine_adaptive_limit(query, is_counting_query)
         
-        # Build list of coroutines to execute in parallel
-        tasks = []
-        task_keys = []
-        
-        if data_types.get("contacts"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_contacts(user_id, query, limit))
-            task_keys.append("contacts")
-        
-        if data_types.get("companies"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_companies(user_id, query, limit))
-            task_keys.append("companies")
-        
-        if data_types.get("opportunities"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_opportunities(user_id, query, limit))
-            task_keys.append("opportunities")
-        
-        if data_types.get("projects"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_projects(user_id, query, limit))
-            task_keys.append("projects")
-        
-        if data_types.get("employees"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_employees(user_id, query, limit))
-            task_keys.append("employees")
-        
-        if data_types.get("pipelines"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_pipelines(user_id, query, limit))
-            task_keys.append("pipelines")
-        
-        if data_types.get("tasks"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_tasks(user_id, query, limit))
-            task_keys.append("tasks")
-        
-        if data_types.get("vacation_requests"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_vacation_requests(user_id, query, limit))
-            task_keys.append("vacation_requests")
-        
-        if data_types.get("expense_accounts"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_expense_accounts(user_id, query, limit))
-            task_keys.append("expense_accounts")
-        
-        if data_types.get("transactions"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_transactions(user_id, query, limit))
-            task_keys.append("transactions")
-        
-        if data_types.get("time_entries"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_time_entries(user_id, query, limit))
-            task_keys.append("time_entries")
-        
-        if data_types.get("invoices"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_invoices(user_id, query, limit))
-            task_keys.append("invoices")
-        
-        if data_types.get("quotes"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_quotes(user_id, query, limit))
-            task_keys.append("quotes")
-        
-        if data_types.get("calendar_events"):
-            limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
-            tasks.append(self.get_relevant_calendar_events(user_id, query, limit))
-            task_keys.append("calendar_events")
-        
-        # Execute all tasks in parallel
-        result = {}
-        if tasks:
-            try:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Map results to keys, handling exceptions gracefully
-                for key, res in zip(task_keys, results):
-                    if isinstance(res, Exception):
-                        logger.error(f"Error fetching {key}: {res}", exc_info=res)
-                        result[key] = []
-                    else:
-                        result[key] = res
-            except Exception as e:
-                logger.error(f"Error in parallel data fetching: {e}", exc_info=True)
-                # Fallback: return empty results for all requested types
-                for key in task_keys:
-                    result[key] = []
+        limit = adaptive_limit if adaptive_limit else self.MAX_ITEMS_PER_TYPE
+        
+        # One job per requested data type, each on its own session (see RetrievalExecutor)
+        jobs = {
+            key: self._retrieval_job(method_name, user_id, query, limit)
+            for key, method_name in self.RETRIEVERS.items()
+            if data_types.get(key)
+        }
+        if is_counting_query:
+            time_range = self._extract_time_range(query)
+            for key in [key for key in jobs if key in self.COUNTING_AGGREGATES]:
+                request = self.COUNTING_AGGREGATES[key]
+                if time_range and key == "time_entries":
+                    request = replace(request, date_from=time_range[0], date_to=time_range[1])
+                jobs[f"{key}{AGGREGATE_JOB_SUFFIX}"] = self._aggregate_job(request)
+        executor = RetrievalExecutor(
+            self.db,
+            timeout=settings.LEO_RETRIEVAL_TIMEOUT,
+            budget=settings.LEO_RETRIEVAL_BUDGET,
+            concurrency=settings.LEO_RETRIEVAL_CONCURRENCY,
+        )
+        result, report = await executor.run(jobs)
+        self.last_retrieval = report
+        aggregates = {}
+        for job_key in [job_key for job_key in result if job_key.endswith(AGGREGATE_JOB_SUFFIX)]:
+            items = result.pop(job_key)
+            if items:
+                aggregates[job_key[:-len(AGGREGATE_JOB_SUFFIX)]] = items[0]
+        if aggregates:
+            result["aggregates"] = aggregates
+        if report.partial:
+            logger.info(f"Leo context retrieval returned partial results: {report.to_dict()}")
         
         # Calculate financial data if requested (these can also run in parallel with data queries)
         if data_types.get("financial_calculations"):
@@ -1779,8 +1623,14 @@ class LeoContextService:
             "normalized_query": query_normalized
         }
 
+    # Static text, built once per process
+    _structure_context: Optional[str] = None
+
     async def get_structure_context(self) -> str:
         """Get structural context about the ERP system (pages, tables, structure)"""
+        if LeoContextService._structure_context is not None:
+            return LeoContextService._structure_context
+        
         structure_parts = []
         
         # Main application pages/modules
@@ -1851,13 +1701,15 @@ class LeoContextService:
             structure_parts.append(f"  - {rel}")
         structure_parts.append("")
         
-        return "\n".join(structure_parts)
+        LeoContextService._structure_context = "\n".join(structure_parts)
+        return LeoContextService._structure_context
     
     def _format_data_as_markdown_table(
         self,
         data: List[Dict[str, Any]],
         columns: List[str],
-        max_rows: int = 20
+        max_rows: int = 20,
+        max_tokens: Optional[int] = None,
     ) -> str:
         """
         Format data as a markdown table
@@ -1866,6 +1718,7 @@ class LeoContextService:
             data: List of dictionaries with data
             columns: List of column keys to include
             max_rows: Maximum number of rows to include
+            max_tokens: Token budget of the table (rows past it are left out)
             
         Returns:
             Markdown table string
@@ -1874,15 +1727,17 @@ class LeoContextService:
             return ""
         
         # Limit rows
+        omitted = max(len(data) - max_rows, 0)
         data = data[:max_rows]
         
         # Build table header
         header = "| " + " | ".join(columns) + " |\n"
         separator = "| " + " | ".join(["---"] * len(columns)) + " |\n"
+        used_tokens = estimate_tokens(header + separator)
         
         # Build table rows
         rows = []
-        for item in data:
+        for index, item in enumerate(data):
             row_values = []
             for col in columns:
                 value = item.get(col, "")
@@ -1902,9 +1757,17 @@ class LeoContextService:
                 else:
                     value = str(value)
                 row_values.append(value)
-            rows.append("| " + " | ".join(row_values) + " |\n")
-        
-        return header + separator + "".join(rows)
+            row = "| " + " | ".join(row_values) + " |\n"
+            used_tokens += estimate_tokens(row)
+            if max_tokens is not None and used_tokens > max_tokens and rows:
+                omitted += len(data) - index
+                break
+            rows.append(row)
+        
+        table = header + separator + "".join(rows)
+        if omitted:
+            table += f"... ({omitted} lignes omises)\n"
+        return table
     
     def _generate_action_suggestions(
         self,
@@ -2303,13 +2166,105 @@ class LeoContextService:
                 "error": str(e)
             }
     
+    def _aggregate_summary_parts(self, aggregates: Dict[str, AggregateResult], query_lower: str) -> List[str]:
+        """Counting summary from exact aggregates (same wording as the list-based summary)"""
+        summary_parts = []
+        if "contacts" in aggregates:
+            summary_parts.append(f"CONTACTS: {aggregates['contacts'].count}")
+        if "companies" in aggregates:
+            companies = aggregates["companies"]
+            clients_count = companies.group_value("is_client", True)
+            if any(word in query_lower for word in ["client", "clients", "cleint", "cleints"]):
+                summary_parts.append(f"CLIENTS: {clients_count}")
+            else:
+                summary_parts.append(f"ENTREPRISES: {companies.count} (dont {clients_count} clients)")
+        if "employees" in aggregates:
+            summary_parts.append(f"EMPLOYÉS: {aggregates['employees'].count}")
+        if "opportunities" in aggregates:
+            opportunities = aggregates["opportunities"]
+            summary_parts.append(f"OPPORTUNITÉS: {opportunities.count} ({opportunities.value:,.2f}€)")
+        if "pipelines" in aggregates:
+            summary_parts.append(f"PIPELINES: {aggregates['pipelines'].count}")
+        if "projects" in aggregates:
+            summary_parts.append(f"PROJETS: {aggregates['projects'].count}")
+        if "tasks" in aggregates:
+            tasks = aggregates["tasks"]
+            in_progress = tasks.group_value("status", "in_progress")
+            if any(word in query_lower for word in ["en cours", "in progress"]):
+                summary_parts.append(f"TÂCHES EN COURS: {in_progress}")
+            else:
+                todo = tasks.group_value("status", "todo")
+                completed = tasks.group_value("status", "completed")
+                summary_parts.append(f"TÂCHES: {tasks.count} ({in_progress} en cours, {todo} à faire, {completed} terminées)")
+        if "vacation_requests" in aggregates:
+            vrs = aggregates["vacation_requests"]
+            pending = vrs.group_value("status", "pending")
+            approved = vrs.group_value("status", "approved")
+            if any(word in query_lower for word in ["en attente", "pending"]):
+                summary_parts.append(f"VACANCES EN ATTENTE: {pending}")
+            elif any(word in query_lower for word in ["approuvé", "approved"]):
+                summary_parts.append(f"VACANCES APPROUVÉES: {approved}")
+            else:
+                summary_parts.append(f"DEMANDES VACANCES: {vrs.count} ({pending} en attente, {approved} approuvées)")
+        if "expense_accounts" in aggregates:
+            eas = aggregates["expense_accounts"]
+            approved = eas.group_value("status", "approved")
+            pending = eas.group_value("status", ["submitted", "under_review"])
+            if any(word in query_lower for word in ["approuvé", "approved"]):
+                summary_parts.append(f"DÉPENSES APPROUVÉES: {approved} ({eas.group_value('status', 'approved', 'value'):,.2f}€)")
+            elif any(word in query_lower for word in ["en attente", "pending"]):
+                pending_total = eas.group_value("status", ["submitted", "under_review"], "value")
+                summary_parts.append(f"DÉPENSES EN ATTENTE: {pending} ({pending_total:,.2f}€)")
+            else:
+                summary_parts.append(f"COMPTES DÉPENSES: {eas.count} ({approved} approuvés, {pending} en attente)")
+        if "transactions" in aggregates:
+            transactions = aggregates["transactions"]
+            expenses = transactions.group_value("type", "expense")
+            total_expenses = transactions.group_value("type", "expense", "value")
+            summary_parts.append(f"TRANSACTIONS: {transactions.count} (Dépenses: {expenses}, Total: {total_expenses:,.2f}€)")
+        if "time_entries" in aggregates:
+            time_entries = aggregates["time_entries"]
+            summary_parts.append(f"FEUILLES DE TEMPS: {time_entries.count} entrées ({time_entries.value:.2f}h)")
+        if "invoices" in aggregates:
+            invoices = aggregates["invoices"]
+            open_count = invoices.group_value("status", "open")
+            total_open = invoices.group_value("status", "open", "value")
+            if any(word in query_lower for word in ["impayé", "unpaid", "en attente"]):
+                summary_parts.append(f"FACTURES EN ATTENTE: {open_count} ({total_open:,.2f}€)")
+            else:
+                summary_parts.append(f"FACTURES: {invoices.count} ({open_count} en attente = {total_open:,.2f}€)")
+        if "quotes" in aggregates:
+            quotes = aggregates["quotes"]
+            pending = quotes.group_value("status", ["sent", "pending"])
+            total_pending = quotes.group_value("status", ["sent", "pending"], "value")
+            if any(word in query_lower for word in ["en attente", "pending", "envoyé"]):
+                summary_parts.append(f"DEVIS EN ATTENTE: {pending} ({total_pending:,.2f}€)")
+            else:
+                summary_parts.append(f"DEVIS: {quotes.count} ({pending} en attente = {total_pending:,.2f}€)")
+        if "calendar_events" in aggregates:
+            summary_parts.append(f"ÉVÉNEMENTS: {aggregates['calendar_events'].count}")
+        return summary_parts
+    
     async def build_context_string(
         self,
         data: Dict[str, List[Dict[str, Any]]],
-        query: str
+        query: str,
+        max_tokens: Optional[int] = None,
     ) -> str:
-        """Format data into readable context string - SIMPLIFIED for better AI understanding"""
-        context_parts = []
+        """
+        Format data into readable context string - SIMPLIFIED for better AI understanding
+        
+        The result fits ``max_tokens`` (default LEO_CONTEXT_MAX_TOKENS): summaries are
+        kept first, then record sections share the budget, suggestions and the system
+        reference come last (see leo_context_budget.fit_sections).
+        """
+        sections: List[ContextSection] = []
+        
+        def section(key: str, priority: int = PRIORITY_DATA) -> List[str]:
+            """Lines of a new prompt section"""
+            sections.append(ContextSection(key, priority))
+            return sections[-1].lines
+        
         query_lower = query.lower()
         
         # Add structure context for navigation/help queries
@@ -2318,6 +2273,7 @@ class LeoContextService:
             "structure", "organisation", "naviguer", "navigate", "aide", "help"
         ])
         
+        context_parts = section("structure")
         if is_navigation_query:
             structure_context = await self.get_structure_context()
             context_parts.append(structure_context)
@@ -2327,26 +2283,30 @@ class LeoContextService:
             "combien", "how many", "nombre", "total", "count", "quantité"
         ])
         
+        # Exact figures computed in the database (counting queries only)
+        aggregates = data.get("aggregates") or {}
+        
         # For counting queries, provide SIMPLE summary first
+        context_parts = section("summary", PRIORITY_REQUIRED)
         if is_counting_query:
-            summary_parts = []
-            if data.get("contacts"):
+            summary_parts = self._aggregate_summary_parts(aggregates, query_lower)
+            if data.get("contacts") and "contacts" not in aggregates:
                 summary_parts.append(f"CONTACTS: {len(data['contacts'])}")
-            if data.get("companies"):
+            if data.get("companies") and "companies" not in aggregates:
                 clients_count = sum(1 for c in data["companies"] if c.get("is_client"))
                 if any(word in query_lower for word in ["client", "clients", "cleint", "cleints"]):
                     summary_parts.append(f"CLIENTS: {clients_count}")
                 else:
                     summary_parts.append(f"ENTREPRISES: {len(data['companies'])} (dont {clients_count} clients)")
-            if data.get("employees"):
+            if data.get("employees") and "employees" not in aggregates:
                 summary_parts.append(f"EMPLOYÉS: {len(data['employees'])}")
-            if data.get("opportunities"):
+            if data.get("opportunities") and "opportunities" not in aggregates:
                 summary_parts.append(f"OPPORTUNITÉS: {len(data['opportunities'])}")
-            if data.get("pipelines"):
+            if data.get("pipelines") and "pipelines" not in aggregates:
                 summary_parts.append(f"PIPELINES: {len(data['pipelines'])}")
-            if data.get("projects"):
+            if data.get("projects") and "projects" not in aggregates:
                 summary_parts.append(f"PROJETS: {len(data['projects'])}")
-            if data.get("tasks"):
+            if data.get("tasks") and "tasks" not in aggregates:
                 # Count by status
                 tasks = data["tasks"]
                 in_progress = sum(1 for t in tasks if t.get("status") == "in_progress")
@@ -2356,7 +2316,7 @@ class LeoContextService:
                     summary_parts.append(f"TÂCHES EN COURS: {in_progress}")
                 else:
                     summary_parts.append(f"TÂCHES: {len(tasks)} ({in_progress} en cours, {todo} à faire, {completed} terminées)")
-            if data.get("vacation_requests"):
+            if data.get("vacation_requests") and "vacation_requests" not in aggregates:
                 # Count by status
                 vrs = data["vacation_requests"]
                 pending = sum(1 for v in vrs if v.get("status") == "pending")
@@ -2367,7 +2327,7 @@ class LeoContextService:
                     summary_parts.append(f"VACANCES APPROUVÉES: {approved}")
                 else:
                     summary_parts.append(f"DEMANDES VACANCES: {len(vrs)} ({pending} en attente, {approved} approuvées)")
-            if data.get("expense_accounts"):
+            if data.get("expense_accounts") and "expense_accounts" not in aggregates:
                 # Count by status
                 eas = data["expense_accounts"]
                 approved = sum(1 for e in eas if e.get("status") == "approved")
@@ -2378,19 +2338,19 @@ class LeoContextService:
                     summary_parts.append(f"DÉPENSES EN ATTENTE: {pending}")
                 else:
                     summary_parts.append(f"COMPTES DÉPENSES: {len(eas)} ({approved} approuvés, {pending} en attente)")
-            if data.get("transactions"):
+            if data.get("transactions") and "transactions" not in aggregates:
                 transactions = data["transactions"]
                 expenses = [t for t in transactions if t.get("type") == "expense"]
                 total_expenses = sum(float(t.get("amount", 0) or 0) for t in expenses)
                 if is_counting_query:
                     summary_parts.append(f"TRANSACTIONS: {len(transactions)} (Dépenses: {len(expenses)}, Total: {total_expenses:,.2f}€)")
-            if data.get("time_entries"):
+            if data.get("time_entries") and "time_entries" not in aggregates:
                 time_entries = data["time_entries"]
                 aggregation = time_entries[0].get("_aggregation") if time_entries else None
                 total_hours = aggregation.get("total_hours", 0) if aggregation else sum(te.get("duration_hours", 0) for te in time_entries)
                 if is_counting_query:
                     summary_parts.append(f"FEUILLES DE TEMPS: {len(time_entries)} entrées ({total_hours:.2f}h)")
-            if data.get("invoices"):
+            if data.get("invoices") and "invoices" not in aggregates:
                 invoices = data["invoices"]
                 open_invoices = [i for i in invoices if i.get("status") == "open"]
                 total_open = sum(float(i.get("amount_due", 0) or 0) for i in open_invoices)
@@ -2399,7 +2359,7 @@ class LeoContextService:
                         summary_parts.append(f"FACTURES EN ATTENTE: {len(open_invoices)} ({total_open:,.2f}€)")
                     else:
                         summary_parts.append(f"FACTURES: {len(invoices)} ({len(open_invoices)} en attente = {total_open:,.2f}€)")
-            if data.get("quotes"):
+            if data.get("quotes") and "quotes" not in aggregates:
                 quotes = data["quotes"]
                 pending = [q for q in quotes if q.get("status") in ["sent", "pending"]]
                 total_pending = sum(float(q.get("total_amount", 0) or 0) for q in pending)
@@ -2408,7 +2368,7 @@ class LeoContextService:
                         summary_parts.append(f"DEVIS EN ATTENTE: {len(pending)} ({total_pending:,.2f}€)")
                     else:
                         summary_parts.append(f"DEVIS: {len(quotes)} ({len(pending)} en attente = {total_pending:,.2f}€)")
-            if data.get("calendar_events"):
+            if data.get("calendar_events") and "calendar_events" not in aggregates:
                 events = data["calendar_events"]
                 if is_counting_query:
                     summary_parts.append(f"ÉVÉNEMENTS: {len(events)}")
@@ -2416,8 +2376,14 @@ class LeoContextService:
             if summary_parts:
                 context_parts.append("RÉSUMÉ: " + " | ".join(summary_parts))
                 context_parts.append("")
+            
+            # Exact figures answer the question: examples only when a list is asked for
+            wants_list = any(phrase in query_lower for phrase in ["nomme", "liste", "list", "donne", "montre", "affiche"])
+            if aggregates and not wants_list:
+                data = {key: items for key, items in data.items() if key not in aggregates}
         
         # Detailed data (simplified format)
+        context_parts = section("contacts")
         if data.get("contacts"):
             if not is_counting_query:
                 context_parts.append(f"=== CONTACTS ({len(data['contacts'])}) ===")
@@ -2436,6 +2402,7 @@ class LeoContextService:
                 context_parts.append(f"... et {len(data['contacts']) - max_contacts} autres")
             context_parts.append("")
         
+        context_parts = section("companies")
         if data.get("companies"):
             if not is_counting_query:
                 total_companies = len(data["companies"])
@@ -2460,6 +2427,7 @@ class LeoContextService:
                     context_parts.append(f"... et {len(data['companies']) - max_companies} autres")
             context_parts.append("")
         
+        context_parts = section("opportunities")
         if data.get("opportunities"):
             opps = data["opportunities"]
             # Detect if query is about Closed Won/Lost
@@ -2498,6 +2466,7 @@ class LeoContextService:
                     context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("pipelines")
         if data.get("pipelines"):
             if is_counting_query:
                 context_parts.append(f"PIPELINES DE VENTE: {len(data['pipelines'])}")
@@ -2510,6 +2479,7 @@ class LeoContextService:
                     context_parts.append(line)
                 context_parts.append("")
         
+        context_parts = section("tasks")
         if data.get("tasks"):
             if not is_counting_query:
                 tasks = data["tasks"]
@@ -2534,6 +2504,7 @@ class LeoContextService:
                         context_parts.append(f"- {task['title']}")
                 context_parts.append("")
         
+        context_parts = section("vacation_requests")
         if data.get("vacation_requests"):
             vrs = data["vacation_requests"]
             # Group by status
@@ -2572,6 +2543,7 @@ class LeoContextService:
                         context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("expense_accounts")
         if data.get("expense_accounts"):
             eas = data["expense_accounts"]
             # Group by status
@@ -2610,6 +2582,7 @@ class LeoContextService:
                         context_parts.append(line)
                 context_parts.append("")
         
+        context_parts = section("transactions")
         if data.get("transactions"):
             transactions = data["transactions"]
             expenses = [t for t in transactions if t.get("type") == "expense"]
@@ -2642,6 +2615,7 @@ class LeoContextService:
                         context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("time_entries")
         if data.get("time_entries"):
             time_entries = data["time_entries"]
             query_lower = query.lower()
@@ -2688,6 +2662,7 @@ class LeoContextService:
                     context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("invoices")
         if data.get("invoices"):
             invoices = data["invoices"]
             query_lower = query.lower()
@@ -2711,7 +2686,7 @@ class LeoContextService:
                 if open_invoices:
                     context_parts.append(f"En attente ({len(open_invoices)}, Total: {total_open:,.2f}€):")
                     for inv in open_invoices[:20]:
-                        line = f"- {inv.get('invoice_number', f'FACT-{inv.get('id')}')}"
+                        line = f"- {inv.get('invoice_number', 'FACT-' + str(inv.get('id')))}"
                         if inv.get("amount_due"):
                             line += f": {inv['amount_due']:,.2f} {inv.get('currency', 'EUR')}"
                         if inv.get("due_date"):
@@ -2722,12 +2697,13 @@ class LeoContextService:
                 if paid_invoices and wants_list:
                     context_parts.append(f"Payées ({len(paid_invoices)}, Total: {total_paid:,.2f}€):")
                     for inv in paid_invoices[:10]:
-                        line = f"- {inv.get('invoice_number', f'FACT-{inv.get('id')}')}"
+                        line = f"- {inv.get('invoice_number', 'FACT-' + str(inv.get('id')))}"
                         if inv.get("amount_paid"):
                             line += f": {inv['amount_paid']:,.2f} {inv.get('currency', 'EUR')}"
                         context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("quotes")
         if data.get("quotes"):
             quotes = data["quotes"]
             query_lower = query.lower()
@@ -2751,7 +2727,7 @@ class LeoContextService:
                 if pending:
                     context_parts.append(f"En attente ({len(pending)}, Total: {total_pending:,.2f}€):")
                     for quote in pending[:20]:
-                        line = f"- {quote.get('quote_number', f'DEVIS-{quote.get('id')}')}"
+                        line = f"- {quote.get('quote_number', 'DEVIS-' + str(quote.get('id')))}"
                         if quote.get("title"):
                             line += f": {quote['title']}"
                         if quote.get("total_amount"):
@@ -2764,12 +2740,13 @@ class LeoContextService:
                 if accepted and wants_list:
                     context_parts.append(f"Acceptés ({len(accepted)}):")
                     for quote in accepted[:10]:
-                        line = f"- {quote.get('quote_number', f'DEVIS-{quote.get('id')}')}"
+                        line = f"- {quote.get('quote_number', 'DEVIS-' + str(quote.get('id')))}"
                         if quote.get("title"):
                             line += f": {quote['title']}"
                         context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("calendar_events")
         if data.get("calendar_events"):
             events = data["calendar_events"]
             query_lower = query.lower()
@@ -2799,6 +2776,7 @@ class LeoContextService:
                     context_parts.append(line)
             context_parts.append("")
         
+        context_parts = section("projects")
         if data.get("projects"):
             if not is_counting_query:
                 context_parts.append(f"=== PROJETS ({len(data['projects'])}) ===")
@@ -2809,6 +2787,7 @@ class LeoContextService:
                     context_parts.append(line)
                 context_parts.append("")
         
+        context_parts = section("employees")
         if data.get("employees"):
             employees = data["employees"]
             # Check if query is about birthdays or hire dates
@@ -2830,6 +2809,7 @@ class LeoContextService:
                 context_parts.append("")
         
         # Financial calculations
+        context_parts = section("cash_flow_forecast")
         if data.get("cash_flow_forecast"):
             forecast = data["cash_flow_forecast"]
             if not forecast.get("error"):
@@ -2844,6 +2824,7 @@ class LeoContextService:
                         context_parts.append(f"  - {day['date']}: +{day['inflows']:,.2f}€ / -{day['outflows']:,.2f}€ (Net: {day['net']:,.2f}€)")
                 context_parts.append("")
         
+        context_parts = section("financial_ratios")
         if data.get("financial_ratios"):
             ratios = data["financial_ratios"]
             if not ratios.get("error"):
@@ -2860,6 +2841,7 @@ class LeoContextService:
         
         # Generate action suggestions
         suggestions = self._generate_action_suggestions(data, query)
+        context_parts = section("suggestions", PRIORITY_EXTRA)
         if suggestions:
             context_parts.append("")
             context_parts.append("=== ACTIONS SUGGÉRÉES ===")
@@ -2868,6 +2850,7 @@ class LeoContextService:
         
         # Always add a brief structure summary at the end for context awareness
         # This helps Leo understand the system structure even for data queries
+        context_parts = section("reference", PRIORITY_EXTRA)
         if not is_navigation_query:
             context_parts.append("")
             context_parts.append("=== RÉFÉRENCE SYSTÈME ===")
@@ -2875,4 +2858,6 @@ class LeoContextService:
             context_parts.append("Tables: contacts, companies, projects, opportunites, pipelines, employees, invoices, transactions, time_entries")
             context_parts.append("Relations: Contact→Company, Opportunity→Company→Pipeline, Project→Company→Employee")
         
-        return "\n".join(context_parts)
+        if max_tokens is None:
+            max_tokens = settings.LEO_CONTEXT_MAX_TOKENS
+        return fit_sections(sections, max_tokens)
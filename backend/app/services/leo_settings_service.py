@@ -3,12 +3,66 @@ Leo Settings Service
 Manages Leo AI assistant settings and preferences
 """
 
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.models.user_preference import UserPreference
+from app.services.leo_context_budget import CHARS_PER_TOKEN, truncate_to_tokens
 from app.services.user_preference_service import UserPreferenceService
+from app.core.cache import LocalCache
+from app.core.config import settings as app_settings
 from app.core.logging import logger
 
+LEO_SETTINGS_KEY = "leo_settings"
+_CHANGED_USERS_KEY = "leo_settings_changed_users"
+
+
+@dataclass
+class _CachedLeoSettings:
+    settings: Dict[str, Any]
+    system_prompt: Optional[str] = None
+
+
+# Per-user settings and persona prompt (process-local). Entries are dropped when
+# the leo_settings preference is committed by this process; other workers pick
+# up the change within LEO_PROMPT_CACHE_TTL.
+_cache = LocalCache(max_entries=2000, default_ttl=max(app_settings.LEO_PROMPT_CACHE_TTL, 1))
+# Bumped on every invalidation, so a read that raced with a write is not cached
+_generation = 0
+
+
+def invalidate_leo_settings_cache(*user_ids: int) -> None:
+    """Drop the cached settings and prompt of the given users, or of everyone"""
+    global _generation
+    _generation += 1
+    if not user_ids:
+        _cache.clear()
+    for user_id in user_ids:
+        _cache.delete(str(user_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _track_leo_settings_changes(session: Session, flush_context) -> None:
+    """Record users whose leo_settings preference is written by this session (any code path)"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, UserPreference) and obj.key == LEO_SETTINGS_KEY:
+            session.info.setdefault(_CHANGED_USERS_KEY, set()).add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop(_CHANGED_USERS_KEY, None)
+    if user_ids:
+        invalidate_leo_settings_cache(*user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS_KEY, None)
+
 
 class LeoSettingsService:
     """Service for managing Leo AI assistant settings"""
@@ -53,25 +107,40 @@ class LeoSettingsService:
         self.preference_service = UserPreferenceService(db)
 
     async def get_leo_settings(self, user_id: int) -> Dict[str, Any]:
-        """Get Leo settings for a user, returning defaults if not set"""
+        """Get Leo settings for a user, returning defaults if not set (cached per user)"""
+        cached = self._cached(user_id)
+        if cached is not None:
+            return dict(cached.settings)
+        
+        generation = _generation
         try:
-            preference = await self.preference_service.get_preference(user_id, "leo_settings")
-            if preference and preference.value:
-                # Merge with defaults to ensure all keys are present
-                settings = {**self.DEFAULT_SETTINGS, **preference.value}
-                return settings
-            return self.DEFAULT_SETTINGS.copy()
+            settings = await self._load_settings(user_id)
+            if app_settings.LEO_PROMPT_CACHE_TTL and generation == _generation:
+                _cache.set(str(user_id), _CachedLeoSettings(dict(settings)))
+            return settings
         except Exception as e:
             logger.error(f"Error getting Leo settings for user {user_id}: {e}", exc_info=True)
             return self.DEFAULT_SETTINGS.copy()
 
+    async def _load_settings(self, user_id: int) -> Dict[str, Any]:
+        """
+        Leo settings as stored, merged with the defaults (no cache: writes
+        merge into this, and the cache may be behind a write made by
+        another worker)
+        """
+        preference = await self.preference_service.get_preference(user_id, LEO_SETTINGS_KEY)
+        if preference and preference.value:
+            # Merge with defaults to ensure all keys are present
+            return {**self.DEFAULT_SETTINGS, **preference.value}
+        return self.DEFAULT_SETTINGS.copy()
+
     async def update_leo_settings(
         self, user_id: int, settings: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Update Leo settings for a user"""
         try:
             # Get current settings
-            current_settings = await self.get_leo_settings(user_id)
+            current_settings = await self._load_settings(user_id)
             
             # Merge with new settings
             updated_settings = {**current_settings, **settings}
@@ -81,7 +150,7 @@ class LeoSettingsService:
             
             # Save to preferences
             await self.preference_service.set_preference(
-                user_id, "leo_settings", updated_settings
+                user_id, LEO_SETTINGS_KEY, updated_settings
             )
             
             logger.info(f"Leo settings updated for user {user_id}")
@@ -178,9 +247,26 @@ class LeoSettingsService:
         
         return validated
 
+    @staticmethod
+    def _cached(user_id: int) -> Optional[_CachedLeoSettings]:
+        if not app_settings.LEO_PROMPT_CACHE_TTL:
+            return None
+        return _cache.get(str(user_id))
+
     async def build_system_prompt(self, user_id: int) -> str:
-        """Build the system prompt from user's Leo settings"""
+        """Build the system prompt from user's Leo settings (cached with the settings)"""
+        cached = self._cached(user_id)
+        if cached is not None and cached.system_prompt is not None:
+            return cached.system_prompt
+        
         settings = await self.get_leo_settings(user_id)
+        prompt = self._build_system_prompt(settings)
+        cached = self._cached(user_id)
+        if cached is not None and cached.settings == settings:
+            cached.system_prompt = prompt
+        return prompt
+
+    def _build_system_prompt(self, settings: Dict[str, Any]) -> str:
         
         # Base prompt
         base_prompt = "Tu es Leo, l'assistant IA de l'ERP Nukleo.\n\n"
@@ -203,7 +289,7 @@ class LeoSettingsService:
         
         # Add markdown content if present
         if settings.get("markdown_content"):
-            base_prompt += f"=== Instructions détaillées ===\n{settings['markdown_content']}\n=== Fin des instructions ===\n\n"
+            base_prompt += f"=== Instructions détaillées ===\n{self._bounded_instructions(settings['markdown_content'])}\n=== Fin des instructions ===\n\n"
         
         # Add language instruction
         if settings["language"] == "fr":
@@ -217,6 +303,15 @@ class LeoSettingsService:
         
         return base_prompt
 
+    @staticmethod
+    def _bounded_instructions(content: str) -> str:
+        """Uploaded instructions cut to LEO_INSTRUCTIONS_MAX_TOKENS (whole lines where possible)"""
+        max_tokens = app_settings.LEO_INSTRUCTIONS_MAX_TOKENS
+        bounded = truncate_to_tokens(content, max_tokens) or content[:max_tokens * CHARS_PER_TOKEN]
+        if bounded != content:
+            logger.warning(f"Leo markdown instructions truncated to {max_tokens} tokens")
+        return bounded
+
     async def upload_markdown_file(
         self, user_id: int, file_content: str, filename: str
     ) -> Dict[str, Any]:
@@ -231,7 +326,7 @@ class LeoSettingsService:
                 raise ValueError("Le fichier doit être au format Markdown (.md)")
             
             # Get current settings
-            settings = await self.get_leo_settings(user_id)
+            settings = await self._load_settings(user_id)
             
             # Update markdown fields
             settings["markdown_file_name"] = filename
@@ -240,7 +335,7 @@ class LeoSettingsService:
             
             # Save settings
             await self.preference_service.set_preference(
-                user_id, "leo_settings", settings
+                user_id, LEO_SETTINGS_KEY, settings
             )
             
             logger.info(f"Markdown file uploaded for user {user_id}: {filename}")
@@ -266,13 +361,13 @@ class LeoSettingsService:
     async def delete_markdown_file(self, user_id: int) -> bool:
         """Delete the markdown file"""
         try:
-            settings = await self.get_leo_settings(user_id)
+            settings = await self._load_settings(user_id)
             settings["markdown_file_name"] = None
             settings["markdown_content"] = None
             settings["markdown_file_id"] = None
             
             await self.preference_service.set_preference(
-                user_id, "leo_settings", settings
+                user_id, LEO_SETTINGS_KEY, settings
             )
             
             logger.info(f"Markdown file deleted for user {user_id}")
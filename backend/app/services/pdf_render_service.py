@@ -0,0 +1,236 @@
+"""
+PDF Render Service
+Renders invoice and submission PDFs in worker processes, cached by a hash
+of the document snapshot so an unchanged document is never rendered twice
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.cache import LocalCache, redis_client_or_none
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.invoice_pdf_service import InvoicePDFService
+from app.services.submission_pdf_service import SubmissionPDFService
+
+CACHE_PREFIX = "pdf:"
+
+# Bump when a template changes so cached documents are rendered again
+RENDERER_VERSION = 1
+
+RENDERERS = {
+    "invoice": InvoicePDFService.render,
+    "submission": SubmissionPDFService.render,
+}
+
+# Rendered documents kept in process memory (content-addressed: never stale)
+L1_MAX_ENTRIES = 128
+
+
+def snapshot_digest(kind: str, data: Dict[str, Any]) -> str:
+    """SHA-256 of the document snapshot (key order does not matter)"""
+    payload = json.dumps(
+        {"renderer": RENDERER_VERSION, "kind": kind, "data": data},
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_document(kind: str, data: Dict[str, Any]) -> bytes:
+    """Render one document (runs in a worker process)"""
+    return RENDERERS[kind](data)
+
+
+def _warm_worker() -> None:
+    """Load ReportLab, the standard fonts and the paragraph styles once per worker"""
+    try:
+        from reportlab.pdfbase import pdfmetrics
+
+        for font_name in ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique"):
+            pdfmetrics.getFont(font_name)
+        InvoicePDFService.styles()
+        SubmissionPDFService.styles()
+    except ImportError:
+        # Rendering will raise the usual "reportlab is required" error
+        pass
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        # spawn: never fork a process that runs an event loop and DB pools
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+    return _process_pool
+
+
+def shutdown_pdf_workers() -> None:
+    """Stop the render worker processes (called on application shutdown)"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def _render_off_loop(kind: str, data: Dict[str, Any]) -> bytes:
+    global _process_pool
+    pool = _get_process_pool()
+    if pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, render_document, kind, data)
+        except BrokenProcessPool:
+            logger.warning("PDF worker pool broken, rendering in a thread instead")
+            _process_pool = None
+    return await asyncio.to_thread(render_document, kind, data)
+
+
+def build_zip(files: Sequence[Tuple[str, bytes]]) -> bytes:
+    """ZIP archive of (filename, content); PDFs are already compressed, so stored as is"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for filename, content in files:
+            archive.writestr(filename, content)
+    return buffer.getvalue()
+
+
+class PDFRenderService:
+    """
+    Content-addressed PDF rendering
+
+    Documents are looked up by ``snapshot_digest`` in process memory, then
+    Redis, and only rendered on a miss. Concurrent requests for the same
+    snapshot share one render.
+    """
+
+    def __init__(self, cache_ttl: Optional[int] = None, l1_max_entries: int = L1_MAX_ENTRIES):
+        self.cache_ttl = settings.PDF_CACHE_TTL if cache_ttl is None else cache_ttl
+        self._local = LocalCache(max_entries=l1_max_entries, default_ttl=max(self.cache_ttl, 3600))
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.renders = 0
+
+    @staticmethod
+    def _cache_key(kind: str, digest: str) -> str:
+        return f"{CACHE_PREFIX}{kind}:{digest}"
+
+    async def _get_cached(self, keys: List[str]) -> Dict[str, bytes]:
+        found = {}
+        missing = []
+        for key in keys:
+            pdf = self._local.get(key)
+            if pdf is not None:
+                found[key] = pdf
+            else:
+                missing.append(key)
+
+        redis_client = redis_client_or_none() if self.cache_ttl > 0 else None
+        if missing and redis_client is not None:
+            try:
+                for key, pdf in zip(missing, await redis_client.mget(missing)):
+                    if pdf is not None:
+                        found[key] = pdf
+                        self._local.set(key, pdf)
+            except Exception as e:
+                logger.warning(f"PDF cache read failed: {e}")
+        return found
+
+    async def _render_and_store(self, kind: str, key: str, data: Dict[str, Any]) -> bytes:
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            pdf = await _render_off_loop(kind, data)
+            self.renders += 1
+            self._local.set(key, pdf)
+            redis_client = redis_client_or_none() if self.cache_ttl > 0 else None
+            if redis_client is not None:
+                try:
+                    await redis_client.set(key, pdf, ex=self.cache_ttl)
+                except Exception as e:
+                    logger.warning(f"PDF cache write failed: {e}")
+        except BaseException as e:
+            future.set_exception(e)
+            # Avoid "Future exception was never retrieved" when nobody waits
+            future.exception()
+            raise
+        else:
+            future.set_result(pdf)
+            return pdf
+        finally:
+            self._inflight.pop(key, None)
+
+    async def render_many(self, kind: str, documents: Sequence[Dict[str, Any]]) -> List[Tuple[str, bytes]]:
+        """
+        Render documents in parallel across the worker pool
+
+        Returns:
+            [(digest, pdf bytes)] in the order of ``documents``
+        """
+        if kind not in RENDERERS:
+            raise ValueError(f"Unknown document kind: {kind}")
+
+        digests = [snapshot_digest(kind, data) for data in documents]
+        keys = [self._cache_key(kind, digest) for digest in digests]
+        cached = await self._get_cached(list(dict.fromkeys(keys)))
+
+        to_render = {key: data for key, data in zip(keys, documents) if key not in cached}
+        if to_render:
+            rendered = await asyncio.gather(*(
+                self._render_and_store(kind, key, data) for key, data in to_render.items()
+            ))
+            cached.update(zip(to_render, rendered))
+        return [(digest, cached[key]) for digest, key in zip(digests, keys)]
+
+    async def render(self, kind: str, data: Dict[str, Any]) -> Tuple[str, bytes]:
+        """Render one document: (digest, pdf bytes)"""
+        return (await self.render_many(kind, [data]))[0]
+
+    async def render_zip(self, kind: str, documents: Sequence[Tuple[str, Dict[str, Any]]]) -> bytes:
+        """Render (filename, data) pairs and pack them in one ZIP archive"""
+        rendered = await self.render_many(kind, [data for _, data in documents])
+        files = [(filename, pdf) for (filename, _), (_, pdf) in zip(documents, rendered)]
+        return await asyncio.to_thread(build_zip, files)
+
+    async def upload(self, pdf: bytes, file_key: str) -> Optional[str]:
+        """
+        Store a rendered PDF in S3 and return a presigned URL
+
+        Uses the shared S3 client off the event loop. Returns None when S3
+        is not configured.
+        """
+        from app.services import s3_service
+        from app.services.presigned_urls import get_presigned_url_service
+
+        presigner = get_presigned_url_service()
+        if presigner is None:
+            return None
+        await asyncio.to_thread(
+            s3_service.s3_client.put_object,
+            Bucket=s3_service.AWS_S3_BUCKET,
+            Key=file_key,
+            Body=pdf,
+            ContentType="application/pdf",
+        )
+        return await presigner.get_url(file_key)
+
+
+pdf_render_service = PDFRenderService()
@@ -0,0 +1,233 @@
+"""
+Pipeline Board Service
+Kanban read model for commercial pipelines: per-stage aggregates from one
+grouped query and per-stage card streams paginated by keyset
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.pagination import Keyset
+from app.models.company import Company
+from app.models.pipeline import Opportunite, Pipeline
+from app.models.user import User
+
+# Probability assumed for opportunities without one
+DEFAULT_PROBABILITY = 50
+
+CLOSED_STATUSES = ("closed won", "closed lost", "won", "lost")
+
+# Cards are listed newest first
+CARD_KEYSET = Keyset(Opportunite.created_at.desc(), Opportunite.id.desc())
+
+
+def active_opportunity_filter() -> ColumnElement:
+    """Opportunities not closed won/lost (NULL statuses excluded, as before)"""
+    return ~or_(*(Opportunite.status == closed for closed in CLOSED_STATUSES))
+
+
+def opportunity_value_columns() -> Tuple[ColumnElement, ColumnElement, ColumnElement, ColumnElement]:
+    """count, total amount, weighted amount and average probability aggregates"""
+    amount = func.coalesce(Opportunite.amount, 0)
+    probability = func.coalesce(Opportunite.probability, DEFAULT_PROBABILITY)
+    return (
+        func.count(Opportunite.id),
+        func.coalesce(func.sum(amount), 0),
+        func.coalesce(func.sum(amount * probability), 0) / 100.0,
+        func.avg(probability),
+    )
+
+
+def _card_query():
+    return (
+        select(
+            Opportunite.id,
+            Opportunite.name,
+            Opportunite.amount,
+            Opportunite.probability,
+            Opportunite.status,
+            Opportunite.expected_close_date,
+            Opportunite.stage_id,
+            Opportunite.company_id,
+            Company.name.label("company_name"),
+            Opportunite.assigned_to_id,
+            User.first_name,
+            User.last_name,
+            Opportunite.created_at,
+        )
+        .outerjoin(Company, Company.id == Opportunite.company_id)
+        .outerjoin(User, User.id == Opportunite.assigned_to_id)
+    )
+
+
+def _card(row: Any) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "amount": float(row.amount) if row.amount is not None else None,
+        "probability": row.probability,
+        "status": row.status,
+        "expected_close_date": row.expected_close_date,
+        "stage_id": row.stage_id,
+        "company_id": row.company_id,
+        "company_name": row.company_name,
+        "assigned_to_id": row.assigned_to_id,
+        "assigned_to_name": f"{row.first_name} {row.last_name}" if row.assigned_to_id and row.first_name else None,
+        "created_at": row.created_at,
+    }
+
+
+def _page(rows: Sequence[Any], limit: int) -> Dict[str, Any]:
+    """Cards and the cursor of the next page (``rows`` holds up to limit + 1 rows)"""
+    rows, next_cursor = CARD_KEYSET.page(rows, limit)
+    return {"items": [_card(row) for row in rows], "next_cursor": next_cursor}
+
+
+class PipelineBoardService:
+    """Pipeline Kanban in a constant number of queries"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def opportunity_counts(self, pipeline_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        """Opportunities per pipeline, one grouped query"""
+        pipeline_ids = list(pipeline_ids)
+        if not pipeline_ids:
+            return {}
+        result = await self.db.execute(
+            select(Opportunite.pipeline_id, func.count(Opportunite.id))
+            .where(Opportunite.pipeline_id.in_(pipeline_ids))
+            .group_by(Opportunite.pipeline_id)
+        )
+        return dict(result.all())
+
+    async def active_stats(self) -> Dict[str, Any]:
+        """Count, total/weighted value and average probability of active opportunities"""
+        result = await self.db.execute(select(*opportunity_value_columns()).where(active_opportunity_filter()))
+        total, total_value, weighted_value, avg_probability = result.one()
+        return {
+            "total": int(total),
+            "total_value": float(total_value),
+            "weighted_value": float(weighted_value),
+            "avg_probability": round(float(avg_probability or 0.0), 1),
+        }
+
+    async def stage_aggregates(self, pipeline_id: UUID) -> Dict[Optional[UUID], Dict[str, Any]]:
+        """Count, total and weighted amount per stage (None: no stage)"""
+        count, total_amount, weighted_amount, _ = opportunity_value_columns()
+        result = await self.db.execute(
+            select(Opportunite.stage_id, count, total_amount, weighted_amount)
+            .where(Opportunite.pipeline_id == pipeline_id)
+            .group_by(Opportunite.stage_id)
+        )
+        return {
+            stage_id: {
+                "count": int(stage_count),
+                "total_amount": float(stage_total),
+                "weighted_amount": float(stage_weighted),
+            }
+            for stage_id, stage_count, stage_total, stage_weighted in result.all()
+        }
+
+    async def first_cards(self, pipeline_id: UUID, per_stage: int) -> Dict[Optional[UUID], Dict[str, Any]]:
+        """
+        First ``per_stage`` cards of every stage in one query
+
+        Rows are ranked per stage with ROW_NUMBER(); one extra row per stage
+        tells whether a next page exists.
+        """
+        rank = func.row_number().over(partition_by=Opportunite.stage_id, order_by=CARD_KEYSET.order_by()).label("rank")
+        ranked = (
+            select(Opportunite.id, rank)
+            .where(Opportunite.pipeline_id == pipeline_id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            _card_query()
+            .join(ranked, ranked.c.id == Opportunite.id)
+            .where(ranked.c.rank <= per_stage + 1)
+            .order_by(Opportunite.stage_id, *CARD_KEYSET.order_by())
+        )
+        rows_by_stage: Dict[Optional[UUID], List[Any]] = {}
+        for row in result.all():
+            rows_by_stage.setdefault(row.stage_id, []).append(row)
+        return {stage_id: _page(rows, per_stage) for stage_id, rows in rows_by_stage.items()}
+
+    async def stage_cards(
+        self,
+        pipeline_id: UUID,
+        stage_id: Optional[UUID],
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Next cards of one stage after ``cursor`` (keyset: same cost at any depth)
+
+        Raises:
+            InvalidCursorError: If the cursor was not issued by this board
+        """
+        query = _card_query().where(Opportunite.pipeline_id == pipeline_id)
+        if stage_id is None:
+            query = query.where(Opportunite.stage_id.is_(None))
+        else:
+            query = query.where(Opportunite.stage_id == stage_id)
+        result = await self.db.execute(CARD_KEYSET.window(query, limit, cursor))
+        return _page(result.all(), limit)
+
+    async def board(self, pipeline_id: UUID, cards_per_stage: int) -> Optional[Dict[str, Any]]:
+        """
+        Pipeline, stages, per-stage aggregates and first cards
+
+        Four queries whatever the pipeline size (pipeline, stages,
+        aggregates, cards). Returns None if the pipeline does not exist.
+        """
+        result = await self.db.execute(
+            select(Pipeline).where(Pipeline.id == pipeline_id).options(selectinload(Pipeline.stages))
+        )
+        pipeline = result.scalar_one_or_none()
+        if pipeline is None:
+            return None
+
+        aggregates = await self.stage_aggregates(pipeline_id)
+        cards = await self.first_cards(pipeline_id, cards_per_stage) if cards_per_stage > 0 else {}
+        empty_page = {"items": [], "next_cursor": None}
+        empty_totals = {"count": 0, "total_amount": 0.0, "weighted_amount": 0.0}
+
+        columns = [
+            {
+                "stage_id": stage.id,
+                "name": stage.name,
+                "color": stage.color,
+                "order": stage.order,
+                **aggregates.get(stage.id, empty_totals),
+                **cards.get(stage.id, empty_page),
+            }
+            for stage in pipeline.stages
+        ]
+        # Opportunities without stage get their own column
+        if None in aggregates:
+            columns.append({
+                "stage_id": None,
+                "name": "Sans étape",
+                "color": None,
+                "order": len(columns),
+                **aggregates[None],
+                **cards.get(None, empty_page),
+            })
+
+        return {
+            "id": pipeline.id,
+            "name": pipeline.name,
+            "description": pipeline.description,
+            "is_default": pipeline.is_default,
+            "is_active": pipeline.is_active,
+            "count": sum(totals["count"] for totals in aggregates.values()),
+            "total_amount": sum(totals["total_amount"] for totals in aggregates.values()),
+            "weighted_amount": sum(totals["weighted_amount"] for totals in aggregates.values()),
+            "columns": columns,
+        }
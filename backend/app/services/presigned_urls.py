@@ -0,0 +1,303 @@
+"""
+Presigned URL Service
+Local SigV4 signing of S3 GET URLs with a shared Redis-backed URL cache
+"""
+
+import asyncio
+import hashlib
+import hmac
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from app.core.cache import LocalCache, redis_client_or_none
+from app.core.config import settings
+from app.core.logging import logger
+
+CACHE_PREFIX = "presigned:"
+
+# Batches larger than this are signed in a worker thread
+THREAD_SIGNING_THRESHOLD = 200
+
+
+def extract_file_key(url: Optional[str], prefix: str, repair: bool = False) -> Optional[str]:
+    """
+    Extract the S3 object key from a stored URL
+
+    Args:
+        url: Stored value (object key, presigned URL or public URL)
+        prefix: Expected key prefix, e.g. 'contacts/photos'
+        repair: Prepend ``prefix`` to bare file names (legacy contact photos)
+
+    Returns:
+        The object key, or None when it cannot be found in the URL
+    """
+    if not url:
+        return None
+
+    root = prefix.split('/')[0] + '/'
+    file_key = None
+    if url.startswith('http'):
+        parsed = urlparse(url)
+        # Some S3 presigned URLs carry the key as a query parameter
+        query_params = parse_qs(parsed.query)
+        if 'key' in query_params:
+            file_key = unquote(query_params['key'][0])
+        else:
+            # Path may start with the bucket name (path-style URLs)
+            path = unquote(parsed.path).strip('/')
+            idx = path.find(prefix)
+            if idx != -1:
+                file_key = path[idx:]
+            elif path.startswith(root):
+                file_key = path
+    else:
+        file_key = url
+
+    if not file_key:
+        return None
+    file_key = file_key.strip('/')
+    if repair and not file_key.startswith(root):
+        file_key = f"{prefix}/{file_key}"
+    return file_key
+
+
+class S3UrlSigner:
+    """
+    SigV4 query-string signer for S3 GET requests
+
+    Produces the same URLs as botocore's SigV4 presigner without going
+    through the client's event hooks. The derived signing key only depends
+    on the day, so each URL costs one SHA-256 and one HMAC.
+    """
+
+    def __init__(
+        self,
+        access_key: str,
+        secret_key: str,
+        region: str,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+    ):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region or "us-east-1"
+        self.bucket = bucket
+        self._signing_key: Tuple[str, bytes] = ("", b"")
+
+        if endpoint_url:
+            # S3-compatible services (DigitalOcean Spaces, MinIO): path-style
+            parsed = urlparse(endpoint_url)
+            self.scheme = parsed.scheme or "https"
+            self.host = parsed.netloc
+            self.path_prefix = f"{parsed.path.rstrip('/')}/{quote(bucket, safe='')}"
+        else:
+            # us-east-1 keeps the legacy global endpoint, like botocore
+            s3_host = "s3.amazonaws.com" if self.region == "us-east-1" else f"s3.{self.region}.amazonaws.com"
+            self.scheme = "https"
+            if bucket == bucket.lower() and "." not in bucket:
+                self.host = f"{bucket}.{s3_host}"
+                self.path_prefix = ""
+            else:
+                self.host = s3_host
+                self.path_prefix = f"/{quote(bucket, safe='')}"
+
+    def _key_for_day(self, date_stamp: str) -> bytes:
+        cached_day, key = self._signing_key
+        if cached_day != date_stamp:
+            key = ("AWS4" + self.secret_key).encode("utf-8")
+            for part in (date_stamp, self.region, "s3", "aws4_request"):
+                key = hmac.new(key, part.encode("utf-8"), hashlib.sha256).digest()
+            self._signing_key = (date_stamp, key)
+        return key
+
+    def sign(self, file_key: str, expires_in: int, now: Optional[datetime] = None) -> str:
+        """Presigned GET URL for ``file_key`` valid ``expires_in`` seconds from ``now``"""
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = amz_date[:8]
+        scope = f"{date_stamp}/{self.region}/s3/aws4_request"
+
+        path = f"{self.path_prefix}/{quote(file_key, safe='/~')}"
+        query = (
+            "X-Amz-Algorithm=AWS4-HMAC-SHA256"
+            f"&X-Amz-Credential={quote(f'{self.access_key}/{scope}', safe='-_.~')}"
+            f"&X-Amz-Date={amz_date}"
+            f"&X-Amz-Expires={expires_in}"
+            "&X-Amz-SignedHeaders=host"
+        )
+        canonical_request = f"GET\n{path}\n{query}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign = (
+            f"AWS4-HMAC-SHA256\n{amz_date}\n{scope}\n"
+            f"{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}"
+        )
+        signature = hmac.new(
+            self._key_for_day(date_stamp), string_to_sign.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+        return f"{self.scheme}://{self.host}{path}?{query}&X-Amz-Signature={signature}"
+
+
+class PresignedUrlService:
+    """
+    Presigned URLs with a two-level cache
+
+    URLs are kept in process memory and in Redis (shared by every worker)
+    until ``refresh_margin`` seconds before they expire, so the same object
+    gets the same URL everywhere and browsers can cache the image.
+    """
+
+    def __init__(
+        self,
+        signer: S3UrlSigner,
+        expiration: int = 604800,
+        refresh_margin: int = 3600,
+        l1_max_entries: int = 20000,
+    ):
+        self.signer = signer
+        self.expiration = expiration
+        self.refresh_margin = min(refresh_margin, expiration // 2)
+        self._local = LocalCache(max_entries=l1_max_entries, default_ttl=expiration) if l1_max_entries else None
+
+    def _cache_key(self, file_key: str) -> str:
+        return f"{CACHE_PREFIX}{self.signer.bucket}:{file_key}"
+
+    def _remember_local(self, file_key: str, url: str, expires_at: float) -> None:
+        ttl = int(expires_at - self.refresh_margin - time.time())
+        if self._local is not None and ttl > 0:
+            self._local.set(file_key, url, expire=ttl)
+
+    def _sign_many(self, file_keys: List[str]) -> List[Tuple[str, str, float]]:
+        now = datetime.now(timezone.utc)
+        expires_at = now.timestamp() + self.expiration
+        return [(file_key, self.signer.sign(file_key, self.expiration, now), expires_at) for file_key in file_keys]
+
+    def get_cached(self, file_key: str) -> Optional[str]:
+        """URL from process memory only (never signs)"""
+        return self._local.get(file_key) if self._local is not None else None
+
+    async def get_urls(self, file_keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Presigned URLs for many object keys
+
+        One Redis MGET for the keys missing from memory, local signing of the
+        rest (off the event loop for large batches), one pipelined write back.
+        """
+        urls: Dict[str, str] = {}
+        missing: List[str] = []
+        for file_key in dict.fromkeys(key for key in file_keys if key):
+            cached = self.get_cached(file_key)
+            if cached is not None:
+                urls[file_key] = cached
+            else:
+                missing.append(file_key)
+        if not missing:
+            return urls
+
+        redis_client = redis_client_or_none()
+        if redis_client is not None:
+            try:
+                values = await redis_client.mget([self._cache_key(key) for key in missing])
+                still_missing = []
+                for file_key, value in zip(missing, values):
+                    if value is None:
+                        still_missing.append(file_key)
+                        continue
+                    if isinstance(value, bytes):
+                        value = value.decode("utf-8")
+                    expires_at, url = value.split("|", 1)
+                    urls[file_key] = url
+                    self._remember_local(file_key, url, float(expires_at))
+                missing = still_missing
+            except Exception as e:
+                logger.warning(f"Presigned URL cache read failed: {e}")
+        if not missing:
+            return urls
+
+        if len(missing) > THREAD_SIGNING_THRESHOLD:
+            signed = await asyncio.to_thread(self._sign_many, missing)
+        else:
+            signed = self._sign_many(missing)
+
+        ttl = self.expiration - self.refresh_margin
+        for file_key, url, expires_at in signed:
+            urls[file_key] = url
+            self._remember_local(file_key, url, expires_at)
+
+        if redis_client is not None:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for file_key, url, expires_at in signed:
+                        pipe.set(self._cache_key(file_key), f"{expires_at:.0f}|{url}", ex=ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Presigned URL cache write failed: {e}")
+        return urls
+
+    async def get_url(self, file_key: str) -> str:
+        """Presigned URL for one object key"""
+        return (await self.get_urls([file_key]))[file_key]
+
+    def clear_local(self) -> None:
+        """Drop the in-memory tier (tests, credential rotation)"""
+        if self._local is not None:
+            self._local.clear()
+
+
+_service: Optional[PresignedUrlService] = None
+
+
+def get_presigned_url_service() -> Optional[PresignedUrlService]:
+    """Shared service built from the S3 settings, None when S3 is not configured"""
+    global _service
+    if _service is None:
+        from app.services import s3_service
+
+        if not s3_service.S3Service.is_configured():
+            return None
+        _service = PresignedUrlService(
+            S3UrlSigner(
+                access_key=s3_service.AWS_ACCESS_KEY_ID,
+                secret_key=s3_service.AWS_SECRET_ACCESS_KEY,
+                region=s3_service.AWS_REGION,
+                bucket=s3_service.AWS_S3_BUCKET,
+                endpoint_url=s3_service.AWS_S3_ENDPOINT_URL,
+            ),
+            expiration=settings.PRESIGNED_URL_EXPIRATION,
+            refresh_margin=settings.PRESIGNED_URL_REFRESH_MARGIN,
+            l1_max_entries=settings.PRESIGNED_URL_L1_MAX_ENTRIES,
+        )
+    return _service
+
+
+async def presign_stored_urls(
+    stored_urls: Iterable[Optional[str]],
+    prefix: str,
+    repair: bool = False,
+) -> Dict[str, Optional[str]]:
+    """
+    Presigned URLs for stored photo/logo values, in one batch
+
+    Returns a mapping from each stored value to the URL to serve: the
+    presigned URL, the stored value itself when S3 is not configured or no
+    key can be extracted, or None when signing failed.
+    """
+    stored = [url for url in dict.fromkeys(stored_urls) if url]
+    service = get_presigned_url_service()
+    if service is None:
+        return {url: url for url in stored}
+
+    keys = {url: extract_file_key(url, prefix, repair=repair) for url in stored}
+    try:
+        signed = await service.get_urls(key for key in keys.values() if key)
+    except Exception as e:
+        logger.error(f"Failed to generate presigned URLs for {prefix}: {e}", exc_info=True)
+        return {url: (None if key else url) for url, key in keys.items()}
+    return {url: (signed.get(key) if key else url) for url, key in keys.items()}
+
+
+async def presign_stored_url(stored_url: Optional[str], prefix: str, repair: bool = False) -> Optional[str]:
+    """Single-value variant of ``presign_stored_urls``"""
+    if not stored_url:
+        return None
+    return (await presign_stored_urls([stored_url], prefix, repair=repair))[stored_url]
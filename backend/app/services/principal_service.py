@@ -0,0 +1,255 @@
+"""
+Principal Service
+Cached authenticated principal: the user row, its roles and permissions and
+its tenant, resolved without a database round trip on the hot path of
+authenticated requests
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+from fastapi import Request
+from sqlalchemy import DateTime, event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.orm.util import identity_key
+
+from app.core.cache import LocalCache, redis_client_or_none
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.tenancy import get_user_tenant_id
+from app.models import TeamMember, User
+from app.services import rbac_service
+from app.services.rbac_service import RBAC_VERSION_KEY, RBACService, ResolvedPermissions
+
+PRINCIPAL_CACHE_PREFIX = "auth:principal:"
+# Bumped when team memberships change: every cached tenant may be stale
+PRINCIPAL_GENERATION_KEY = "auth:principal:generation"
+_CHANGED_SUBJECTS_KEY = "principal_changed_subjects"
+_CHANGED_TEAMS_KEY = "principal_changed_teams"
+
+# The password hash stays in the database: it is loaded on access only
+_CACHED_COLUMNS = tuple(column.key for column in User.__table__.columns if column.key != "hashed_password")
+_DATETIME_COLUMNS = frozenset(
+    column.key for column in User.__table__.columns if isinstance(column.type, DateTime)
+)
+
+
+class Principal:
+    """Authenticated user as cached: user columns, roles, permissions and tenant"""
+
+    __slots__ = ("user_id", "email", "is_active", "tenant_id", "roles", "permissions", "version", "columns")
+
+    def __init__(
+        self,
+        columns: Dict[str, Any],
+        roles: FrozenSet[str],
+        permissions: FrozenSet[str],
+        tenant_id: Optional[int],
+        version: Optional[str],
+    ):
+        self.columns = columns
+        self.user_id: int = columns["id"]
+        self.email: str = columns["email"]
+        self.is_active: bool = bool(columns.get("is_active", True))
+        self.tenant_id = tenant_id
+        self.roles = roles
+        self.permissions = permissions
+        self.version = version
+
+    @property
+    def resolved_permissions(self) -> ResolvedPermissions:
+        return ResolvedPermissions(self.roles, self.permissions)
+
+    def to_json(self) -> str:
+        columns = {
+            key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in self.columns.items()
+        }
+        return json.dumps({
+            "v": self.version,
+            "user": columns,
+            "roles": sorted(self.roles),
+            "permissions": sorted(self.permissions),
+            "tenant_id": self.tenant_id,
+        })
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "Principal":
+        columns = {
+            key: datetime.fromisoformat(value) if key in _DATETIME_COLUMNS and value else value
+            for key, value in payload["user"].items()
+        }
+        return cls(
+            columns,
+            frozenset(payload["roles"]),
+            frozenset(payload["permissions"]),
+            payload.get("tenant_id"),
+            payload.get("v"),
+        )
+
+    def attach(self, db: AsyncSession) -> User:
+        """
+        The principal's User, persistent in ``db`` without a SELECT
+
+        Cached columns are set as if loaded; the password hash is loaded on
+        first access. Changes made by the endpoint are flushed as usual.
+        """
+        user = db.identity_map.get(identity_key(User, self.user_id))
+        if user is not None:
+            return user
+        user = User(**self.columns)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+
+# Without Redis, principals are kept per process as (version, principal);
+# the version combines the RBAC and team generations.
+_local_cache = LocalCache(max_entries=5000, default_ttl=max(settings.PRINCIPAL_CACHE_TTL, 1))
+_local_generation = 0
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value or 0)
+
+
+def _local_version() -> str:
+    return f"{rbac_service._local_version}:{_local_generation}"
+
+
+def _forget_local(subjects: Set[str], teams_changed: bool) -> None:
+    global _local_generation
+    if teams_changed:
+        _local_generation += 1
+        _local_cache.clear()
+        return
+    for subject in subjects:
+        _local_cache.delete(subject)
+
+
+async def _forget_shared(redis_client, subjects: Set[str], teams_changed: bool) -> None:
+    try:
+        if subjects:
+            await redis_client.delete(*(f"{PRINCIPAL_CACHE_PREFIX}{subject}" for subject in subjects))
+        if teams_changed:
+            await redis_client.incr(PRINCIPAL_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate cached principals: {e}")
+
+
+async def invalidate_principal_cache(*subjects: str) -> None:
+    """Drop the cached principals of the given token subjects (emails), or all of them"""
+    _forget_local(set(subjects), teams_changed=not subjects)
+    redis_client = redis_client_or_none()
+    if redis_client is not None:
+        await _forget_shared(redis_client, set(subjects), teams_changed=not subjects)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_principal_changes(session: Session, flush_context) -> None:
+    """Record users and team memberships written by this session"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TeamMember):
+            session.info[_CHANGED_TEAMS_KEY] = True
+        elif isinstance(obj, User) and obj not in session.new:
+            email = get_history(obj, "email")
+            if obj in session.deleted or email.has_changes() or any(
+                get_history(obj, key).has_changes() for key in _CACHED_COLUMNS
+            ):
+                subjects = session.info.setdefault(_CHANGED_SUBJECTS_KEY, set())
+                subjects.update(value for value in (*email.unchanged, *email.added, *email.deleted) if value)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    subjects = session.info.pop(_CHANGED_SUBJECTS_KEY, set())
+    teams_changed = session.info.pop(_CHANGED_TEAMS_KEY, False)
+    if not subjects and not teams_changed:
+        return
+    _forget_local(subjects, teams_changed)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    redis_client = redis_client_or_none()
+    if redis_client is not None:
+        loop.create_task(_forget_shared(redis_client, subjects, teams_changed))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_SUBJECTS_KEY, None)
+    session.info.pop(_CHANGED_TEAMS_KEY, None)
+
+
+async def _query_principal(
+    db: AsyncSession, subject: str, request: Optional[Request], version: Optional[str]
+) -> Optional[Principal]:
+    """User row, permissions (RBAC cache) and tenant of a token subject"""
+    result = await db.execute(
+        select(*(User.__table__.c[key] for key in _CACHED_COLUMNS)).where(User.email == subject)
+    )
+    row = result.mappings().one_or_none()
+    if row is None:
+        return None
+    resolved = await RBACService(db, request).resolve_permissions(row["id"])
+    tenant_id = await get_user_tenant_id(row["id"], db)
+    return Principal(dict(row), resolved.roles, resolved.permissions, tenant_id, version)
+
+
+async def load_principal(
+    db: AsyncSession, subject: str, request: Optional[Request] = None
+) -> Optional[Principal]:
+    """
+    Principal of a token subject (the user's email), None for unknown users
+
+    Lookup order: shared cache (Redis, or process memory without Redis),
+    then the database. Entries are tagged with the RBAC version and the team
+    generation, and dropped when the user row is written. The resolved
+    permissions seed the request's RBAC memo, so role checks later in the
+    request cost nothing either.
+    """
+    ttl = settings.PRINCIPAL_CACHE_TTL
+    redis_client = redis_client_or_none() if ttl else None
+    key = f"{PRINCIPAL_CACHE_PREFIX}{subject}"
+    principal = None
+    version = None
+    if redis_client is not None:
+        try:
+            raw_rbac, raw_generation, raw_entry = await redis_client.mget(
+                [RBAC_VERSION_KEY, PRINCIPAL_GENERATION_KEY, key]
+            )
+            version = f"{_text(raw_rbac)}:{_text(raw_generation)}"
+            if raw_entry is not None:
+                payload = json.loads(raw_entry)
+                if payload.get("v") == version:
+                    principal = Principal.from_json(payload)
+        except Exception as e:
+            logger.warning(f"Principal cache read failed: {e}")
+            redis_client = None
+    elif ttl:
+        version = _local_version()
+        cached = _local_cache.get(subject)
+        if cached is not None and cached[0] == version:
+            principal = cached[1]
+
+    if principal is None:
+        principal = await _query_principal(db, subject, request, version)
+        if principal is None:
+            return None
+        if redis_client is not None and version is not None:
+            try:
+                await redis_client.set(key, principal.to_json(), ex=ttl)
+            except Exception as e:
+                logger.warning(f"Principal cache write failed: {e}")
+        elif ttl:
+            _local_cache.set(subject, (version, principal), expire=ttl)
+
+    RBACService(db, request).remember(principal.user_id, principal.resolved_permissions)
+    if request is not None:
+        request.state.principal = principal
+    return principal
@@ -3,19 +3,226 @@ RBAC Service
 Service for Role-Based Access Control operations
 """
 
-from typing import List, Optional, Set
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, event, literal, union_all
+from sqlalchemy.orm import Session, selectinload
 
+from app.core.cache import LocalCache, redis_client_or_none
+from app.core.config import settings
+from app.core.logging import logger
 from app.models import User, Role, Permission, RolePermission, UserRole, UserPermission, TeamMember
 
+RBAC_VERSION_KEY = "rbac:version"
+RBAC_CACHE_PREFIX = "rbac:permissions:"
+_MEMO_KEY = "rbac_permissions"
+_CHANGED_KEY = "rbac_changed"
+_RBAC_MODELS = (Role, Permission, RolePermission, UserRole, UserPermission)
+
+
+@dataclass
+class ResolvedPermissions:
+    """Active role slugs and effective permission names of a user"""
+    roles: FrozenSet[str]
+    permissions: FrozenSet[str]
+
+    @property
+    def is_superadmin(self) -> bool:
+        return "superadmin" in self.roles
+
+    @property
+    def effective_permissions(self) -> Set[str]:
+        """Permission names as returned by get_user_permissions"""
+        if self.is_superadmin:
+            return {"admin:*"}
+        return set(self.permissions)
+
+    def allows(self, permission_name: str) -> bool:
+        """
+        Handles wildcard permissions:
+        - superadmin role and admin:* grant all permissions
+        - resource:* grants all permissions for that resource (the part
+          before the first ':'); other wildcards only match themselves
+        """
+        if self.is_superadmin or "admin:*" in self.permissions:
+            return True
+        if permission_name in self.permissions:
+            return True
+        if ":" in permission_name:
+            resource = permission_name.split(":", 1)[0]
+            return f"{resource}:*" in self.permissions
+        return False
+
+    def to_json(self, version: str) -> str:
+        return json.dumps({"v": version, "roles": sorted(self.roles), "permissions": sorted(self.permissions)})
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "ResolvedPermissions":
+        return cls(frozenset(payload["roles"]), frozenset(payload["permissions"]))
+
+
+# Process-local tier, used when Redis is not available. Entries are keyed by
+# the local version, bumped on every RBAC change committed by this process.
+_local_cache = LocalCache(max_entries=5000, default_ttl=max(settings.RBAC_PERMISSION_CACHE_TTL, 1))
+_local_version = 0
+
+
+def _bump_local_version() -> None:
+    global _local_version
+    _local_version += 1
+    _local_cache.clear()
+
+
+async def invalidate_permission_cache() -> None:
+    """Invalidate every cached permission set (all users, all workers)"""
+    _bump_local_version()
+    redis_client = redis_client_or_none()
+    if redis_client is not None:
+        try:
+            await redis_client.incr(RBAC_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to bump RBAC cache version: {e}")
+
+
+@event.listens_for(Session, "after_flush")
+def _track_rbac_changes(session: Session, flush_context) -> None:
+    """Flag sessions that write roles, permissions or their assignments"""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _RBAC_MODELS):
+            session.info[_CHANGED_KEY] = True
+            session.info.pop(_MEMO_KEY, None)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if not session.info.pop(_CHANGED_KEY, False):
+        return
+    _bump_local_version()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    redis_client = redis_client_or_none()
+    if redis_client is not None:
+        loop.create_task(_incr_version(redis_client))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_KEY, None)
+
+
+async def _incr_version(redis_client) -> None:
+    try:
+        await redis_client.incr(RBAC_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to bump RBAC cache version: {e}")
+
 
 class RBACService:
     """Service for managing roles and permissions"""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, request: Optional[Request] = None):
         self.db = db
+        self.request = request
+
+    def _memo(self) -> Dict[int, ResolvedPermissions]:
+        """
+        Per-request memo: on request.state when the caller passed the request,
+        otherwise on the request's database session (one per request via get_db)
+        """
+        if self.request is not None:
+            memo = getattr(self.request.state, _MEMO_KEY, None)
+            if memo is None:
+                memo = {}
+                setattr(self.request.state, _MEMO_KEY, memo)
+            return memo
+        return self.db.info.setdefault(_MEMO_KEY, {})
+
+    async def _query_permissions(self, user_id: int) -> ResolvedPermissions:
+        """Active roles, role permissions and custom permissions in one round trip"""
+        active_roles = (
+            select(literal("role").label("kind"), Role.slug.label("name"))
+            .join(UserRole, UserRole.role_id == Role.id)
+            .where(UserRole.user_id == user_id)
+            .where(Role.is_active == True)
+        )
+        role_permissions = (
+            select(literal("permission").label("kind"), Permission.name.label("name"))
+            .join(RolePermission, RolePermission.permission_id == Permission.id)
+            .join(Role, Role.id == RolePermission.role_id)
+            .join(UserRole, UserRole.role_id == Role.id)
+            .where(UserRole.user_id == user_id)
+            .where(Role.is_active == True)
+        )
+        # Custom permissions (override role permissions)
+        custom_permissions = (
+            select(literal("permission").label("kind"), Permission.name.label("name"))
+            .join(UserPermission, UserPermission.permission_id == Permission.id)
+            .where(UserPermission.user_id == user_id)
+        )
+        result = await self.db.execute(union_all(active_roles, role_permissions, custom_permissions))
+
+        roles, permissions = set(), set()
+        for kind, name in result.all():
+            (roles if kind == "role" else permissions).add(name)
+        return ResolvedPermissions(frozenset(roles), frozenset(permissions))
+
+    def remember(self, user_id: int, resolved: ResolvedPermissions) -> None:
+        """Seed the request memo with permissions resolved elsewhere (the cached principal)"""
+        self._memo()[user_id] = resolved
+
+    async def resolve_permissions(self, user_id: int) -> ResolvedPermissions:
+        """
+        Roles and permissions of a user, resolved once per request
+
+        Lookup order: request memo, shared cache (Redis, or process memory
+        without Redis), then a single database query. Cached entries carry
+        the RBAC version and are ignored once any role or assignment changed.
+        """
+        memo = self._memo()
+        resolved = memo.get(user_id)
+        if resolved is not None:
+            return resolved
+
+        ttl = settings.RBAC_PERMISSION_CACHE_TTL
+        redis_client = redis_client_or_none() if ttl else None
+        version = None
+        if redis_client is not None:
+            try:
+                raw_version, raw_entry = await redis_client.mget(
+                    [RBAC_VERSION_KEY, f"{RBAC_CACHE_PREFIX}{user_id}"]
+                )
+                version = raw_version.decode() if isinstance(raw_version, bytes) else str(raw_version or 0)
+                if raw_entry is not None:
+                    payload = json.loads(raw_entry)
+                    if payload.get("v") == version:
+                        resolved = ResolvedPermissions.from_json(payload)
+            except Exception as e:
+                logger.warning(f"RBAC cache read failed: {e}")
+                redis_client = None
+        elif ttl:
+            local_key = f"{_local_version}:{user_id}"
+            resolved = _local_cache.get(local_key)
+
+        if resolved is None:
+            resolved = await self._query_permissions(user_id)
+            if redis_client is not None and version is not None:
+                try:
+                    await redis_client.set(f"{RBAC_CACHE_PREFIX}{user_id}", resolved.to_json(version), ex=ttl)
+                except Exception as e:
+                    logger.warning(f"RBAC cache write failed: {e}")
+            elif ttl:
+                _local_cache.set(local_key, resolved, expire=ttl)
+
+        memo[user_id] = resolved
+        return resolved
 
     async def get_user_roles(self, user_id: int) -> List[Role]:
         """Get all roles for a user"""
@@ -34,34 +241,8 @@ class RBACService:
         Custom permissions override role-based permissions.
         Superadmin role grants admin:* permission (all permissions).
         """
-        # Check if user has superadmin role (has all permissions)
-        has_superadmin = await self.has_role(user_id, "superadmin")
-        if has_superadmin:
-            return {"admin:*"}
-        
-        # Get permissions from roles
-        role_permissions_result = await self.db.execute(
-            select(Permission.name)
-            .join(RolePermission)
-            .join(Role)
-            .join(UserRole)
-            .where(UserRole.user_id == user_id)
-            .where(Role.is_active == True)
-        )
-        permissions = set(role_permissions_result.scalars().all())
-        
-        # Get custom permissions (override role permissions)
-        custom_permissions_result = await self.db.execute(
-            select(Permission.name)
-            .join(UserPermission)
-            .where(UserPermission.user_id == user_id)
-        )
-        custom_permissions = set(custom_permissions_result.scalars().all())
-        
-        # Combine: custom permissions override role permissions
-        permissions.update(custom_permissions)
-        
-        return permissions
+        resolved = await self.resolve_permissions(user_id)
+        return resolved.effective_permissions
 
     async def has_permission(self, user_id: int, permission_name: str) -> bool:
         """
@@ -71,61 +252,28 @@ class RBACService:
         - admin:* grants all permissions
         - resource:* grants all permissions for that resource
         """
-        permissions = await self.get_user_permissions(user_id)
-        
-        # Check for exact match
-        if permission_name in permissions:
-            return True
-        
-        # Check for wildcard permissions
-        if "admin:*" in permissions:
-            # admin:* grants all permissions
-            return True
-        
-        # Check for resource-level wildcards (e.g., "users:*" grants "users:read", "users:create", etc.)
-        if ":" in permission_name:
-            resource, action = permission_name.split(":", 1)
-            resource_wildcard = f"{resource}:*"
-            if resource_wildcard in permissions:
-                return True
-        
-        return False
+        resolved = await self.resolve_permissions(user_id)
+        return resolved.allows(permission_name)
 
     async def has_any_permission(self, user_id: int, permission_names: List[str]) -> bool:
         """Check if user has any of the specified permissions"""
-        for permission_name in permission_names:
-            if await self.has_permission(user_id, permission_name):
-                return True
-        return False
+        resolved = await self.resolve_permissions(user_id)
+        return any(resolved.allows(name) for name in permission_names)
 
     async def has_all_permissions(self, user_id: int, permission_names: List[str]) -> bool:
         """Check if user has all of the specified permissions"""
-        for permission_name in permission_names:
-            if not await self.has_permission(user_id, permission_name):
-                return False
-        return True
+        resolved = await self.resolve_permissions(user_id)
+        return all(resolved.allows(name) for name in permission_names)
 
     async def has_role(self, user_id: int, role_slug: str) -> bool:
         """Check if user has a specific role"""
-        result = await self.db.execute(
-            select(UserRole)
-            .join(Role)
-            .where(UserRole.user_id == user_id)
-            .where(Role.slug == role_slug)
-            .where(Role.is_active == True)
-        )
-        return result.scalar_one_or_none() is not None
+        resolved = await self.resolve_permissions(user_id)
+        return role_slug in resolved.roles
 
     async def has_any_role(self, user_id: int, role_slugs: List[str]) -> bool:
         """Check if user has any of the specified roles"""
-        result = await self.db.execute(
-            select(UserRole)
-            .join(Role)
-            .where(UserRole.user_id == user_id)
-            .where(Role.slug.in_(role_slugs))
-            .where(Role.is_active == True)
-        )
-        return result.scalar_one_or_none() is not None
+        resolved = await self.resolve_permissions(user_id)
+        return not resolved.roles.isdisjoint(role_slugs)
 
     async def assign_role(self, user_id: int, role_id: int) -> UserRole:
         """Assign a role to a user"""
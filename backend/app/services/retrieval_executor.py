@@ -0,0 +1,125 @@
+"""
+Retrieval Executor
+Runs independent read jobs concurrently, each on its own pooled session,
+under a per-job time limit and an overall latency budget
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging import logger
+
+RetrievalJob = Callable[[AsyncSession], Awaitable[List[Dict[str, Any]]]]
+
+
+@dataclass
+class RetrievalTiming:
+    """Outcome of one job: ok, timeout (its own limit), budget (overall limit) or error"""
+    status: str
+    elapsed_ms: float
+    items: int = 0
+
+
+@dataclass
+class RetrievalReport:
+    """Timing metadata of a retrieval run"""
+    elapsed_ms: float = 0.0
+    jobs: Dict[str, RetrievalTiming] = field(default_factory=dict)
+
+    @property
+    def partial(self) -> bool:
+        return any(timing.status != "ok" for timing in self.jobs.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "partial": self.partial,
+            "jobs": {
+                key: {"status": timing.status, "elapsed_ms": round(timing.elapsed_ms, 1), "items": timing.items}
+                for key, timing in self.jobs.items()
+            },
+        }
+
+
+class RetrievalExecutor:
+    """
+    Concurrent read jobs on separate sessions
+
+    An AsyncSession cannot run two statements at once, so jobs sharing the
+    request session serialize (or fail). Each job here opens its own session
+    on the request session's engine; at most ``concurrency`` of them hold a
+    pooled connection at a time. Jobs still running when the budget is spent
+    are cancelled and reported; the other results are returned.
+    """
+
+    def __init__(self, db: AsyncSession, timeout: float, budget: float, concurrency: int = 4):
+        self.db = db
+        self.timeout = timeout
+        self.budget = budget
+        self.concurrency = concurrency
+
+    def _session_factory(self) -> Optional[async_sessionmaker]:
+        bind = self.db.bind
+        if bind is None:
+            return None
+        return async_sessionmaker(bind, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    async def run(self, jobs: Dict[str, RetrievalJob]) -> Tuple[Dict[str, List[Dict[str, Any]]], RetrievalReport]:
+        """Results of the jobs that finished in time (empty list for the others), and the report"""
+        report = RetrievalReport()
+        results: Dict[str, List[Dict[str, Any]]] = {key: [] for key in jobs}
+        if not jobs:
+            return results, report
+
+        started = time.perf_counter()
+        session_factory = self._session_factory()
+        if session_factory is None:
+            # No engine to open sessions on: one job at a time on the given session
+            for key, job in jobs.items():
+                results[key], report.jobs[key] = await self._run_job(key, job, self.db)
+            report.elapsed_ms = (time.perf_counter() - started) * 1000
+            return results, report
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_on_own_session(key: str, job: RetrievalJob):
+            async with semaphore:
+                async with session_factory() as session:
+                    return await self._run_job(key, job, session)
+
+        tasks = {asyncio.create_task(run_on_own_session(key, job)): key for key, job in jobs.items()}
+        done, pending = await asyncio.wait(tasks, timeout=self.budget)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for task, key in tasks.items():
+            if task in done:
+                results[key], report.jobs[key] = task.result()
+            else:
+                logger.warning(f"Retrieval of {key} dropped: budget of {self.budget}s spent")
+                report.jobs[key] = RetrievalTiming("budget", elapsed_ms)
+        report.elapsed_ms = elapsed_ms
+        return results, report
+
+    async def _run_job(
+        self, key: str, job: RetrievalJob, session: AsyncSession
+    ) -> Tuple[List[Dict[str, Any]], RetrievalTiming]:
+        started = time.perf_counter()
+        try:
+            items = await asyncio.wait_for(job(session), timeout=self.timeout)
+            status = "ok"
+        except asyncio.TimeoutError:
+            logger.warning(f"Retrieval of {key} timed out after {self.timeout}s")
+            items, status = [], "timeout"
+        except Exception as e:
+            logger.error(f"Error fetching {key}: {e}", exc_info=True)
+            items, status = [], "error"
+        items = items or []
+        return items, RetrievalTiming(status, (time.perf_counter() - started) * 1000, len(items))
@@ -0,0 +1,191 @@
+"""
+Search Index Service
+Ranked full-text search over search_documents, shared by Leo and /search
+"""
+
+import operator
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import logger
+from app.core.tenancy import TenancyConfig, get_current_tenant
+from app.models.search_document import SEARCH_SPECS, SearchDocument, normalize_search_text
+from app.services.entity_matcher import pg_trgm_available
+
+# Configs of the generated search_vector column (migration 084)
+TS_CONFIGS = ("french", "english")
+
+
+@dataclass
+class SearchHit:
+    """One ranked match"""
+    entity_type: str
+    entity_id: str
+    title: str
+    subtitle: Optional[str]
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "entity_type": self.entity_type,
+            "entity_id": self.entity_id,
+            "title": self.title,
+            "subtitle": self.subtitle,
+            "score": self.score,
+        }
+
+
+_search_vector_available: Optional[bool] = None
+
+
+async def search_vector_available(db: AsyncSession) -> bool:
+    """Whether search_documents.search_vector exists (PostgreSQL after migration 084, checked once per process)"""
+    global _search_vector_available
+    if _search_vector_available is None:
+        if db.get_bind().dialect.name != 'postgresql':
+            _search_vector_available = False
+        else:
+            try:
+                result = await db.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'search_documents' AND column_name = 'search_vector'"
+                ))
+                _search_vector_available = result.scalar() is not None
+            except Exception as e:
+                logger.warning(f"Could not check search_vector availability: {e}")
+                _search_vector_available = False
+    return _search_vector_available
+
+
+def _word_groups(terms: Sequence[str]) -> List[List[str]]:
+    """Normalized words of each term (empty terms dropped)"""
+    groups = [normalize_search_text(term).split() for term in terms]
+    return [words for words in groups if words]
+
+
+def _entity_key(entity_type: str, entity_id: str) -> Any:
+    """Index entity_id back to the record's id type (int, UUID)"""
+    python_type = SEARCH_SPECS[entity_type].model.__table__.c.id.type.python_type
+    return python_type(entity_id)
+
+
+class SearchIndex:
+    """
+    Ranked search over the shared index
+
+    A query is a list of terms: a record matches when it contains every
+    word of at least one term (as a word prefix). PostgreSQL uses the
+    search_vector GIN index with ts_rank, plus pg_trgm similarity on
+    titles for typos when installed; other databases fall back to LIKE on
+    the normalized text, title matches ranking first.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(
+        self,
+        query: str,
+        entity_types: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Tuple[List[SearchHit], int]:
+        """Hits for every word of ``query``, best first, and the total number of matches"""
+        return await self._search([query], entity_types, limit, offset, with_total=True)
+
+    async def entity_ids(self, entity_type: str, terms: Sequence[str], limit: int = 200) -> List[Any]:
+        """Ids of the records of ``entity_type`` matching any of ``terms``, best first"""
+        hits, _ = await self._search(terms, [entity_type], limit, 0, with_total=False)
+        return [_entity_key(hit.entity_type, hit.entity_id) for hit in hits]
+
+    async def _search(
+        self,
+        terms: Sequence[str],
+        entity_types: Optional[Sequence[str]],
+        limit: int,
+        offset: int,
+        with_total: bool,
+    ) -> Tuple[List[SearchHit], int]:
+        unknown = set(entity_types or ()) - set(SEARCH_SPECS)
+        if unknown:
+            raise ValueError(f"Unknown entity types: {', '.join(sorted(unknown))}")
+        groups = _word_groups(terms)
+        if not groups or entity_types == []:
+            return [], 0
+
+        condition, rank = await self._match(groups)
+        # Rows of types no longer indexed (left by an earlier version) are never returned
+        stmt = select(SearchDocument.entity_type, SearchDocument.entity_id, SearchDocument.title,
+                      SearchDocument.subtitle, rank.label("score")).where(
+            condition, SearchDocument.entity_type.in_(list(entity_types or SEARCH_SPECS))
+        )
+        stmt = self._scope(stmt)
+
+        result = await self.db.execute(
+            stmt.order_by(literal_column("score").desc(), SearchDocument.title, SearchDocument.id)
+            .limit(limit).offset(offset)
+        )
+        hits = [
+            SearchHit(row.entity_type, row.entity_id, row.title, row.subtitle, float(row.score or 0))
+            for row in result
+        ]
+
+        total = len(hits)
+        if with_total and (offset or len(hits) == limit):
+            count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+            total = (await self.db.execute(count_stmt)).scalar() or 0
+        elif with_total:
+            total = offset + len(hits)
+        return hits, total
+
+    async def _match(self, groups: List[List[str]]):
+        """WHERE condition and rank expression for the word groups"""
+        if await search_vector_available(self.db):
+            tsquery_text = ' | '.join(
+                '(' + ' & '.join(f"{word}:*" for word in words) + ')' for words in groups
+            )
+            tsquery = reduce(
+                lambda left, right: left.op('||')(right),
+                [func.to_tsquery(literal_column(f"'{config}'::regconfig"), tsquery_text) for config in TS_CONFIGS],
+            )
+            vector = literal_column("search_documents.search_vector")
+            condition = vector.op('@@')(tsquery)
+            rank = func.ts_rank(vector, tsquery)
+            if await pg_trgm_available(self.db):
+                # Typo tolerance on titles (idx_search_documents_title_trgm)
+                phrases = [' '.join(words) for words in groups]
+                condition = or_(condition, *[SearchDocument.search_title.op('%')(phrase) for phrase in phrases])
+                similarity = [func.similarity(SearchDocument.search_title, phrase) for phrase in phrases]
+                rank = rank + (similarity[0] if len(similarity) == 1 else func.greatest(*similarity))
+            return condition, rank
+
+        condition = or_(*[
+            and_(*[SearchDocument.search_text.like(f"%{word}%") for word in words]) for words in groups
+        ])
+        words = sorted({word for words in groups for word in words})
+        rank = reduce(operator.add, [
+            case(
+                (SearchDocument.search_title.like(f"%{word}%"), 2),
+                (SearchDocument.search_text.like(f"%{word}%"), 1),
+                else_=0,
+            )
+            for word in words
+        ])
+        return condition, rank
+
+    @staticmethod
+    def _scope(stmt):
+        """Tenant scoping, for the entity types whose model has team_id (as scope_query does)"""
+        if not TenancyConfig.is_enabled():
+            return stmt
+        tenant_id = get_current_tenant()
+        if tenant_id is None:
+            return stmt
+        scoped = [spec.entity_type for spec in SEARCH_SPECS.values() if hasattr(spec.model, "team_id")]
+        if not scoped:
+            return stmt
+        return stmt.where(or_(SearchDocument.entity_type.notin_(scoped), SearchDocument.team_id == tenant_id))
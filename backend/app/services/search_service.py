@@ -4,10 +4,15 @@ Full-text search and filtering capabilities
 """
 
 from typing import List, Dict, Any, Optional
-from sqlalchemy import text, func, or_, and_
+from sqlalchemy import text, func, or_, and_, case
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from app.core.logging import logger
+from app.models.search_document import SEARCH_SPECS
+from app.services.search_index_service import SearchIndex
+
+# Most index matches considered for one search on an indexed model
+MAX_INDEX_CANDIDATES = 1000
 
 
 class SearchService:
@@ -55,16 +60,25 @@ class SearchService:
 
         # Build search conditions
         search_conditions = []
-        search_terms = search_query.split()
+        ranked_ids = None
+        spec = next((spec for spec in SEARCH_SPECS.values() if spec.model is model_class), None)
         
-        for field_name in search_fields:
-            if hasattr(model_class, field_name):
-                field = getattr(model_class, field_name)
-                for term in search_terms:
-                    # Use ILIKE for case-insensitive search (PostgreSQL)
-                    search_conditions.append(
-                        field.ilike(f'%{term}%')
-                    )
+        if spec is not None:
+            # Indexed model: ranked matches from the search index
+            ranked_ids = await SearchIndex(self.db).entity_ids(
+                spec.entity_type, [search_query], limit=MAX_INDEX_CANDIDATES
+            )
+            search_conditions.append(model_class.id.in_(ranked_ids))
+        else:
+            search_terms = search_query.split()
+            for field_name in search_fields:
+                if hasattr(model_class, field_name):
+                    field = getattr(model_class, field_name)
+                    for term in search_terms:
+                        # Use ILIKE for case-insensitive search (PostgreSQL)
+                        search_conditions.append(
+                            field.ilike(f'%{term}%')
+                        )
 
         if search_conditions:
             query = query.where(or_(*search_conditions))
@@ -134,6 +148,12 @@ class SearchService:
                 field_name = order_parts[0]
                 if hasattr(model_class, field_name):
                     query = query.order_by(getattr(model_class, field_name).asc())
+        elif ranked_ids:
+            # Best matches first
+            query = query.order_by(case(
+                {entity_id: position for position, entity_id in enumerate(ranked_ids)},
+                value=model_class.id,
+            ))
         else:
             # Default ordering by id desc
             if hasattr(model_class, 'id'):
@@ -194,6 +214,44 @@ class SearchService:
             offset=offset
         )
 
+    async def search_indexed(
+        self,
+        entity_type: str,
+        search_query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Search one entity type of the search index (contacts, companies, ...)"""
+        spec = SEARCH_SPECS[entity_type]
+        return await self.full_text_search(
+            model_class=spec.model,
+            search_query=search_query,
+            search_fields=list(spec.fields),
+            filters=filters,
+            limit=limit,
+            offset=offset
+        )
+
+    async def search_all(
+        self,
+        search_query: str,
+        entity_types: Optional[List[str]] = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Ranked search across the indexed entity types (all of them by default)"""
+        hits, total = await SearchIndex(self.db).search(
+            search_query, entity_types=entity_types, limit=limit, offset=offset
+        )
+        return {
+            'results': [hit.to_dict() for hit in hits],
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'has_more': (offset + len(hits)) < total
+        }
+
     def _serialize_model(self, model_instance: Any) -> Dict[str, Any]:
         """Serialize SQLAlchemy model to dict"""
         result = {}
@@ -3,6 +3,7 @@ Submission PDF Generation Service
 Generates complex PDF documents for commercial submissions
 """
 
+from functools import lru_cache
 from io import BytesIO
 from typing import Dict, Any, Optional
 from datetime import datetime
@@ -28,32 +29,15 @@ class SubmissionPDFService:
     """Service for generating submission PDFs"""
     
     @staticmethod
-    def generate_pdf(submission_data: Dict[str, Any]) -> BytesIO:
-        """
-        Generate a PDF document from submission data
-        
-        Args:
-            submission_data: Dictionary containing submission content
-            
-        Returns:
-            BytesIO buffer containing the PDF
-        """
-        if not REPORTLAB_AVAILABLE:
-            raise ImportError(
-                "reportlab is required for PDF generation. "
-                "Install with: pip install reportlab"
-            )
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
-        story = []
-        
-        styles = getSampleStyleSheet()
+    @lru_cache(maxsize=1)
+    def styles() -> Dict[str, Any]:
+        """Paragraph styles, built once per process and shared by every render"""
+        base = getSampleStyleSheet()
         
         # Custom styles
         title_style = ParagraphStyle(
             'CustomTitle',
-            parent=styles['Heading1'],
+            parent=base['Heading1'],
             fontSize=24,
             textColor=colors.HexColor('#1a1a1a'),
             spaceAfter=30,
@@ -62,7 +46,7 @@ class SubmissionPDFService:
         
         subtitle_style = ParagraphStyle(
             'CustomSubtitle',
-            parent=styles['Heading2'],
+            parent=base['Heading2'],
             fontSize=16,
             textColor=colors.HexColor('#666666'),
             spaceAfter=20,
@@ -71,7 +55,7 @@ class SubmissionPDFService:
         
         heading_style = ParagraphStyle(
             'CustomHeading',
-            parent=styles['Heading2'],
+            parent=base['Heading2'],
             fontSize=18,
             textColor=colors.HexColor('#1a1a1a'),
             spaceAfter=12,
@@ -80,13 +64,76 @@ class SubmissionPDFService:
         
         body_style = ParagraphStyle(
             'CustomBody',
-            parent=styles['Normal'],
+            parent=base['Normal'],
             fontSize=11,
             textColor=colors.HexColor('#333333'),
             spaceAfter=12,
             leading=14,
         )
         
+        return {
+            'title': title_style,
+            'subtitle': subtitle_style,
+            'heading': heading_style,
+            'body': body_style,
+            'objective_title': ParagraphStyle(
+                'ObjectiveTitle',
+                parent=body_style,
+                fontName='Helvetica-Bold',
+            ),
+            'step_heading': ParagraphStyle(
+                'StepHeading',
+                parent=body_style,
+                fontName='Helvetica-Bold',
+                fontSize=12,
+            ),
+            'duration': ParagraphStyle(
+                'Duration',
+                parent=body_style,
+                fontSize=10,
+                textColor=colors.HexColor('#666666'),
+            ),
+            'member_name': ParagraphStyle(
+                'MemberName',
+                parent=body_style,
+                fontName='Helvetica-Bold',
+                fontSize=12,
+            ),
+            'member_role': ParagraphStyle(
+                'MemberRole',
+                parent=body_style,
+                fontSize=10,
+                textColor=colors.HexColor('#666666'),
+            ),
+        }
+    
+    @staticmethod
+    def generate_pdf(submission_data: Dict[str, Any]) -> BytesIO:
+        """
+        Generate a PDF document from submission data
+        
+        Args:
+            submission_data: Dictionary containing submission content
+            
+        Returns:
+            BytesIO buffer containing the PDF
+        """
+        if not REPORTLAB_AVAILABLE:
+            raise ImportError(
+                "reportlab is required for PDF generation. "
+                "Install with: pip install reportlab"
+            )
+        
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=2*cm, bottomMargin=2*cm)
+        story = []
+        
+        styles = SubmissionPDFService.styles()
+        title_style = styles['title']
+        subtitle_style = styles['subtitle']
+        heading_style = styles['heading']
+        body_style = styles['body']
+        
         content = submission_data.get('content', {})
         
         # Cover Page
@@ -146,11 +193,7 @@ class SubmissionPDFService:
             objectives = mandate.get('objectives', [])
             if objectives:
                 story.append(Spacer(1, 0.3*cm))
-                story.append(Paragraph('Objectifs:', ParagraphStyle(
-                    'ObjectiveTitle',
-                    parent=body_style,
-                    fontName='Helvetica-Bold',
-                )))
+                story.append(Paragraph('Objectifs:', styles['objective_title']))
                 
                 for obj in objectives:
                     if obj:
@@ -168,30 +211,14 @@ class SubmissionPDFService:
                 step_desc = step.get('description', '')
                 step_duration = step.get('duration', '')
                 
-                step_heading = Paragraph(
-                    f"{idx}. {step_title}",
-                    ParagraphStyle(
-                        'StepHeading',
-                        parent=body_style,
-                        fontName='Helvetica-Bold',
-                        fontSize=12,
-                    )
-                )
+                step_heading = Paragraph(f"{idx}. {step_title}", styles['step_heading'])
                 story.append(step_heading)
                 
                 if step_desc:
                     story.append(Paragraph(step_desc, body_style))
                 
                 if step_duration:
-                    story.append(Paragraph(
-                        f"<i>Durée estimée: {step_duration}</i>",
-                        ParagraphStyle(
-                            'Duration',
-                            parent=body_style,
-                            fontSize=10,
-                            textColor=colors.HexColor('#666666'),
-                        )
-                    ))
+                    story.append(Paragraph(f"<i>Durée estimée: {step_duration}</i>", styles['duration']))
                 
                 story.append(Spacer(1, 0.5*cm))
             
@@ -263,26 +290,10 @@ class SubmissionPDFService:
                 member_bio = member.get('bio', '')
                 
                 if member_name:
-                    story.append(Paragraph(
-                        member_name,
-                        ParagraphStyle(
-                            'MemberName',
-                            parent=body_style,
-                            fontName='Helvetica-Bold',
-                            fontSize=12,
-                        )
-                    ))
+                    story.append(Paragraph(member_name, styles['member_name']))
                 
                 if member_role:
-                    story.append(Paragraph(
-                        f"<i>{member_role}</i>",
-                        ParagraphStyle(
-                            'MemberRole',
-                            parent=body_style,
-                            fontSize=10,
-                            textColor=colors.HexColor('#666666'),
-                        )
-                    ))
+                    story.append(Paragraph(f"<i>{member_role}</i>", styles['member_role']))
                 
                 if member_bio:
                     story.append(Paragraph(member_bio, body_style))
@@ -296,3 +307,8 @@ class SubmissionPDFService:
         buffer.seek(0)
         
         return buffer
+    
+    @staticmethod
+    def render(submission_data: Dict[str, Any]) -> bytes:
+        """Render the PDF and return its bytes (used by the render workers)"""
+        return SubmissionPDFService.generate_pdf(submission_data).getvalue()
@@ -0,0 +1,344 @@
+"""
+Task Board Service
+Read model and ordering for the project task board: flat task rows with
+denormalized assignee fields, and lexicographic rank keys so that moving a
+task rewrites that task only
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import Keyset
+from app.models.employee import Employee
+from app.models.project_task import ProjectTask, TaskStatus
+
+# Lowercase base 36: ASCII order, and the same order under usual collations
+RANK_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+RANK_BASE = len(RANK_DIGITS)
+RANK_MAX_LENGTH = 64
+# Appended tasks count up in the first RANK_APPEND_WIDTH digits, so their ranks keep that length
+RANK_APPEND_WIDTH = 10
+
+# Dates set the first time a task reaches a status
+STATUS_DATE_FIELDS = {
+    TaskStatus.IN_PROGRESS: "started_at",
+    TaskStatus.COMPLETED: "completed_at",
+}
+
+# Board order; the id breaks ties
+TASK_KEYSET = Keyset(ProjectTask.rank, ProjectTask.id)
+
+BOARD_COLUMNS = (
+    ProjectTask.id,
+    ProjectTask.title,
+    ProjectTask.description,
+    ProjectTask.status,
+    ProjectTask.priority,
+    ProjectTask.team_id,
+    ProjectTask.project_id,
+    ProjectTask.assignee_id,
+    ProjectTask.assignee_name,
+    ProjectTask.assignee_email,
+    ProjectTask.created_by_id,
+    ProjectTask.due_date,
+    ProjectTask.started_at,
+    ProjectTask.completed_at,
+    ProjectTask.order,
+    ProjectTask.rank,
+    ProjectTask.created_at,
+    ProjectTask.updated_at,
+)
+
+
+class TaskMoveError(ValueError):
+    """Move that cannot be applied (unknown task, neighbours out of order)"""
+
+
+class _RanksTooLong(TaskMoveError):
+    """Neighbours too close for a rank within RANK_MAX_LENGTH (the board needs rebalancing)"""
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """
+    Shortest-ish rank strictly between two ranks (None: open end)
+
+    Ranks are base-36 fractions (digits after the point): the midpoint digit
+    is taken at the first position where the bounds leave room, otherwise
+    the lower digit is kept and the next position is tried. Generated ranks
+    never end with "0", so there is always room between two of them.
+
+    Raises:
+        TaskMoveError: If ``before`` is not lower than ``after``
+    """
+    if before is not None and after is not None and before >= after:
+        raise TaskMoveError(f"Rank {before!r} is not lower than {after!r}")
+
+    digits = []
+    position = 0
+    while True:
+        low = RANK_DIGITS.index(before[position]) if before and position < len(before) else 0
+        high = RANK_DIGITS.index(after[position]) if after is not None and position < len(after) else RANK_BASE
+        if high - low > 1:
+            digits.append(RANK_DIGITS[(low + high) // 2])
+            return "".join(digits)
+        digits.append(RANK_DIGITS[low])
+        if high > low:
+            # Already below ``after``: the upper bound no longer constrains
+            after = None
+        position += 1
+
+
+def rank_after(rank: Optional[str]) -> str:
+    """
+    Rank after ``rank`` that stays short when repeated (appending to the board)
+
+    The first RANK_APPEND_WIDTH digits of ``rank`` are incremented with
+    carry and the rest dropped: unlike ``rank_between(rank, None)``, which
+    halves the distance to the end each time, successive appends keep the
+    same length.
+    """
+    if rank is None:
+        return rank_between(None, None)
+    digits = [RANK_DIGITS.index(digit) for digit in rank[:RANK_APPEND_WIDTH].ljust(RANK_APPEND_WIDTH, "0")]
+    for position in reversed(range(RANK_APPEND_WIDTH)):
+        if digits[position] + 1 < RANK_BASE:
+            digits[position] += 1
+            return "".join(RANK_DIGITS[digit] for digit in digits[:position + 1])
+    # Only "zzz..." left: lengthen
+    return rank_between(rank, None)
+
+
+def initial_ranks(count: int) -> List[str]:
+    """``count`` increasing ranks with room around each (used to seed existing rows)"""
+    return [f"{index:010d}i" for index in range(1, count + 1)]
+
+
+def task_board_row(row: Any) -> Dict[str, Any]:
+    """Response dict of a BOARD_COLUMNS row"""
+    return {
+        "id": row.id,
+        "title": row.title if row.title and row.title.strip() else "Untitled Task",
+        "description": row.description,
+        "status": row.status,
+        "priority": row.priority,
+        "team_id": row.team_id,
+        "project_id": row.project_id,
+        "assignee_id": row.assignee_id,
+        "created_by_id": row.created_by_id,
+        "due_date": row.due_date,
+        "started_at": row.started_at,
+        "completed_at": row.completed_at,
+        "order": row.order or 0,
+        "rank": row.rank,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "assignee_name": row.assignee_name,
+        "assignee_email": row.assignee_email,
+    }
+
+
+class TaskBoardService:
+    """Task board reads and moves"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def employee_user_id(self, employee_id: int) -> Optional[int]:
+        """User linked to an employee, without creating one (reads must not write)"""
+        result = await self.db.execute(select(Employee.user_id).where(Employee.id == employee_id))
+        return result.scalar_one_or_none()
+
+    async def list_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        team_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        assignee_id: Optional[int] = None,
+        task_status: Optional[TaskStatus] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of board rows in rank order, from a single query on project_tasks
+
+        Raises:
+            InvalidCursorError: If the cursor was not issued by this listing
+        """
+        query = select(*BOARD_COLUMNS)
+        if team_id:
+            query = query.where(ProjectTask.team_id == team_id)
+        if project_id:
+            query = query.where(ProjectTask.project_id == project_id)
+        if assignee_id:
+            query = query.where(ProjectTask.assignee_id == assignee_id)
+        if task_status:
+            query = query.where(ProjectTask.status == task_status)
+        result = await self.db.execute(TASK_KEYSET.window(query, limit, cursor, skip))
+        rows, next_cursor = TASK_KEYSET.page(result.all(), limit)
+        return [task_board_row(row) for row in rows], next_cursor
+
+    async def last_rank(self) -> Optional[str]:
+        result = await self.db.execute(select(func.max(ProjectTask.rank)))
+        return result.scalar()
+
+    async def rank_at_end(self) -> str:
+        """Rank after every task (new tasks go to the bottom of their column)"""
+        return rank_after(await self.last_rank())
+
+    async def rebalance(self) -> int:
+        """
+        Rewrite every rank with evenly spaced ones in the current board order
+        (one executemany UPDATE, not committed), once moves made neighbours
+        too close to fit a rank between them
+
+        Returns:
+            Number of tasks
+        """
+        result = await self.db.execute(select(ProjectTask.id).order_by(ProjectTask.rank, ProjectTask.id))
+        ids = result.scalars().all()
+        if ids:
+            await self.db.execute(
+                update(ProjectTask),
+                [{"id": task_id, "rank": rank} for task_id, rank in zip(ids, initial_ranks(len(ids)))],
+            )
+        return len(ids)
+
+    async def _spread_ties(self, ranks: Set[str]) -> List[Tuple[int, str]]:
+        """
+        New ranks for the tasks sharing one of ``ranks``, keeping the board
+        order: the first task by id keeps the rank, the others are spaced
+        out before the next rank on the board
+        """
+        if not ranks:
+            return []
+        result = await self.db.execute(
+            select(ProjectTask.rank)
+            .where(ProjectTask.rank.in_(ranks))
+            .group_by(ProjectTask.rank)
+            .having(func.count() > 1)
+        )
+        spread = []
+        for tied in result.scalars().all():
+            ids = (await self.db.execute(
+                select(ProjectTask.id).where(ProjectTask.rank == tied).order_by(ProjectTask.id)
+            )).scalars().all()
+            upper = (await self.db.execute(
+                select(func.min(ProjectTask.rank)).where(ProjectTask.rank > tied)
+            )).scalar()
+            rank = tied
+            for task_id in ids[1:]:
+                rank = rank_between(rank, upper)
+                spread.append((task_id, rank))
+        return spread
+
+    async def move_many(self, moves: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply a batch of moves with one read and one executemany UPDATE
+        (per set of changed columns: rank only, rank and status, and the
+        started_at/completed_at dates set on the first move to that status)
+
+        Each move is ``{"task_id", "after_id", "before_id", "status"}``: the
+        task is placed right after ``after_id`` and right before
+        ``before_id`` (either may be None for the start or end of the board)
+        and optionally changes status. Moves apply in order, so a move may
+        use a task moved earlier in the batch as neighbour.
+
+        Tasks created concurrently can share a rank (the board orders them
+        by id). When a neighbour's rank is shared, the tied tasks first get
+        distinct ranks in that order, and are returned with the moved ones.
+        When a rank would exceed RANK_MAX_LENGTH, the board is rebalanced and
+        the moves placed again.
+
+        Raises:
+            TaskMoveError: If a task is unknown or the neighbours are out of order
+        """
+        try:
+            changes, ranks, statuses = await self._plan_moves(moves)
+        except _RanksTooLong:
+            await self.rebalance()
+            changes, ranks, statuses = await self._plan_moves(moves)
+
+        # ORM bulk UPDATE by primary key: one executemany, one row per moved task
+        rows = list(changes.values())
+        for keys in {tuple(sorted(row)) for row in rows}:
+            await self.db.execute(update(ProjectTask), [row for row in rows if tuple(sorted(row)) == keys])
+        await self.db.commit()
+        return [
+            {"id": task_id, "rank": ranks[task_id], "status": statuses[task_id]}
+            for task_id in changes
+        ]
+
+    async def _plan_moves(
+        self, moves: Sequence[Dict[str, Any]]
+    ) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, str], Dict[int, Any]]:
+        """(changed rows by task id, ranks, statuses) of a batch of moves, without writing"""
+        ids = {
+            task_id
+            for move in moves
+            for task_id in (move["task_id"], move.get("after_id"), move.get("before_id"))
+            if task_id is not None
+        }
+        result = await self.db.execute(
+            select(
+                ProjectTask.id, ProjectTask.rank, ProjectTask.status,
+                ProjectTask.started_at, ProjectTask.completed_at,
+            ).where(ProjectTask.id.in_(ids))
+        )
+        ranks = {}
+        statuses = {}
+        unset_dates: Dict[int, Set[str]] = {}
+        for task_id, rank, task_status, started_at, completed_at in result.all():
+            ranks[task_id] = rank
+            statuses[task_id] = task_status
+            unset_dates[task_id] = {
+                name for name, value in (("started_at", started_at), ("completed_at", completed_at))
+                if value is None
+            }
+        missing = ids - ranks.keys()
+        if missing:
+            raise TaskMoveError(f"Unknown tasks: {', '.join(str(task_id) for task_id in sorted(missing))}")
+
+        now = datetime.now(timezone.utc)
+        changes: Dict[int, Dict[str, Any]] = {}
+        neighbour_ranks = {
+            ranks[task_id]
+            for move in moves
+            for task_id in (move.get("after_id"), move.get("before_id"))
+            if task_id is not None
+        }
+        for task_id, rank in await self._spread_ties(neighbour_ranks):
+            ranks[task_id] = rank
+            changes[task_id] = {"id": task_id, "rank": rank}
+
+        end_rank = None
+        if any(move.get("after_id") is None and move.get("before_id") is None for move in moves):
+            end_rank = await self.last_rank()
+
+        for move in moves:
+            after_id, before_id = move.get("after_id"), move.get("before_id")
+            if move["task_id"] in (after_id, before_id):
+                raise TaskMoveError(f"Task {move['task_id']} cannot be its own neighbour")
+            if after_id is None and before_id is None:
+                end_rank = rank = rank_after(end_rank)
+            else:
+                lower = ranks[after_id] if after_id is not None else None
+                upper = ranks[before_id] if before_id is not None else None
+                rank = rank_between(lower, upper)
+            ranks[move["task_id"]] = rank
+            change = changes.setdefault(move["task_id"], {"id": move["task_id"]})
+            change["rank"] = rank
+            if move.get("status") is not None:
+                statuses[move["task_id"]] = move["status"]
+                change["status"] = move["status"]
+                # Same bookkeeping as a status change through update_task
+                date_field = STATUS_DATE_FIELDS.get(TaskStatus(move["status"]))
+                if date_field in unset_dates[move["task_id"]]:
+                    unset_dates[move["task_id"]].discard(date_field)
+                    change[date_field] = now
+
+        if any(len(change["rank"]) > RANK_MAX_LENGTH for change in changes.values()):
+            raise _RanksTooLong("Rank too long, the board needs rebalancing")
+        return changes, ranks, statuses
@@ -0,0 +1,113 @@
+"""
+Transaction Import
+Row parser for bank/transaction exports used by the bulk import engine
+"""
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple
+
+from app.services.bulk_import import get_field_value
+
+TYPE_FIELDS = ['type', 'type_transaction', 'entree_sortie', 'entry_exit']
+AMOUNT_FIELDS = ['amount', 'montant', 'montant_transaction']
+DATE_FIELDS = ['date', 'date_transaction', 'date_operation']
+DESCRIPTION_FIELDS = ['description', 'libelle', 'libellé', 'description_transaction']
+CATEGORY_FIELDS = ['category', 'categorie', 'category_name', 'nom_categorie']
+STATUS_FIELDS = ['status', 'statut', 'etat', 'state']
+
+REVENUE_TYPES = {'entree', 'entrée', 'entry', 'entrées', 'revenue', 'revenu'}
+EXPENSE_TYPES = {'sortie', 'exit', 'sorties', 'expense', 'depense', 'dépense'}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d %H:%M:%S']
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = None
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(str(value).strip(), fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            return None
+    # Assume UTC if no timezone info
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _parse_status(value: Any) -> str:
+    status_lower = str(value).lower() if value else ''
+    if status_lower in ['paid', 'paye', 'payé', 'confirmed', 'confirme', 'confirmé']:
+        return 'paid'
+    if status_lower in ['cancelled', 'annule', 'annulé']:
+        return 'cancelled'
+    return 'pending'
+
+
+def parse_transaction_row(row: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate and normalize one transaction row
+
+    Returns:
+        (record, None) with type/status as plain strings and an optional
+        'category_name' to resolve, or (None, error message)
+    """
+    transaction_type = get_field_value(row, TYPE_FIELDS)
+    if not transaction_type:
+        return None, "Missing required field: type"
+    type_str = str(transaction_type).lower().strip()
+    if type_str in REVENUE_TYPES:
+        type_value = 'revenue'
+    elif type_str in EXPENSE_TYPES:
+        type_value = 'expense'
+    else:
+        return None, f"Invalid type: {transaction_type}. Must be 'entry'/'revenue' or 'exit'/'expense'"
+
+    amount = get_field_value(row, AMOUNT_FIELDS)
+    if not amount:
+        return None, "Missing required field: amount"
+    try:
+        amount_decimal = Decimal(str(amount))
+    except (InvalidOperation, ValueError, TypeError):
+        return None, f"Invalid amount: {amount}"
+    if amount_decimal <= 0:
+        return None, "Amount must be greater than 0"
+
+    date_value = get_field_value(row, DATE_FIELDS)
+    if not date_value:
+        return None, "Missing required field: date"
+    transaction_date = _parse_date(date_value)
+    if transaction_date is None:
+        return None, f"Invalid date format: {date_value}"
+
+    description = get_field_value(row, DESCRIPTION_FIELDS)
+    if not description:
+        return None, "Missing required field: description"
+
+    # Optional fields that don't have dedicated columns
+    transaction_metadata = {}
+    payment_method = get_field_value(row, ['payment_method', 'methode_paiement', 'moyen_paiement'])
+    if payment_method:
+        transaction_metadata['payment_method'] = str(payment_method)
+    reference_number = get_field_value(row, ['reference', 'reference_number', 'numero_reference', 'numero'])
+    if reference_number:
+        transaction_metadata['reference_number'] = str(reference_number)
+
+    notes = get_field_value(row, ['notes', 'remarques', 'commentaires'])
+    category_name = get_field_value(row, CATEGORY_FIELDS)
+
+    return {
+        'type': type_value,
+        'amount': amount_decimal,
+        'transaction_date': transaction_date,
+        'description': str(description),
+        'notes': str(notes) if notes else None,
+        'status': _parse_status(get_field_value(row, STATUS_FIELDS)),
+        'category_name': str(category_name) if category_name else None,
+        'transaction_metadata': json.dumps(transaction_metadata) if transaction_metadata else None,
+    }, None
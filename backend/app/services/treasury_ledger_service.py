@@ -0,0 +1,145 @@
+"""
+Treasury Ledger Service
+Read side of the materialized treasury ledger (cashflow, balances, totals)
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, func, and_, delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.treasury_ledger import TreasuryLedgerDay, ledger_backfill_sql, lock_ledger_users
+from app.core.logging import logger
+
+
+@dataclass
+class LedgerWeek:
+    """Aggregated ledger values for one week (Monday to Sunday)"""
+    week_start: date
+    week_end: date
+    entries: Decimal
+    exits: Decimal
+    balance: Decimal
+
+
+class TreasuryLedgerService:
+    """Service for querying the per-day treasury ledger"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def _as_day(value) -> date:
+        return value.date() if isinstance(value, datetime) else value
+
+    async def balance_before(self, user_id: int, day) -> Decimal:
+        """Cumulative net of all transactions strictly before ``day``"""
+        result = await self.db.execute(
+            select(TreasuryLedgerDay.running_balance)
+            .where(and_(TreasuryLedgerDay.user_id == user_id, TreasuryLedgerDay.day < self._as_day(day)))
+            .order_by(TreasuryLedgerDay.day.desc())
+            .limit(1)
+        )
+        return Decimal(str(result.scalar() or 0))
+
+    async def balance_at(self, user_id: int, day) -> Decimal:
+        """Cumulative net of all transactions up to and including ``day``"""
+        return await self.balance_before(user_id, self._as_day(day) + timedelta(days=1))
+
+    async def totals(self, user_id: int, start_day, end_day) -> Tuple[Decimal, Decimal]:
+        """Sum of entries and exits between two days (inclusive)"""
+        result = await self.db.execute(
+            select(
+                func.coalesce(func.sum(TreasuryLedgerDay.entries), 0),
+                func.coalesce(func.sum(TreasuryLedgerDay.exits), 0),
+            ).where(
+                and_(
+                    TreasuryLedgerDay.user_id == user_id,
+                    TreasuryLedgerDay.day >= self._as_day(start_day),
+                    TreasuryLedgerDay.day <= self._as_day(end_day),
+                )
+            )
+        )
+        entries, exits = result.one()
+        return Decimal(str(entries)), Decimal(str(exits))
+
+    async def weekly_cashflow(self, user_id: int, date_from, date_to) -> Tuple[Decimal, List[LedgerWeek]]:
+        """
+        Weekly entries/exits and end-of-week balances between two dates
+
+        Reads at most one ledger row per day of the window plus one row for
+        the opening balance, independently of the number of transactions.
+
+        Returns:
+            (opening balance before the first week, weeks)
+        """
+        start_day = self._as_day(date_from)
+        end_day = self._as_day(date_to)
+        first_week_start = start_day - timedelta(days=start_day.weekday())
+
+        opening_balance = await self.balance_before(user_id, first_week_start)
+
+        result = await self.db.execute(
+            select(TreasuryLedgerDay.day, TreasuryLedgerDay.entries, TreasuryLedgerDay.exits)
+            .where(
+                and_(
+                    TreasuryLedgerDay.user_id == user_id,
+                    TreasuryLedgerDay.day >= first_week_start,
+                    TreasuryLedgerDay.day <= end_day,
+                )
+            )
+            .order_by(TreasuryLedgerDay.day)
+        )
+        rows = result.all()
+
+        weeks: List[LedgerWeek] = []
+        week_start = first_week_start
+        balance = opening_balance
+        row_index = 0
+        while week_start <= end_day:
+            week_end = week_start + timedelta(days=6)
+            entries = Decimal(0)
+            exits = Decimal(0)
+            while row_index < len(rows) and rows[row_index].day <= week_end:
+                entries += Decimal(str(rows[row_index].entries))
+                exits += Decimal(str(rows[row_index].exits))
+                row_index += 1
+            balance = balance + entries - exits
+            weeks.append(LedgerWeek(week_start, week_end, entries, exits, balance))
+            week_start = week_end + timedelta(days=1)
+
+        return opening_balance, weeks
+
+    async def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        Recompute the ledger from the transactions table
+
+        Used after bulk statements that bypass the ORM (raw SQL, cascades).
+
+        Returns:
+            Number of ledger rows written
+        """
+        delete_stmt = delete(TreasuryLedgerDay)
+        user_filter = ""
+        params = {}
+        if user_id is not None:
+            delete_stmt = delete_stmt.where(TreasuryLedgerDay.user_id == user_id)
+            user_filter = "AND user_id = :user_id"
+            params["user_id"] = user_id
+
+        dialect = self.db.get_bind().dialect.name
+        if user_id is not None:
+            await self.db.run_sync(lambda session: lock_ledger_users(session.connection(), [user_id]))
+        elif dialect == "postgresql":
+            # Blocks incremental writers (ROW EXCLUSIVE) until the rebuild commits
+            await self.db.execute(text("LOCK TABLE treasury_ledger_days IN SHARE ROW EXCLUSIVE MODE"))
+
+        await self.db.execute(delete_stmt)
+        result = await self.db.execute(ledger_backfill_sql(dialect, user_filter), params)
+        await self.db.commit()
+
+        logger.info(f"Treasury ledger rebuilt (user_id={user_id}, rows={result.rowcount})")
+        return result.rowcount
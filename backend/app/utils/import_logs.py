@@ -1,56 +1,319 @@
 """
 Shared utilities for import logging via Server-Sent Events (SSE)
+
+Import jobs publish their logs and status through ``import_jobs``. With Redis,
+each job is a capped stream plus a status key, both expiring after
+IMPORT_JOB_TTL, so the SSE request can be served by any worker. Without Redis
+an in-process store with the same limits is used.
 """
-from typing import Dict, List, Optional
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime as dt
 import json
 import asyncio
+import time
 from fastapi import HTTPException, status, Request, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.cache import redis_client_or_none
+from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
 from app.core.logging import logger
 
-# In-memory store for import logs (in production, use Redis)
-import_logs: Dict[str, List[Dict[str, any]]] = {}
-import_status: Dict[str, Dict[str, any]] = {}
+IMPORT_JOB_PREFIX = "import:job:"
+MAX_LOGS_PER_JOB = 1000
+MAX_LOCAL_JOBS = 200
+FINAL_STATUSES = ("completed", "failed")
+PROGRESS_EVENT_INTERVAL = 0.5  # Minimum seconds between two progress events of a job
+SSE_HEARTBEAT_INTERVAL = 15  # Seconds without event before a keep-alive comment
+# Clients pick the import id and may open the log stream just before the import request starts it
+IMPORT_JOB_START_GRACE = 30  # Seconds to wait for an unknown job before answering 404
+JOB_LOOKUP_INTERVAL = 0.5
+WRITE_QUEUE_SIZE = 10000
+
+
+def _events_key(import_id: str) -> str:
+    return f"{IMPORT_JOB_PREFIX}{import_id}:events"
+
+
+def _status_key(import_id: str) -> str:
+    return f"{IMPORT_JOB_PREFIX}{import_id}:status"
+
+
+def _is_final(event: Dict) -> bool:
+    return event.get("type") == "status" and event.get("data", {}).get("status") in FINAL_STATUSES
+
+
+class _LocalJob:
+    """Events and status of a job when Redis is not configured"""
+
+    __slots__ = ("events", "next_seq", "status", "changed", "expires_at")
+
+    def __init__(self):
+        self.events: deque = deque(maxlen=MAX_LOGS_PER_JOB)
+        self.next_seq = 1
+        self.status: Optional[Dict] = None
+        self.changed = asyncio.Event()
+        self.expires_at = 0.0
+
+
+class ImportJobStore:
+    """
+    Import job logs and status, pushed to subscribers
+
+    Publishing is synchronous (import loops call it between rows): with Redis,
+    events are queued and a background task writes them in pipelined batches
+    (XADD with MAXLEN, status SET with TTL). Subscribers block on XREAD
+    instead of polling. Per-row progress updates are coalesced: the status key
+    always holds the latest values, but a status event is only emitted when
+    the status changes or every PROGRESS_EVENT_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._local: "OrderedDict[str, _LocalJob]" = OrderedDict()
+        # Status of the jobs run by this process (merged by update_status)
+        self._statuses: "OrderedDict[str, Dict]" = OrderedDict()
+        self._last_progress_event: Dict[str, float] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    # ---------- Publishing ----------
+
+    def start(self, import_id: str, **fields) -> None:
+        job_status = {
+            "status": "started",
+            "progress": 0,
+            "total": 0,
+            "created_at": dt.now().isoformat(),
+            **fields,
+        }
+        self._remember_status(import_id, job_status)
+        self._publish(import_id, {"type": "status", "data": dict(job_status)}, job_status)
+
+    def log(self, import_id: str, message: str, level: str = "info", data: Optional[Dict] = None) -> None:
+        log_entry = {
+            "timestamp": dt.now().isoformat(),
+            "level": level,
+            "message": message,
+            "data": data or {}
+        }
+        self._publish(import_id, log_entry, None)
+
+    def update_status(self, import_id: str, job_status: str, progress: Optional[int] = None, total: Optional[int] = None) -> None:
+        current = self._statuses.get(import_id) or {}
+        status_changed = current.get("status") != job_status
+
+        updated = {**current, "status": job_status, "updated_at": dt.now().isoformat()}
+        if progress is not None:
+            updated["progress"] = progress
+        if total is not None:
+            updated["total"] = total
+        self._remember_status(import_id, updated)
+
+        now = time.monotonic()
+        emit = (
+            status_changed
+            or job_status in FINAL_STATUSES
+            or now - self._last_progress_event.get(import_id, 0.0) >= PROGRESS_EVENT_INTERVAL
+        )
+        if emit:
+            self._last_progress_event[import_id] = now
+        self._publish(import_id, {"type": "status", "data": dict(updated)} if emit else None, updated)
+
+    def _remember_status(self, import_id: str, job_status: Dict) -> None:
+        self._statuses[import_id] = job_status
+        self._statuses.move_to_end(import_id)
+        while len(self._statuses) > MAX_LOCAL_JOBS:
+            old_id, _ = self._statuses.popitem(last=False)
+            self._last_progress_event.pop(old_id, None)
+
+    def _publish(self, import_id: str, event: Optional[Dict], job_status: Optional[Dict]) -> None:
+        if redis_client_or_none() is None:
+            self._publish_local(import_id, event, job_status)
+            return
+
+        item = (import_id, event, dict(job_status) if job_status else None)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Published from a worker thread: hand the event to the writer's loop
+            if self._writer is None or self._writer.done():
+                logger.warning(f"No import job writer running, dropping event for import {import_id}")
+                return
+            self._writer.get_loop().call_soon_threadsafe(self._enqueue, item)
+            return
+        self._ensure_writer(loop)
+        self._enqueue(item)
+
+    def _enqueue(self, item: Tuple[str, Optional[Dict], Optional[Dict]]) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            logger.warning(f"Import job queue full, dropping event for import {item[0]}")
+
+    def _publish_local(self, import_id: str, event: Optional[Dict], job_status: Optional[Dict]) -> None:
+        job = self._local_job(import_id)
+        if job_status is not None:
+            job.status = dict(job_status)
+        if event is not None:
+            job.events.append((job.next_seq, event))
+            job.next_seq += 1
+        # Wake up the subscribers waiting on the previous event
+        changed, job.changed = job.changed, asyncio.Event()
+        changed.set()
+
+    def _local_job(self, import_id: str) -> _LocalJob:
+        now = time.monotonic()
+        while self._local:
+            oldest_id, oldest = next(iter(self._local.items()))
+            if oldest.expires_at > now and len(self._local) <= MAX_LOCAL_JOBS:
+                break
+            del self._local[oldest_id]
+
+        job = self._local.get(import_id)
+        if job is None:
+            job = self._local[import_id] = _LocalJob()
+        job.expires_at = now + settings.IMPORT_JOB_TTL
+        self._local.move_to_end(import_id)
+        return job
+
+    def _ensure_writer(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._writer is None or self._writer.done() or self._writer.get_loop() is not loop:
+            self._queue = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+            self._writer = loop.create_task(self._write_loop(self._queue))
+
+    async def _write_loop(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch: List[Tuple[str, Optional[Dict], Optional[Dict]]] = [await queue.get()]
+            while not queue.empty() and len(batch) < 500:
+                batch.append(queue.get_nowait())
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.warning(f"Failed to write {len(batch)} import job event(s) to Redis: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[str, Optional[Dict], Optional[Dict]]]) -> None:
+        ttl = settings.IMPORT_JOB_TTL
+        latest_status: Dict[str, Dict] = {}
+        pipe = redis_client_or_none().pipeline(transaction=False)
+        for import_id, event, job_status in batch:
+            if event is not None:
+                pipe.xadd(_events_key(import_id), {"e": json.dumps(event)}, maxlen=MAX_LOGS_PER_JOB, approximate=True)
+            if job_status is not None:
+                latest_status[import_id] = job_status
+        for import_id in {item[0] for item in batch}:
+            pipe.expire(_events_key(import_id), ttl)
+        for import_id, job_status in latest_status.items():
+            pipe.set(_status_key(import_id), json.dumps(job_status), ex=ttl)
+        await pipe.execute()
+
+    async def flush(self) -> None:
+        """Wait until queued events are written (no-op without Redis)"""
+        if self._queue is not None and self._writer is not None and not self._writer.done():
+            await self._queue.join()
+
+    # ---------- Reading ----------
+
+    async def get_status(self, import_id: str) -> Optional[Dict]:
+        redis_client = redis_client_or_none()
+        if redis_client is None:
+            job = self._local.get(import_id)
+            return dict(job.status) if job and job.status else None
+
+        raw = await redis_client.get(_status_key(import_id))
+        return json.loads(raw) if raw else None
+
+    async def exists(self, import_id: str, timeout: float = 0) -> bool:
+        """Whether the job has been started or logged to, waiting up to ``timeout`` seconds for it"""
+        deadline = time.monotonic() + timeout
+        while True:
+            redis_client = redis_client_or_none()
+            if redis_client is None:
+                if import_id in self._local:
+                    return True
+            elif import_id in self._statuses or await redis_client.exists(
+                _status_key(import_id), _events_key(import_id)
+            ):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(JOB_LOOKUP_INTERVAL)
+
+    async def subscribe(self, import_id: str, idle_timeout: Optional[float] = None) -> AsyncIterator[Optional[Dict]]:
+        """
+        Yield the events of a job from its first one, until its final status
+
+        Yields None after SSE_HEARTBEAT_INTERVAL seconds without event. Stops
+        after ``idle_timeout`` seconds (default IMPORT_JOB_TTL) without event.
+        """
+        idle_timeout = settings.IMPORT_JOB_TTL if idle_timeout is None else idle_timeout
+        source = self._subscribe_redis if redis_client_or_none() is not None else self._subscribe_local
+        last_event_at = time.monotonic()
+        async for event in source(import_id):
+            if event is not None:
+                last_event_at = time.monotonic()
+            elif time.monotonic() - last_event_at >= idle_timeout:
+                return
+            yield event
+            if event is not None and _is_final(event):
+                return
+
+    async def _subscribe_redis(self, import_id: str) -> AsyncIterator[Optional[Dict]]:
+        redis_client = redis_client_or_none()
+        key = _events_key(import_id)
+        last_id = "0-0"
+        while True:
+            response = await redis_client.xread({key: last_id}, count=200, block=SSE_HEARTBEAT_INTERVAL * 1000)
+            if not response:
+                yield None
+                continue
+            for _stream, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    yield json.loads(fields.get(b"e") or fields.get("e"))
+
+    async def _subscribe_local(self, import_id: str) -> AsyncIterator[Optional[Dict]]:
+        last_seq = 0
+        while True:
+            job = self._local.get(import_id)
+            if job is None:
+                # Unknown or expired job: nothing to stream
+                return
+            pending = [(seq, event) for seq, event in job.events if seq > last_seq]
+            changed = job.changed
+            for seq, event in pending:
+                last_seq = seq
+                yield event
+            if pending:
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=SSE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield None
+
+
+import_jobs = ImportJobStore()
+
+
+def start_import_job(import_id: str, **fields) -> None:
+    """Reset the status of an import and notify subscribers that it started"""
+    import_jobs.start(import_id, **fields)
 
 
 def add_import_log(import_id: str, message: str, level: str = "info", data: Optional[Dict] = None):
     """Add a log entry to the import logs"""
-    if import_id not in import_logs:
-        import_logs[import_id] = []
-    
-    log_entry = {
-        "timestamp": dt.now().isoformat(),
-        "level": level,
-        "message": message,
-        "data": data or {}
-    }
-    import_logs[import_id].append(log_entry)
-    
-    # Keep only last 1000 logs per import
-    if len(import_logs[import_id]) > 1000:
-        import_logs[import_id] = import_logs[import_id][-1000:]
+    import_jobs.log(import_id, message, level, data)
 
 
 def update_import_status(import_id: str, status: str, progress: Optional[int] = None, total: Optional[int] = None):
     """Update import status"""
-    if import_id not in import_status:
-        import_status[import_id] = {}
-    
-    import_status[import_id].update({
-        "status": status,
-        "updated_at": dt.now().isoformat()
-    })
-    
-    if progress is not None:
-        import_status[import_id]["progress"] = progress
-    if total is not None:
-        import_status[import_id]["total"] = total
+    import_jobs.update_status(import_id, status, progress, total)
 
 
 async def get_current_user_from_query(
@@ -100,40 +363,25 @@ async def get_current_user_from_query(
     return user
 
 
+async def require_import_job(import_id: str) -> None:
+    """
+    Raise 404 unless the import job exists or is started within
+    IMPORT_JOB_START_GRACE seconds (call before opening the log stream)
+    """
+    if not await import_jobs.exists(import_id, timeout=IMPORT_JOB_START_GRACE):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+
+
 async def stream_import_logs_generator(import_id: str):
-    """Generator function for SSE streaming of import logs"""
-    last_index = 0
-    
-    while True:
-        # Check if import is complete
-        if import_id in import_status:
-            status_info = import_status[import_id]
-            if status_info.get("status") == "completed" or status_info.get("status") == "failed":
-                # Send final logs
-                if import_id in import_logs:
-                    logs = import_logs[import_id]
-                    for log in logs[last_index:]:
-                        yield f"data: {json.dumps(log)}\n\n"
-                
-                # Send final status
-                yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
-                break
-        
-        # Send new logs
-        if import_id in import_logs:
-            logs = import_logs[import_id]
-            if len(logs) > last_index:
-                for log in logs[last_index:]:
-                    yield f"data: {json.dumps(log)}\n\n"
-                last_index = len(logs)
-        
-        # Send status update
-        if import_id in import_status:
-            status_info = import_status[import_id]
-            yield f"data: {json.dumps({'type': 'status', 'data': status_info})}\n\n"
-        
-        await asyncio.sleep(0.5)  # Check every 500ms
+    """Generator function for SSE streaming of import logs (pushed, works across workers)"""
+    async for event in import_jobs.subscribe(import_id):
+        if event is None:
+            # SSE comment: keeps proxies from closing an idle connection
+            yield ": keep-alive\n\n"
+            continue
+        yield f"data: {json.dumps(event)}\n\n"
+        if _is_final(event):
+            yield f"data: {json.dumps({'type': 'done'})}\n\n"
 
 
 def create_sse_logs_endpoint(router, endpoint_path: str):
@@ -155,6 +403,7 @@ def create_sse_logs_endpoint(router, endpoint_path: str):
         Stream import logs via Server-Sent Events (SSE)
         Note: Uses query parameter authentication because EventSource doesn't support custom headers
         """
+        await require_import_job(import_id)
         return StreamingResponse(
             stream_import_logs_generator(import_id),
             media_type="text/event-stream",
@@ -17,7 +17,7 @@ from typing import Generator
 from app.main import app
 from app.core.database import Base, get_db
 from app.models.user import User
-from app.core.auth import get_password_hash, create_access_token
+from app.core.security import hash_password as get_password_hash, create_access_token
 from datetime import timedelta
 
 
@@ -48,6 +48,37 @@ async def db() -> Generator[AsyncSession, None, None]:
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture
+async def make_sqlite_engine(tmp_path):
+    """
+    Factory of SQLite engines with only the given models (or tables) created,
+    since the full metadata uses PostgreSQL-only types
+
+    Usage:
+        engine = await make_sqlite_engine(User, Project)
+
+    ``file=True`` gives a database file instead of memory, for tests whose
+    sessions each need their own connection to the same data.
+    """
+    engines = []
+
+    async def make(*models, file: bool = False):
+        if file:
+            url = f"sqlite+aiosqlite:///{tmp_path / f'test_{len(engines)}.db'}"
+        else:
+            url = "sqlite+aiosqlite:///:memory:"
+        sqlite_engine = create_async_engine(url)
+        engines.append(sqlite_engine)
+        tables = [getattr(model, "__table__", model) for model in models]
+        async with sqlite_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+        return sqlite_engine
+
+    yield make
+    for sqlite_engine in engines:
+        await sqlite_engine.dispose()
+
+
 @pytest.fixture(scope="function")
 def client(db: AsyncSession) -> Generator[TestClient, None, None]:
     """Create a test client"""
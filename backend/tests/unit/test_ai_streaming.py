@@ -0,0 +1,101 @@
+"""
+Tests for streamed AI completions (fake provider, /ai/chat/stream)
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import ai as ai_api
+from app.services.ai_fake_provider import FakeAIProvider
+from app.services.ai_service import AIProvider, AIService
+
+
+@pytest.fixture
+def fake_provider(monkeypatch):
+    monkeypatch.setenv("AI_FAKE_PROVIDER", "true")
+    monkeypatch.delenv("AI_FAKE_REPLY", raising=False)
+
+
+async def _collect(stream):
+    return [event async for event in stream]
+
+
+@pytest.mark.asyncio
+async def test_fake_stream_yields_deltas_then_usage(fake_provider):
+    service = AIService(provider=AIProvider.FAKE)
+    events = await _collect(service.stream_chat_completion(
+        [{"role": "user", "content": "combien de contacts"}],
+        system_prompt="Tu es Leo",
+    ))
+
+    deltas = [event["content"] for event in events if event["type"] == "delta"]
+    assert deltas == ["Echo:", " combien", " de", " contacts"]
+    done = events[-1]
+    assert done["type"] == "done" and done["content"] == "".join(deltas)
+    assert done["provider"] == "fake" and done["finish_reason"] == "stop"
+    assert done["usage"] == {"prompt_tokens": 6, "completion_tokens": 4, "total_tokens": 10}
+
+    # Non-streamed completion: same fields as the done event
+    response = await service.chat_completion([{"role": "user", "content": "bonjour"}], max_tokens=1)
+    assert response["content"] == "Echo:" and response["finish_reason"] == "length"
+    assert "type" not in response
+
+
+def test_fake_provider_requires_opt_in(monkeypatch):
+    monkeypatch.delenv("AI_FAKE_PROVIDER", raising=False)
+    with pytest.raises(ValueError):
+        AIService(provider=AIProvider.FAKE)
+    assert "fake" not in AIService.get_available_providers()
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_overlaps_context_and_connection(fake_provider, monkeypatch):
+    class SlowProvider(FakeAIProvider):
+        def __init__(self):
+            super().__init__(reply="Vous avez 3 contacts", connect_delay=0.2)
+
+    monkeypatch.setattr("app.services.ai_service.FakeAIProvider", SlowProvider)
+
+    async def slow_system_prompt(plan, request, current_user, db):
+        await asyncio.sleep(0.2)  # ERP context retrieval
+        return "Tu es Leo"
+
+    monkeypatch.setattr(ai_api, "_leo_system_prompt", slow_system_prompt)
+
+    request = ai_api.ChatRequest(
+        messages=[ai_api.ChatMessage(role="user", content="combien de contacts ?")],
+        provider="fake",
+    )
+    started = time.perf_counter()
+    # Without a database, Leo settings fall back to their defaults
+    response = await ai_api.chat_completion_stream(request, current_user=SimpleNamespace(id=1), db=None)
+    assert response.media_type == "text/event-stream"
+    assert response.headers["x-accel-buffering"] == "no"
+
+    body = "".join([chunk async for chunk in response.body_iterator])
+    elapsed = time.perf_counter() - started
+    # Connection (0.2s) and context (0.2s) run concurrently
+    assert elapsed < 0.35
+
+    events = [json.loads(line[len("data: "):]) for line in body.split("\n\n") if line]
+    assert [event["type"] for event in events] == ["delta"] * 4 + ["done"]
+    assert events[-1]["content"] == "Vous avez 3 contacts"
+    assert events[-1]["usage"]["completion_tokens"] == 4
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_reports_provider_errors(fake_provider, monkeypatch):
+    async def failing_stream(self, messages, system_prompt, max_tokens):
+        raise RuntimeError("provider down")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(FakeAIProvider, "stream", failing_stream)
+    request = ai_api.ChatRequest(messages=[ai_api.ChatMessage(role="user", content="salut")], provider="fake")
+    response = await ai_api.chat_completion_stream(request, current_user=SimpleNamespace(id=1), db=None)
+
+    body = "".join([chunk async for chunk in response.body_iterator])
+    assert json.loads(body[len("data: "):]) == {"type": "error", "detail": "AI service error: provider down"}
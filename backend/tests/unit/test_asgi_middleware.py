@@ -0,0 +1,156 @@
+"""
+Tests for the pure-ASGI middleware stack
+"""
+
+import asyncio
+import gzip
+import zlib
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.api_versioning import APIVersioningMiddleware
+from app.core.cache_headers import CacheHeadersMiddleware, version_etag
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.request_limits import RequestSizeLimitMiddleware
+
+
+calls = []
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/items")
+    async def items(request: Request):
+        return {"version": request.state.api_version, "items": ["x" * 50] * 50}
+
+    @app.get("/api/v1/stream")
+    async def stream():
+        async def chunks():
+            for i in range(20):
+                yield f"line {i} {'y' * 200}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/api/v1/versioned")
+    async def versioned():
+        async def rows():
+            raise AssertionError("body must not be produced for a 304")
+            yield b""
+
+        calls.append("versioned")
+        return StreamingResponse(rows(), media_type="application/json", headers={"ETag": version_etag(42, "2026-01-01")})
+
+    @app.get("/api/v1/events")
+    async def events():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.post("/api/v1/upload")
+    async def upload(request: Request):
+        return {"received": len(await request.body())}
+
+    app.add_middleware(RequestSizeLimitMiddleware, default_limit=1000)
+    app.add_middleware(CacheHeadersMiddleware, default_max_age=300)
+    app.add_middleware(CompressionMiddleware, min_size=500, use_brotli=False)
+    app.add_middleware(APIVersioningMiddleware)
+    return app
+
+
+class TestASGIMiddlewareStack:
+    """Middlewares compose without BaseHTTPMiddleware"""
+
+    def test_state_and_response_headers(self):
+        client = TestClient(build_app())
+        response = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.json()["version"] == "v1"
+        assert response.headers["X-API-Version"] == "v1"
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_etag_not_modified(self):
+        client = TestClient(build_app())
+        first = client.get("/api/v1/items", headers={"Accept-Encoding": "identity"})
+        etag = first.headers["ETag"]
+
+        second = client.get("/api/v1/items", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+
+    def test_streamed_response_compressed_by_chunks(self):
+        client = TestClient(build_app())
+        with client.stream("GET", "/api/v1/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert "Content-Length" not in response.headers
+            assert "ETag" not in response.headers
+            raw = b"".join(response.iter_raw())
+        lines = gzip.decompress(raw).decode().splitlines()
+        assert len(lines) == 20
+        assert lines[-1].startswith("line 19 ")
+
+    def test_chunked_upload_over_limit(self):
+        client = TestClient(build_app())
+
+        def body():
+            for _ in range(5):
+                yield b"z" * 400
+
+        response = client.post("/api/v1/upload", content=body())
+        assert response.status_code == 413
+
+        response = client.post("/api/v1/upload", content=b"z" * 400)
+        assert response.json() == {"received": 400}
+
+    def test_negotiate_encoding(self):
+        available = ["br", "zstd", "gzip"]
+        assert negotiate_encoding("gzip, deflate, br", available) == "br"
+        assert negotiate_encoding("br;q=0.5, gzip", available) == "gzip"
+        assert negotiate_encoding("br;q=0, *;q=0.1", available) == "zstd"
+        assert negotiate_encoding("identity", available) is None
+
+    def test_compressed_etag_is_weak_and_revalidates(self):
+        client = TestClient(build_app())
+        first = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+        etag = first.headers["ETag"]
+        assert etag.startswith('W/"')
+
+        second = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert second.status_code == 304
+        assert "Content-Encoding" not in second.headers
+
+    def test_endpoint_etag_answers_before_body(self):
+        client = TestClient(build_app())
+        etag = version_etag(42, "2026-01-01")
+        response = client.get("/api/v1/versioned", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert calls[-1] == "versioned"
+
+    def test_event_stream_chunks_flushed(self):
+        app = build_app()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/v1/events", "raw_path": b"/api/v1/events", "root_path": "",
+            "query_string": b"", "headers": [(b"accept-encoding", b"gzip")],
+            "client": ("127.0.0.1", 1), "server": ("testserver", 80),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(app(scope, receive, send))
+        bodies = [message.get("body", b"") for message in messages if message["type"] == "http.response.body"]
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        # Each event is decodable as soon as its chunk arrives
+        assert [decoder.decompress(body) for body in bodies[:3]] == [b"data: 0\n\n", b"data: 1\n\n", b"data: 2\n\n"]
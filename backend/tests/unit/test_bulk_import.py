@@ -0,0 +1,169 @@
+"""
+Tests for the streaming bulk import engine
+"""
+
+import io
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.import_checkpoint import ImportCheckpoint
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.treasury_ledger import TreasuryLedgerDay, apply_ledger_deltas, ledger_deltas_for_rows
+from app.services.bulk_import import BulkImporter, iter_rows, open_import_source, read_import_rows
+from app.services.transaction_import import parse_transaction_row
+
+
+CSV_CONTENT = (
+    "Type;Montant;Date;Libellé;Statut\n"
+    "entrée;100.50;2026-03-02;Vente;payé\n"
+    "sortie;40;02/03/2026;Loyer;\n"
+    "sortie;-5;2026-03-03;Invalide;\n"
+    "entry;20;2026-03-04;Service;\n"
+).encode("utf-8")
+
+
+@pytest.fixture(autouse=True)
+def parse_in_thread(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_WORKERS", 0)
+
+
+@pytest.fixture
+async def session(make_sqlite_engine):
+    engine = await make_sqlite_engine(Transaction, TreasuryLedgerDay, ImportCheckpoint)
+    async with AsyncSession(engine) as session:
+        yield session
+
+
+def _importer(session, **kwargs):
+    async def prepare(records):
+        for record in records:
+            record.pop("category_name")
+            record.update(
+                user_id=1,
+                type=TransactionType(record["type"]),
+                status=TransactionStatus(record["status"]),
+            )
+        return records
+
+    async def update_ledger(records):
+        deltas = ledger_deltas_for_rows(records)
+        await session.run_sync(lambda s: apply_ledger_deltas(s.connection(), deltas))
+
+    return BulkImporter(session, Transaction, parse_transaction_row, prepare=prepare, on_written=update_ledger, **kwargs)
+
+
+def test_csv_rows_are_streamed_with_sniffed_delimiter():
+    source = open_import_source(io.BytesIO(CSV_CONTENT), "export.csv")
+    rows = list(iter_rows(source))
+
+    assert len(rows) == 4
+    assert rows[0] == {"Type": "entrée", "Montant": "100.50", "Date": "2026-03-02", "Libellé": "Vente", "Statut": "payé"}
+    assert rows[1]["Statut"] is None
+
+
+def test_zip_with_excel_and_instructions():
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Nom", "Ville"])
+    sheet.append(["Nukleo", " Montréal "])
+    sheet.append([None, None])
+    excel = io.BytesIO()
+    workbook.save(excel)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("entreprises.xlsx", excel.getvalue())
+        zip_file.writestr("INSTRUCTIONS.txt", "Lisez-moi")
+
+    source = open_import_source(archive, "import.zip")
+    try:
+        assert source.format == "xlsx"
+        assert source.instructions == "Lisez-moi"
+        assert list(iter_rows(source)) == [{"Nom": "Nukleo", "Ville": "Montréal"}]
+    finally:
+        source.close()
+
+
+@pytest.mark.asyncio
+async def test_read_import_rows_matches_import_service_shape():
+    result = await read_import_rows(io.BytesIO(CSV_CONTENT), "export.csv")
+
+    assert result["total_rows"] == 4
+    assert result["data"][2]["Montant"] == "-5"
+    assert result["errors"] == []
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        open_import_source(io.BytesIO(b"x"), "export.pdf")
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_written_and_ledger_updated(session):
+    source = open_import_source(io.BytesIO(CSV_CONTENT), "export.csv")
+    result = await _importer(session, chunk_size=2).run(iter_rows(source))
+
+    assert (result.total_rows, result.valid_rows, result.invalid_rows, result.inserted) == (4, 3, 1, 3)
+    assert result.errors[0]["row"] == 3
+    assert result.errors[0]["error"] == "Amount must be greater than 0"
+    assert await session.scalar(select(func.count()).select_from(Transaction)) == 3
+
+    ledger = await session.execute(select(TreasuryLedgerDay.day, TreasuryLedgerDay.running_balance).order_by(TreasuryLedgerDay.day))
+    assert ledger.all() == [(date(2026, 3, 2), Decimal("60.50")), (date(2026, 3, 4), Decimal("80.50"))]
+
+
+@pytest.mark.asyncio
+async def test_dry_run_writes_nothing(session):
+    source = open_import_source(io.BytesIO(CSV_CONTENT), "export.csv")
+    result = await _importer(session, dry_run=True).run(iter_rows(source))
+
+    assert result.valid_rows == 3
+    assert len(result.preview) == 3
+    assert await session.scalar(select(func.count()).select_from(Transaction)) == 0
+
+
+@pytest.mark.asyncio
+async def test_resume_from_checkpoint(session):
+    # A previous run committed the first two rows before failing
+    session.add(ImportCheckpoint(key="transactions:1:abc", offset=2))
+    await session.commit()
+    source = open_import_source(io.BytesIO(CSV_CONTENT), "export.csv")
+    result = await _importer(session, chunk_size=3, checkpoint_key="transactions:1:abc").run(iter_rows(source))
+
+    assert result.resumed_from == 2
+    assert result.total_rows == 4
+    assert result.inserted == 1
+    assert await session.scalar(select(func.count()).select_from(ImportCheckpoint)) == 0
+
+
+@pytest.mark.asyncio
+async def test_interrupted_import_resumes_without_duplicates(session):
+    importer = _importer(session, chunk_size=2, checkpoint_key="transactions:1:abc")
+    on_written = importer.on_written
+    chunks = []
+
+    async def fail_on_second_chunk(records):
+        chunks.append(records)
+        if len(chunks) == 2:
+            raise RuntimeError("worker killed")
+        await on_written(records)
+
+    importer.on_written = fail_on_second_chunk
+    with pytest.raises(RuntimeError):
+        await importer.run(iter_rows(open_import_source(io.BytesIO(CSV_CONTENT), "export.csv")))
+    await session.rollback()
+    # The checkpoint was committed with the first chunk, and only with it
+    assert await session.scalar(select(ImportCheckpoint.offset)) == 2
+
+    result = await _importer(session, chunk_size=2, checkpoint_key="transactions:1:abc").run(
+        iter_rows(open_import_source(io.BytesIO(CSV_CONTENT), "export.csv"))
+    )
+    assert result.resumed_from == 2 and result.inserted == 1
+    assert await session.scalar(select(func.count()).select_from(Transaction)) == 3
@@ -0,0 +1,348 @@
+"""
+Unit tests for the cache backend (L1/L2 tiers, endpoint keys, table invalidation)
+"""
+
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.cache import (
+    CacheBackend,
+    LocalCache,
+    INVALIDATION_CHANNEL,
+    TAG_INDEX_PREFIX,
+    cached,
+    endpoint_cache_key,
+    get_or_compute,
+    invalidate_cache_tables,
+)
+
+
+class FakePipeline:
+    """Minimal async pipeline recording queued commands"""
+
+    def __init__(self, results):
+        self.results = results
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args))
+        return queue
+
+    async def execute(self):
+        return self.results
+
+
+class TestLocalCache:
+    """Tests for LocalCache"""
+
+    def test_get_set(self):
+        cache = LocalCache(max_entries=10, default_ttl=30)
+        cache.set("a", {"value": 1})
+
+        assert cache.get("a") == {"value": 1}
+        assert cache.get("missing") is None
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        cache = LocalCache(max_entries=2, default_ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiration(self):
+        cache = LocalCache(max_entries=10, default_ttl=30)
+        with patch("app.core.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1, expire=5)
+        with patch("app.core.cache.time.monotonic", return_value=1004.0):
+            assert cache.get("a") == 1
+        with patch("app.core.cache.time.monotonic", return_value=1006.0):
+            assert cache.get("a") is None
+
+    def test_ttl_capped_by_default(self):
+        cache = LocalCache(max_entries=10, default_ttl=10)
+        with patch("app.core.cache.time.monotonic", return_value=0.0):
+            cache.set("a", 1, expire=300)
+        with patch("app.core.cache.time.monotonic", return_value=11.0):
+            assert cache.get("a") is None
+
+    def test_clear_pattern(self):
+        cache = LocalCache(max_entries=10, default_ttl=30)
+        cache.set("projects:list:1", 1)
+        cache.set("projects:list:2", 2)
+        cache.set("users:list:1", 3)
+
+        assert cache.clear_pattern("projects:*") == 2
+        assert cache.get("users:list:1") == 3
+
+
+class TestCacheBackendTiers:
+    """Tests for CacheBackend with the L1 tier enabled"""
+
+    @pytest.fixture
+    def backend(self):
+        backend = CacheBackend.__new__(CacheBackend)
+        backend.redis_client = MagicMock()
+        backend.redis_client.publish = AsyncMock(return_value=1)
+        backend.redis_client.delete = AsyncMock(return_value=1)
+        backend.use_redis = True
+        backend.use_msgpack = False
+        backend.local_cache = LocalCache(max_entries=10, default_ttl=30)
+        backend.instance_id = "worker-a"
+        backend.redis_hits = 0
+        backend.redis_misses = 0
+        backend._invalidation_task = None
+        return backend
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_populates_l1(self, backend):
+        backend.redis_client.pipeline = MagicMock(
+            return_value=FakePipeline([json.dumps({"total": 3}).encode(), 120])
+        )
+
+        assert await backend.get("stats") == {"total": 3}
+        assert await backend.get("stats") == {"total": 3}
+
+        backend.redis_client.pipeline.assert_called_once()
+        stats = backend.get_stats()
+        assert stats["l1"]["hits"] == 1
+        assert stats["l2"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_redis_miss_counted(self, backend):
+        backend.redis_client.pipeline = MagicMock(return_value=FakePipeline([None, -2]))
+
+        assert await backend.get("missing") is None
+        assert backend.get_stats()["l2"]["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_delete_invalidates_l1_and_publishes(self, backend):
+        backend.local_cache.set("stats", {"total": 3})
+
+        assert await backend.delete("stats") is True
+
+        assert backend.local_cache.get("stats") is None
+        channel, message = backend.redis_client.publish.call_args.args
+        assert channel == INVALIDATION_CHANNEL
+        assert json.loads(message) == {"origin": "worker-a", "op": "delete", "target": "stats"}
+
+    def test_remote_invalidation_applies_pattern(self, backend):
+        backend.local_cache.set("projects:a", 1)
+        backend.local_cache.set("users:a", 2)
+
+        backend._apply_local_invalidation("pattern", "projects:*")
+
+        assert backend.local_cache.get("projects:a") is None
+        assert backend.local_cache.get("users:a") == 2
+
+
+class FakeUser:
+    """Stand-in for the User ORM model"""
+
+    __tablename__ = "users"
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class TestEndpointCacheKey:
+    """Tests for endpoint_cache_key"""
+
+    @staticmethod
+    async def endpoint(request, db, current_user, skip: int = 0, limit: int = 100, status=None):
+        return []
+
+    def test_ignores_infrastructure_dependencies(self):
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from starlette.requests import Request
+
+        def make_request():
+            return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": []})
+
+        key_a = endpoint_cache_key(self.endpoint, (), {
+            "request": make_request(), "db": MagicMock(spec=AsyncSession), "current_user": FakeUser(7),
+        })
+        key_b = endpoint_cache_key(self.endpoint, (), {
+            "request": make_request(), "db": MagicMock(spec=AsyncSession), "current_user": FakeUser(7),
+        })
+
+        assert key_a == key_b
+        assert key_a.startswith("t-.u7:")
+
+    def test_defaults_are_normalized(self):
+        explicit = endpoint_cache_key(self.endpoint, (), {"request": None, "db": None, "current_user": FakeUser(1), "limit": 100})
+        implicit = endpoint_cache_key(self.endpoint, (), {"request": None, "db": None, "current_user": FakeUser(1)})
+
+        assert explicit == implicit
+
+    def test_user_and_params_change_key(self):
+        base = {"request": None, "db": None}
+        key_user_1 = endpoint_cache_key(self.endpoint, (), {**base, "current_user": FakeUser(1)})
+        key_user_2 = endpoint_cache_key(self.endpoint, (), {**base, "current_user": FakeUser(2)})
+        key_status = endpoint_cache_key(self.endpoint, (), {**base, "current_user": FakeUser(1), "status": "active"})
+
+        assert len({key_user_1, key_user_2, key_status}) == 3
+
+
+class TestCachedTables:
+    """Tests for table-based invalidation of @cached entries"""
+
+    @pytest.mark.asyncio
+    async def test_cached_records_tables(self):
+        calls = []
+
+        @cached(expire=60, key_prefix="projects", tables=["projects", "clients"])
+        async def get_projects(current_user):
+            calls.append(1)
+            return {"items": [1, 2]}
+
+        with patch("app.core.cache.cache_backend") as backend:
+            backend.get = AsyncMock(return_value=None)
+            backend.set = AsyncMock(return_value=True)
+            backend.add_to_indexes = AsyncMock(return_value=True)
+            backend.acquire_lock = AsyncMock(return_value="token")
+            backend.release_lock = AsyncMock()
+
+            assert await get_projects(FakeUser(3)) == {"items": [1, 2]}
+
+            key = backend.set.call_args.args[0]
+            assert key.startswith("projects:get_projects:t-.u3:")
+            backend.add_to_indexes.assert_awaited_once_with(
+                [f"{TAG_INDEX_PREFIX}projects", f"{TAG_INDEX_PREFIX}clients"], key, 60
+            )
+
+    @pytest.mark.asyncio
+    async def test_invalidate_cache_tables(self):
+        with patch("app.core.cache.cache_backend") as backend:
+            backend.invalidate_indexes = AsyncMock(return_value=4)
+
+            assert await invalidate_cache_tables("projects", "clients") == 4
+            backend.invalidate_indexes.assert_awaited_once_with(
+                [f"{TAG_INDEX_PREFIX}projects", f"{TAG_INDEX_PREFIX}clients"]
+            )
+
+
+class MemoryBackend:
+    """In-memory stand-in for CacheBackend with Redis-like locks"""
+
+    def __init__(self):
+        self.values = {}
+        self.locks = set()
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, expire=300, compress=True):
+        self.values[key] = value
+        return True
+
+    async def acquire_lock(self, name, timeout):
+        if name in self.locks:
+            return None
+        self.locks.add(name)
+        return "token"
+
+    async def release_lock(self, name, token):
+        self.locks.discard(name)
+
+
+class TestStampedeProtection:
+    """Tests for single-flight recomputation and stale-while-revalidate"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_compute_once(self):
+        backend = MemoryBackend()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"total": 42}
+
+        results = await asyncio.gather(*[
+            get_or_compute("stats", compute, expire=60, backend=backend) for _ in range(10)
+        ])
+
+        assert results == [{"total": 42}] * 10
+        assert len(calls) == 1
+        assert backend.locks == set()
+
+    @pytest.mark.asyncio
+    async def test_waits_for_peer_worker_holding_lock(self):
+        backend = MemoryBackend()
+        backend.locks.add("stats")
+
+        async def peer_worker():
+            await asyncio.sleep(0.02)
+            backend.values["stats"] = {"total": 1}
+            backend.locks.discard("stats")
+
+        compute = AsyncMock(return_value={"total": 2})
+        peer = asyncio.create_task(peer_worker())
+
+        assert await get_or_compute("stats", compute, expire=60, backend=backend) == {"total": 1}
+        await peer
+        compute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_refreshing(self):
+        backend = MemoryBackend()
+        compute = AsyncMock(return_value={"total": 1})
+
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            await get_or_compute("stats", compute, expire=60, stale_ttl=300, backend=backend)
+
+        compute.return_value = {"total": 2}
+        with patch("app.core.cache.time.time", return_value=1100.0):
+            # Expired: the stale value is returned immediately
+            assert await get_or_compute("stats", compute, expire=60, stale_ttl=300, backend=backend) == {"total": 1}
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+        assert backend.values["stats"]["value"] == {"total": 2}
+        assert compute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_miss_during_abandoned_refresh_gets_a_value(self):
+        class SlowLockBackend(MemoryBackend):
+            async def acquire_lock(self, name, timeout):
+                await asyncio.sleep(0.01)
+                return await super().acquire_lock(name, timeout)
+
+        backend = SlowLockBackend()
+        compute = AsyncMock(return_value={"total": 2})
+        with patch("app.core.cache.time.time", return_value=1000.0):
+            backend.values["stats"] = {"__swr__": 1, "fresh_until": 900.0, "value": {"total": 1}}
+            # Another worker is refreshing: this worker's background refresh gives up
+            backend.locks.add("stats")
+            assert await get_or_compute("stats", compute, expire=60, stale_ttl=300, backend=backend) == {"total": 1}
+
+            # Invalidated while the refresh is pending: the miss joins it, then waits for the peer
+            await asyncio.sleep(0)
+            del backend.values["stats"]
+
+            async def peer_worker():
+                await asyncio.sleep(0.05)
+                backend.values["stats"] = {"total": 3}
+                backend.locks.discard("stats")
+
+            peer = asyncio.create_task(peer_worker())
+            assert await get_or_compute("stats", compute, expire=60, stale_ttl=300, backend=backend) == {"total": 3}
+            await peer
+        compute.assert_not_awaited()
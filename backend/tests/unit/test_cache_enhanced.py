@@ -60,16 +60,22 @@ class TestEnhancedCache:
         
         assert success is True
         mock_cache_backend.set.assert_called()
+        mock_cache_backend.add_to_indexes.assert_awaited_once_with(
+            ["cache:tag:users"], "query:query_hash_123", 600
+        )
     
     @pytest.mark.asyncio
     async def test_invalidate_by_tags(self, cache, mock_cache_backend):
         """Test invalidating cache by tags"""
-        mock_cache_backend.get.return_value = ["query_hash_1", "query_hash_2"]
+        mock_cache_backend.invalidate_indexes = AsyncMock(return_value=2)
         
-        invalidated = await cache.invalidate_by_tags(["users"])
+        invalidated = await cache.invalidate_by_tags(["users", "teams"])
         
-        assert invalidated >= 0
-        assert mock_cache_backend.delete.call_count >= 2
+        assert invalidated == 2
+        mock_cache_backend.invalidate_indexes.assert_awaited_once_with(
+            ["cache:tag:users", "cache:tag:teams"]
+        )
+        mock_cache_backend.get.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_warm_cache(self, cache, mock_cache_backend):
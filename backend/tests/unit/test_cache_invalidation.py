@@ -0,0 +1,91 @@
+"""
+Tests for automatic ORM-driven cache tag invalidation
+"""
+
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import Column, Integer, String, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import declarative_base
+
+from app.core import cache_invalidation
+from app.core.cache_invalidation import install_cache_invalidation_hooks
+
+
+Base = declarative_base()
+
+
+class FakeContact(Base):
+    __tablename__ = "contacts"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50))
+
+
+class FakeNote(Base):
+    __tablename__ = "untracked_notes"
+
+    id = Column(Integer, primary_key=True)
+
+
+@pytest.fixture
+async def session(make_sqlite_engine):
+    install_cache_invalidation_hooks()
+    engine = await make_sqlite_engine(FakeContact, FakeNote)
+    async with AsyncSession(engine) as session:
+        yield session
+
+
+async def _drain():
+    await asyncio.gather(*list(cache_invalidation._pending_tasks))
+
+
+@pytest.mark.asyncio
+async def test_commit_invalidates_tracked_table(session):
+    with patch.object(cache_invalidation, "invalidate_cache_tables", AsyncMock(return_value=1)) as invalidate:
+        session.add(FakeContact(name="Ada"))
+        await session.commit()
+        await _drain()
+
+    invalidate.assert_awaited_once_with("contacts")
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_invalidates(session):
+    with patch.object(cache_invalidation, "invalidate_cache_tables", AsyncMock(return_value=1)) as invalidate:
+        await session.execute(delete(FakeContact))
+        await session.commit()
+        await _drain()
+
+    invalidate.assert_awaited_once_with("contacts")
+
+
+@pytest.mark.asyncio
+async def test_rollback_and_untracked_tables_skip_invalidation(session):
+    with patch.object(cache_invalidation, "invalidate_cache_tables", AsyncMock(return_value=0)) as invalidate:
+        session.add(FakeContact(name="Ada"))
+        await session.flush()
+        await session.rollback()
+
+        session.add(FakeNote())
+        await session.commit()
+        await _drain()
+
+    invalidate.assert_not_awaited()
+
+
+def test_every_cached_table_tag_is_invalidated():
+    """Tags used by @cached(tables=[...]) must be emitted by TRACKED_TABLES"""
+    emitted = {tag for tags in cache_invalidation.TRACKED_TABLES.values() for tag in tags}
+    app_dir = Path(cache_invalidation.__file__).resolve().parents[1]
+    used = set()
+    for path in app_dir.rglob("*.py"):
+        for tables in re.findall(r"^@cached\([^)]*tables=\[([^\]]*)\]", path.read_text(encoding="utf-8"), re.M):
+            used.update(re.findall(r"[\"'](\w+)[\"']", tables))
+
+    assert "clients" in used
+    assert used <= emitted, sorted(used - emitted)
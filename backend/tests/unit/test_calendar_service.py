@@ -0,0 +1,143 @@
+"""
+Tests for the calendar range query engine
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.calendar_event import CalendarEvent
+from app.models.employee import Employee
+from app.models.project_task import ProjectTask, TaskStatus as ProjectTaskStatus
+from app.models.public_holiday import PublicHoliday
+from app.models.scheduled_task import ScheduledTask, TaskStatus, TaskType
+from app.models.user import User
+from app.models.vacation_request import VacationRequest
+from app.services.calendar_service import (
+    CalendarQueryService,
+    date_span_overlaps,
+    holiday_occurrences,
+    recurrence_occurrences,
+)
+
+UTC = timezone.utc
+
+
+@pytest.fixture
+async def session(make_sqlite_engine):
+    engine = await make_sqlite_engine(
+        User, Employee, CalendarEvent, VacationRequest, PublicHoliday, ProjectTask, ScheduledTask,
+    )
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add_all([
+            User(id=1, email="me@example.com", hashed_password="x"),
+            User(id=2, email="colleague@example.com", hashed_password="x"),
+            Employee(id=1, first_name="Moi", last_name="Même", user_id=1),
+            Employee(id=2, first_name="Lea", last_name="Roy", user_id=2),
+            # Overlaps March from February, inside March, after March, someone else's
+            CalendarEvent(id=1, title="Salon", date=date(2026, 2, 27), end_date=date(2026, 3, 2), user_id=1),
+            CalendarEvent(id=2, title="Client", date=date(2026, 3, 10), time=time(14), type="meeting", user_id=1),
+            CalendarEvent(id=3, title="Standup", date=date(2026, 3, 10), time=time(9), user_id=1),
+            CalendarEvent(id=4, title="Avril", date=date(2026, 4, 1), user_id=1),
+            CalendarEvent(id=5, title="Autre", date=date(2026, 3, 10), user_id=2),
+            VacationRequest(id=1, employee_id=2, start_date=date(2026, 3, 30), end_date=date(2026, 4, 3), status="approved"),
+            VacationRequest(id=2, employee_id=2, start_date=date(2026, 3, 5), end_date=date(2026, 3, 6), status="pending"),
+            VacationRequest(id=3, employee_id=1, start_date=date(2026, 3, 5), end_date=date(2026, 3, 6), status="approved"),
+            PublicHoliday(id=1, name="Fête du travail", date=date(2020, 3, 17), year=None),
+            PublicHoliday(id=2, name="Férié 2026", date=date(2026, 3, 20), year=2026),
+            PublicHoliday(id=3, name="Férié 2025", date=date(2025, 3, 20), year=2025),
+            ProjectTask(id=1, title="Livrable", team_id=1, assignee_id=1, status=ProjectTaskStatus.TODO,
+                        due_date=datetime(2026, 3, 10, 12, tzinfo=UTC)),
+            ProjectTask(id=2, title="Plus tard", team_id=1, assignee_id=1, due_date=datetime(2026, 5, 1, tzinfo=UTC)),
+            # Weekly series: last run done on March 2, next instance pending
+            ScheduledTask(id=1, name="Rapport", task_type=TaskType.REPORT, recurrence="weekly",
+                          scheduled_at=datetime(2026, 3, 9, 8, tzinfo=UTC), user_id=1),
+            ScheduledTask(id=2, name="Rapport fait", task_type=TaskType.REPORT, recurrence="weekly",
+                          status=TaskStatus.COMPLETED, scheduled_at=datetime(2026, 3, 2, 8, tzinfo=UTC), user_id=1),
+            ScheduledTask(id=3, name="Ancien", task_type=TaskType.CLEANUP, status=TaskStatus.COMPLETED,
+                          scheduled_at=datetime(2026, 1, 5, 8, tzinfo=UTC), user_id=1),
+        ])
+        await session.commit()
+        yield session
+
+
+def test_recurrence_jumps_to_window():
+    first = datetime(2020, 1, 6, 8, tzinfo=UTC)
+    occurrences = list(recurrence_occurrences(
+        first, "weekly", datetime(2026, 3, 1, tzinfo=UTC), datetime(2026, 3, 15, tzinfo=UTC)
+    ))
+    assert occurrences == [datetime(2026, 3, 2, 8, tzinfo=UTC), datetime(2026, 3, 9, 8, tzinfo=UTC)]
+    # Unknown or unsupported recurrence: the stored occurrence only
+    assert list(recurrence_occurrences(first, "yearly", first, first + timedelta(days=1))) == [first]
+
+
+def test_holiday_occurrences():
+    assert list(holiday_occurrences(date(2000, 1, 1), date(2025, 12, 1), date(2027, 1, 31))) == [
+        date(2026, 1, 1), date(2027, 1, 1)
+    ]
+    assert list(holiday_occurrences(date(2024, 2, 29), date(2025, 1, 1), date(2028, 12, 31))) == [date(2028, 2, 29)]
+
+
+def test_postgresql_overlap_uses_indexed_range_expression():
+    predicate = date_span_overlaps(
+        "postgresql", CalendarEvent.date, CalendarEvent.end_date, date(2026, 3, 1), date(2026, 3, 31)
+    )
+    sql = str(predicate.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("daterange(calendar_events.date, greatest(calendar_events.end_date, calendar_events.date), '[]') &&")
+
+
+@pytest.mark.asyncio
+async def test_month_agenda(session):
+    statements = []
+    event.listen(session.bind.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    items = await CalendarQueryService(session).agenda(1, date(2026, 3, 1), date(2026, 3, 31), all_vacations=True)
+
+    assert [(item["source"], item["id"], item["start_date"].day) for item in items] == [
+        ("event", 1, 27),
+        ("scheduled_task", 2, 2),
+        ("scheduled_task", 1, 9),
+        ("event", 3, 10),
+        ("task", 1, 10),
+        ("event", 2, 10),
+        ("scheduled_task", 1, 16),
+        ("holiday", 1, 17),
+        ("holiday", 2, 20),
+        ("scheduled_task", 1, 23),
+        ("vacation", 1, 30),
+        ("scheduled_task", 1, 30),
+    ]
+    # One query per source
+    assert len(statements) == 5
+    holiday = next(item for item in items if item["source"] == "holiday")
+    assert holiday["recurring"] and holiday["start_date"] == date(2026, 3, 17)
+    vacation = items[-2]
+    assert vacation["title"] == "Vacances - Lea Roy" and vacation["end_date"] == date(2026, 4, 3)
+
+
+@pytest.mark.asyncio
+async def test_agenda_sources_and_validation(session):
+    service = CalendarQueryService(session)
+
+    items = await service.agenda(1, date(2026, 3, 1), date(2026, 3, 31), sources=["vacation", "holiday"])
+    assert [item["source"] for item in items] == ["holiday", "holiday"]
+
+    with pytest.raises(ValueError):
+        await service.agenda(1, date(2026, 3, 31), date(2026, 3, 1))
+    with pytest.raises(ValueError):
+        await service.agenda(1, date(2026, 1, 1), date(2027, 6, 1))
+    with pytest.raises(ValueError):
+        await service.agenda(1, date(2026, 3, 1), date(2026, 3, 31), sources=["birthday"])
+
+
+@pytest.mark.asyncio
+async def test_events_query_half_open_windows(session):
+    service = CalendarQueryService(session)
+
+    result = await session.execute(service.events_query(1, date(2026, 3, 2), None))
+    assert sorted(e.id for e in result.scalars().all()) == [1, 2, 3, 4]
+    result = await session.execute(service.events_query(1, None, date(2026, 2, 28)))
+    assert [e.id for e in result.scalars().all()] == [1]
@@ -2,13 +2,16 @@
 Tests for Compression Middleware
 """
 
+import gzip
+
+import brotli
 import pytest
 from unittest.mock import AsyncMock, Mock
 from fastapi import Request, FastAPI
 from fastapi.testclient import TestClient
 from fastapi.responses import JSONResponse
 
-from app.core.compression import CompressionMiddleware
+from app.core.compression import CompressionMiddleware, negotiate_encoding
 
 
 class TestCompressionMiddleware:
@@ -36,43 +39,45 @@ class TestCompressionMiddleware:
         
         return app
     
-    def test_supports_compression_gzip(self):
-        """Test compression support detection for GZip"""
-        middleware = CompressionMiddleware(Mock(), use_brotli=False)
-        supports_gzip, supports_brotli = middleware._supports_compression("gzip")
-        assert supports_gzip is True
-        assert supports_brotli is False
+    def test_negotiate_encoding_gzip(self):
+        """Test encoding negotiation when only GZip is enabled"""
+        middleware = CompressionMiddleware(Mock(), use_brotli=False, use_zstd=False)
+        assert negotiate_encoding("gzip", middleware.available_encodings) == "gzip"
+        assert negotiate_encoding("br", middleware.available_encodings) is None
     
-    def test_supports_compression_brotli(self):
-        """Test compression support detection for Brotli"""
+    def test_negotiate_encoding_brotli(self):
+        """Test encoding negotiation prefers Brotli"""
         middleware = CompressionMiddleware(Mock(), use_brotli=True)
-        supports_gzip, supports_brotli = middleware._supports_compression("br, gzip")
-        assert supports_gzip is True
-        assert supports_brotli is True
+        assert negotiate_encoding("br, gzip", middleware.available_encodings) == "br"
+        assert negotiate_encoding("br;q=0.2, gzip", middleware.available_encodings) == "gzip"
     
-    def test_supports_compression_none(self):
-        """Test compression support detection when not supported"""
+    def test_negotiate_encoding_none(self):
+        """Test encoding negotiation when compression is not supported"""
         middleware = CompressionMiddleware(Mock())
-        supports_gzip, supports_brotli = middleware._supports_compression("")
-        assert supports_gzip is False
-        assert supports_brotli is False
+        assert negotiate_encoding("", middleware.available_encodings) is None
+        assert negotiate_encoding("gzip;q=0", middleware.available_encodings) is None
     
-    def test_compress_gzip(self):
+    def test_compress_body_gzip(self):
         """Test GZip compression"""
         middleware = CompressionMiddleware(Mock())
         data = b"test data" * 100
-        compressed = middleware._compress_gzip(data)
+        compressed = middleware._compress_body(data, "gzip")
         assert isinstance(compressed, bytes)
         assert len(compressed) < len(data)
+        assert gzip.decompress(compressed) == data
     
-    def test_compress_brotli(self):
+    def test_compress_body_brotli(self):
         """Test Brotli compression"""
         middleware = CompressionMiddleware(Mock(), use_brotli=True)
         data = b"test data" * 100
-        compressed = middleware._compress_brotli(data)
+        compressed = middleware._compress_body(data, "br")
         assert compressed is not None
-        assert isinstance(compressed, bytes)
-        assert len(compressed) < len(data)
+        assert brotli.decompress(compressed) == data
+    
+    def test_compress_body_not_smaller(self):
+        """Test that a body that does not shrink is left uncompressed"""
+        middleware = CompressionMiddleware(Mock())
+        assert middleware._compress_body(b"x", "gzip") is None
     
     def test_compression_middleware_large_response(self, app):
         """Test compression middleware compresses large responses"""
@@ -0,0 +1,96 @@
+"""
+Tests for the indexed company name matcher
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.company import Company
+from app.services.entity_matcher import (
+    CompanyMatcher,
+    MATCH_EXACT,
+    MATCH_PARTIAL,
+    MATCH_WITHOUT_LEGAL_FORM,
+    NameMatcher,
+    find_company_by_name,
+    normalize_name,
+    strip_legal_form,
+)
+
+
+COMPANIES = [
+    (1, "Nukleo Digital Inc."),
+    (2, "Société Générale SA"),
+    (3, "Samsung Electronics"),
+    (4, "Boulangerie Côté"),
+]
+
+
+def test_normalize_and_strip_legal_form():
+    assert normalize_name("  Société  Générale, S.A. ") == "societe generale s a"
+    assert strip_legal_form(normalize_name("Nukleo SARL")) == "nukleo"
+    # Legal forms are whole words only ("sa" inside "samsung" is kept)
+    assert strip_legal_form(normalize_name("Samsung SAS")) == "samsung"
+
+
+def test_exact_and_legal_form_matches():
+    matcher = NameMatcher(COMPANIES)
+
+    match = matcher.match("NUKLEO DIGITAL INC")
+    assert (match.id, match.match_type, match.score) == (1, MATCH_EXACT, 1.0)
+
+    match = matcher.match("societe generale")
+    assert (match.id, match.match_type) == (2, MATCH_WITHOUT_LEGAL_FORM)
+
+    match = matcher.match("Boulangerie Cote")
+    assert (match.id, match.match_type) == (4, MATCH_EXACT)
+
+
+def test_partial_matches_are_ranked():
+    matcher = NameMatcher(COMPANIES)
+
+    match = matcher.match("Nukleo")
+    assert (match.id, match.match_type) == (1, MATCH_PARTIAL)
+    assert 0.5 <= match.score < 1.0
+
+    match = matcher.match("Samsung Electronic")
+    assert match.id == 3
+
+    candidates = matcher.candidates("Nukleo Digitale", limit=3)
+    assert candidates[0].id == 1
+    assert [c.score for c in candidates] == sorted((c.score for c in candidates), reverse=True)
+
+    assert matcher.match("Acme Plumbing") is None
+    assert matcher.match("") is None
+
+
+@pytest.mark.asyncio
+async def test_find_company_by_name_loads_companies(make_sqlite_engine):
+    engine = await make_sqlite_engine(Company)
+    async with AsyncSession(engine) as session:
+        session.add_all([Company(id=company_id, name=name) for company_id, name in COMPANIES])
+        await session.commit()
+
+        matcher = await CompanyMatcher.load(session)
+        assert len(matcher) == len(COMPANIES)
+        assert await find_company_by_name("Société Générale", session, matcher=matcher) == 2
+        assert await find_company_by_name("boulangerie côté", session) == 4
+        assert await find_company_by_name("Unknown Corp", session) is None
+
+
+@pytest.mark.asyncio
+async def test_search_looks_up_the_normalized_name_first(make_sqlite_engine, monkeypatch):
+    engine = await make_sqlite_engine(Company)
+    async with AsyncSession(engine) as session:
+        session.add_all([Company(id=company_id, name=name) for company_id, name in COMPANIES])
+        session.add(Company(id=5, name="Café Dépôt"))
+        await session.commit()
+        company = await session.get(Company, 2)
+        assert company.name_key == "societe generale"
+        company.name = "Société Générale Ltée"
+        assert company.name_key == "societe generale"
+
+        # Exact names whose trigram similarity to the typed name is low
+        monkeypatch.setattr("app.services.entity_matcher._pg_trgm_available", True)
+        assert await find_company_by_name("Café Dépôt", session) == 5
+        assert await find_company_by_name("Societe Generale", session) == 2
@@ -0,0 +1,163 @@
+"""
+Tests for the invoice query service and the invoice number allocator
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints.finances.facturations import calculate_invoice_status
+from app.models.finance_invoice import (
+    FinanceInvoice,
+    FinanceInvoiceNumberSequence,
+    FinanceInvoicePayment,
+    FinanceInvoiceStatus,
+)
+from app.models.project import Project
+from app.services.finance_invoice_service import (
+    FinanceInvoiceQueryService,
+    advance_invoice_sequence,
+    reserve_invoice_numbers,
+)
+
+NOW = datetime(2026, 6, 15, 12, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    return await make_sqlite_engine(Project, FinanceInvoice, FinanceInvoicePayment, FinanceInvoiceNumberSequence)
+
+
+@pytest.fixture
+async def session(engine):
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        project = Project(id=1, name="Refonte site", user_id=1)
+        session.add(project)
+        invoices = [
+            _invoice(1, FinanceInvoiceStatus.DRAFT, "100", "0", days_due=10),
+            _invoice(2, FinanceInvoiceStatus.SENT, "200", "0", days_due=10, project_id=1),
+            _invoice(3, FinanceInvoiceStatus.SENT, "300", "0", days_due=-5, project_id=1),
+            _invoice(4, FinanceInvoiceStatus.SENT, "400", "150", days_due=-5),
+            _invoice(5, FinanceInvoiceStatus.PAID, "500", "500", days_due=-30),
+            _invoice(6, FinanceInvoiceStatus.CANCELLED, "600", "0", days_due=-30),
+            _invoice(7, FinanceInvoiceStatus.SENT, "700", "0", days_due=-5, user_id=2),
+        ]
+        session.add_all(invoices)
+        session.add(FinanceInvoicePayment(invoice_id=4, amount=Decimal("150"), payment_method="cash"))
+        await session.commit()
+        yield session
+
+
+def _invoice(invoice_id, status, total, paid, days_due, user_id=1, project_id=None) -> FinanceInvoice:
+    return FinanceInvoice(
+        id=invoice_id,
+        user_id=user_id,
+        project_id=project_id,
+        invoice_number=f"INV-2026-{invoice_id:03d}",
+        client_data={"name": "Client"},
+        line_items=[],
+        total=Decimal(total),
+        amount_paid=Decimal(paid),
+        amount_due=Decimal(total) - Decimal(paid),
+        status=status,
+        issue_date=NOW - timedelta(days=40 - invoice_id),
+        due_date=NOW + timedelta(days=days_due),
+    )
+
+
+@pytest.mark.asyncio
+async def test_list_page_matches_python_status(session, engine):
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    rows, total, _ = await FinanceInvoiceQueryService(session).list_page(1, skip=0, limit=10)
+
+    assert total == 6
+    # Newest first
+    assert [invoice.id for invoice, _, _ in rows] == [6, 5, 4, 3, 2, 1]
+    for invoice, _, status in rows:
+        invoice.due_date = invoice.due_date.replace(tzinfo=timezone.utc)
+        assert status == calculate_invoice_status(invoice)
+    names = {invoice.id: name for invoice, name, _ in rows}
+    assert names[2] == "Refonte site" and names[1] is None
+    assert [len(invoice.payments) for invoice, _, _ in rows if invoice.id == 4] == [1]
+    # Page + payments, no per-invoice query
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_page_total_and_filters(session):
+    service = FinanceInvoiceQueryService(session)
+
+    rows, total, _ = await service.list_page(1, skip=2, limit=2)
+    assert [invoice.id for invoice, _, _ in rows] == [4, 3]
+    assert total == 6
+
+    rows, total, _ = await service.list_page(1, skip=10, limit=2)
+    assert rows == [] and total == 6
+
+    rows, total, _ = await service.list_page(1, skip=0, limit=10, project_id=1)
+    assert total == 2
+
+
+@pytest.mark.asyncio
+async def test_stats_buckets(session):
+    stats = await FinanceInvoiceQueryService(session).stats(1, now=NOW)
+
+    assert stats["total"] == {"amount": 2100.0, "count": 6}
+    assert stats["paid"] == {"amount": 650.0, "count": 1}
+    assert stats["pending"] == {"amount": 100.0 + 200.0 + 300.0 + 250.0, "count": 4}
+    assert stats["overdue"] == {"amount": 300.0, "count": 1}
+    assert stats["by_status"] == {
+        "draft": 1,
+        "sent": 3,
+        "paid": 1,
+        "partial": 1,
+        "overdue": 1,
+        "cancelled": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_reserve_invoice_numbers(engine):
+    async with AsyncSession(engine) as session:
+        assert await reserve_invoice_numbers(session, 2026) == ["INV-2026-001"]
+        assert await reserve_invoice_numbers(session, 2026, count=3) == ["INV-2026-002", "INV-2026-003", "INV-2026-004"]
+        # Each year has its own counter
+        assert await reserve_invoice_numbers(session, 2027) == ["INV-2027-001"]
+        await session.commit()
+
+        # A rolled-back creation leaves no gap
+        assert await reserve_invoice_numbers(session, 2026) == ["INV-2026-005"]
+        await session.rollback()
+        assert await reserve_invoice_numbers(session, 2026) == ["INV-2026-005"]
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_manual_number_advances_sequence(engine):
+    async with AsyncSession(engine) as session:
+        await advance_invoice_sequence(session, "INV-2026-999")
+        assert await reserve_invoice_numbers(session, 2026) == ["INV-2026-1000"]
+
+        # Lower or free-form numbers leave the counter alone
+        await advance_invoice_sequence(session, "INV-2026-010")
+        await advance_invoice_sequence(session, "FACT/2026/2000")
+        assert await reserve_invoice_numbers(session, 2026) == ["INV-2026-1001"]
+
+        with pytest.raises(ValueError):
+            await reserve_invoice_numbers(session, 2026, count=0)
+
+
+@pytest.mark.asyncio
+async def test_list_page_cursor(session):
+    service = FinanceInvoiceQueryService(session)
+
+    rows, total, cursor = await service.list_page(1, skip=0, limit=4)
+    assert [invoice.id for invoice, _, _ in rows] == [6, 5, 4, 3]
+    rows, total, next_cursor = await service.list_page(1, skip=0, limit=4, cursor=cursor)
+    assert [invoice.id for invoice, _, _ in rows] == [2, 1]
+    assert total == 6 and next_cursor is None
@@ -0,0 +1,169 @@
+"""
+Tests for the import job store (logs/status pushed to SSE subscribers)
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils import import_logs
+from app.utils.import_logs import ImportJobStore, require_import_job, stream_import_logs_generator
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.commands.append(("xadd", key, fields, maxlen))
+
+    def expire(self, key, ttl):
+        self.commands.append(("expire", key, ttl))
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key, value, ex))
+
+    async def execute(self):
+        for command in self.commands:
+            if command[0] == "xadd":
+                _, key, fields, maxlen = command
+                stream = self.redis.streams.setdefault(key, [])
+                stream.append((f"{len(stream) + 1}-0".encode(), {k.encode(): v.encode() for k, v in fields.items()}))
+                del stream[:-maxlen]
+            elif command[0] == "set":
+                self.redis.values[command[1]] = command[2].encode()
+            self.redis.executed.append(command)
+        self.redis.new_data.set()
+
+
+class FakeRedis:
+    def __init__(self):
+        self.streams = {}
+        self.values = {}
+        self.executed = []
+        self.new_data = asyncio.Event()
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def exists(self, *keys):
+        return sum(key in self.values or key in self.streams for key in keys)
+
+    async def xread(self, streams, count=None, block=None):
+        (key, last_id), = streams.items()
+        last = int(str(last_id if isinstance(last_id, str) else last_id.decode()).split("-")[0])
+        entries = [entry for entry in self.streams.get(key, []) if int(entry[0].decode().split("-")[0]) > last]
+        if not entries:
+            self.new_data.clear()
+            try:
+                await asyncio.wait_for(self.new_data.wait(), timeout=block / 1000)
+            except asyncio.TimeoutError:
+                return []
+            entries = [entry for entry in self.streams.get(key, []) if int(entry[0].decode().split("-")[0]) > last]
+        return [(key.encode(), entries[:count])]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = ImportJobStore()
+    monkeypatch.setattr(import_logs, "import_jobs", store)
+    monkeypatch.setattr("app.core.cache.cache_backend", SimpleNamespace(redis_client=None, use_redis=False))
+    return store
+
+
+async def _collect(import_id):
+    return [chunk async for chunk in stream_import_logs_generator(import_id)]
+
+
+@pytest.mark.asyncio
+async def test_subscriber_receives_pushed_events_until_done(store):
+    store.start("job-1")
+    subscriber = asyncio.ensure_future(_collect("job-1"))
+    await asyncio.sleep(0)
+
+    store.log("job-1", "Lecture du fichier", "info")
+    for row in range(1, 50):
+        store.update_status("job-1", "processing", progress=row, total=100)
+    store.update_status("job-1", "completed", progress=100, total=100)
+
+    chunks = await asyncio.wait_for(subscriber, timeout=2)
+    events = [json.loads(chunk[len("data: "):]) for chunk in chunks]
+
+    assert events[0]["data"]["status"] == "started"
+    assert events[1]["message"] == "Lecture du fichier"
+    # Per-row progress updates are coalesced into a single event
+    assert [e["data"]["status"] for e in events if e.get("type") == "status"] == ["started", "processing", "completed"]
+    assert events[-2]["data"]["progress"] == 100
+    assert events[-1] == {"type": "done"}
+    assert (await store.get_status("job-1"))["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_logs_are_capped_per_job(store):
+    for index in range(import_logs.MAX_LOGS_PER_JOB + 10):
+        store.log("job-2", f"log {index}")
+
+    job = store._local["job-2"]
+    assert len(job.events) == import_logs.MAX_LOGS_PER_JOB
+    assert job.events[0][1]["message"] == "log 10"
+
+
+@pytest.mark.asyncio
+async def test_redis_stream_shared_across_workers(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr("app.core.cache.cache_backend", SimpleNamespace(redis_client=redis, use_redis=True))
+    importing_worker = ImportJobStore()
+    streaming_worker = ImportJobStore()
+    monkeypatch.setattr(import_logs, "import_jobs", streaming_worker)
+
+    importing_worker.start("job-3")
+    importing_worker.log("job-3", "Début")
+    importing_worker.update_status("job-3", "failed")
+    await importing_worker.flush()
+
+    chunks = await asyncio.wait_for(_collect("job-3"), timeout=2)
+    events = [json.loads(chunk[len("data: "):]) for chunk in chunks]
+
+    assert [e.get("message") or e["type"] for e in events] == ["status", "Début", "status", "done"]
+    assert json.loads(redis.values["import:job:job-3:status"])["status"] == "failed"
+    assert ("expire", "import:job:job-3:events", 3600) in redis.executed
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_is_not_streamed(store, monkeypatch):
+    monkeypatch.setattr(import_logs, "IMPORT_JOB_START_GRACE", 0.2)
+    monkeypatch.setattr(import_logs, "JOB_LOOKUP_INTERVAL", 0.05)
+    with pytest.raises(HTTPException) as exc_info:
+        await require_import_job("missing")
+    assert exc_info.value.status_code == 404
+    assert "missing" not in store._local
+    assert await _collect("missing") == []
+
+    # The stream may be opened just before the import request starts the job
+    asyncio.get_running_loop().call_later(0.1, store.start, "job-4")
+    await require_import_job("job-4")
+
+
+@pytest.mark.asyncio
+async def test_events_published_from_a_thread_reach_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr("app.core.cache.cache_backend", SimpleNamespace(redis_client=redis, use_redis=True))
+    store = ImportJobStore()
+
+    store.start("job-5")
+    await asyncio.to_thread(store.log, "job-5", "Ligne 1")
+    await asyncio.sleep(0)
+    await store.flush()
+
+    assert [command[1] for command in redis.executed if command[0] == "xadd"] == ["import:job:job-5:events"] * 2
+    assert await store.exists("job-5") and not await store.exists("job-6")
+
+    # No writer yet: dropped instead of raising in the import thread
+    await asyncio.to_thread(ImportJobStore().log, "job-6", "Ligne 1")
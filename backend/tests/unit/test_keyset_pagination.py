@@ -0,0 +1,122 @@
+"""
+Tests for keyset (cursor) pagination
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import (
+    CursorParams,
+    InvalidCursorError,
+    Keyset,
+    PaginationParams,
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+    paginate_keyset,
+    paginate_query,
+)
+from app.models.contact import Contact
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+KEYSET = Keyset(Contact.created_at.desc(), Contact.id.desc())
+
+
+@pytest.fixture
+async def session(make_sqlite_engine):
+    engine = await make_sqlite_engine(Contact)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        # 25 contacts, created in pairs so that the id has to break ties
+        session.add_all([
+            Contact(
+                id=i,
+                first_name=f"Contact {i}",
+                last_name="Test",
+                circle="client" if i % 2 else "prospect",
+                created_at=START + timedelta(hours=i // 2),
+            )
+            for i in range(1, 26)
+        ])
+        await session.commit()
+        yield session
+
+
+def test_cursor_round_trip():
+    values = [START, date(2026, 5, 4), time(9, 30), uuid4(), Decimal("12.50"), 42, "x", None]
+    assert decode_cursor(encode_cursor(values, "scope"), "scope") == values
+
+
+def test_cursor_rejects_tampering_and_other_scopes():
+    cursor = encode_cursor([START, 7], "contacts.created_at:desc,contacts.id:desc")
+    payload, signature = cursor.split(".")
+    forged = encode_cursor([START, 8], "other").split(".")[0]
+
+    for invalid in ("not-a-cursor", f"{forged}.{signature}", f"{payload}.{signature[:-2]}", ""):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(invalid, "contacts.created_at:desc,contacts.id:desc")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "invoices.issue_date:desc,invoices.id:desc")
+    # A keyset only accepts its own cursors
+    with pytest.raises(InvalidCursorError):
+        KEYSET.after(encode_cursor([START, 7], "other"))
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_row_once(session):
+    seen, cursor = [], None
+    while True:
+        page = await paginate_keyset(session, select(Contact), KEYSET, CursorParams(cursor=cursor, limit=4))
+        seen += [contact.id for contact in page.items]
+        assert page.has_more == (page.next_cursor is not None)
+        if not page.has_more:
+            break
+        cursor = page.next_cursor
+
+    assert seen == list(range(25, 0, -1))
+    assert page.total is None
+
+
+@pytest.mark.asyncio
+async def test_keyset_respects_filters_and_counts(session):
+    query = select(Contact).where(Contact.circle == "prospect")
+    first = await paginate_keyset(session, query, KEYSET, CursorParams(limit=5), count="exact")
+    assert [contact.id for contact in first.items] == [24, 22, 20, 18, 16]
+    assert first.total == 12 and not first.total_is_estimate
+
+    second = await paginate_keyset(session, query, KEYSET, CursorParams(cursor=first.next_cursor, limit=5))
+    assert [contact.id for contact in second.items] == [14, 12, 10, 8, 6]
+
+    # Estimates fall back to an exact count outside PostgreSQL
+    assert await estimate_count(session, query) == (12, False)
+
+
+@pytest.mark.asyncio
+async def test_deep_page_seeks_instead_of_skipping(session):
+    cursor = KEYSET.cursor_for(await session.get(Contact, 3))
+    statements = []
+    event.listen(session.bind.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2:4]))
+
+    page = await paginate_keyset(session, select(Contact), KEYSET, CursorParams(cursor=cursor, limit=10))
+
+    assert [contact.id for contact in page.items] == [2, 1]
+    # One statement, positioned by the WHERE clause rather than an offset
+    (statement, parameters), = statements
+    assert "contacts.created_at < ?" in statement and parameters[-1] == 0
+
+
+@pytest.mark.asyncio
+async def test_paginate_query_count_keeps_filters(session):
+    result = await paginate_query(
+        session,
+        select(Contact).where(Contact.circle == "client").order_by(Contact.id),
+        PaginationParams(page=2, page_size=5),
+    )
+
+    assert result.total == 13
+    assert [contact.id for contact in result.items] == [11, 13, 15, 17, 19]
@@ -0,0 +1,126 @@
+"""
+Tests for Leo aggregate questions compiled to GROUP BY queries
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Project, ProjectTask, Quote, TimeEntry, User
+from app.services.leo_aggregate_service import AggregateRequest, LeoAggregateService
+from app.services.leo_context_service import LeoContextService
+
+QUOTES = 600
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    # A file database: Leo retrieval jobs run on their own sessions
+    engine = await make_sqlite_engine(User, Project, ProjectTask, TimeEntry, Quote, file=True)
+    async with AsyncSession(engine) as db:
+        db.add_all([
+            User(id=1, email="lea@example.com", hashed_password="x", first_name="Lea", last_name="Martin"),
+            User(id=2, email="tom@example.com", hashed_password="x", first_name="Tom", last_name="Roy"),
+            Project(id=1, name="Site web", user_id=1),
+        ])
+        # More rows than any Leo list limit
+        db.add_all([
+            Quote(
+                quote_number=f"DEV-{i}", title=f"Devis {i}", amount=10 * (i % 3 + 1),
+                status="sent" if i % 3 == 0 else "draft",
+            )
+            for i in range(QUOTES)
+        ])
+        db.add_all([
+            TimeEntry(user_id=1, project_id=1, duration=3600, date=datetime(2026, 3, 2)),
+            TimeEntry(user_id=1, project_id=1, duration=1800, date=datetime(2026, 3, 3)),
+            TimeEntry(user_id=2, project_id=None, duration=7200, date=datetime(2026, 4, 1)),
+        ])
+        await db.commit()
+    return engine
+
+
+def _count_queries(engine) -> list:
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_grouped_sum_in_one_query(engine):
+    statements = _count_queries(engine)
+    async with AsyncSession(engine) as db:
+        result = await LeoAggregateService(db).run(
+            AggregateRequest("quotes", "sum", "amount", group_by=["status"])
+        )
+
+    assert len(statements) == 1 and "GROUP BY" in statements[0]
+    assert result.count == QUOTES
+    # i % 3 == 0 -> 10, otherwise 20 or 30
+    assert result.group_value("status", "sent") == QUOTES // 3
+    assert result.group_value("status", "sent", "value") == 10 * QUOTES // 3
+    assert result.group_value("status", "draft", "value") == 50 * QUOTES // 3
+    assert result.value == 60 * QUOTES // 3
+
+
+@pytest.mark.asyncio
+async def test_filters_averages_and_labels(engine):
+    async with AsyncSession(engine) as db:
+        service = LeoAggregateService(db)
+        drafts = await service.run(AggregateRequest("quotes", filters={"status": ["draft", "accepted"]}))
+        assert (drafts.count, drafts.value, drafts.groups) == (2 * QUOTES // 3, 2 * QUOTES // 3, [])
+
+        average = await service.run(AggregateRequest("quotes", "avg", "amount", filters={"status": "draft"}))
+        assert average.value == 25
+
+        march = await service.run(AggregateRequest(
+            "time_entries", "sum", "hours", group_by=["user", "project"],
+            date_from=datetime(2026, 3, 1), date_to=datetime(2026, 3, 31),
+        ))
+        assert march.count == 2 and march.value == 1.5
+        assert march.groups == [
+            {"user": 1, "user_label": "Lea Martin", "project": 1, "project_label": "Site web",
+             "count": 2, "value": 1.5},
+        ]
+
+
+@pytest.mark.asyncio
+async def test_unknown_inputs_are_rejected(engine):
+    async with AsyncSession(engine) as db:
+        service = LeoAggregateService(db)
+        for request in [
+            AggregateRequest("unknown"),
+            AggregateRequest("quotes", "median", "amount"),
+            AggregateRequest("quotes", "sum"),
+            AggregateRequest("quotes", group_by=["title"]),
+            AggregateRequest("quotes", filters={"user_id": 1}),
+        ]:
+            with pytest.raises(ValueError):
+                service.compile(request)
+
+
+@pytest.mark.asyncio
+async def test_leo_counting_answers_from_aggregates(engine):
+    async with AsyncSession(engine) as db:
+        service = LeoContextService(db)
+        query = "combien de devis en attente"
+        data = await service._get_relevant_data_single(1, {"quotes": True}, query)
+        assert len(data["quotes"]) <= service.COUNTING_SAMPLE_SIZE
+        assert data["aggregates"]["quotes"].count == QUOTES
+
+        context = await service.build_context_string(data, query)
+        assert f"DEVIS EN ATTENTE: {QUOTES // 3} ({10 * QUOTES // 3:,.2f}€)" in context
+
+        # Hours over every entry, not only the returned ones
+        entries = await service.get_relevant_time_entries(1, "heures", limit=1)
+        assert len(entries) == 1
+        assert entries[0]["_aggregation"] == {
+            "total_hours": 3.5,
+            "by_employee": {"Lea Martin": 1.5, "Tom Roy": 2.0},
+            "by_project": {"Site web": 1.5},
+        }
@@ -0,0 +1,146 @@
+"""
+Tests for Leo's token-budgeted context and cached persona prompt
+"""
+
+import pytest
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import User
+from app.models.user_preference import UserPreference
+from app.services.leo_context_budget import (
+    PRIORITY_DATA,
+    PRIORITY_EXTRA,
+    PRIORITY_REQUIRED,
+    ContextSection,
+    estimate_tokens,
+    fit_sections,
+)
+from app.services.leo_context_service import LeoContextService
+from app.services.leo_settings_service import LeoSettingsService, invalidate_leo_settings_cache
+
+
+def _lines(prefix, count):
+    return [f"{prefix} {i} - une ligne de contexte assez longue" for i in range(count)]
+
+
+def test_sections_are_ranked_and_truncated_to_the_budget():
+    sections = [
+        ContextSection("summary", PRIORITY_REQUIRED, ["RÉSUMÉ: CONTACTS: 200"]),
+        ContextSection("contacts", PRIORITY_DATA, ["=== CONTACTS ==="] + _lines("contact", 100)),
+        ContextSection("projects", PRIORITY_DATA, ["=== PROJETS ==="] + _lines("projet", 3)),
+        ContextSection("empty", PRIORITY_DATA, []),
+        ContextSection("reference", PRIORITY_EXTRA, ["=== RÉFÉRENCE SYSTÈME ==="] + _lines("ref", 50)),
+    ]
+    small = [sections[0], sections[2]]
+    assert fit_sections(small, 1000) == "\n".join(section.text for section in small)
+
+    text = fit_sections(sections, 300)
+    assert estimate_tokens(text) <= 300
+    lines = text.split("\n")
+    # Summary whole and first, small section whole, large one cut after its first records
+    assert lines[0] == "RÉSUMÉ: CONTACTS: 200"
+    assert lines[1:3] == ["=== CONTACTS ===", "contact 0 - une ligne de contexte assez longue"]
+    assert any(line.endswith("lignes omises)") for line in lines)
+    assert "projet 2 - une ligne de contexte assez longue" in lines
+    # Extras only get what the data sections left
+    assert "=== RÉFÉRENCE SYSTÈME ===" not in lines
+
+
+@pytest.mark.asyncio
+async def test_context_string_stays_within_budget():
+    service = LeoContextService(db=None)
+    data = {
+        "contacts": [
+            {"id": i, "nom_complet": f"Contact {i}", "email": f"c{i}@example.com", "entreprise": "Nukleo"}
+            for i in range(1, 201)
+        ],
+        "employees": [{"nom_complet": f"Employé {i}", "email": f"e{i}@example.com"} for i in range(200)],
+    }
+    full = await service.build_context_string(data, "qui sont nos contacts et employés", max_tokens=100000)
+    bounded = await service.build_context_string(data, "qui sont nos contacts et employés", max_tokens=150)
+    assert estimate_tokens(bounded) <= 150 < estimate_tokens(full)
+    assert bounded.startswith("=== CONTACTS (200) ===\nContact 1 [ID: 1]")
+    assert "=== EMPLOYÉS (200) ===" in bounded
+
+    table = service._format_data_as_markdown_table(data["contacts"], ["id", "nom_complet"], max_rows=50, max_tokens=40)
+    assert estimate_tokens(table) <= 50 and table.endswith("lignes omises)\n")
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    engine = await make_sqlite_engine(User, UserPreference, file=True)
+    async with AsyncSession(engine) as db:
+        db.add(User(id=1, email="lea@example.com", hashed_password="x", first_name="Lea", last_name="Martin"))
+        await db.commit()
+    invalidate_leo_settings_cache()
+    yield engine
+    invalidate_leo_settings_cache()
+
+
+@pytest.mark.asyncio
+async def test_persona_prompt_cached_until_settings_change(engine):
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    async with AsyncSession(engine) as db:
+        service = LeoSettingsService(db)
+        await service.update_leo_settings(1, {"tone": "technique", "custom_instructions": "Cite les ID"})
+        prompt = await service.build_system_prompt(1)
+        assert "Cite les ID" in prompt
+
+        statements.clear()
+        assert await service.build_system_prompt(1) == prompt
+        assert (await service.get_leo_settings(1))["tone"] == "technique"
+        assert statements == []
+
+        # Endpoint path
+        await service.upload_markdown_file(1, "# Règles\nToujours vouvoyer", "regles.md")
+        assert "Toujours vouvoyer" in await service.build_system_prompt(1)
+
+    # Any other write of the preference, from another session
+    async with AsyncSession(engine) as db:
+        preference = (await db.execute(select(UserPreference))).scalar_one()
+        preference.value = {**preference.value, "custom_instructions": "Réponds en une phrase"}
+        await db.commit()
+
+    async with AsyncSession(engine) as db:
+        prompt = await LeoSettingsService(db).build_system_prompt(1)
+        assert "Réponds en une phrase" in prompt and "Cite les ID" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_uploaded_instructions_are_bounded(engine, monkeypatch):
+    monkeypatch.setattr(settings, "LEO_INSTRUCTIONS_MAX_TOKENS", 100)
+    async with AsyncSession(engine) as db:
+        service = LeoSettingsService(db)
+        await service.upload_markdown_file(1, "\n".join(_lines("règle", 500)), "regles.md")
+        prompt = await service.build_system_prompt(1)
+    assert "règle 0 " in prompt and "règle 499 " not in prompt
+    assert estimate_tokens(prompt) < 400
+
+
+@pytest.mark.asyncio
+async def test_updates_merge_into_the_stored_settings(engine):
+    async with AsyncSession(engine) as db:
+        service = LeoSettingsService(db)
+        await service.update_leo_settings(1, {"tone": "technique"})
+        assert (await service.get_leo_settings(1))["custom_instructions"] == ""
+
+    # Written by another worker: this worker's cache is not invalidated
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(UserPreference).values(value={"tone": "technique", "custom_instructions": "Cite les ID"})
+        )
+
+    async with AsyncSession(engine) as db:
+        service = LeoSettingsService(db)
+        saved = await service.update_leo_settings(1, {"approach": "detaille"})
+        assert (saved["custom_instructions"], saved["approach"]) == ("Cite les ID", "detaille")
+        await service.upload_markdown_file(1, "# Règles", "regles.md")
+        assert await service.delete_markdown_file(1)
+        assert (await service.get_leo_settings(1))["custom_instructions"] == "Cite les ID"
@@ -0,0 +1,84 @@
+"""
+Tests for the content-addressed PDF render service
+"""
+
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from app.core.config import settings
+from app.services import pdf_render_service as module
+from app.services.pdf_render_service import PDFRenderService, snapshot_digest
+
+
+def _invoice(number: str, total: float = 100.0) -> dict:
+    return {
+        "invoice_number": number,
+        "client_data": {"name": "Client", "email": "client@example.com"},
+        "line_items": [{"description": "Service", "quantity": 1, "unitPrice": total, "total": total}],
+        "subtotal": total,
+        "tax_rate": 0.0,
+        "tax_amount": 0.0,
+        "total": total,
+        "issue_date": "2026-05-04T00:00:00+00:00",
+        "status": "sent",
+    }
+
+
+@pytest.fixture
+def inline_rendering(monkeypatch):
+    """Render in a thread and count renders per document"""
+    monkeypatch.setattr(settings, "PDF_RENDER_WORKERS", 0)
+    rendered = []
+    original = module.RENDERERS["invoice"]
+
+    def counting_render(data):
+        rendered.append(data["invoice_number"])
+        return original(data)
+
+    monkeypatch.setitem(module.RENDERERS, "invoice", counting_render)
+    return rendered
+
+
+def test_snapshot_digest_ignores_key_order():
+    data = _invoice("INV-2026-001")
+    reordered = dict(reversed(list(data.items())))
+    assert snapshot_digest("invoice", data) == snapshot_digest("invoice", reordered)
+    assert snapshot_digest("invoice", data) != snapshot_digest("invoice", _invoice("INV-2026-001", 101.0))
+    assert snapshot_digest("invoice", data) != snapshot_digest("submission", data)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_document_rendered_once(inline_rendering):
+    service = PDFRenderService(cache_ttl=0)
+
+    digest, pdf = await service.render("invoice", _invoice("INV-2026-001"))
+    assert pdf.startswith(b"%PDF")
+    again_digest, again = await service.render("invoice", _invoice("INV-2026-001"))
+    assert (again_digest, again) == (digest, pdf)
+
+    # Concurrent requests for a new snapshot share one render
+    await asyncio.gather(*(service.render("invoice", _invoice("INV-2026-001", 250.0)) for _ in range(5)))
+    assert inline_rendering == ["INV-2026-001", "INV-2026-001"]
+    assert service.renders == 2
+
+
+@pytest.mark.asyncio
+async def test_render_zip(inline_rendering):
+    service = PDFRenderService(cache_ttl=0)
+    documents = [(f"facture_INV-2026-{i:03d}.pdf", _invoice(f"INV-2026-{i:03d}")) for i in range(1, 4)]
+    await service.render("invoice", documents[0][1])
+
+    archive = zipfile.ZipFile(io.BytesIO(await service.render_zip("invoice", documents)))
+
+    assert archive.namelist() == [filename for filename, _ in documents]
+    assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+    # The first invoice came from the cache
+    assert sorted(inline_rendering) == ["INV-2026-001", "INV-2026-002", "INV-2026-003"]
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        asyncio.run(PDFRenderService(cache_ttl=0).render("quote", {}))
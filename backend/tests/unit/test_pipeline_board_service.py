@@ -0,0 +1,122 @@
+"""
+Tests for the pipeline board read model
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import InvalidCursorError
+from app.models.company import Company
+from app.models.pipeline import Opportunite, Pipeline, PipelineStage
+from app.models.user import User
+from app.services.pipeline_board_service import PipelineBoardService
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    return await make_sqlite_engine(User, Company, Pipeline, PipelineStage, Opportunite)
+
+
+@pytest.fixture
+async def board(engine):
+    """Pipeline with 3 stages: 7 cards in 'lead', 2 in 'won', 0 in 'lost', 1 without stage"""
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        owner = User(id=1, email="sales@example.com", hashed_password="x", first_name="Ana", last_name="Roy")
+        company = Company(id=1, name="Acme")
+        pipeline = Pipeline(id=uuid4(), name="Ventes")
+        lead, won, lost = (
+            PipelineStage(id=uuid4(), name=name, order=order, pipeline=pipeline)
+            for order, name in enumerate(("lead", "won", "lost"))
+        )
+        opportunities = [
+            Opportunite(
+                id=uuid4(), name=f"lead {i}", amount=Decimal("100"), probability=20 if i % 2 else None,
+                pipeline=pipeline, stage=lead, company_id=1, assigned_to_id=1,
+                created_at=START + timedelta(days=i),
+            )
+            for i in range(7)
+        ]
+        opportunities += [
+            Opportunite(id=uuid4(), name=f"won {i}", amount=Decimal("1000"), probability=100, status="won",
+                        pipeline=pipeline, stage=won, created_at=START + timedelta(days=i))
+            for i in range(2)
+        ]
+        opportunities.append(Opportunite(id=uuid4(), name="loose", pipeline=pipeline, created_at=START))
+        session.add_all([owner, company, pipeline, *opportunities])
+        await session.commit()
+        yield session, pipeline, (lead, won, lost)
+
+
+@pytest.mark.asyncio
+async def test_board_columns_and_aggregates(board, engine):
+    session, pipeline, (lead, won, lost) = board
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    result = await PipelineBoardService(session).board(pipeline.id, cards_per_stage=3)
+
+    # Pipeline, stages, aggregates, cards
+    assert len(statements) == 4
+    assert [column["name"] for column in result["columns"]] == ["lead", "won", "lost", "Sans étape"]
+    lead_column, won_column, lost_column, no_stage = result["columns"]
+
+    assert lead_column["count"] == 7
+    assert lead_column["total_amount"] == 700.0
+    # 3 cards at 20% and 4 without probability (50%)
+    assert lead_column["weighted_amount"] == pytest.approx(3 * 20 + 4 * 50)
+    assert [card["name"] for card in lead_column["items"]] == ["lead 6", "lead 5", "lead 4"]
+    assert lead_column["items"][0]["company_name"] == "Acme"
+    assert lead_column["items"][0]["assigned_to_name"] == "Ana Roy"
+    assert lead_column["next_cursor"] is not None
+
+    assert won_column["count"] == 2 and won_column["next_cursor"] is None
+    assert lost_column["count"] == 0 and lost_column["items"] == []
+    assert no_stage["stage_id"] is None and no_stage["count"] == 1
+    assert result["count"] == 10
+    assert result["total_amount"] == 2700.0
+
+
+@pytest.mark.asyncio
+async def test_stage_cards_keyset(board):
+    session, pipeline, (lead, _, _) = board
+    service = PipelineBoardService(session)
+
+    first = await service.board(pipeline.id, cards_per_stage=3)
+    cursor = first["columns"][0]["next_cursor"]
+    names = []
+    while cursor:
+        page = await service.stage_cards(pipeline.id, lead.id, limit=3, cursor=cursor)
+        names += [card["name"] for card in page["items"]]
+        cursor = page["next_cursor"]
+
+    assert names == ["lead 3", "lead 2", "lead 1", "lead 0"]
+
+    page = await service.stage_cards(pipeline.id, None, limit=5)
+    assert [card["name"] for card in page["items"]] == ["loose"]
+
+    with pytest.raises(InvalidCursorError):
+        await service.stage_cards(pipeline.id, lead.id, limit=3, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_counts_and_active_stats(board):
+    session, pipeline, _ = board
+    service = PipelineBoardService(session)
+
+    assert await service.opportunity_counts([pipeline.id, uuid4()]) == {pipeline.id: 10}
+    # Won and NULL-status opportunities are not active
+    stats = await service.active_stats()
+    assert stats == {"total": 0, "total_value": 0.0, "weighted_value": 0.0, "avg_probability": 0.0}
+
+    newest_lead = (await service.board(pipeline.id, 1))["columns"][0]["items"][0]
+    (await session.get(Opportunite, newest_lead["id"])).status = "open"
+    await session.commit()
+    stats = await service.active_stats()
+    assert stats == {"total": 1, "total_value": 100.0, "weighted_value": 50.0, "avg_probability": 50.0}
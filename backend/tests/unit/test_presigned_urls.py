@@ -0,0 +1,61 @@
+"""
+Tests for the presigned URL service
+"""
+
+from datetime import datetime, timezone
+from unittest import mock
+
+import boto3
+import pytest
+from botocore.config import Config
+
+from app.services.presigned_urls import PresignedUrlService, S3UrlSigner, extract_file_key
+
+NOW = datetime(2026, 10, 17, 12, 0, 0, tzinfo=timezone.utc)
+KEY = "contacts/photos/Jean Côté+1~.jpg"
+
+
+@pytest.mark.parametrize("region,endpoint_url,bucket,addressing_style", [
+    ("us-east-1", None, "my-bucket", "virtual"),
+    ("ca-central-1", None, "My.Bucket", "path"),
+    ("nyc3", "https://nyc3.digitaloceanspaces.com", "my-bucket", "path"),
+])
+def test_signer_matches_botocore(region, endpoint_url, bucket, addressing_style):
+    client = boto3.client(
+        "s3",
+        aws_access_key_id="AKIATEST",
+        aws_secret_access_key="secret",
+        region_name=region,
+        endpoint_url=endpoint_url,
+        config=Config(signature_version="s3v4", s3={"addressing_style": addressing_style}),
+    )
+    with mock.patch("botocore.auth.get_current_datetime", return_value=NOW.replace(tzinfo=None)):
+        expected = client.generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": KEY}, ExpiresIn=604800
+        )
+
+    signer = S3UrlSigner("AKIATEST", "secret", region, bucket, endpoint_url)
+    assert signer.sign(KEY, 604800, NOW) == expected
+
+
+def test_extract_file_key():
+    presigned = "https://nyc3.digitaloceanspaces.com/my-bucket/contacts/photos/a%20b.jpg?X-Amz-Signature=x"
+    assert extract_file_key(presigned, "contacts/photos") == "contacts/photos/a b.jpg"
+    assert extract_file_key("photo.jpg", "contacts/photos", repair=True) == "contacts/photos/photo.jpg"
+    assert extract_file_key("/contacts/other/p.jpg", "contacts/photos", repair=True) == "contacts/other/p.jpg"
+    assert extract_file_key("https://cdn.example.com/image.png", "testimonials/logos") is None
+
+
+@pytest.mark.asyncio
+async def test_service_batches_and_caches():
+    service = PresignedUrlService(S3UrlSigner("AKIATEST", "secret", "us-east-1", "my-bucket"))
+    keys = [f"contacts/photos/{i}.jpg" for i in range(300)]
+
+    urls = await service.get_urls(keys + keys[:10])
+    assert set(urls) == set(keys)
+    assert all("X-Amz-Signature=" in url for url in urls.values())
+
+    # Second call is served from memory: same URLs, nothing signed
+    with mock.patch.object(service.signer, "sign", side_effect=AssertionError("signed again")):
+        assert await service.get_urls(keys) == urls
+        assert await service.get_url(keys[0]) == urls[keys[0]]
@@ -0,0 +1,113 @@
+"""
+Tests for the cached authenticated principal
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import is_admin_or_superadmin
+from app.models import Permission, ProjectTask, Role, RolePermission, User, UserPermission, UserRole
+from app.services.principal_service import Principal, invalidate_principal_cache, load_principal
+from app.services.rbac_service import invalidate_permission_cache
+
+EMAIL = "lea@example.com"
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    engine = await make_sqlite_engine(
+        User, Role, Permission, RolePermission, UserRole, UserPermission, ProjectTask,
+    )
+    async with AsyncSession(engine) as db:
+        db.add_all([
+            User(id=1, email=EMAIL, first_name="Lea", hashed_password="secret-hash"),
+            Role(id=1, name="Admin", slug="admin"),
+        ])
+        await db.commit()
+    await invalidate_principal_cache()
+    await invalidate_permission_cache()
+    return engine
+
+
+def _count_queries(engine) -> list:
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def test_principal_json_round_trip():
+    created = datetime(2026, 1, 2, 3, 4, tzinfo=timezone.utc)
+    principal = Principal(
+        {"id": 1, "email": EMAIL, "is_active": True, "created_at": created, "avatar": None},
+        frozenset({"admin"}), frozenset({"users:read"}), 7, "3:0",
+    )
+    restored = Principal.from_json(json.loads(principal.to_json()))
+    assert restored.columns == principal.columns
+    assert (restored.roles, restored.permissions, restored.tenant_id, restored.version) == (
+        frozenset({"admin"}), frozenset({"users:read"}), 7, "3:0"
+    )
+    assert not hasattr(restored, "__dict__")
+
+
+@pytest.mark.asyncio
+async def test_cached_principal_skips_database(engine):
+    statements = _count_queries(engine)
+    async with AsyncSession(engine) as db:
+        principal = await load_principal(db, EMAIL)
+    assert principal.user_id == 1 and principal.roles == frozenset()
+    first_load = len(statements)
+
+    async with AsyncSession(engine) as db:
+        user = (await load_principal(db, EMAIL)).attach(db)
+        assert (user.id, user.email, user.first_name) == (1, EMAIL, "Lea")
+        assert not await is_admin_or_superadmin(user, db)
+    assert len(statements) == first_load
+
+    async with AsyncSession(engine) as db:
+        assert await load_principal(db, "nobody@example.com") is None
+
+
+@pytest.mark.asyncio
+async def test_attached_user_is_persistent(engine):
+    async with AsyncSession(engine) as db:
+        await load_principal(db, EMAIL)
+
+    async with AsyncSession(engine) as db:
+        user = (await load_principal(db, EMAIL)).attach(db)
+        # Not cached, loaded on demand
+        await db.refresh(user, ["hashed_password"])
+        assert user.hashed_password == "secret-hash"
+        user.first_name = "Léa"
+        await db.commit()
+
+    async with AsyncSession(engine) as db:
+        assert (await db.execute(select(User.first_name))).scalar() == "Léa"
+        # The write dropped the cached entry
+        assert (await load_principal(db, EMAIL)).columns["first_name"] == "Léa"
+
+
+@pytest.mark.asyncio
+async def test_role_and_user_changes_invalidate(engine):
+    async with AsyncSession(engine) as db:
+        await load_principal(db, EMAIL)
+
+    async with AsyncSession(engine) as db:
+        db.add(UserRole(user_id=1, role_id=1))
+        await db.commit()
+    async with AsyncSession(engine) as db:
+        user = (await load_principal(db, EMAIL)).attach(db)
+        assert await is_admin_or_superadmin(user, db)
+
+    async with AsyncSession(engine) as db:
+        user = await db.get(User, 1)
+        user.is_active = False
+        await db.commit()
+    async with AsyncSession(engine) as db:
+        assert not (await load_principal(db, EMAIL)).is_active
@@ -0,0 +1,88 @@
+"""
+Tests for cached RBAC permission resolution
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Permission, Role, RolePermission, UserPermission, UserRole
+from app.services.rbac_service import RBACService, ResolvedPermissions
+
+
+def test_resource_wildcards():
+    resolved = ResolvedPermissions(frozenset(), frozenset({"users:read", "erp:view:*", "teams:*", "*"}))
+
+    assert resolved.allows("users:read")
+    assert not resolved.allows("users:delete")
+    assert resolved.allows("teams:update")
+    assert resolved.allows("teams:members:add")
+    assert not resolved.allows("teams")
+    # Only <resource>:* is a wildcard: nested ones and a bare '*' grant nothing more
+    assert resolved.allows("erp:view:*")
+    assert not resolved.allows("erp:view:all")
+    assert not resolved.allows("erp:view:all:orders")
+    assert not resolved.allows("projects:read")
+    assert not resolved.allows("admin")
+
+
+def test_resolved_permissions_admin_wildcard():
+    superadmin = ResolvedPermissions(frozenset({"superadmin"}), frozenset())
+    assert superadmin.allows("anything:at:all")
+    assert superadmin.effective_permissions == {"admin:*"}
+
+    admin = ResolvedPermissions(frozenset({"admin"}), frozenset({"admin:*"}))
+    assert admin.allows("users:delete")
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    return await make_sqlite_engine(Role, Permission, RolePermission, UserRole, UserPermission)
+
+
+def _count_queries(engine) -> list:
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_resolution_uses_one_query_and_is_invalidated_on_commit(engine):
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        manager = Role(name="Manager", slug="manager")
+        read = Permission(resource="users", action="read", name="users:read")
+        teams = Permission(resource="teams", action="*", name="teams:*")
+        delete = Permission(resource="users", action="delete", name="users:delete")
+        db.add_all([manager, read, teams, delete])
+        await db.flush()
+        db.add_all([
+            UserRole(user_id=1, role_id=manager.id),
+            RolePermission(role_id=manager.id, permission_id=read.id),
+            RolePermission(role_id=manager.id, permission_id=teams.id),
+        ])
+        await db.commit()
+
+    statements = _count_queries(engine)
+    async with AsyncSession(engine) as db:
+        rbac = RBACService(db)
+        assert await rbac.has_permission(1, "users:read")
+        assert await rbac.has_any_permission(1, ["users:delete", "teams:update"])
+        assert not await rbac.has_all_permissions(1, ["users:read", "users:delete"])
+        assert await rbac.has_role(1, "manager")
+        assert await rbac.get_user_permissions(1) == {"users:read", "teams:*"}
+    assert len(statements) == 1
+
+    # Next request is served from the shared cache
+    async with AsyncSession(engine) as db:
+        assert await RBACService(db).has_permission(1, "teams:list")
+    assert len(statements) == 1
+
+    # Granting a custom permission is visible to the next request
+    async with AsyncSession(engine) as db:
+        db.add(UserPermission(user_id=1, permission_id=delete.id))
+        await db.commit()
+    async with AsyncSession(engine) as db:
+        assert await RBACService(db).has_permission(1, "users:delete")
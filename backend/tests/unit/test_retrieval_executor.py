@@ -0,0 +1,91 @@
+"""
+Tests for concurrent context retrieval on separate sessions
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.contact import Contact
+from app.services.leo_context_service import LeoContextService
+from app.services.retrieval_executor import RetrievalExecutor
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    # A file database: every session gets its own connection to the same data
+    engine = await make_sqlite_engine(Contact, file=True)
+    async with AsyncSession(engine) as db:
+        db.add_all([
+            Contact(id=i, first_name=f"Alice {i}", last_name="Martin", circle="client")
+            for i in range(1, 4)
+        ])
+        await db.commit()
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_concurrently_on_their_own_sessions(engine):
+    sessions = []
+    running = 0
+    peak = 0
+
+    async def job(session):
+        nonlocal running, peak
+        sessions.append(session)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        count = (await session.execute(text("SELECT count(*) FROM contacts"))).scalar()
+        running -= 1
+        return [{"count": count}]
+
+    async with AsyncSession(engine) as db:
+        results, report = await RetrievalExecutor(db, timeout=1, budget=2, concurrency=2).run(
+            {key: job for key in ("a", "b", "c")}
+        )
+
+    assert results == {key: [{"count": 3}] for key in ("a", "b", "c")}
+    assert len({id(session) for session in sessions}) == 3 and db not in sessions
+    assert peak == 2
+    assert not report.partial and report.jobs["a"].items == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_results_on_timeouts_and_errors(engine):
+    async def fast(session):
+        return [{"id": 1}]
+
+    async def slow(session):
+        await asyncio.sleep(5)
+        return [{"id": 2}]
+
+    async def broken(session):
+        raise RuntimeError("boom")
+
+    async with AsyncSession(engine) as db:
+        executor = RetrievalExecutor(db, timeout=0.1, budget=1, concurrency=4)
+        results, report = await executor.run({"fast": fast, "slow": slow, "broken": broken})
+        assert results == {"fast": [{"id": 1}], "slow": [], "broken": []}
+        assert {key: timing.status for key, timing in report.jobs.items()} == {
+            "fast": "ok", "slow": "timeout", "broken": "error"
+        }
+
+        # Overall budget shorter than the job limit: late jobs are cancelled
+        executor = RetrievalExecutor(db, timeout=5, budget=0.1, concurrency=4)
+        results, report = await executor.run({"fast": fast, "slow": slow})
+        assert results == {"fast": [{"id": 1}], "slow": []}
+        assert report.jobs["slow"].status == "budget" and report.partial
+        assert report.elapsed_ms < 1000
+
+
+@pytest.mark.asyncio
+async def test_leo_context_uses_the_executor(engine):
+    async with AsyncSession(engine) as db:
+        service = LeoContextService(db)
+        data = await service._get_relevant_data_single(1, {"contacts": True}, "")
+
+    assert sorted(contact["id"] for contact in data["contacts"]) == [1, 2, 3]
+    assert service.last_retrieval.jobs["contacts"].status == "ok"
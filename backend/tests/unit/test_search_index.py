@@ -0,0 +1,135 @@
+"""
+Tests for the shared full-text search index
+"""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import Base
+from app.models import Company, Contact, Project, SearchDocument, User
+from app.services.leo_context_service import LeoContextService
+from app.services.search_index_service import SearchIndex
+from app.services.search_service import SearchService
+
+
+@pytest.fixture
+async def engine(make_sqlite_engine):
+    engine = await make_sqlite_engine(
+        User, Company, Contact, Project, SearchDocument,
+        # Loaded when a contact is deleted
+        *(Base.metadata.tables[name] for name in ("opportunites", "opportunity_contacts", "testimonials")),
+        file=True,
+    )
+    async with AsyncSession(engine) as db:
+        db.add_all([
+            Company(id=1, name="Éloïse Conseil", city="Montréal"),
+            Company(id=2, name="Atelier Nord", description="Partenaire d'Éloïse"),
+            Contact(id=1, first_name="Daly", last_name="Ann", email="daly@example.com", position="Directrice"),
+            Contact(id=2, first_name="Marc", last_name="Côté", city="Québec"),
+            Project(id=1, name="Refonte site web", etape="Conception", user_id=1),
+        ])
+        await db.commit()
+    return engine
+
+
+async def _documents(db):
+    result = await db.execute(
+        select(SearchDocument.entity_type, SearchDocument.entity_id, SearchDocument.search_title)
+        .order_by(SearchDocument.entity_type, SearchDocument.entity_id)
+    )
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_writes_maintain_the_index(engine):
+    async with AsyncSession(engine) as db:
+        assert await _documents(db) == [
+            ("companies", "1", "eloise conseil"),
+            ("companies", "2", "atelier nord"),
+            ("contacts", "1", "daly ann"),
+            ("contacts", "2", "marc cote"),
+            ("projects", "1", "refonte site web"),
+        ]
+        company = await db.get(Company, 2)
+        company.name = "Atelier Sud"
+        await db.delete(await db.get(Contact, 2))
+        await db.commit()
+
+        documents = await _documents(db)
+        assert ("companies", "2", "atelier sud") in documents
+        assert not any(entity_type == "contacts" and entity_id == "2" for entity_type, entity_id, _ in documents)
+
+
+@pytest.mark.asyncio
+async def test_ranked_accent_insensitive_search(engine):
+    async with AsyncSession(engine) as db:
+        hits, total = await SearchIndex(db).search("eloise")
+        assert total == 2
+        # Title match before a match in the description
+        assert [(hit.entity_type, hit.entity_id) for hit in hits] == [("companies", "1"), ("companies", "2")]
+        assert hits[0].title == "Éloïse Conseil" and hits[0].subtitle == "Montréal"
+
+        # Every word of the query, across fields
+        hits, total = await SearchIndex(db).search("Québec Marc")
+        assert [hit.entity_id for hit in hits] == ["2"] and total == 1
+
+        # Any of the terms (Leo keywords), ids typed like the model's
+        assert sorted(await SearchIndex(db).entity_ids("contacts", ["daly", "directrice ann", "cote"])) == [1, 2]
+
+        with pytest.raises(ValueError):
+            await SearchIndex(db).search("x", entity_types=["unknown"])
+
+
+@pytest.mark.asyncio
+async def test_search_service_and_leo_use_the_index(engine):
+    async with AsyncSession(engine) as db:
+        result = await SearchService(db).search_indexed("companies", "Eloïse")
+        assert [company["id"] for company in result["results"]] == [1, 2] and result["total"] == 2
+
+        result = await SearchService(db).search_all("site", limit=10)
+        assert result["results"][0]["entity_type"] == "projects" and not result["has_more"]
+
+        # Capitalized names used to need concat(), which only PostgreSQL has
+        contacts = await LeoContextService(db).get_relevant_contacts(1, "Qui est Daly Ann ?")
+        assert [contact["id"] for contact in contacts] == [1]
+
+
+@pytest.mark.asyncio
+async def test_databases_without_the_index_table(make_sqlite_engine):
+    engine = await make_sqlite_engine(Contact, file=True)
+    async with AsyncSession(engine) as db:
+        db.add(Contact(first_name="Lea", last_name="Martin"))
+        await db.commit()
+        assert (await db.execute(select(Contact.first_name))).scalar() == "Lea"
+
+
+@pytest.mark.asyncio
+async def test_search_limited_to_readable_entity_types(engine, monkeypatch):
+    from types import SimpleNamespace
+
+    from app.api.v1.endpoints import search as search_api
+
+    async with AsyncSession(engine) as db:
+        # Row left by a version that indexed invoices (owned by user, not tenant)
+        db.add(SearchDocument(entity_type="invoices", entity_id="1", title="FAC-eloise",
+                              search_title="fac eloise", search_text="fac eloise"))
+        await db.commit()
+        assert "invoices" not in search_api.SEARCH_SPECS
+        hits, total = await SearchIndex(db).search("eloise")
+        assert {hit.entity_type for hit in hits} == {"companies"} and total == 2
+        assert await SearchIndex(db).search("eloise", entity_types=[]) == ([], 0)
+
+        async def not_superadmin(user, db, request=None):
+            return False
+
+        monkeypatch.setattr(search_api, "is_superadmin", not_superadmin)
+        user = SimpleNamespace(id=1)
+        with pytest.raises(search_api.HTTPException) as exc_info:
+            await search_api.search(search_api.SearchRequest(query="daly", entity_type="employees"), user, db)
+        assert exc_info.value.status_code == 403
+        for entity_type in ("invoices", "unknown"):
+            with pytest.raises(search_api.HTTPException) as exc_info:
+                await search_api.search(search_api.SearchRequest(query="daly", entity_type=entity_type), user, db)
+            assert exc_info.value.status_code == 400
+        assert "employees" not in await search_api._searchable_entity_types(user, db)
@@ -0,0 +1,219 @@
+"""
+Tests for the task board read model and rank keys
+"""
+
+import random
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.employee import Employee
+from app.models.project_task import ProjectTask, TaskStatus
+from app.models.user import User
+from app.services.task_board_service import (
+    RANK_MAX_LENGTH,
+    TaskBoardService,
+    TaskMoveError,
+    initial_ranks,
+    rank_after,
+    rank_between,
+)
+
+
+@pytest.fixture
+async def session(make_sqlite_engine):
+    engine = await make_sqlite_engine(User, Employee, ProjectTask)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add_all([
+            User(id=1, email="lea@example.com", first_name="Lea", last_name="Roy", hashed_password="x"),
+            User(id=2, email="max@example.com", first_name="Max", hashed_password="x"),
+            Employee(id=1, first_name="Lea", last_name="Roy", user_id=1),
+            Employee(id=2, first_name="Sans", last_name="Compte"),
+        ])
+        await session.flush()
+        session.add_all([
+            ProjectTask(id=i, title=f"Task {i}", team_id=1, assignee_id=1 if i % 2 else None, rank=rank)
+            for i, rank in enumerate(initial_ranks(5), start=1)
+        ])
+        await session.commit()
+        yield session
+
+
+def test_rank_between_orders_and_stays_short():
+    assert rank_between(None, None) == "i"
+    assert "a" < rank_between("a", "b") < "b"
+    assert rank_between("a", "a1") == "a0i"
+    assert rank_between(None, "1") < "1"
+    assert "zz" < rank_between("zz", None)
+    with pytest.raises(TaskMoveError):
+        rank_between("b", "a")
+
+    # Repeated inserts at random positions keep a strict order without rewriting neighbours
+    generator = random.Random(7)
+    ranks = initial_ranks(3)
+    for _ in range(300):
+        position = generator.randint(0, len(ranks))
+        lower = ranks[position - 1] if position else None
+        upper = ranks[position] if position < len(ranks) else None
+        ranks.insert(position, rank_between(lower, upper))
+    assert ranks == sorted(ranks) and len(set(ranks)) == len(ranks)
+    assert not any(rank.endswith("0") for rank in ranks)
+
+
+@pytest.mark.asyncio
+async def test_move_touches_moved_rows_only(session):
+    statements = []
+    event.listen(session.bind.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    # Task 5 between 1 and 2, then task 4 at the top in another column
+    positions = await TaskBoardService(session).move_many([
+        {"task_id": 5, "after_id": 1, "before_id": 2},
+        {"task_id": 4, "after_id": None, "before_id": 1, "status": TaskStatus.COMPLETED},
+    ])
+
+    assert [position["id"] for position in positions] == [5, 4]
+    updates = [statement for statement in statements if statement.startswith("UPDATE")]
+    assert len(updates) == 2 and all("WHERE project_tasks.id = ?" in statement for statement in updates)
+    page, _ = await TaskBoardService(session).list_page(limit=10)
+    assert [task["id"] for task in page] == [4, 1, 5, 2, 3]
+    assert page[0]["status"] == TaskStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_move_validation(session):
+    service = TaskBoardService(session)
+    with pytest.raises(TaskMoveError):
+        await service.move_many([{"task_id": 1, "after_id": 99}])
+    with pytest.raises(TaskMoveError):
+        await service.move_many([{"task_id": 1, "after_id": 3, "before_id": 2}])
+    with pytest.raises(TaskMoveError):
+        await service.move_many([{"task_id": 1, "after_id": 1}])
+
+    # No neighbour: end of the board
+    await service.move_many([{"task_id": 1}])
+    page, _ = await service.list_page(limit=10)
+    assert page[-1]["id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_assignee_copies_follow_tasks_and_users(session):
+    task = await session.get(ProjectTask, 1)
+    assert (task.assignee_name, task.assignee_email) == ("Lea Roy", "lea@example.com")
+
+    task.assignee_id = 2
+    await session.commit()
+    assert (task.assignee_name, task.assignee_email) == ("Max", "max@example.com")
+
+    user = await session.get(User, 1)
+    user.last_name = "Martin"
+    await session.commit()
+    rows = (await session.execute(
+        select(ProjectTask.id, ProjectTask.assignee_name).where(ProjectTask.assignee_id == 1)
+    )).all()
+    assert rows == [(3, "Lea Martin"), (5, "Lea Martin")]
+
+
+@pytest.mark.asyncio
+async def test_list_page_reads_one_table(session):
+    service = TaskBoardService(session)
+    statements = []
+    event.listen(session.bind.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    first, cursor = await service.list_page(limit=3, assignee_id=await service.employee_user_id(1))
+    assert [task["id"] for task in first] == [1, 3, 5] and cursor is None
+    assert first[0]["assignee_name"] == "Lea Roy"
+    assert all("users" not in statement.split("FROM")[-1] for statement in statements if statement.startswith("SELECT"))
+
+    # Employee without a user: looked up, never created
+    assert await service.employee_user_id(2) is None
+    assert (await session.execute(select(User.id))).scalars().all() == [1, 2]
+
+    first, cursor = await service.list_page(limit=2)
+    second, _ = await service.list_page(limit=2, cursor=cursor)
+    assert [task["id"] for task in first + second] == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_new_tasks_get_a_rank_at_the_end(session):
+    # Created as automations do, without a rank
+    session.add_all([ProjectTask(title="Relance", team_id=1), ProjectTask(title="Appel", team_id=1)])
+    await session.commit()
+
+    service = TaskBoardService(session)
+    first, cursor = await service.list_page(limit=4)
+    second, _ = await service.list_page(limit=4, cursor=cursor)
+    assert [task["title"] for task in first + second][-2:] == ["Relance", "Appel"]
+    assert all(task["rank"] for task in first + second)
+
+
+@pytest.mark.asyncio
+async def test_move_between_tasks_sharing_a_rank(session):
+    # Two tasks created concurrently end up with the same rank
+    tied = (await session.get(ProjectTask, 2)).rank
+    session.add_all([
+        ProjectTask(id=6, title="Task 6", team_id=1, rank=tied),
+        ProjectTask(id=7, title="Task 7", team_id=1, rank=tied),
+    ])
+    await session.commit()
+
+    positions = await TaskBoardService(session).move_many([{"task_id": 1, "after_id": 6, "before_id": 7}])
+    assert {position["id"] for position in positions} == {1, 6, 7}
+    page, _ = await TaskBoardService(session).list_page(limit=10)
+    assert [task["id"] for task in page] == [2, 6, 1, 7, 3, 4, 5]
+    assert len({task["rank"] for task in page}) == 7
+
+
+def test_appended_ranks_keep_their_length():
+    ranks = initial_ranks(3)
+    for _ in range(5000):
+        ranks.append(rank_after(ranks[-1]))
+    assert ranks == sorted(ranks) and len(set(ranks)) == len(ranks)
+    assert max(len(rank) for rank in ranks) <= len(initial_ranks(1)[0])
+    assert rank_after(None) == "i" < rank_after("i") < "j"
+    assert "zz" < rank_after("zz") and rank_after("z" * 12) > "z" * 12
+
+
+@pytest.mark.asyncio
+async def test_many_creates_stay_within_the_rank_column(session):
+    for i in range(300):
+        session.add(ProjectTask(title=f"Créée {i}", team_id=1))
+        await session.commit()
+
+    ranks = (await session.execute(select(ProjectTask.rank).order_by(ProjectTask.id))).scalars().all()
+    assert max(len(rank) for rank in ranks) <= RANK_MAX_LENGTH
+    assert ranks[5:] == sorted(ranks[5:]) and ranks[4] < ranks[5]
+
+
+@pytest.mark.asyncio
+async def test_move_between_close_neighbours_rebalances(session):
+    # Neighbours with no room left within RANK_MAX_LENGTH
+    (await session.get(ProjectTask, 1)).rank = "a" * (RANK_MAX_LENGTH - 1)
+    (await session.get(ProjectTask, 2)).rank = "a" * (RANK_MAX_LENGTH - 1) + "1"
+    await session.commit()
+
+    await TaskBoardService(session).move_many([{"task_id": 5, "after_id": 1, "before_id": 2}])
+    page, _ = await TaskBoardService(session).list_page(limit=10)
+    assert [task["id"] for task in page] == [3, 4, 1, 5, 2]
+    assert max(len(task["rank"]) for task in page) <= len(initial_ranks(1)[0])
+
+
+@pytest.mark.asyncio
+async def test_status_moves_set_start_and_completion_dates(session):
+    service = TaskBoardService(session)
+    await service.move_many([
+        {"task_id": 1, "after_id": 2, "before_id": 3, "status": TaskStatus.IN_PROGRESS},
+        {"task_id": 4, "after_id": None, "before_id": 1, "status": TaskStatus.COMPLETED},
+    ])
+    session.expire_all()
+    started = await session.get(ProjectTask, 1)
+    completed = await session.get(ProjectTask, 4)
+    assert started.started_at is not None and started.completed_at is None
+    assert completed.completed_at is not None and completed.started_at is None
+
+    # Set once: moving back and forth keeps the first date
+    first_start = started.started_at
+    await service.move_many([{"task_id": 1, "status": TaskStatus.TODO}])
+    await service.move_many([{"task_id": 1, "status": TaskStatus.IN_PROGRESS}])
+    session.expire_all()
+    assert (await session.get(ProjectTask, 1)).started_at == first_start
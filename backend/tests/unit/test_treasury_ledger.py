@@ -0,0 +1,141 @@
+"""
+Tests for the materialized treasury ledger
+"""
+
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.transaction import Transaction, TransactionStatus, TransactionType
+from app.models.treasury_ledger import TreasuryLedgerDay, apply_ledger_deltas, ledger_deltas_for_rows
+from app.services.treasury_ledger_service import TreasuryLedgerService
+
+
+@pytest.fixture
+async def session(make_sqlite_engine):
+    engine = await make_sqlite_engine(Transaction, TreasuryLedgerDay)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+
+def _transaction(day: date, amount: str, tx_type=TransactionType.REVENUE, **kwargs) -> Transaction:
+    return Transaction(
+        user_id=1,
+        type=tx_type,
+        description="test",
+        amount=Decimal(amount),
+        transaction_date=datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc),
+        status=kwargs.pop("status", TransactionStatus.PAID),
+        **kwargs,
+    )
+
+
+async def _ledger(session):
+    result = await session.execute(select(TreasuryLedgerDay).order_by(TreasuryLedgerDay.day))
+    return [(row.day, row.entries, row.exits, row.running_balance) for row in result.scalars()]
+
+
+@pytest.mark.asyncio
+async def test_insert_maintains_running_balance(session):
+    session.add_all([
+        _transaction(date(2026, 3, 2), "100"),
+        _transaction(date(2026, 3, 4), "30", TransactionType.EXPENSE),
+    ])
+    await session.commit()
+
+    # A backdated transaction shifts every later balance
+    session.add(_transaction(date(2026, 3, 1), "50"))
+    await session.commit()
+
+    assert await _ledger(session) == [
+        (date(2026, 3, 1), Decimal("50"), Decimal("0"), Decimal("50")),
+        (date(2026, 3, 2), Decimal("100"), Decimal("0"), Decimal("150")),
+        (date(2026, 3, 4), Decimal("0"), Decimal("30"), Decimal("120")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_update_cancel_and_delete(session):
+    revenue = _transaction(date(2026, 3, 2), "100")
+    expense = _transaction(date(2026, 3, 3), "40", TransactionType.EXPENSE)
+    session.add_all([revenue, expense])
+    await session.commit()
+
+    # Moving a transaction to another day
+    revenue.transaction_date = datetime(2026, 3, 5, tzinfo=timezone.utc)
+    await session.commit()
+    ledger = TreasuryLedgerService(session)
+    assert await ledger.balance_at(1, date(2026, 3, 4)) == Decimal("-40")
+    assert await ledger.balance_at(1, date(2026, 3, 5)) == Decimal("60")
+
+    # Cancelled transactions no longer count
+    expense.status = TransactionStatus.CANCELLED
+    await session.commit()
+    assert await ledger.balance_at(1, date(2026, 3, 5)) == Decimal("100")
+
+    await session.delete(revenue)
+    await session.commit()
+    assert await ledger.balance_at(1, date(2026, 3, 31)) == Decimal("0")
+
+
+@pytest.mark.asyncio
+async def test_weekly_cashflow_and_totals(session):
+    session.add_all([
+        _transaction(date(2026, 2, 20), "500"),  # before the window: opening balance
+        _transaction(date(2026, 3, 3), "100"),
+        _transaction(date(2026, 3, 12), "70", TransactionType.EXPENSE),
+    ])
+    await session.commit()
+
+    ledger = TreasuryLedgerService(session)
+    opening, weeks = await ledger.weekly_cashflow(1, datetime(2026, 3, 4), datetime(2026, 3, 20))
+
+    assert opening == Decimal("500")
+    assert [week.week_start for week in weeks] == [date(2026, 3, 2), date(2026, 3, 9), date(2026, 3, 16)]
+    assert [week.balance for week in weeks] == [Decimal("600"), Decimal("530"), Decimal("530")]
+    assert await ledger.totals(1, date(2026, 3, 1), date(2026, 3, 31)) == (Decimal("100"), Decimal("70"))
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_ledger(session):
+    session.add_all([
+        _transaction(date(2026, 3, 2), "100"),
+        _transaction(date(2026, 3, 2), "20", TransactionType.EXPENSE),
+        _transaction(date(2026, 3, 9), "45", TransactionType.EXPENSE),
+        _transaction(date(2026, 3, 5), "10", status=TransactionStatus.CANCELLED),
+    ])
+    # Late in the UTC day
+    session.add(Transaction(
+        user_id=1, type=TransactionType.REVENUE, description="late", amount=Decimal("7"),
+        transaction_date=datetime(2026, 3, 3, 23, 30, tzinfo=timezone.utc), status=TransactionStatus.PAID,
+    ))
+    await session.commit()
+    incremental = await _ledger(session)
+
+    assert await TreasuryLedgerService(session).rebuild() == len(incremental)
+    session.expunge_all()
+    assert await _ledger(session) == incremental
+    assert incremental[1][0] == date(2026, 3, 3)
+
+
+def test_ledger_writes_lock_each_user_in_order():
+    executed = []
+    connection = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        execute=lambda statement, params=None: executed.append((str(statement), params)),
+    )
+    rows = [
+        {"user_id": user_id, "transaction_date": datetime(2026, 3, 2, tzinfo=timezone.utc),
+         "type": "revenue", "amount": "10", "status": "paid"}
+        for user_id in (7, 3, 7)
+    ]
+    apply_ledger_deltas(connection, ledger_deltas_for_rows(rows))
+
+    locks = [params for statement, params in executed if "pg_advisory_xact_lock" in statement]
+    assert locks == [{"user_id": 3}, {"user_id": 7}]
+    # Before any ledger row is read or written
+    assert all("pg_advisory_xact_lock" in statement for statement, _ in executed[:2])